@@ -0,0 +1,94 @@
+// SPDX-License-Identifier: UNLICENSED
+pragma solidity 0.8.12;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+
+
+/**
+    @title Cumulative Merkle Distributor
+    @notice Multi-round variant of `MerkleDistributor`
+    @dev Each round the updater posts a new root committing to the lifetime total of
+         every account. A claim transfers the difference between that total and the amount
+         already claimed, so any number of rounds are collected with one proof. Tokens are
+         paid from the balance of this contract, which must be funded before each round.
+         The balance also bounds the amount that can be paid out with a faulty root.
+ */
+contract CumulativeMerkleDistributor is Ownable {
+    using SafeERC20 for IERC20;
+
+    bytes32 public root;
+    uint256 public round;
+    address public updater;
+    IERC20 public immutable token;
+
+    // total amount claimed by all accounts
+    uint256 public totalClaimed;
+
+    // account -> total amount claimed across all rounds
+    mapping(address => uint256) public claimed;
+
+    event RootUpdated(bytes32 root, uint256 round);
+    event Claimed(
+        address indexed account,
+        address indexed receiver,
+        uint256 amount,
+        uint256 totalClaimed
+    );
+
+    constructor(IERC20 _token, address _updater) {
+        token = _token;
+        updater = _updater;
+    }
+
+    function setUpdater(address _updater) external onlyOwner {
+        updater = _updater;
+    }
+
+    /**
+        @notice Post the root for a new round
+        @dev The root is a merkle tree of (account, total amount) where the total
+             includes every round so far. Totals must never decrease.
+     */
+    function setRoot(bytes32 _root) external {
+        require(msg.sender == updater, "Only updater");
+        root = _root;
+        round += 1;
+        emit RootUpdated(_root, round);
+    }
+
+    /**
+        @notice Claim all unclaimed tokens up to the latest round
+        @param _cumulativeAmount Lifetime total of the caller, as committed to in `root`
+        @param _receiver Address to transfer the claimed tokens to
+        @param _merkleProof Merkle proof for (caller, `_cumulativeAmount`)
+        @return amount Amount transferred
+     */
+    function claim(
+        uint256 _cumulativeAmount,
+        address _receiver,
+        bytes32[] calldata _merkleProof
+    ) external returns (uint256 amount) {
+        require(root != 0x00, "Root not set");
+
+        // Verify the merkle proof.
+        bytes32 node = keccak256(abi.encodePacked(msg.sender, _cumulativeAmount));
+        require(MerkleProof.verify(_merkleProof, root, node), "Invalid proof");
+
+        uint256 previous = claimed[msg.sender];
+        require(_cumulativeAmount > previous, "Nothing to claim");
+        amount = _cumulativeAmount - previous;
+
+        require(token.balanceOf(address(this)) >= amount, "Insufficient balance");
+
+        claimed[msg.sender] = _cumulativeAmount;
+        totalClaimed += amount;
+        token.safeTransfer(_receiver, amount);
+
+        emit Claimed(msg.sender, _receiver, amount, totalClaimed);
+        return amount;
+    }
+
+}
@@ -0,0 +1,184 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.12;
+
+
+interface ITokenLocker {
+    function userWeight(address _user) external view returns (uint256);
+    function totalWeight() external view returns (uint256);
+    function userBalance(address _user) external view returns (uint256);
+    function streamableBalance(address _user) external view returns (uint256);
+    function claimableExitStreamBalance(address _user) external view returns (uint256);
+    function getActiveUserLocks(address _user) external view returns (uint256[2][] memory);
+}
+
+interface IIncentiveVoting {
+    function availableVotes(address _user) external view returns (uint256);
+}
+
+interface ILpStaking {
+    function poolLength() external view returns (uint256);
+    function registeredTokens(uint256 _index) external view returns (address);
+    function userInfo(address _token, address _user)
+        external
+        view
+        returns (uint256, uint256, uint256, uint256, uint128, uint64, uint64);
+    function adjustedBalance(address _token, address _user) external view returns (uint256);
+    function claimableReward(address _user, address[] calldata _tokens) external view returns (uint256[] memory);
+}
+
+interface IFeeDistributor {
+    function feeTokensLength() external view returns (uint256);
+    function feeTokens(uint256 _index) external view returns (address);
+    function claimable(address _user, address[] calldata _tokens) external view returns (uint256[] memory);
+}
+
+
+/**
+    @title Ellipsis Lens
+    @notice Read-only aggregation of a user's complete position across
+            `TokenLocker`, `IncentiveVoting`, `EllipsisLpStaking` and `FeeDistributor`
+    @dev Intended to be queried via `eth_call`. Python bindings are in `scripts/lens.py`.
+ */
+contract EllipsisLens {
+
+    struct LockPosition {
+        uint256 weight;
+        uint256 totalWeight;
+        uint256 balance;                // total balance held in `TokenLocker`, active and expired
+        uint256 streamable;             // expired balance that can be added to an exit stream
+        uint256 claimableExitStream;    // balance withdrawable from the active exit stream
+        uint256[2][] activeLocks;       // [weeks until expiration, balance of lock]
+    }
+
+    struct PoolPosition {
+        address token;
+        uint256 depositAmount;
+        uint256 adjustedAmount;
+        uint256 claimableReward;
+    }
+
+    struct FeePosition {
+        address token;
+        uint256 claimable;
+    }
+
+    struct UserPosition {
+        address user;
+        LockPosition lock;
+        uint256 availableVotes;
+        PoolPosition[] pools;
+        FeePosition[] fees;
+    }
+
+    ITokenLocker public immutable tokenLocker;
+    IIncentiveVoting public immutable incentiveVoting;
+    ILpStaking public immutable lpStaking;
+    IFeeDistributor public immutable feeDistributor;
+
+    constructor(
+        ITokenLocker _tokenLocker,
+        IIncentiveVoting _incentiveVoting,
+        ILpStaking _lpStaking,
+        IFeeDistributor _feeDistributor
+    ) {
+        tokenLocker = _tokenLocker;
+        incentiveVoting = _incentiveVoting;
+        lpStaking = _lpStaking;
+        feeDistributor = _feeDistributor;
+    }
+
+    /**
+        @notice Get the complete position of a single user
+        @param _user Address to query
+        @param _lpTokens LP tokens to include. If empty, all tokens registered
+                         in `EllipsisLpStaking` are included.
+        @param _feeTokens Fee tokens to include. If empty, all fee tokens
+                          within `FeeDistributor` are included.
+     */
+    function getUserPosition(
+        address _user,
+        address[] memory _lpTokens,
+        address[] memory _feeTokens
+    ) external view returns (UserPosition memory) {
+        return _getUserPosition(_user, _getLpTokens(_lpTokens), _getFeeTokens(_feeTokens));
+    }
+
+    /**
+        @notice Get the complete positions of many users
+        @dev Token lists are resolved once and shared by all users
+     */
+    function getUserPositions(
+        address[] calldata _users,
+        address[] memory _lpTokens,
+        address[] memory _feeTokens
+    ) external view returns (UserPosition[] memory positions) {
+        _lpTokens = _getLpTokens(_lpTokens);
+        _feeTokens = _getFeeTokens(_feeTokens);
+        positions = new UserPosition[](_users.length);
+        for (uint256 i = 0; i < _users.length; i++) {
+            positions[i] = _getUserPosition(_users[i], _lpTokens, _feeTokens);
+        }
+        return positions;
+    }
+
+    function _getLpTokens(address[] memory _tokens) internal view returns (address[] memory) {
+        if (_tokens.length > 0) return _tokens;
+        uint256 length = lpStaking.poolLength();
+        _tokens = new address[](length);
+        for (uint256 i = 0; i < length; i++) {
+            _tokens[i] = lpStaking.registeredTokens(i);
+        }
+        return _tokens;
+    }
+
+    function _getFeeTokens(address[] memory _tokens) internal view returns (address[] memory) {
+        if (_tokens.length > 0) return _tokens;
+        uint256 length = feeDistributor.feeTokensLength();
+        _tokens = new address[](length);
+        for (uint256 i = 0; i < length; i++) {
+            _tokens[i] = feeDistributor.feeTokens(i);
+        }
+        return _tokens;
+    }
+
+    function _getUserPosition(
+        address _user,
+        address[] memory _lpTokens,
+        address[] memory _feeTokens
+    ) internal view returns (UserPosition memory position) {
+        position.user = _user;
+        position.lock = LockPosition({
+            weight: tokenLocker.userWeight(_user),
+            totalWeight: tokenLocker.totalWeight(),
+            balance: tokenLocker.userBalance(_user),
+            streamable: tokenLocker.streamableBalance(_user),
+            claimableExitStream: tokenLocker.claimableExitStreamBalance(_user),
+            activeLocks: tokenLocker.getActiveUserLocks(_user)
+        });
+        position.availableVotes = incentiveVoting.availableVotes(_user);
+
+        position.pools = new PoolPosition[](_lpTokens.length);
+        if (_lpTokens.length > 0) {
+            uint256[] memory rewards = lpStaking.claimableReward(_user, _lpTokens);
+            for (uint256 i = 0; i < _lpTokens.length; i++) {
+                (uint256 depositAmount,,,,,,) = lpStaking.userInfo(_lpTokens[i], _user);
+                position.pools[i] = PoolPosition({
+                    token: _lpTokens[i],
+                    depositAmount: depositAmount,
+                    adjustedAmount: lpStaking.adjustedBalance(_lpTokens[i], _user),
+                    claimableReward: rewards[i]
+                });
+            }
+        }
+
+        position.fees = new FeePosition[](_feeTokens.length);
+        if (_feeTokens.length > 0) {
+            uint256[] memory amounts = feeDistributor.claimable(_user, _feeTokens);
+            for (uint256 i = 0; i < _feeTokens.length; i++) {
+                position.fees[i] = FeePosition({token: _feeTokens[i], claimable: amounts[i]});
+            }
+        }
+        return position;
+    }
+
+}
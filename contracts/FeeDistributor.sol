@@ -1,16 +1,20 @@
 pragma solidity 0.8.12;
 
+import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
 import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 
 
 interface ITokenLocker {
     function getWeek() external view returns (uint256);
     function weeklyWeight(address user, uint256 week) external view returns (uint256, uint256);
+    function weeklyWeightOf(address user, uint256 week) external view returns (uint256);
+    function weeklyTotalWeight(uint256 week) external view returns (uint256);
     function startTime() external view returns (uint256);
 }
 
-contract FeeDistributor {
+contract FeeDistributor is Ownable {
     using SafeERC20 for IERC20;
 
     struct StreamData {
@@ -19,6 +23,16 @@ contract FeeDistributor {
         uint256 claimed;
     }
 
+    // weekly values read once for all users within `claimMany`. Each array is
+    // indexed by the number of weeks since `firstWeek`.
+    struct BatchData {
+        uint256 firstWeek;
+        uint256 claimableWeek;
+        uint256[] totalWeights;
+        uint256[][] feeAmounts; // fee token index -> week
+        uint256[] userWeights;  // overwritten for each user
+    }
+
     // Fees are transferred into this contract as they are collected, and in the same tokens
     // that they are collected in. The total amount collected each week is recorded in
     // `weeklyFeeAmounts`. At the end of a week, the fee amounts are streamed out over
@@ -28,13 +42,33 @@ contract FeeDistributor {
     // fee token -> week -> total amount received that week
     mapping(address => mapping(uint256 => uint256)) public weeklyFeeAmounts;
     // user -> fee token -> data about the active stream
-    mapping(address => mapping(address => StreamData)) activeUserStream;
+    mapping(address => mapping(address => StreamData)) public activeUserStream;
 
     // array of all fee tokens that have been added
     address[] public feeTokens;
     // private mapping for tracking which addresses were added to `feeTokens`
     mapping(address => bool) seenFees;
 
+    // fee token -> balance of the token that has already been credited to a week
+    // and not yet claimed. Any balance above this amount was transferred in directly
+    // and is credited to the current week by `checkpointFees`.
+    mapping(address => uint256) public trackedBalance;
+
+    // user -> fee token -> total amount claimed via `claim` and `claimSettled`
+    mapping(address => mapping(address => uint256)) public totalClaimed;
+
+    // user -> latest week reached by a claim made by the user themselves. Fees for
+    // weeks prior to this have been claimed for every token included in that claim.
+    // Used by `TokenLocker` to determine which past lock weights the user may delete.
+    mapping(address => uint256) public claimedUntil;
+
+    // Optional settlement of past weeks. `settlementRoot` is a merkle root of
+    // (user, fee token, cumulative amount), where the cumulative amount is the user's
+    // full entitlement for all weeks prior to `settlementWeek`. It is computed off-chain
+    // by `scripts/fee_settlement.py` and allows a claim without iterating over weeks.
+    bytes32 public settlementRoot;
+    uint256 public settlementWeek;
+
     // account earning rewards => receiver of rewards for this account
     // if receiver is set to address(0), rewards are paid to the earner
     // this is used to aid 3rd party contract integrations
@@ -61,6 +95,7 @@ contract FeeDistributor {
         address indexed token,
         uint256 amount
     );
+    event SettlementRootSet(bytes32 root, uint256 week);
 
     constructor(ITokenLocker _tokenLocker) {
         tokenLocker = _tokenLocker;
@@ -76,6 +111,22 @@ contract FeeDistributor {
         blockThirdPartyActions[msg.sender] = _block;
     }
 
+    /**
+        @notice Set the merkle root of cumulative fee entitlements
+        @dev Weeks prior to `_week` must have been fully released by `claim`, so
+             `_week` may be at most `getWeek() - 1`. The root is trusted: it can be
+             checked against chain state with `scripts/fee_settlement.py`.
+        @param _root Merkle root of (user, fee token, cumulative amount)
+        @param _week Entitlements include all weeks prior to this week
+     */
+    function setSettlementRoot(bytes32 _root, uint256 _week) external onlyOwner {
+        require(_week < getWeek(), "Week not yet released");
+        require(_week >= settlementWeek, "Cannot decrease week");
+        settlementRoot = _root;
+        settlementWeek = _week;
+        emit SettlementRootSet(_root, _week);
+    }
+
     function getWeek() public view returns (uint256) {
         if (startTime == 0) return 0;
         return (block.timestamp - startTime) / 604800;
@@ -96,20 +147,52 @@ contract FeeDistributor {
         returns (bool)
     {
         if (_amount > 0) {
-            if (!seenFees[_token]) {
-                seenFees[_token] = true;
-                feeTokens.push(_token);
-            }
             uint256 received = IERC20(_token).balanceOf(address(this));
             IERC20(_token).safeTransferFrom(msg.sender, address(this), _amount);
             received = IERC20(_token).balanceOf(address(this)) - received;
-            uint256 week = getWeek();
-            weeklyFeeAmounts[_token][week] += received;
-            emit FeesReceived(msg.sender, _token, week, _amount);
+            trackedBalance[_token] += received;
+            _addFees(_token, received);
         }
         return true;
     }
 
+    /**
+        @notice Credit fees transferred directly into the contract to the current week
+        @dev Pools send admin fees straight to the fee receiver without calling
+             `depositFee`. Any balance above `trackedBalance` is treated as newly
+             received fees. Fees pushed in a previous week are credited to the
+             week in which this function is called.
+        @param _tokens Array of tokens to checkpoint
+        @return amounts Array of amounts credited for each token
+     */
+    function checkpointFees(address[] calldata _tokens)
+        external
+        returns (uint256[] memory amounts)
+    {
+        amounts = new uint256[](_tokens.length);
+        for (uint256 i = 0; i < _tokens.length; i++) {
+            address token = _tokens[i];
+            uint256 balance = IERC20(token).balanceOf(address(this));
+            uint256 amount = balance - trackedBalance[token];
+            if (amount > 0) {
+                trackedBalance[token] = balance;
+                _addFees(token, amount);
+                amounts[i] = amount;
+            }
+        }
+        return amounts;
+    }
+
+    function _addFees(address _token, uint256 _amount) internal {
+        if (!seenFees[_token]) {
+            seenFees[_token] = true;
+            feeTokens.push(_token);
+        }
+        uint256 week = getWeek();
+        weeklyFeeAmounts[_token][week] += _amount;
+        emit FeesReceived(msg.sender, _token, week, _amount);
+    }
+
     /**
         @notice Get an array of claimable amounts of different tokens accrued from protocol fees
         @param _user Address to query claimable amounts for
@@ -150,12 +233,240 @@ contract FeeDistributor {
             address token = _tokens[i];
             (claimedAmounts[i], stream) = _getClaimable(_user, token);
             activeUserStream[_user][token] = stream;
+            trackedBalance[token] -= claimedAmounts[i];
+            totalClaimed[_user][token] += claimedAmounts[i];
             IERC20(token).safeTransfer(receiver, claimedAmounts[i]);
             emit FeesClaimed(msg.sender, _user, receiver, token, claimedAmounts[i]);
         }
+        if (_tokens.length > 0) _setClaimedUntil(_user, _lastClaimWeek(stream.start));
         return claimedAmounts;
     }
 
+    /**
+        @notice Claim accrued protocol fees for many users at once
+        @dev Intended for integrations that claim on behalf of many accounts. Weekly fee
+             amounts and total weights are read once for the whole batch, and each user's
+             lock weights once for all tokens. Third-party restrictions and claim
+             receivers apply in the same way as `claim`.
+        @param _users Array of addresses to claim for.
+        @param _tokens Array of tokens to claim for each user.
+        @return claimedAmounts Amounts claimed, indexed by user and then by token.
+     */
+    function claimMany(address[] calldata _users, address[] calldata _tokens)
+        external
+        returns (uint256[][] memory claimedAmounts)
+    {
+        claimedAmounts = new uint256[][](_users.length);
+        for (uint256 i = 0; i < _users.length; i++) {
+            claimedAmounts[i] = new uint256[](_tokens.length);
+        }
+        uint256 claimableWeek = getWeek();
+        if (claimableWeek == 0) {
+            // the first full week hasn't completed yet
+            for (uint256 i = 0; i < _users.length; i++) {
+                _claimFirstWeek(_users[i], _tokens);
+            }
+            return claimedAmounts;
+        }
+        claimableWeek -= 1;
+
+        // find the earliest week that any stream in the batch must be read from
+        uint256 firstWeek = claimableWeek;
+        for (uint256 i = 0; i < _users.length; i++) {
+            for (uint256 x = 0; x < _tokens.length; x++) {
+                uint256 week = _lastClaimWeek(activeUserStream[_users[i]][_tokens[x]].start);
+                if (week < firstWeek) firstWeek = week;
+            }
+        }
+
+        BatchData memory data = _readBatchData(_tokens, firstWeek, claimableWeek);
+        for (uint256 i = 0; i < _users.length; i++) {
+            _claimFromBatch(_users[i], _tokens, data, claimedAmounts[i]);
+        }
+        return claimedAmounts;
+    }
+
+    // Equivalent to `claim` prior to the end of the first week, when nothing is claimable
+    function _claimFirstWeek(address _user, address[] calldata _tokens) internal {
+        if (msg.sender != _user) {
+            require(!blockThirdPartyActions[_user], "Cannot claim on behalf of this account");
+        }
+        address receiver = claimReceiver[_user];
+        if (receiver == address(0)) receiver = _user;
+        for (uint256 x = 0; x < _tokens.length; x++) {
+            address token = _tokens[x];
+            activeUserStream[_user][token] = StreamData({start: startTime, amount: 0, claimed: 0});
+            IERC20(token).safeTransfer(receiver, 0);
+            emit FeesClaimed(msg.sender, _user, receiver, token, 0);
+        }
+    }
+
+    function _readBatchData(address[] calldata _tokens, uint256 _firstWeek, uint256 _claimableWeek)
+        internal
+        view
+        returns (BatchData memory data)
+    {
+        uint256 length = _claimableWeek - _firstWeek + 1;
+        data.firstWeek = _firstWeek;
+        data.claimableWeek = _claimableWeek;
+        data.totalWeights = new uint256[](length);
+        data.userWeights = new uint256[](length);
+        data.feeAmounts = new uint256[][](_tokens.length);
+        for (uint256 i = 0; i < length; i++) {
+            data.totalWeights[i] = tokenLocker.weeklyTotalWeight(_firstWeek + i);
+        }
+        for (uint256 x = 0; x < _tokens.length; x++) {
+            uint256[] memory amounts = new uint256[](length);
+            for (uint256 i = 0; i < length; i++) {
+                amounts[i] = weeklyFeeAmounts[_tokens[x]][_firstWeek + i];
+            }
+            data.feeAmounts[x] = amounts;
+        }
+        return data;
+    }
+
+    function _claimFromBatch(
+        address _user,
+        address[] calldata _tokens,
+        BatchData memory _data,
+        uint256[] memory _claimedAmounts
+    ) internal {
+        if (msg.sender != _user) {
+            require(!blockThirdPartyActions[_user], "Cannot claim on behalf of this account");
+        }
+        address receiver = claimReceiver[_user];
+        if (receiver == address(0)) receiver = _user;
+
+        // read the user's lock weights from the earliest week of any of their streams
+        uint256 week = _data.claimableWeek;
+        for (uint256 x = 0; x < _tokens.length; x++) {
+            uint256 lastClaimWeek = _lastClaimWeek(activeUserStream[_user][_tokens[x]].start);
+            if (lastClaimWeek < week) week = lastClaimWeek;
+        }
+        for (; week <= _data.claimableWeek; week++) {
+            _data.userWeights[week - _data.firstWeek] = tokenLocker.weeklyWeightOf(_user, week);
+        }
+
+        for (uint256 x = 0; x < _tokens.length; x++) {
+            address token = _tokens[x];
+            StreamData memory stream;
+            (_claimedAmounts[x], stream) = _getClaimableFromBatch(
+                activeUserStream[_user][token],
+                _data,
+                x
+            );
+            activeUserStream[_user][token] = stream;
+            trackedBalance[token] -= _claimedAmounts[x];
+            totalClaimed[_user][token] += _claimedAmounts[x];
+            IERC20(token).safeTransfer(receiver, _claimedAmounts[x]);
+            emit FeesClaimed(msg.sender, _user, receiver, token, _claimedAmounts[x]);
+        }
+        if (_tokens.length > 0) _setClaimedUntil(_user, _data.claimableWeek);
+    }
+
+    // Equivalent to `_getClaimable`, using the weekly values in `_data`
+    function _getClaimableFromBatch(
+        StreamData memory _stream,
+        BatchData memory _data,
+        uint256 _tokenIndex
+    ) internal view returns (uint256 amount, StreamData memory stream) {
+        uint256 claimableWeek = _data.claimableWeek;
+        uint256 lastClaimWeek = _lastClaimWeek(_stream.start);
+        uint256[] memory feeAmounts = _data.feeAmounts[_tokenIndex];
+
+        if (claimableWeek == lastClaimWeek) {
+            // special case: claim is happening in the same week as a previous claim
+            stream = _buildStreamFromBatch(_data, feeAmounts);
+            return (stream.claimed - _stream.claimed, stream);
+        }
+
+        if (_stream.start > 0) {
+            amount = _stream.amount - _stream.claimed;
+            lastClaimWeek += 1;
+        }
+
+        uint256 end = claimableWeek - _data.firstWeek;
+        for (uint256 i = lastClaimWeek - _data.firstWeek; i < end; i++) {
+            uint256 userWeight = _data.userWeights[i];
+            if (userWeight == 0) continue;
+            amount += feeAmounts[i] * userWeight / _data.totalWeights[i];
+        }
+
+        stream = _buildStreamFromBatch(_data, feeAmounts);
+        return (amount + stream.claimed, stream);
+    }
+
+    function _buildStreamFromBatch(BatchData memory _data, uint256[] memory _feeAmounts)
+        internal
+        view
+        returns (StreamData memory)
+    {
+        uint256 i = _data.claimableWeek - _data.firstWeek;
+        uint256 amount;
+        if (_data.userWeights[i] > 0) {
+            amount = _feeAmounts[i] * _data.userWeights[i] / _data.totalWeights[i];
+        }
+        return _streamData(_data.claimableWeek, amount);
+    }
+
+    /**
+        @notice Claim fees for all weeks prior to `settlementWeek` using a merkle proof
+        @dev Pays the difference between `_cumulativeAmount` and the amount already
+             claimed, with a single proof and transfer regardless of how many weeks
+             have passed. Afterwards `claim` continues from `settlementWeek`. Reverts
+             if `claim` has already been used for `settlementWeek` or later, or if the
+             root commits to less than the amount already claimed.
+        @param _user Address to claim for. Any account can trigger a claim for any other account.
+        @param _token Fee token to claim
+        @param _cumulativeAmount Total entitlement of `_user` for `_token`, as committed to in the root
+        @param _proof Merkle proof for (`_user`, `_token`, `_cumulativeAmount`)
+        @return amount Amount claimed
+     */
+    function claimSettled(
+        address _user,
+        address _token,
+        uint256 _cumulativeAmount,
+        bytes32[] calldata _proof
+    ) external returns (uint256 amount) {
+        if (msg.sender != _user) {
+            require(!blockThirdPartyActions[_user], "Cannot claim on behalf of this account");
+        }
+        uint256 week = settlementWeek;
+        require(week > 0, "Root not set");
+        bytes32 node = keccak256(abi.encodePacked(_user, _token, _cumulativeAmount));
+        require(MerkleProof.verify(_proof, settlementRoot, node), "Invalid proof");
+
+        uint256 start = activeUserStream[_user][_token].start;
+        require(start == 0 || (start - startTime) / WEEK < week, "Already claimed past root");
+
+        // every amount claimed so far is for a week prior to `week`
+        uint256 claimed = totalClaimed[_user][_token];
+        require(_cumulativeAmount >= claimed, "Root below claimed amount");
+        amount = _cumulativeAmount - claimed;
+        totalClaimed[_user][_token] = _cumulativeAmount;
+        // mark the week prior to `week` as fully claimed
+        activeUserStream[_user][_token] = StreamData({
+            start: startTime + (week - 1) * WEEK,
+            amount: 0,
+            claimed: 0
+        });
+        trackedBalance[_token] -= amount;
+        _setClaimedUntil(_user, week - 1);
+
+        address receiver = claimReceiver[_user];
+        if (receiver == address(0)) receiver = _user;
+        IERC20(_token).safeTransfer(receiver, amount);
+        emit FeesClaimed(msg.sender, _user, receiver, _token, amount);
+        return amount;
+    }
+
+    // Record the week reached by a claim, when made by the user themselves. Claims made
+    // by others are ignored, so that they cannot choose which fees a user forfeits by
+    // deleting their lock weights.
+    function _setClaimedUntil(address _user, uint256 _week) internal {
+        if (msg.sender == _user && _week > claimedUntil[_user]) claimedUntil[_user] = _week;
+    }
+
     function _getClaimable(address _user, address _token)
         internal
         view
@@ -171,12 +482,7 @@ contract FeeDistributor {
         // the previous week is the claimable one
         claimableWeek -= 1;
         StreamData memory stream = activeUserStream[_user][_token];
-        uint256 lastClaimWeek;
-        if (stream.start == 0) {
-            lastClaimWeek = 0;
-        } else {
-            lastClaimWeek = (stream.start - startTime) / WEEK;
-        }
+        uint256 lastClaimWeek = _lastClaimWeek(stream.start);
 
         uint256 amount;
         if (claimableWeek == lastClaimWeek) {
@@ -212,14 +518,24 @@ contract FeeDistributor {
         address _token,
         uint256 _week
     ) internal view returns (StreamData memory) {
-        uint256 start = startTime + _week * WEEK;
         (uint256 userWeight, uint256 totalWeight) = tokenLocker.weeklyWeight(_user, _week);
         uint256 amount;
-        uint256 claimed;
         if (userWeight > 0) {
             amount = weeklyFeeAmounts[_token][_week] * userWeight / totalWeight;
-            claimed = amount * (block.timestamp - 604800 - start) / WEEK;
         }
-        return StreamData({start: start, amount: amount, claimed: claimed});
+        return _streamData(_week, amount);
+    }
+
+    // Stream of `_amount` over the week following `_week`
+    function _streamData(uint256 _week, uint256 _amount) internal view returns (StreamData memory) {
+        uint256 start = startTime + _week * WEEK;
+        uint256 claimed = _amount * (block.timestamp - 604800 - start) / WEEK;
+        return StreamData({start: start, amount: _amount, claimed: claimed});
+    }
+
+    // First week of a stream that may not be fully claimed
+    function _lastClaimWeek(uint256 _streamStart) internal view returns (uint256) {
+        if (_streamStart == 0) return 0;
+        return (_streamStart - startTime) / WEEK;
     }
 }
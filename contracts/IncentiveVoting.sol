@@ -2,11 +2,13 @@ pragma solidity 0.8.12;
 
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+import "@openzeppelin/contracts/utils/cryptography/draft-EIP712.sol";
 
 
 interface ITokenLocker {
 
-    function userWeight(address _user) external view returns (uint256);
+    function userVoteWeight(address _user) external view returns (uint256);
     function weeklyTotalWeight(uint256 _week) external view returns (uint256);
     function weeklyWeightOf(address _user, uint256 _week)
         external
@@ -16,7 +18,7 @@ interface ITokenLocker {
 }
 
 interface ILpStaking {
-    function poolInfo(address _pool) external view returns (uint256, uint256, uint256, uint256);
+    function poolInfo(address _pool) external view returns (uint256, uint256, uint256, uint256, uint256, uint256);
     function addPool(address _token) external returns (bool);
 }
 
@@ -29,31 +31,46 @@ interface IERC20Mintable {
 }
 
 
-contract IncentiveVoting is Ownable {
+contract IncentiveVoting is Ownable, EIP712 {
 
     struct TokenApprovalVote {
         address token;
         uint40 startTime;
         uint16 week;
-        uint256 requiredVotes;
-        uint256 givenVotes;
+        uint128 requiredVotes;
+        uint128 givenVotes;
     }
     struct Vote {
         address token;
         uint256 votes;
     }
+    struct TokenData {
+        address token;
+        bool isApproved;
+    }
+    struct SignedVote {
+        address voter;
+        uint256 nonce;
+        uint256[] packedVotes;
+        bytes signature;
+    }
+
+    // Vote amounts are bounded by `tokenLocker.userVoteWeight / 1e18`, which never exceeds
+    // the total lock weight, so weekly vote records are stored as uint128 to pack two
+    // consecutive weeks into each slot. A user voting in consecutive weeks only initializes
+    // a new slot every other week.
 
     // token -> week -> votes received
-    mapping(address => uint256[65535]) public tokenVotes;
+    mapping(address => uint128[65535]) public tokenVotes;
 
     // user -> week -> votes used
-    mapping(address => uint256[65535]) public userVotes;
+    mapping(address => uint128[65535]) public userVotes;
 
     // user -> token -> week -> votes for pool
-    mapping(address => mapping(address => uint256[65535])) public userTokenVotes;
+    mapping(address => mapping(address => uint128[65535])) public userTokenVotes;
 
     // week -> total votes used
-    uint256[65535] public totalVotes;
+    uint128[65535] public totalVotes;
 
     // data about token approval votes
     TokenApprovalVote[] public tokenApprovalVotes;
@@ -72,12 +89,30 @@ contract IncentiveVoting is Ownable {
     uint256 constant WEEK = 86400 * 7;
     uint256 public startTime;
 
+    bytes32 constant VOTE_TYPEHASH = keccak256(
+        "Vote(address voter,uint256 week,uint256 nonce,uint256[] packedVotes)"
+    );
+
+    // user -> nonce required for the next signed vote given to `submitVotes`
+    mapping(address => uint256) public nonces;
+
+    // layout of each (token ID, votes) pair within the words given to `votePacked`
+    uint256 constant PACKED_PAIR_BITS = 64;
+    uint256 constant PACKED_VOTE_BITS = 48;
+    uint256 constant PACKED_VOTE_MASK = 2**48 - 1;
+    uint256 constant PACKED_ID_MASK = 2**16 - 1;
+
     ITokenLocker public tokenLocker;
     ILpStaking public lpStaking;
 
     mapping(address => bool) public isApproved;
     address[] public approvedTokens;
 
+    // token ID -> token address and approval status. The ID of each token is its index
+    // within `approvedTokens`. Both values share a slot so that `votePacked` can load
+    // them with a single read.
+    TokenData[] tokenData;
+
     // The amount of EPX tokens minted each second in a given period.
     // Each item represents a 4 week epoch. New values are pushed onto
     // the array over time as users call `vote`.
@@ -112,6 +147,23 @@ contract IncentiveVoting is Ownable {
         uint256 totalUserVotes
     );
 
+    event VotedForIncentivesPacked(
+        address indexed voter,
+        uint256[] packedVotes,
+        uint256 userVotesUsed,
+        uint256 totalUserVotes
+    );
+
+    event TokenApproved(
+        address indexed token,
+        uint256 tokenId
+    );
+
+    event SignedVoteRejected(
+        address indexed voter,
+        uint256 nonce
+    );
+
     event PendingApprovalQuorumSet(
         address caller,
         uint256 quorumPct,
@@ -129,7 +181,7 @@ contract IncentiveVoting is Ownable {
         uint256 _initialRewardsPerSecond,
         uint256 _quorumPct,
         uint256 _tokenApprovalMinWeight
-    ) {
+    ) EIP712("Ellipsis IncentiveVoting", "1") {
         require(_tokenApprovalMinWeight > 1e18, "Incorrect precision!");
 
         tokenApprovalQuorumPct = _quorumPct;
@@ -144,10 +196,7 @@ contract IncentiveVoting is Ownable {
         require(address(lpStaking) == address(0));
         lpStaking = _lpStaking;
         for (uint i = 0; i < _initialApprovedTokens.length; i++) {
-            address token = _initialApprovedTokens[i];
-            isApproved[token] = true;
-            approvedTokens.push(token);
-            _lpStaking.addPool(token);
+            _approveToken(_initialApprovedTokens[i]);
         }
     }
 
@@ -159,6 +208,13 @@ contract IncentiveVoting is Ownable {
         return approvedTokens.length;
     }
 
+    /**
+        @notice EIP-712 domain separator for signed votes
+     */
+    function DOMAIN_SEPARATOR() external view returns (bytes32) {
+        return _domainSeparatorV4();
+    }
+
     function getWeek() public view returns (uint256) {
         if (startTime >= block.timestamp) return 0;
         return (block.timestamp - startTime) / 604800;
@@ -205,7 +261,7 @@ contract IncentiveVoting is Ownable {
     function availableVotes(address _user) external view returns (uint256) {
         uint256 week = getWeek();
         uint256 usedVotes = userVotes[_user][week];
-        uint256 totalVotes = tokenLocker.userWeight(_user) / 1e18;
+        uint256 totalVotes = tokenLocker.userVoteWeight(_user) / 1e18;
         return totalVotes - usedVotes;
     }
 
@@ -213,7 +269,9 @@ contract IncentiveVoting is Ownable {
         @notice Allocate votes toward LP tokens to receive emissions in the following week
         @dev A user may vote as many times as they like within a week, so long as their total
              available votes are not exceeded. If they receive additional votes by locking more
-             tokens within `tokenLocker`, they can vote immediately.
+             tokens within `tokenLocker`, they can vote immediately. An account that has been
+             delegated weight via `tokenLocker.setDelegate` votes with the combined weight of
+             its delegators, and an account that has delegated cannot vote.
 
              Votes can only be added - not modified or removed. Votes only apply to the
              following week - they do not carry over. A user must resubmit their vote each
@@ -226,45 +284,238 @@ contract IncentiveVoting is Ownable {
      */
     function vote(address[] calldata _tokens, uint256[] calldata _votes) external {
         require(_tokens.length == _votes.length, "Input length mismatch");
-
-        // update rewards per second, if required
-        uint256 week = getWeek();
-        uint256 length = rewardsPerSecond.length;
-        if (length <= week / 4) {
-            uint256 perSecond = rewardsPerSecond[length-1];
-            while (length <= week / 4) {
-                perSecond = perSecond * 99 / 100;
-                length += 1;
-                rewardsPerSecond.push(perSecond);
-            }
-        }
+        uint256 week = _updateRewardsPerSecond();
 
         // update accounting for this week's votes
-        uint256 usedVotes = userVotes[msg.sender][week];
+        uint256 newVotes;
         for (uint i = 0; i < _tokens.length; i++) {
             address token = _tokens[i];
             uint256 amount = _votes[i];
             require(isApproved[token], "Not approved for incentives");
-            tokenVotes[token][week] += amount;
-            totalVotes[week] += amount;
-            userTokenVotes[msg.sender][token][week] += amount;
-            usedVotes += amount;
+            _addTokenVotes(token, week, amount);
+            newVotes += amount;
         }
-
-        // make sure user has not exceeded available votes
-        uint256 totalVotes = tokenLocker.userWeight(msg.sender) / 1e18;
-        require(usedVotes <= totalVotes, "Available votes exceeded");
-        userVotes[msg.sender][week] = usedVotes;
+        (uint256 usedVotes, uint256 totalUserVotes) = _addUserVotes(week, newVotes);
 
         emit VotedForIncentives(
             msg.sender,
             _tokens,
             _votes,
             usedVotes,
-            totalVotes
+            totalUserVotes
+        );
+    }
+
+    /**
+        @notice Allocate votes toward LP tokens, referenced by token ID
+        @dev Identical to `vote`, with a more compact encoding to reduce calldata and
+             log costs when voting for many tokens. The ID of each token is its index
+             within `approvedTokens`, as given in `TokenApproved`.
+
+             Each word in `_packedVotes` holds up to four 64 bit (token ID, votes) pairs,
+             starting from the least significant bits. Within each pair, the upper 16
+             bits are the token ID and the lower 48 bits are the number of votes. Pairs
+             with zero votes are ignored and may be used as padding.
+        @param _packedVotes Packed (token ID, votes) pairs
+     */
+    function votePacked(uint256[] calldata _packedVotes) external {
+        uint256 week = _updateRewardsPerSecond();
+        uint256 length = tokenData.length;
+
+        // update accounting for this week's votes
+        uint256 newVotes;
+        for (uint i = 0; i < _packedVotes.length; i++) {
+            uint256 packed = _packedVotes[i];
+            while (packed > 0) {
+                uint256 amount = packed & PACKED_VOTE_MASK;
+                uint256 tokenId = (packed >> PACKED_VOTE_BITS) & PACKED_ID_MASK;
+                packed >>= PACKED_PAIR_BITS;
+                if (amount == 0) continue;
+
+                require(tokenId < length, "Invalid token ID");
+                TokenData memory data = tokenData[tokenId];
+                require(data.isApproved, "Not approved for incentives");
+                _addTokenVotes(data.token, week, amount);
+                newVotes += amount;
+            }
+        }
+        (uint256 usedVotes, uint256 totalUserVotes) = _addUserVotes(week, newVotes);
+
+        emit VotedForIncentivesPacked(
+            msg.sender,
+            _packedVotes,
+            usedVotes,
+            totalUserVotes
         );
     }
 
+    /**
+        @notice Submit signed votes on behalf of many users in a single transaction
+        @dev Each vote is an EIP-712 `Vote` message signed by the voter, for the current
+             week and with the voter's current nonce. Votes use the same encoding as
+             `votePacked`.
+
+             Votes with an invalid signature or nonce, an invalid or unapproved token ID,
+             or that exceed the voter's available votes are skipped and emit
+             `SignedVoteRejected`, so that one bad entry does not revert the batch. Token
+             and total vote counts are only written once for the entire batch.
+        @param _votes Signed votes to apply
+        @return accepted Number of votes that were applied
+     */
+    function submitVotes(SignedVote[] calldata _votes) external returns (uint256 accepted) {
+        uint256 week = _updateRewardsPerSecond();
+        uint256[] memory batchTokenVotes = new uint256[](tokenData.length);
+        uint256 batchVotes;
+
+        for (uint i = 0; i < _votes.length; i++) {
+            (bool isValid, uint256 newVotes) = _applySignedVote(_votes[i], week, batchTokenVotes);
+            if (isValid) {
+                batchVotes += newVotes;
+                accepted++;
+            } else {
+                emit SignedVoteRejected(_votes[i].voter, _votes[i].nonce);
+            }
+        }
+
+        for (uint i = 0; i < batchTokenVotes.length; i++) {
+            if (batchTokenVotes[i] > 0) {
+                tokenVotes[tokenData[i].token][week] += uint128(batchTokenVotes[i]);
+            }
+        }
+        totalVotes[week] += uint128(batchVotes);
+        return accepted;
+    }
+
+    /**
+        @dev Validate and apply a single signed vote within `submitVotes`. Per-token votes
+             are added to `_batchTokenVotes` rather than written to `tokenVotes`.
+     */
+    function _applySignedVote(
+        SignedVote calldata _vote,
+        uint256 _week,
+        uint256[] memory _batchTokenVotes
+    ) internal returns (bool, uint256) {
+        address voter = _vote.voter;
+        if (_vote.nonce != nonces[voter] || !_isValidSignature(_vote, _week)) return (false, 0);
+
+        uint256 newVotes = _sumPackedVotes(_vote.packedVotes, _batchTokenVotes.length);
+        if (newVotes == type(uint256).max) return (false, 0);
+
+        uint256 usedVotes = userVotes[voter][_week] + newVotes;
+        uint256 totalUserVotes = tokenLocker.userVoteWeight(voter) / 1e18;
+        if (usedVotes > totalUserVotes) return (false, 0);
+
+        nonces[voter] = _vote.nonce + 1;
+        userVotes[voter][_week] = uint128(usedVotes);
+        _addSignedTokenVotes(voter, _vote.packedVotes, _week, _batchTokenVotes);
+
+        emit VotedForIncentivesPacked(voter, _vote.packedVotes, usedVotes, totalUserVotes);
+        return (true, newVotes);
+    }
+
+    function _isValidSignature(SignedVote calldata _vote, uint256 _week) internal view returns (bool) {
+        bytes32 structHash = keccak256(abi.encode(
+            VOTE_TYPEHASH,
+            _vote.voter,
+            _week,
+            _vote.nonce,
+            keccak256(abi.encodePacked(_vote.packedVotes))
+        ));
+        (address signer, ECDSA.RecoverError error) = ECDSA.tryRecover(
+            _hashTypedDataV4(structHash),
+            _vote.signature
+        );
+        return error == ECDSA.RecoverError.NoError && signer == _vote.voter;
+    }
+
+    function _addSignedTokenVotes(
+        address _voter,
+        uint256[] calldata _packedVotes,
+        uint256 _week,
+        uint256[] memory _batchTokenVotes
+    ) internal {
+        for (uint i = 0; i < _packedVotes.length; i++) {
+            uint256 packed = _packedVotes[i];
+            while (packed > 0) {
+                uint256 amount = packed & PACKED_VOTE_MASK;
+                uint256 tokenId = (packed >> PACKED_VOTE_BITS) & PACKED_ID_MASK;
+                packed >>= PACKED_PAIR_BITS;
+                if (amount == 0) continue;
+
+                userTokenVotes[_voter][tokenData[tokenId].token][_week] += uint128(amount);
+                _batchTokenVotes[tokenId] += amount;
+            }
+        }
+    }
+
+    /**
+        @dev Sum the votes within `_packedVotes`, returning `type(uint256).max`
+             if any pair references an invalid or unapproved token ID
+     */
+    function _sumPackedVotes(uint256[] calldata _packedVotes, uint256 _length)
+        internal
+        view
+        returns (uint256 total)
+    {
+        for (uint i = 0; i < _packedVotes.length; i++) {
+            uint256 packed = _packedVotes[i];
+            while (packed > 0) {
+                uint256 amount = packed & PACKED_VOTE_MASK;
+                uint256 tokenId = (packed >> PACKED_VOTE_BITS) & PACKED_ID_MASK;
+                packed >>= PACKED_PAIR_BITS;
+                if (amount == 0) continue;
+
+                if (tokenId >= _length || !tokenData[tokenId].isApproved) {
+                    return type(uint256).max;
+                }
+                total += amount;
+            }
+        }
+        return total;
+    }
+
+    /**
+        @dev Push new values to `rewardsPerSecond` if required, and return the current week
+     */
+    function _updateRewardsPerSecond() internal returns (uint256 week) {
+        week = getWeek();
+        uint256 length = rewardsPerSecond.length;
+        if (length <= week / 4) {
+            uint256 perSecond = rewardsPerSecond[length-1];
+            while (length <= week / 4) {
+                perSecond = perSecond * 99 / 100;
+                length += 1;
+                rewardsPerSecond.push(perSecond);
+            }
+        }
+        return week;
+    }
+
+    /**
+        @dev Casting to uint128 is safe, the uncast amounts are also summed in
+             `_addUserVotes` and must not exceed the caller's available votes
+     */
+    function _addTokenVotes(address _token, uint256 _week, uint256 _amount) internal {
+        tokenVotes[_token][_week] += uint128(_amount);
+        userTokenVotes[msg.sender][_token][_week] += uint128(_amount);
+    }
+
+    /**
+        @dev Add `_newVotes` to the caller's used votes and the weekly total,
+             and make sure the caller has not exceeded their available votes
+     */
+    function _addUserVotes(uint256 _week, uint256 _newVotes)
+        internal
+        returns (uint256 usedVotes, uint256 totalUserVotes)
+    {
+        totalVotes[_week] += uint128(_newVotes);
+        usedVotes = userVotes[msg.sender][_week] + _newVotes;
+        totalUserVotes = tokenLocker.userVoteWeight(msg.sender) / 1e18;
+        require(usedVotes <= totalUserVotes, "Available votes exceeded");
+        userVotes[msg.sender][_week] = uint128(usedVotes);
+        return (usedVotes, totalUserVotes);
+    }
+
     /**
         @notice Create a new vote to enable protocol emissions on a given token
         @dev Emissions are only available to approved LP tokens. This prevents
@@ -302,7 +553,7 @@ contract IncentiveVoting is Ownable {
                 token: _token,
                 startTime: uint40(block.timestamp),
                 week: uint16(week),
-                requiredVotes: required,
+                requiredVotes: uint128(required),
                 givenVotes: 0
             })
         );
@@ -358,12 +609,10 @@ contract IncentiveVoting is Ownable {
         require(usedVotes <= totalVotes, "Exceeds available votes");
 
         userTokenApprovalVotes[_voteIndex][msg.sender] = usedVotes;
-        vote.givenVotes += _yesVotes;
+        vote.givenVotes += uint128(_yesVotes);
 
         if (vote.givenVotes >= vote.requiredVotes) {
-            isApproved[vote.token] = true;
-            approvedTokens.push(vote.token);
-            lpStaking.addPool(vote.token);
+            _approveToken(vote.token);
         }
 
         emit VotedForTokenApproval(
@@ -427,10 +676,27 @@ contract IncentiveVoting is Ownable {
      */
     function setTokenApproval(address _token, bool _isApproved) external onlyOwner {
         if (!isApproved[_token]) {
-            (,,uint256 lastRewardTime,) = lpStaking.poolInfo(_token);
+            (,,uint256 lastRewardTime,,,) = lpStaking.poolInfo(_token);
             require(lastRewardTime != 0, "Token must be voted in");
         }
         isApproved[_token] = _isApproved;
+        for (uint i = 0; i < tokenData.length; i++) {
+            if (tokenData[i].token == _token) tokenData[i].isApproved = _isApproved;
+        }
+    }
+
+    /**
+        @dev Approve a new token for incentives. The token ID assigned to
+             `_token` is its index within `approvedTokens`.
+     */
+    function _approveToken(address _token) internal {
+        uint256 tokenId = approvedTokens.length;
+        require(tokenId <= PACKED_ID_MASK, "Too many approved tokens");
+        isApproved[_token] = true;
+        approvedTokens.push(_token);
+        tokenData.push(TokenData({token: _token, isApproved: true}));
+        lpStaking.addPool(_token);
+        emit TokenApproved(_token, tokenId);
     }
 
 }
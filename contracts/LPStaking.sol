@@ -19,7 +19,9 @@ interface IERC20Mintable {
 
 interface ITokenLocker {
     function userWeight(address _user) external view returns (uint256);
+    function weeklyWeightOf(address _user, uint256 _week) external view returns (uint256);
     function totalWeight() external view returns (uint256);
+    function lockClaimedRewards(address _user, uint256 _amount, uint256 _weeks) external returns (bool);
 }
 
 interface IStableSwap {
@@ -35,16 +37,21 @@ contract EllipsisLpStaking is ReentrancyGuard {
     // Info of each user.
     struct UserInfo {
         uint256 depositAmount;  // The amount of tokens deposited into the contract.
-        uint256 adjustedAmount; // The user's effective balance after boosting, used to calculate emission rates.
+        uint256 adjustedAmount; // The user's effective balance after boosting as of `boostStart`, used to calculate emission rates.
         uint256 rewardDebt;
         uint256 claimable;
+        uint128 boostSlope;     // Weekly decrease of the effective balance, until the boost has fully decayed.
+        uint64 boostStart;      // Week in which `adjustedAmount` was set.
+        uint64 boostEnd;        // First week in which the effective balance no longer includes a boost.
     }
     // Info of each pool.
     struct PoolInfo {
-        uint256 adjustedSupply;
+        uint256 adjustedSupply; // Sum of effective balances in the week of `lastRewardTime`.
         uint256 rewardsPerSecond;
         uint256 lastRewardTime; // Last second that reward distribution occurs.
         uint256 accRewardPerShare; // Accumulated rewards per share, times 1e12. See below.
+        uint256 accWeekRewardPerShare; // Sum of each increase in `accRewardPerShare` multiplied by its week.
+        uint256 boostSlope; // Weekly decrease of `adjustedSupply` from decaying boosts.
     }
 
     uint256 public immutable maxMintableTokens;
@@ -56,6 +63,32 @@ contract EllipsisLpStaking is ReentrancyGuard {
 
     // token => user => Info of each user that stakes LP tokens.
     mapping(address => mapping(address => UserInfo)) public userInfo;
+
+    // Boosts decay with the user's lock weight, so a pool's adjusted supply can follow
+    // the decay without writes for each user. At the start of each week `adjustedSupply`
+    // falls by `boostSlope`, and the slopes of boosts ending in that week are removed.
+    // token => week => sum of `UserInfo.boostSlope` for boosts ending in the week
+    mapping(address => mapping(uint256 => uint256)) public boostSlopeChanges;
+    // token => week => [accRewardPerShare, accWeekRewardPerShare] at the start of the
+    // week, recorded for weeks in which at least one boost ends
+    mapping(address => mapping(uint256 => uint256[2])) public boostEndRewardPerShare;
+
+    // token => week => [accRewardPerShare at the end of the week, rewards emitted within
+    // the week], recorded by the first pool update after the week has passed
+    mapping(address => mapping(uint256 => uint256[2])) public weeklyPoolData;
+    // token => week => seconds within the week in which the pool had no adjusted supply,
+    // and so emitted nothing. Only tracked until the week has passed.
+    mapping(address => mapping(uint256 => uint256)) idleTime;
+
+    // user => LP tokens with a nonzero deposit, used to refresh boosts when
+    // `tokenLocker` reports a change to the user's locks
+    mapping(address => address[]) userPools;
+    // user => token => index within `userPools` plus one, or zero if not present
+    mapping(address => mapping(address => uint256)) userPoolIndex;
+
+    // maximum number of pools updated by `refreshBoosts`, which bounds the gas
+    // added to a lock. Further pools can be updated via `updateUserBoosts`.
+    uint256 public constant MAX_BOOST_REFRESH_POOLS = 10;
     // The timestamp when reward mining starts.
     uint256 public immutable startTime;
 
@@ -113,6 +146,8 @@ contract EllipsisLpStaking is ReentrancyGuard {
         incentiveVoting = _incentiveVoting;
         tokenLocker = _tokenLocker;
         maxMintableTokens = _maxMintable;
+        // rewards claimed with `claimAndLock` are transferred to the locker from here
+        IERC20(address(_rewardToken)).approve(address(_tokenLocker), type(uint256).max);
     }
 
     /**
@@ -130,7 +165,14 @@ contract EllipsisLpStaking is ReentrancyGuard {
         require(msg.sender == address(incentiveVoting), "Sender not incentiveVoting");
         require(poolInfo[_token].lastRewardTime == 0);
         registeredTokens.push(_token);
-        poolInfo[_token].lastRewardTime = block.timestamp;
+        uint256 start = startTime;
+        if (block.timestamp > start) {
+            poolInfo[_token].lastRewardTime = block.timestamp;
+            idleTime[_token][_getWeek()] = (block.timestamp - start) % 604800;
+        } else {
+            // pools added before emissions begin are active from `startTime`
+            poolInfo[_token].lastRewardTime = start;
+        }
         return true;
     }
 
@@ -152,6 +194,61 @@ contract EllipsisLpStaking is ReentrancyGuard {
         blockThirdPartyActions[msg.sender] = _block;
     }
 
+    /**
+        @notice Get the LP tokens that a user currently has deposited
+     */
+    function getUserPools(address _user) external view returns (address[] memory) {
+        return userPools[_user];
+    }
+
+    /**
+        @notice Get a user's current effective balance for an LP token
+        @dev The boosted portion of the balance decays each week until `boostEnd`
+     */
+    function adjustedBalance(address _token, address _user) external view returns (uint256) {
+        return _adjustedBalance(userInfo[_token][_user], _getWeek());
+    }
+
+    /**
+        @notice Get the week-by-week history of a pool
+        @dev Weeks are recorded by the first pool update after they have passed. Weeks
+             that have passed without an update return the values that the next update
+             would record.
+        @param _token LP token address
+        @param _startWeek First week to return
+        @param _endWeek Week to stop at, which must have passed. Not included in the result.
+        @return history Dynamic array of [accRewardPerShare at the end of the week,
+                        rewards emitted within the week]
+     */
+    function getPoolHistory(address _token, uint256 _startWeek, uint256 _endWeek)
+        external
+        view
+        returns (uint256[2][] memory history)
+    {
+        require(poolInfo[_token].lastRewardTime > 0, "Invalid pool");
+        uint256 currentWeek = _getWeek();
+        require(_endWeek <= currentWeek, "Week has not passed");
+        (
+            ,
+            uint256[2][] memory weeklyRewardPerShare,
+            uint256[] memory weeklyEmissions
+        ) = _getRewardData(_token);
+        // first week that has not been recorded
+        uint256 firstPending = currentWeek - weeklyEmissions.length;
+
+        history = new uint256[2][](_endWeek - _startWeek);
+        for (uint256 i = 0; i < history.length; i++) {
+            uint256 week = _startWeek + i;
+            if (week < firstPending) {
+                history[i] = weeklyPoolData[_token][week];
+            } else {
+                week -= firstPending;
+                history[i] = [weeklyRewardPerShare[week][0], weeklyEmissions[week]];
+            }
+        }
+        return history;
+    }
+
     /**
         @notice Get the current number of unclaimed rewards for a user on one or more tokens
         @param _user User to query pending rewards for
@@ -164,84 +261,268 @@ contract EllipsisLpStaking is ReentrancyGuard {
         returns (uint256[] memory)
     {
         uint256[] memory claimable = new uint256[](_tokens.length);
+        uint256 currentWeek = _getWeek();
         for (uint256 i = 0; i < _tokens.length; i++) {
-            address token = _tokens[i];
-            PoolInfo storage pool = poolInfo[token];
-            UserInfo storage user = userInfo[token][_user];
-            (uint256 accRewardPerShare,) = _getRewardData(token);
-            accRewardPerShare += pool.accRewardPerShare;
-            claimable[i] = user.claimable + user.adjustedAmount * accRewardPerShare / 1e12 - user.rewardDebt;
+            claimable[i] = _claimableReward(_user, _tokens[i], currentWeek);
         }
         return claimable;
     }
 
-    // Get updated reward data for the given token
-    function _getRewardData(address _token) internal view returns (uint256 accRewardPerShare, uint256 rewardsPerSecond) {
-        PoolInfo storage pool = poolInfo[_token];
-        uint256 lpSupply = pool.adjustedSupply;
-        uint256 start = startTime;
-        uint256 currentWeek = (block.timestamp - start) / 604800;
-
-        if (lpSupply == 0) {
-            return (0, incentiveVoting.getRewardsPerSecond(_token, currentWeek));
+    function _claimableReward(address _user, address _token, uint256 _currentWeek) internal view returns (uint256) {
+        UserInfo storage user = userInfo[_token][_user];
+        (PoolInfo memory pool, uint256[2][] memory weeklyRewardPerShare,) = _getRewardData(_token);
+        uint256[2] memory rewardPerShare = [pool.accRewardPerShare, pool.accWeekRewardPerShare];
+        uint256[2] memory endRewardPerShare = rewardPerShare;
+        uint256 boostEnd = user.boostEnd;
+        if (user.boostSlope > 0 && boostEnd <= _currentWeek) {
+            // boosts ending in weeks that the pool has not yet processed
+            // use the values calculated by `_getRewardData`
+            uint256 lastWeek = _currentWeek - weeklyRewardPerShare.length;
+            if (boostEnd > lastWeek) {
+                endRewardPerShare = weeklyRewardPerShare[boostEnd - lastWeek - 1];
+            } else {
+                endRewardPerShare = boostEndRewardPerShare[_token][boostEnd];
+            }
         }
+        return user.claimable + _accruedReward(user, rewardPerShare, endRewardPerShare) - user.rewardDebt;
+    }
+
+    function _getWeek() internal view returns (uint256) {
+        return (block.timestamp - startTime) / 604800;
+    }
 
+    // Get updated reward data for the given token. For each week that passed since the
+    // pool was last updated, also returns the values of [accRewardPerShare,
+    // accWeekRewardPerShare] at the start of the following week and the rewards emitted.
+    function _getRewardData(address _token)
+        internal
+        view
+        returns (
+            PoolInfo memory pool,
+            uint256[2][] memory weeklyRewardPerShare,
+            uint256[] memory weeklyEmissions
+        )
+    {
+        pool = poolInfo[_token];
+        if (pool.lastRewardTime == 0) {
+            // the token has not been added, so there is nothing to accrue
+            return (pool, weeklyRewardPerShare, weeklyEmissions);
+        }
+        uint256 start = startTime;
+        uint256 currentWeek = (block.timestamp - start) / 604800;
         uint256 lastRewardTime = pool.lastRewardTime;
         uint256 rewardWeek = (lastRewardTime - start) / 604800;
-        rewardsPerSecond = pool.rewardsPerSecond;
-        uint256 reward;
-        uint256 duration;
-        if (rewardWeek < currentWeek) {
-            while (rewardWeek < currentWeek) {
-                uint256 nextRewardTime = (rewardWeek + 1) * 604800 + start;
-                duration = nextRewardTime - lastRewardTime;
-                reward = reward + duration * rewardsPerSecond;
-                rewardWeek += 1;
-                rewardsPerSecond = incentiveVoting.getRewardsPerSecond(_token, rewardWeek);
-                lastRewardTime = nextRewardTime;
+        weeklyRewardPerShare = new uint256[2][](currentWeek - rewardWeek);
+        weeklyEmissions = new uint256[](currentWeek - rewardWeek);
+
+        if (pool.adjustedSupply == 0) {
+            // without any balance there are also no boosts that can decay, and
+            // nothing is emitted after `lastRewardTime`
+            if (rewardWeek < currentWeek) {
+                uint256 activeTime = (lastRewardTime - start) % 604800;
+                activeTime -= idleTime[_token][rewardWeek];
+                weeklyEmissions[0] = pool.rewardsPerSecond * activeTime;
+            }
+            for (uint256 i = 0; i < weeklyRewardPerShare.length; i++) {
+                weeklyRewardPerShare[i] = [pool.accRewardPerShare, pool.accWeekRewardPerShare];
             }
+            pool.rewardsPerSecond = incentiveVoting.getRewardsPerSecond(_token, currentWeek);
+            pool.lastRewardTime = block.timestamp;
+            return (pool, weeklyRewardPerShare, weeklyEmissions);
         }
 
-        duration = block.timestamp - lastRewardTime;
-        reward = reward + duration * rewardsPerSecond;
-        return (reward * 1e12 / lpSupply, rewardsPerSecond);
+        for (uint256 i = 0; rewardWeek < currentWeek; i++) {
+            uint256 nextRewardTime = (rewardWeek + 1) * 604800 + start;
+            _accrueRewards(pool, rewardWeek, nextRewardTime - lastRewardTime);
+            uint256 activeTime = 604800;
+            if (i == 0) activeTime -= idleTime[_token][rewardWeek];
+            weeklyEmissions[i] = pool.rewardsPerSecond * activeTime;
+            rewardWeek += 1;
+            pool.adjustedSupply -= pool.boostSlope;
+            pool.boostSlope -= boostSlopeChanges[_token][rewardWeek];
+            pool.rewardsPerSecond = incentiveVoting.getRewardsPerSecond(_token, rewardWeek);
+            weeklyRewardPerShare[i] = [pool.accRewardPerShare, pool.accWeekRewardPerShare];
+            lastRewardTime = nextRewardTime;
+        }
+
+        _accrueRewards(pool, currentWeek, block.timestamp - lastRewardTime);
+        pool.lastRewardTime = block.timestamp;
+        return (pool, weeklyRewardPerShare, weeklyEmissions);
+    }
+
+    // Distribute rewards for `_duration` seconds within `_week` across the pool's adjusted supply
+    function _accrueRewards(PoolInfo memory _pool, uint256 _week, uint256 _duration) internal pure {
+        if (_pool.adjustedSupply == 0) return;
+        uint256 rewardPerShare = _duration * _pool.rewardsPerSecond * 1e12 / _pool.adjustedSupply;
+        _pool.accRewardPerShare += rewardPerShare;
+        _pool.accWeekRewardPerShare += rewardPerShare * _week;
     }
 
     // Update reward variables of the given pool to be up-to-date.
-    function _updatePool(address _token) internal returns (uint256 accRewardPerShare) {
+    function _updatePool(address _token) internal returns (uint256[2] memory rewardPerShare) {
         PoolInfo storage pool = poolInfo[_token];
         uint256 lastRewardTime = pool.lastRewardTime;
         require(lastRewardTime > 0, "Invalid pool");
         if (block.timestamp <= lastRewardTime) {
-            return pool.accRewardPerShare;
+            return [pool.accRewardPerShare, pool.accWeekRewardPerShare];
         }
-        (accRewardPerShare, pool.rewardsPerSecond) = _getRewardData(_token);
-        pool.lastRewardTime = block.timestamp;
-        if (accRewardPerShare == 0) return pool.accRewardPerShare;
-        accRewardPerShare = accRewardPerShare + pool.accRewardPerShare;
-        pool.accRewardPerShare = accRewardPerShare;
-        return accRewardPerShare;
+        (
+            PoolInfo memory updated,
+            uint256[2][] memory weeklyRewardPerShare,
+            uint256[] memory weeklyEmissions
+        ) = _getRewardData(_token);
+        uint256 week = (lastRewardTime - startTime) / 604800;
+        for (uint256 i = 0; i < weeklyRewardPerShare.length; i++) {
+            weeklyPoolData[_token][week] = [weeklyRewardPerShare[i][0], weeklyEmissions[i]];
+            week += 1;
+            if (boostSlopeChanges[_token][week] > 0) {
+                boostEndRewardPerShare[_token][week] = weeklyRewardPerShare[i];
+            }
+        }
+        if (pool.adjustedSupply == 0) {
+            // `week` is now the current week
+            uint256 weekStart = week * 604800 + startTime;
+            if (lastRewardTime < weekStart) lastRewardTime = weekStart;
+            idleTime[_token][week] += block.timestamp - lastRewardTime;
+        }
+        poolInfo[_token] = updated;
+        return [updated.accRewardPerShare, updated.accWeekRewardPerShare];
+    }
+
+    // Get a user's effective balance in the given week, which must not be prior to `boostStart`
+    function _adjustedBalance(UserInfo storage _user, uint256 _week) internal view returns (uint256) {
+        uint256 boostEnd = _user.boostEnd;
+        if (_week > boostEnd) _week = boostEnd;
+        return _user.adjustedAmount - _user.boostSlope * (_week - _user.boostStart);
+    }
+
+    // Total rewards accrued to a user's current boost, used with `rewardDebt` to calculate
+    // pending rewards. The boosted balance in a week is `boostSlope * (boostEnd - week)`,
+    // so it accrues `boostSlope * boostEnd` per share less `boostSlope` per week weighted
+    // share, until the start of `boostEnd`.
+    function _accruedReward(
+        UserInfo storage _user,
+        uint256[2] memory _rewardPerShare,
+        uint256[2] memory _endRewardPerShare
+    ) internal view returns (uint256) {
+        uint256 boostSlope = _user.boostSlope;
+        uint256 boostEnd = _user.boostEnd;
+        uint256 accrued = (_user.adjustedAmount - boostSlope * (boostEnd - _user.boostStart)) * _rewardPerShare[0];
+        if (boostSlope > 0) {
+            accrued += boostSlope * (boostEnd * _endRewardPerShare[0] - _endRewardPerShare[1]);
+        }
+        return accrued / 1e12;
+    }
+
+    // Rewards earned by a user since their last update. The pool must be up-to-date.
+    function _pendingReward(
+        address _token,
+        UserInfo storage _user,
+        uint256[2] memory _rewardPerShare
+    ) internal view returns (uint256) {
+        uint256[2] memory endRewardPerShare = _rewardPerShare;
+        uint256 boostEnd = _user.boostEnd;
+        if (_user.boostSlope > 0 && boostEnd <= _getWeek()) {
+            endRewardPerShare = boostEndRewardPerShare[_token][boostEnd];
+        }
+        return _accruedReward(_user, _rewardPerShare, endRewardPerShare) - _user.rewardDebt;
     }
 
     // calculate adjusted balance and total supply, used for boost
+    function _updateLiquidityLimits(
+        address _user,
+        address _token,
+        uint256 _depositAmount,
+        uint256[2] memory _rewardPerShare
+    ) internal {
+        uint256[3] memory weights = _getBoostWeights(_user, _getWeek(), 0);
+        uint256 lpSupply;
+        if (weights[0] > 0) lpSupply = IERC20(_token).balanceOf(address(this));
+        _setLiquidityLimits(_user, _token, _depositAmount, _rewardPerShare, weights, lpSupply);
+    }
+
+    // Lock weights used to calculate a boost in `_week`:
+    // [user weight, user weight in the following week, total weight]
+    // Callers that have already read the total weight may pass it as `_totalWeight`,
+    // otherwise it is zero and the total is read when the user has a weight.
+    function _getBoostWeights(address _user, uint256 _week, uint256 _totalWeight)
+        internal
+        view
+        returns (uint256[3] memory weights)
+    {
+        weights[0] = tokenLocker.userWeight(_user);
+        if (weights[0] > 0) {
+            weights[1] = tokenLocker.weeklyWeightOf(_user, _week + 1);
+            weights[2] = _totalWeight > 0 ? _totalWeight : tokenLocker.totalWeight();
+        }
+        return weights;
+    }
+
+    function _setLiquidityLimits(
+        address _user,
+        address _token,
+        uint256 _depositAmount,
+        uint256[2] memory _rewardPerShare,
+        uint256[3] memory _weights,
+        uint256 _lpSupply
+    ) internal {
+        uint256 week = _getWeek();
+        (uint256 adjustedAmount, uint256 boostSlope, uint256 boostWeeks) = _calculateBoost(
+            _depositAmount,
+            _lpSupply,
+            _weights
+        );
+        UserInfo storage user = userInfo[_token][_user];
+        _removeAdjustedBalance(_token, user, week);
+
+        PoolInfo storage pool = poolInfo[_token];
+        pool.adjustedSupply += adjustedAmount;
+        if (boostSlope > 0) {
+            pool.boostSlope += boostSlope;
+            boostSlopeChanges[_token][week + boostWeeks] += boostSlope;
+        }
+        user.adjustedAmount = adjustedAmount;
+        user.boostSlope = uint128(boostSlope);
+        user.boostStart = uint64(week);
+        user.boostEnd = uint64(week + boostWeeks);
+        user.rewardDebt = _accruedReward(user, _rewardPerShare, _rewardPerShare);
+    }
+
     // boost calculations are modeled after veCRV, with a max boost of 2.5x
-    function _updateLiquidityLimits(address _user, address _token, uint256 _depositAmount, uint256 _accRewardPerShare) internal {
-        uint256 userWeight = tokenLocker.userWeight(_user);
-        uint256 adjustedAmount = _depositAmount * 40 / 100;
+    // the boost then decays at the current rate of decay of the user's lock weight
+    function _calculateBoost(
+        uint256 _depositAmount,
+        uint256 _lpSupply,
+        uint256[3] memory _weights
+    ) internal pure returns (uint256 adjustedAmount, uint256 boostSlope, uint256 boostWeeks) {
+        adjustedAmount = _depositAmount * 40 / 100;
+        uint256 userWeight = _weights[0];
         if (userWeight > 0) {
-            uint256 lpSupply = IERC20(_token).balanceOf(address(this));
-            uint256 totalWeight = tokenLocker.totalWeight();
-            uint256 boost = lpSupply * userWeight / totalWeight * 60 / 100;
-            adjustedAmount += boost;
-            if (adjustedAmount > _depositAmount) {
-                adjustedAmount = _depositAmount;
+            uint256 boost = _lpSupply * userWeight / _weights[2] * 60 / 100;
+            if (adjustedAmount + boost > _depositAmount) {
+                boost = _depositAmount - adjustedAmount;
             }
+            // the boost reaches zero in the week that the user's weight would, if it
+            // kept falling at the current rate. it is rounded down to a multiple of
+            // `boostWeeks` so that it decays by the same amount each week.
+            uint256 nextWeight = _weights[1];
+            boostWeeks = nextWeight < userWeight ? userWeight / (userWeight - nextWeight) : 1;
+            boostSlope = boost / boostWeeks;
+            adjustedAmount += boostSlope * boostWeeks;
+        }
+        return (adjustedAmount, boostSlope, boostWeeks);
+    }
+
+    // Remove a user's effective balance in `_week` and their boost slope from the pool
+    function _removeAdjustedBalance(address _token, UserInfo storage _user, uint256 _week) internal {
+        PoolInfo storage pool = poolInfo[_token];
+        pool.adjustedSupply -= _adjustedBalance(_user, _week);
+        uint256 boostSlope = _user.boostSlope;
+        uint256 boostEnd = _user.boostEnd;
+        if (boostSlope > 0 && _week < boostEnd) {
+            pool.boostSlope -= boostSlope;
+            boostSlopeChanges[_token][boostEnd] -= boostSlope;
         }
-        UserInfo storage user = userInfo[_token][_user];
-        uint256 newAdjustedSupply = poolInfo[_token].adjustedSupply - user.adjustedAmount;
-        user.adjustedAmount = adjustedAmount;
-        poolInfo[_token].adjustedSupply = newAdjustedSupply + adjustedAmount;
-        user.rewardDebt = adjustedAmount * _accRewardPerShare / 1e12;
     }
 
     /**
@@ -258,11 +539,11 @@ contract EllipsisLpStaking is ReentrancyGuard {
         bool _claimRewards
     ) external nonReentrant returns (uint256) {
         require(_amount > 0, "Cannot deposit zero");
-        uint256 accRewardPerShare = _updatePool(_token);
+        uint256[2] memory rewardPerShare = _updatePool(_token);
         UserInfo storage user = userInfo[_token][msg.sender];
         uint256 pending;
         if (user.adjustedAmount > 0) {
-            pending = user.adjustedAmount * accRewardPerShare / 1e12 - user.rewardDebt;
+            pending = _pendingReward(_token, user, rewardPerShare);
             if (_claimRewards) {
                 pending += user.claimable;
                 user.claimable = 0;
@@ -277,9 +558,10 @@ contract EllipsisLpStaking is ReentrancyGuard {
             address(this),
             _amount
         );
+        if (user.depositAmount == 0) _addUserPool(msg.sender, _token);
         uint256 depositAmount = user.depositAmount + _amount;
         user.depositAmount = depositAmount;
-        _updateLiquidityLimits(msg.sender, _token, depositAmount, accRewardPerShare);
+        _updateLiquidityLimits(msg.sender, _token, depositAmount, rewardPerShare);
         emit Deposit(msg.sender, _token, _amount);
         return pending;
     }
@@ -298,12 +580,12 @@ contract EllipsisLpStaking is ReentrancyGuard {
         bool _claimRewards
     ) external nonReentrant returns (uint256) {
         require(_amount > 0, "Cannot withdraw zero");
-        uint256 accRewardPerShare = _updatePool(_token);
+        uint256[2] memory rewardPerShare = _updatePool(_token);
         UserInfo storage user = userInfo[_token][msg.sender];
         uint256 depositAmount = user.depositAmount;
         require(depositAmount >= _amount, "withdraw: not good");
 
-        uint256 pending = user.adjustedAmount * accRewardPerShare / 1e12 - user.rewardDebt;
+        uint256 pending = _pendingReward(_token, user, rewardPerShare);
         if (_claimRewards) {
             pending += user.claimable;
             user.claimable = 0;
@@ -315,7 +597,8 @@ contract EllipsisLpStaking is ReentrancyGuard {
 
         depositAmount -= _amount;
         user.depositAmount = depositAmount;
-        _updateLiquidityLimits(msg.sender, _token, depositAmount, accRewardPerShare);
+        if (depositAmount == 0) _removeUserPool(msg.sender, _token);
+        _updateLiquidityLimits(msg.sender, _token, depositAmount, rewardPerShare);
         IERC20(_token).safeTransfer(msg.sender, _amount);
         emit Withdraw(msg.sender, _token, _amount);
         return pending;
@@ -330,10 +613,15 @@ contract EllipsisLpStaking is ReentrancyGuard {
      */
     function emergencyWithdraw(address _token) external nonReentrant {
         UserInfo storage user = userInfo[_token][msg.sender];
-        poolInfo[_token].adjustedSupply -= user.adjustedAmount;
+        uint256 lastRewardTime = poolInfo[_token].lastRewardTime;
+        if (lastRewardTime > 0) {
+            // the pool is not updated, so the balance is removed as of the pool's last update
+            _removeAdjustedBalance(_token, user, (lastRewardTime - startTime) / 604800);
+        }
 
         uint256 amount = user.depositAmount;
         delete userInfo[_token][msg.sender];
+        if (amount > 0) _removeUserPool(msg.sender, _token);
         IERC20(_token).safeTransfer(address(msg.sender), amount);
         emit EmergencyWithdraw(_token, msg.sender, amount);
     }
@@ -355,38 +643,147 @@ contract EllipsisLpStaking is ReentrancyGuard {
         uint256 pending;
         for (uint i = 0; i < _tokens.length; i++) {
             address token = _tokens[i];
-            uint256 accRewardPerShare = _updatePool(token);
+            uint256[2] memory rewardPerShare = _updatePool(token);
             UserInfo storage user = userInfo[token][_user];
-            uint256 rewardDebt = user.adjustedAmount * accRewardPerShare / 1e12;
-            pending += user.claimable + rewardDebt - user.rewardDebt;
+            pending += user.claimable + _pendingReward(token, user, rewardPerShare);
             user.claimable = 0;
-            _updateLiquidityLimits(_user, token, user.depositAmount, accRewardPerShare);
-
-            // claim admin fees for each pool once per day
-            if (lastFeeClaim[token] + 86400 < block.timestamp) {
-                address pool = IERC20Mintable(token).minter();
-                try IStableSwap(pool).withdraw_admin_fees() {
-                    emit FeeClaimSuccess(pool);
-                } catch {
-                    emit FeeClaimRevert(pool);
-                }
-                lastFeeClaim[token] = block.timestamp;
-            }
+            _updateLiquidityLimits(_user, token, user.depositAmount, rewardPerShare);
+            _claimAdminFees(token);
         }
         return _mintRewards(_user, pending);
     }
 
+    /**
+        @notice Claim pending rewards for many users at once
+        @dev Intended for integrations that claim on behalf of many depositors. Each
+             pool is updated once for the whole batch, and the lock weights used to
+             update boosts are read once per user. Third-party restrictions and claim
+             receivers apply in the same way as `claim`.
+        @param _users Array of addresses to claim rewards for.
+        @param _tokens Array of LP token addresses to claim for each user.
+        @return claimed Array of claimed reward amounts for each user
+     */
+    function claimMany(address[] calldata _users, address[] calldata _tokens)
+        external
+        returns (uint256[] memory claimed)
+    {
+        uint256[2][] memory rewardPerShare = new uint256[2][](_tokens.length);
+        uint256[] memory lpSupply = new uint256[](_tokens.length);
+        for (uint i = 0; i < _tokens.length; i++) {
+            address token = _tokens[i];
+            rewardPerShare[i] = _updatePool(token);
+            lpSupply[i] = IERC20(token).balanceOf(address(this));
+            _claimAdminFees(token);
+        }
+
+        uint256 totalWeight = tokenLocker.totalWeight();
+        claimed = new uint256[](_users.length);
+        for (uint i = 0; i < _users.length; i++) {
+            claimed[i] = _claimForUser(_users[i], _tokens, rewardPerShare, lpSupply, totalWeight);
+        }
+        return claimed;
+    }
+
+    function _claimForUser(
+        address _user,
+        address[] calldata _tokens,
+        uint256[2][] memory _rewardPerShare,
+        uint256[] memory _lpSupply,
+        uint256 _totalWeight
+    ) internal returns (uint256) {
+        if (msg.sender != _user) {
+            require(!blockThirdPartyActions[_user], "Cannot claim on behalf of this account");
+        }
+        uint256[3] memory weights = _getBoostWeights(_user, _getWeek(), _totalWeight);
+
+        uint256 pending;
+        for (uint i = 0; i < _tokens.length; i++) {
+            pending += _claimPool(_user, _tokens[i], _rewardPerShare[i], weights, _lpSupply[i]);
+        }
+        return _mintRewards(_user, pending);
+    }
+
+    // Collect a user's pending rewards for an up-to-date pool and update their boost
+    function _claimPool(
+        address _user,
+        address _token,
+        uint256[2] memory _rewardPerShare,
+        uint256[3] memory _weights,
+        uint256 _lpSupply
+    ) internal returns (uint256 pending) {
+        UserInfo storage user = userInfo[_token][_user];
+        pending = user.claimable + _pendingReward(_token, user, _rewardPerShare);
+        user.claimable = 0;
+        _setLiquidityLimits(_user, _token, user.depositAmount, _rewardPerShare, _weights, _lpSupply);
+        return pending;
+    }
+
+    /**
+        @notice Claim pending rewards for one or more tokens and lock them in `tokenLocker`
+        @dev Rewards are minted to this contract, then transferred to `tokenLocker` and
+             credited as a new lock for the caller, ignoring any `claimReceiver`. Boosts
+             for `_tokens` are updated after the lock is created, so they reflect the
+             increased lock weight.
+        @param _tokens Array of LP token addresses to claim for.
+        @param _weeks The number of weeks to lock claimed rewards for.
+        @return uint256 Claimed and locked reward amount
+     */
+    function claimAndLock(address[] calldata _tokens, uint256 _weeks) external returns (uint256) {
+        uint256[2][] memory rewardPerShare = new uint256[2][](_tokens.length);
+
+        // calculate claimable amount
+        uint256 pending;
+        for (uint i = 0; i < _tokens.length; i++) {
+            address token = _tokens[i];
+            rewardPerShare[i] = _updatePool(token);
+            UserInfo storage user = userInfo[token][msg.sender];
+            uint256 reward = _pendingReward(token, user, rewardPerShare[i]);
+            pending += user.claimable + reward;
+            user.claimable = 0;
+            user.rewardDebt += reward;
+            _claimAdminFees(token);
+        }
+
+        uint256 amount = _mintRewardsTo(msg.sender, address(this), pending);
+        tokenLocker.lockClaimedRewards(msg.sender, amount, _weeks);
+
+        // update boosts using the new lock weight
+        for (uint i = 0; i < _tokens.length; i++) {
+            address token = _tokens[i];
+            uint256 depositAmount = userInfo[token][msg.sender].depositAmount;
+            _updateLiquidityLimits(msg.sender, token, depositAmount, rewardPerShare[i]);
+        }
+        return amount;
+    }
+
+    // claim admin fees for the pool of an LP token once per day
+    function _claimAdminFees(address _token) internal {
+        if (lastFeeClaim[_token] + 86400 < block.timestamp) {
+            address pool = IERC20Mintable(_token).minter();
+            try IStableSwap(pool).withdraw_admin_fees() {
+                emit FeeClaimSuccess(pool);
+            } catch {
+                emit FeeClaimRevert(pool);
+            }
+            lastFeeClaim[_token] = block.timestamp;
+        }
+    }
+
     function _mintRewards(address _user, uint256 _amount) internal returns (uint256) {
+        address receiver = claimReceiver[_user];
+        if (receiver == address(0)) receiver = _user;
+        return _mintRewardsTo(_user, receiver, _amount);
+    }
+
+    function _mintRewardsTo(address _user, address _receiver, uint256 _amount) internal returns (uint256) {
         uint256 minted = mintedTokens;
         if (minted + _amount > maxMintableTokens) {
             _amount = maxMintableTokens - minted;
         }
         if (_amount > 0) {
             mintedTokens = minted + _amount;
-            address receiver = claimReceiver[_user];
-            if (receiver == address(0)) receiver = _user;
-            rewardToken.mint(receiver, _amount);
-            emit ClaimedReward(msg.sender, _user, receiver, _amount);
+            rewardToken.mint(_receiver, _amount);
+            emit ClaimedReward(msg.sender, _user, _receiver, _amount);
         }
         return _amount;
     }
@@ -398,17 +795,56 @@ contract EllipsisLpStaking is ReentrancyGuard {
      */
     function updateUserBoosts(address _user, address[] calldata _tokens) external {
         for (uint i = 0; i < _tokens.length; i++) {
-            address token = _tokens[i];
-            uint256 accRewardPerShare = _updatePool(token);
-            UserInfo storage user = userInfo[token][_user];
-            if (user.adjustedAmount > 0) {
-                uint256 pending = user.adjustedAmount * accRewardPerShare / 1e12 - user.rewardDebt;
-                if (pending > 0) {
-                    user.claimable += pending;
-                }
+            _updateUserBoost(_user, _tokens[i]);
+        }
+    }
+
+    /**
+        @notice Update a user's boost for every LP token they have deposited
+        @dev Called by `tokenLocker` after a user's locks change. At most
+             `MAX_BOOST_REFRESH_POOLS` pools are updated, in the order of `getUserPools`.
+        @param _user Address of the user to update boosts for
+        @return uint256 Number of pools that were updated
+     */
+    function refreshBoosts(address _user) external returns (uint256) {
+        require(msg.sender == address(tokenLocker), "Sender not tokenLocker");
+        address[] storage pools = userPools[_user];
+        uint256 length = pools.length;
+        if (length > MAX_BOOST_REFRESH_POOLS) length = MAX_BOOST_REFRESH_POOLS;
+        for (uint i = 0; i < length; i++) {
+            _updateUserBoost(_user, pools[i]);
+        }
+        return length;
+    }
+
+    function _updateUserBoost(address _user, address _token) internal {
+        uint256[2] memory rewardPerShare = _updatePool(_token);
+        UserInfo storage user = userInfo[_token][_user];
+        if (user.adjustedAmount > 0) {
+            uint256 pending = _pendingReward(_token, user, rewardPerShare);
+            if (pending > 0) {
+                user.claimable += pending;
             }
-            _updateLiquidityLimits(_user, token, user.depositAmount, accRewardPerShare);
         }
+        _updateLiquidityLimits(_user, _token, user.depositAmount, rewardPerShare);
+    }
+
+    function _addUserPool(address _user, address _token) internal {
+        userPools[_user].push(_token);
+        userPoolIndex[_user][_token] = userPools[_user].length;
+    }
+
+    function _removeUserPool(address _user, address _token) internal {
+        address[] storage pools = userPools[_user];
+        uint256 index = userPoolIndex[_user][_token];
+        uint256 length = pools.length;
+        if (index < length) {
+            address last = pools[length - 1];
+            pools[index - 1] = last;
+            userPoolIndex[_user][last] = index;
+        }
+        pools.pop();
+        delete userPoolIndex[_user][_token];
     }
 
 }
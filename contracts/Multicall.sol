@@ -0,0 +1,46 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.12;
+
+
+/**
+    @title Multicall
+    @notice Aggregates many read-only calls into a single `eth_call`
+    @dev Used by off-chain tooling to read protocol state in bulk. All calls are
+         made via `staticcall`, so this contract cannot modify state.
+ */
+contract Multicall {
+
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    /**
+        @notice Perform a batch of static calls
+        @dev A failing call does not revert the batch, it is returned with
+             `success` set to false and the revert data as `returnData`
+        @param _calls Array of (target, calldata) to call
+        @return results Array of (success, return data) for each call
+     */
+    function tryAggregate(Call[] calldata _calls) external view returns (Result[] memory results) {
+        results = new Result[](_calls.length);
+        for (uint256 i = 0; i < _calls.length; i++) {
+            (bool success, bytes memory returnData) = _calls[i].target.staticcall(_calls[i].callData);
+            results[i] = Result({success: success, returnData: returnData});
+        }
+        return results;
+    }
+
+    /**
+        @notice Get the current block number and timestamp
+     */
+    function getBlock() external view returns (uint256 number, uint256 timestamp) {
+        return (block.number, block.timestamp);
+    }
+
+}
@@ -13,6 +13,14 @@ interface IMultiFeeDistribution {
     function lockedBalances(address) view external returns (uint, uint, uint, LockedBalance[] memory);
 }
 
+interface IFeeDistributor {
+    function claimedUntil(address _user) external view returns (uint256);
+}
+
+interface ILpStaking {
+    function refreshBoosts(address _user) external returns (uint256);
+}
+
 
 contract TokenLocker {
     using SafeERC20 for IERC20;
@@ -28,6 +36,17 @@ contract TokenLocker {
         uint128 unlock;
     }
 
+    struct WithdrawalData {
+        uint128 withdrawnUntil;
+        uint128 compactedUntil;
+    }
+
+    struct Delegation {
+        address delegate;
+        uint48 week;
+        address previous;
+    }
+
     // `weeklyTotalWeight` and `weeklyWeightOf` track the total lock weight for each week,
     // calculated as the sum of [number of tokens] * [weeks to unlock] for all active locks.
     // The array index corresponds to the number of the epoch week.
@@ -41,19 +60,40 @@ contract TokenLocker {
     // because they cannot be withdrawn.
     mapping(address => uint256[13]) public legacyLockWeight;
 
-    // `withdrawnUntil` tracks the most recent week for which each user has withdrawn their
-    // expired token locks. Unlock values in `weeklyLockData` with an index less than the related
-    // value within `withdrawnUntil` have already been withdrawn.
-    mapping(address => uint256) withdrawnUntil;
+    // `withdrawals` tracks, for each user, the most recent week for which expired token locks
+    // have been withdrawn. Unlock values in `weeklyLockData` with an index less than or equal
+    // to `withdrawnUntil` have already been withdrawn. It also tracks the week prior to which
+    // `weeklyLockData` has been deleted by `initiateExitStreamAndCompact`. Both values share
+    // a slot, so compaction adds no extra storage writes to an exit.
+    mapping(address => WithdrawalData) withdrawals;
 
     // After a lock expires, a user calls to `initiateExitStream` and the withdrawable tokens
     // are streamed out linearly over the following week. This array is used to track data
     // related to the exit stream.
     mapping(address => StreamData) public exitStream;
 
+    // `delegations` tracks the account that receives each user's vote weight. A change
+    // takes effect from the following week, so `previous` remains the delegate for the
+    // week in which the change was made. `weeklyDelegatedWeight` holds the combined lock
+    // weight delegated to each account in each week, so that voting power can be read
+    // without iterating over delegators.
+    mapping(address => Delegation) delegations;
+    mapping(address => uint128[65535]) public weeklyDelegatedWeight;
+
     // when set to true, other accounts cannot call `lock` on behalf of an account
     mapping(address => bool) public blockThirdPartyActions;
 
+    // used to determine which past weeks of lock weight can still be read by fee claims
+    IFeeDistributor public feeDistributor;
+
+    // `EllipsisLpStaking` locks claimed rewards on behalf of users via
+    // `lockClaimedRewards`. It is also notified when a user's locks change,
+    // so that their LP boosts are refreshed.
+    address public lpStaking;
+
+    // the only account that may set `feeDistributor` and `lpStaking`
+    address immutable deployer;
+
     IMultiFeeDistribution public immutable epsV1Staker;
     IERC20 public immutable stakingToken;
 
@@ -63,6 +103,7 @@ contract TokenLocker {
     uint256 constant WEEK = 86400 * 7;
 
     event NewLock(address indexed user, uint256 amount, uint256 lockWeeks);
+    event LegacyLock(address indexed user, uint256 week);
     event ExtendLock(
         address indexed user,
         uint256 amount,
@@ -79,6 +120,12 @@ contract TokenLocker {
         uint256 claimed,
         uint256 remaining
     );
+    event DelegateChanged(
+        address indexed user,
+        address indexed fromDelegate,
+        address indexed toDelegate,
+        uint256 week
+    );
 
     /**
         @param _startTime Time of the first emissions. Should be set to the
@@ -98,6 +145,19 @@ contract TokenLocker {
         // must start on the epoch week
         require((_startTime / WEEK) * WEEK == _startTime, "!epoch week");
         startTime = _startTime;
+        deployer = msg.sender;
+    }
+
+    function setFeeDistributor(IFeeDistributor _feeDistributor) external {
+        require(msg.sender == deployer, "Only deployer");
+        require(address(feeDistributor) == address(0));
+        feeDistributor = _feeDistributor;
+    }
+
+    function setLpStaking(address _lpStaking) external {
+        require(msg.sender == deployer, "Only deployer");
+        require(lpStaking == address(0));
+        lpStaking = _lpStaking;
     }
 
     /**
@@ -121,6 +181,8 @@ contract TokenLocker {
 
     /**
         @notice Get the lock weight for a user in a given week
+        @dev For weeks prior to `compactedUntil`, only includes the weight of
+             registered EPS v1 locks, which is never deleted
      */
     function weeklyWeightOf(address _user, uint256 _week) public view returns (uint256) {
         uint256 weight = uint256(weeklyLockData[_user][_week].weight);
@@ -128,6 +190,43 @@ contract TokenLocker {
         return weight;
     }
 
+    /**
+        @notice Get the current vote weight for a user
+        @dev Includes weight delegated to the user, and excludes the user's own
+             weight if it is delegated to another account
+     */
+    function userVoteWeight(address _user) external view returns (uint256) {
+        return weeklyVoteWeightOf(_user, getWeek());
+    }
+
+    /**
+        @notice Get the vote weight for a user in a given week
+        @dev Only accurate for the current and future weeks, as the delegate for a
+             week is not retained after the following change of delegate
+     */
+    function weeklyVoteWeightOf(address _user, uint256 _week) public view returns (uint256) {
+        uint256 weight = weeklyDelegatedWeight[_user][_week];
+        if (delegateOf(_user, _week) == address(0)) weight += weeklyWeightOf(_user, _week);
+        return weight;
+    }
+
+    /**
+        @notice Get the account that receives a user's vote weight in a given week
+        @dev Only accurate for the current and future weeks
+     */
+    function delegateOf(address _user, uint256 _week) public view returns (address) {
+        Delegation storage delegation = delegations[_user];
+        if (_week < delegation.week) return delegation.previous;
+        return delegation.delegate;
+    }
+
+    /**
+        @notice Get the week prior to which a user's lock data has been deleted
+     */
+    function compactedUntil(address _user) external view returns (uint256) {
+        return withdrawals[_user].compactedUntil;
+    }
+
     /**
         @notice Get the token balance that unlocks for a user in a given week
      */
@@ -144,7 +243,7 @@ contract TokenLocker {
         view
         returns (uint256 balance)
     {
-        uint256 i = withdrawnUntil[_user] + 1;
+        uint256 i = withdrawals[_user].withdrawnUntil + 1;
         uint256 finish = getWeek() + MAX_LOCK_WEEKS + 1;
         while (i < finish) {
             balance += weeklyLockData[_user][i].unlock;
@@ -195,6 +294,45 @@ contract TokenLocker {
         return lockData;
     }
 
+    /**
+        @notice Delegate the caller's vote weight to another account
+        @dev Takes effect from the start of the following week, so weight that may
+             already have been used to vote in the current week cannot be used again.
+             The delegate votes with the combined weight of all delegators plus their
+             own weight. Delegation is not transitive. Lock weight for fee claims,
+             LP boosts and token approval votes is unaffected.
+        @param _delegate Account to delegate to. Set to zero to vote directly.
+     */
+    function setDelegate(address _delegate) external returns (bool) {
+        require(_delegate != msg.sender, "Cannot delegate to self");
+        Delegation memory delegation = delegations[msg.sender];
+        require(_delegate != delegation.delegate, "Delegate unchanged");
+
+        uint256 week = getWeek() + 1;
+        uint256 finish = week + MAX_LOCK_WEEKS;
+        // lock weight only decreases from one week to the next
+        for (uint256 i = week; i < finish; i++) {
+            uint128 weight = uint128(weeklyWeightOf(msg.sender, i));
+            if (weight == 0) break;
+            if (delegation.delegate != address(0)) {
+                weeklyDelegatedWeight[delegation.delegate][i] -= weight;
+            }
+            if (_delegate != address(0)) {
+                weeklyDelegatedWeight[_delegate][i] += weight;
+            }
+        }
+
+        // `previous` only changes with the first update in each week
+        if (delegation.week < week) delegation.previous = delegation.delegate;
+        emit DelegateChanged(msg.sender, delegation.delegate, _delegate, week);
+        delegations[msg.sender] = Delegation({
+            delegate: _delegate,
+            week: uint48(week),
+            previous: delegation.previous
+        });
+        return true;
+    }
+
     /**
         @notice Deposit tokens into the contract to create a new lock.
         @dev A lock is created for a given number of weeks. Minimum 1, maximum `MAX_LOCK_WEEKS`.
@@ -221,7 +359,36 @@ contract TokenLocker {
         require(_amount > 0, "Amount must be nonzero");
 
         stakingToken.safeTransferFrom(msg.sender, address(this), _amount);
+        _lock(_user, _amount, _weeks);
+        _refreshBoosts(_user);
+        return true;
+    }
 
+    /**
+        @notice Create a new lock from claimed LP staking rewards
+        @dev Only callable by `lpStaking`, within `EllipsisLpStaking.claimAndLock`.
+             `_amount` is transferred from `lpStaking`, so a lock is never credited
+             for tokens this contract has not received.
+        @param _user Address to create a new lock for
+        @param _amount Amount of tokens to transfer from `lpStaking` and lock
+        @param _weeks The number of weeks for the lock
+     */
+    function lockClaimedRewards(
+        address _user,
+        uint256 _amount,
+        uint256 _weeks
+    ) external returns (bool) {
+        require(msg.sender == lpStaking, "Sender not lpStaking");
+        require(_weeks > 0, "Min 1 week");
+        require(_weeks <= MAX_LOCK_WEEKS, "Exceeds MAX_LOCK_WEEKS");
+        if (_amount > 0) {
+            stakingToken.safeTransferFrom(msg.sender, address(this), _amount);
+            _lock(_user, _amount, _weeks);
+        }
+        return true;
+    }
+
+    function _lock(address _user, uint256 _amount, uint256 _weeks) internal {
         uint256 start = getWeek();
         _increaseAmount(_user, start, _amount, _weeks, 0);
 
@@ -229,7 +396,6 @@ contract TokenLocker {
         weeklyLockData[_user][end].unlock += uint128(_amount);
 
         emit NewLock(_user, _amount, _weeks);
-        return true;
     }
 
     /**
@@ -261,15 +427,74 @@ contract TokenLocker {
 
         _increaseAmount(msg.sender, start, _amount, _newWeeks, _weeks);
         emit ExtendLock(msg.sender, _amount, _weeks, _newWeeks);
+        _refreshBoosts(msg.sender);
         return true;
     }
 
+    /**
+        @dev Notify `lpStaking` that the lock weight of `_user` has increased, so that
+             their boost is updated in the pools they have deposited in. The number of
+             pools updated is bounded by `lpStaking`, so the added gas is also bounded.
+             The call is not wrapped in `try`, as gas estimation would then find a limit
+             at which the refresh runs out of gas without reverting the lock.
+     */
+    function _refreshBoosts(address _user) internal {
+        address staking = lpStaking;
+        if (staking != address(0)) ILpStaking(staking).refreshBoosts(_user);
+    }
+
     /**
         @notice Create an exit stream, to withdraw tokens in expired locks over 1 week
      */
     function initiateExitStream() external returns (bool) {
+        return _initiateExitStream(0);
+    }
+
+    /**
+        @notice Create an exit stream, and delete lock data that is no longer needed
+        @dev Unlock amounts that move into the exit stream are zeroed, and lock data
+             from `compactedUntil` up to `compactionHorizon` is deleted, at most
+             `_maxWeeks` weeks at a time. Afterwards `weeklyWeightOf` excludes the
+             deleted weeks and `weeklyUnlocksOf` returns zero for withdrawn weeks.
+             `weeklyTotalWeight` is never modified. Storage refunds offset part of
+             the cost of the exit, subject to the refund cap.
+        @param _maxWeeks Maximum number of weeks of lock data to delete, which bounds
+                         the gas used. Remaining weeks are deleted by later calls.
+     */
+    function initiateExitStreamAndCompact(uint256 _maxWeeks) external returns (bool) {
+        return _initiateExitStream(_maxWeeks);
+    }
+
+    /**
+        @notice Get the first week for which a user's lock weight may still be read
+        @dev Fee claims read the weight of every week from the user's last claim of
+             each token. `FeeDistributor.claimedUntil` is the week reached by the
+             user's own latest claim, so deleting earlier weeks forfeits any unclaimed
+             fees in tokens that were not part of that claim. Token approval votes last
+             one week and read the weight of the week before the vote was created.
+             Returns zero if `feeDistributor` is not set.
+
+             Fee settlements (`scripts/fee_settlement.py`) read past weights from chain
+             state. The weight of a week can be deleted from the end of the second week
+             after it, so each settlement must be built within that window, or from
+             historical state.
+     */
+    function compactionHorizon(address _user) public view returns (uint256) {
+        uint256 week = getWeek();
+        if (address(feeDistributor) == address(0) || week < 2) return 0;
+        uint256 horizon = feeDistributor.claimedUntil(_user);
+        if (horizon > week - 2) horizon = week - 2;
+        return horizon;
+    }
+
+    function _initiateExitStream(uint256 _maxCompactWeeks) internal returns (bool) {
         StreamData storage stream = exitStream[msg.sender];
-        uint256 streamable = streamableBalance(msg.sender);
+        uint256 streamable;
+        if (_maxCompactWeeks > 0) {
+            streamable = _compactLockData(msg.sender, _maxCompactWeeks);
+        } else {
+            streamable = streamableBalance(msg.sender);
+        }
         require(streamable > 0, "No withdrawable balance");
 
         uint256 amount = stream.amount - stream.claimed + streamable;
@@ -278,7 +503,7 @@ contract TokenLocker {
             amount: amount,
             claimed: 0
         });
-        withdrawnUntil[msg.sender] = getWeek();
+        withdrawals[msg.sender].withdrawnUntil = uint128(getWeek());
 
         emit NewExitStream(msg.sender, block.timestamp, amount);
         return true;
@@ -307,6 +532,41 @@ contract TokenLocker {
         return true;
     }
 
+    /**
+        @dev Sum the streamable balance of `_user` while deleting up to `_maxWeeks`
+             weeks of lock data prior to `compactionHorizon`, and zeroing the
+             remaining unlock amounts that are being withdrawn.
+     */
+    function _compactLockData(address _user, uint256 _maxWeeks) internal returns (uint256 amount) {
+        LockData[65535] storage data = weeklyLockData[_user];
+        WithdrawalData storage withdrawal = withdrawals[_user];
+        uint256 finishedWeek = getWeek();
+        uint256 start = withdrawal.withdrawnUntil + 1;
+        uint256 horizon = compactionHorizon(_user);
+
+        uint256 i = withdrawal.compactedUntil;
+        if (horizon > i + _maxWeeks) horizon = i + _maxWeeks;
+        if (i < horizon) {
+            withdrawal.compactedUntil = uint128(horizon);
+            for (; i < horizon; i++) {
+                LockData memory lockData = data[i];
+                // weeks prior to the user's first lock are empty
+                if (lockData.weight == 0 && lockData.unlock == 0) continue;
+                if (i >= start) amount += lockData.unlock;
+                delete data[i];
+            }
+        }
+
+        for (i = start > horizon ? start : horizon; i <= finishedWeek; i++) {
+            uint256 unlock = data[i].unlock;
+            if (unlock > 0) {
+                amount += unlock;
+                data[i].unlock = 0;
+            }
+        }
+        return amount;
+    }
+
     /**
         @notice Get the amount of `stakingToken` in expired locks that is
                 eligible to be released via an exit stream.
@@ -318,7 +578,7 @@ contract TokenLocker {
         uint256 amount;
 
         for (
-            uint256 last = withdrawnUntil[_user] + 1;
+            uint256 last = withdrawals[_user].withdrawnUntil + 1;
             last <= finishedWeek;
             last++
         ) {
@@ -358,6 +618,7 @@ contract TokenLocker {
         uint256 oldEnd = _start + _oldRounds;
         uint256 end = _start + _rounds;
         LockData[65535] storage data = weeklyLockData[_user];
+        Delegation memory delegation = delegations[_user];
         for (uint256 i = _start; i < end; i++) {
             uint256 amount = _amount * (end - i);
             if (i < oldEnd) {
@@ -365,6 +626,21 @@ contract TokenLocker {
             }
             weeklyTotalWeight[i] += uint128(amount);
             data[i].weight += uint128(amount);
+            _increaseDelegatedWeight(delegation, i, amount);
+        }
+    }
+
+    /**
+        @dev Add `_amount` of weight in `_week` to the delegate of a user, if any
+     */
+    function _increaseDelegatedWeight(
+        Delegation memory _delegation,
+        uint256 _week,
+        uint256 _amount
+    ) internal {
+        address delegate = _week < _delegation.week ? _delegation.previous : _delegation.delegate;
+        if (delegate != address(0)) {
+            weeklyDelegatedWeight[delegate][_week] += uint128(_amount);
         }
     }
 
@@ -395,13 +671,16 @@ contract TokenLocker {
             }
         }
 
+        Delegation memory delegation = delegations[_user];
         for (uint i = 0; i < 13; i++) {
             uint256 weight = lockWeights[i];
             if (weight > 0) {
                  legacyLockWeight[_user][i] = weight;
                  weeklyTotalWeight[i] += uint128(weight);
+                 _increaseDelegatedWeight(delegation, i, weight);
             }
         }
+        emit LegacyLock(_user, week);
     }
 
 }
\ No newline at end of file
@@ -0,0 +1,27 @@
+pragma solidity 0.8.12;
+
+import "../IncentiveVoting.sol";
+
+
+// `IncentiveVoting` with an owner-only shortcut for approving tokens, so that
+// `scripts/gas_limits.py` can build a large set of approved tokens over many
+// transactions without running an approval vote for each one.
+contract IncentiveVotingTester is IncentiveVoting {
+
+    constructor(
+        ITokenLocker _tokenLocker,
+        uint256 _initialRewardsPerSecond,
+        uint256 _quorumPct,
+        uint256 _tokenApprovalMinWeight
+    )
+        IncentiveVoting(_tokenLocker, _initialRewardsPerSecond, _quorumPct, _tokenApprovalMinWeight)
+    {
+
+    }
+
+    function approveTokens(address[] calldata _tokens) external onlyOwner {
+        for (uint i = 0; i < _tokens.length; i++) {
+            _approveToken(_tokens[i]);
+        }
+    }
+}
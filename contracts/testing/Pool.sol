@@ -1,17 +1,36 @@
-
 pragma solidity 0.8.12;
 
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+
 
+// Minimal stand-in for a factory pool. Every coin balance held by the pool is
+// treated as admin fees, and `withdraw_admin_fees` pushes them to the fee
+// receiver the same way factory pools do, without calling `depositFee`.
 contract Pool {
 
+    address[] public coins;
+    address public feeReceiver;
+
     constructor() {
 
     }
 
+    function setFeeReceiver(address _receiver) external {
+        feeReceiver = _receiver;
+    }
+
+    function addCoin(address _coin) external {
+        coins.push(_coin);
+    }
 
     function withdraw_admin_fees() external {
-       
+        if (feeReceiver == address(0)) return;
+        for (uint256 i = 0; i < coins.length; i++) {
+            IERC20 coin = IERC20(coins[i]);
+            uint256 amount = coin.balanceOf(address(this));
+            if (amount > 0) coin.transfer(feeReceiver, amount);
+        }
     }
 
 
-}
\ No newline at end of file
+}
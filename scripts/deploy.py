@@ -73,6 +73,8 @@ def main():
 
     # set addresses
     voter.setLpStaking(staking, INITIAL_POOLS, {'from': acct})
+    locker.setFeeDistributor(fee_distro, {'from': acct})
+    locker.setLpStaking(staking, {'from': acct})
     factory.set_fee_receiver(fee_distro, {'from': acct})
     token.addMinter(merkle, {'from': acct})
     token.addMinter(staking, {'from': acct})
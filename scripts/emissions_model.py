@@ -0,0 +1,910 @@
+"""
+Off-chain reference model of the emissions system.
+
+Replays the integer math of `TokenLocker`, `IncentiveVoting`, `EllipsisLpStaking`
+and `FeeDistributor` for many users at once. Per-user state is held in numpy arrays
+of python integers (`dtype=object`), so every value is exact at uint256 magnitudes
+and rounds in the same places as the contracts, while each operation is applied to
+all users in a single vectorized call.
+
+Rather than storing a 65535 week array per user as `TokenLocker` does, the model
+only keeps the current week's weight and active (not yet unlocked) balance. At each
+week boundary a user's weight falls by their active balance, which produces the same
+values as `_increaseAmount`. Legacy (EPS v1) lock weights are not modelled. Vote
+delegation is, as a per-user delegate index that takes effect from the next week.
+
+Users and tokens are referred to by integer index. Batched calls with repeated
+users behave as if each entry was submitted as a separate transaction, in order.
+"""
+import time
+
+import numpy as np
+
+WEEK = 86400 * 7
+
+# boost parameters used in `EllipsisLpStaking._updateLiquidityLimits`
+BASE_BOOST_PCT = 40
+WEIGHTED_BOOST_PCT = 60
+
+# pools updated by `EllipsisLpStaking.refreshBoosts` when a user's locks change
+MAX_BOOST_REFRESH_POOLS = 10
+
+
+def _zeros(*shape):
+    return np.zeros(shape, dtype=object)
+
+
+def _as_array(values, size=None):
+    values = np.array(values, dtype=object)
+    if size is not None and values.ndim == 0:
+        values = np.full(size, values, dtype=object)
+    return values
+
+
+def _validate_unique(users):
+    # batched state updates use fancy indexing, which does not accumulate repeated indices
+    if len(np.unique(users)) != len(users):
+        raise ValueError("Each user may only appear once per call")
+
+
+def _exclusive_cumsum(values):
+    totals = np.cumsum(values)
+    return totals - values
+
+
+def _accrue_rewards(acc, acc_week, supply, rewards_per_second, week, duration):
+    # equivalent to `EllipsisLpStaking._accrueRewards`
+    if supply == 0:
+        return acc, acc_week
+    increase = duration * rewards_per_second * 10 ** 12 // supply
+    return acc + increase, acc_week + increase * week
+
+
+class TokenLockerModel:
+    """
+    Model of `TokenLocker` lock weights.
+
+    The model begins at `week`, relative to the locker's `startTime`, and is
+    moved forward one week at a time by `advance`.
+    """
+
+    def __init__(self, num_users, week=0, max_lock_weeks=52):
+        self.week = week
+        self.max_lock_weeks = max_lock_weeks
+        # lock weight of each user in the current week
+        self.weight = _zeros(num_users)
+        # tokens held in locks that have not yet reached their unlock week
+        self.active = _zeros(num_users)
+        self.total_weight = 0
+        self.total_active = 0
+        # week -> tokens unlocking for each user in that week
+        self.unlocks = {}
+        # week -> total lock weight, recorded for the current and all passed weeks
+        self.weekly_total_weight = {}
+        # index of the user receiving each user's vote weight, -1 if not delegated.
+        # `setDelegate` takes effect from the following week, so changes made in the
+        # current week are held in `next_delegate` until `advance`.
+        self.delegate = np.full(num_users, -1)
+        self.next_delegate = self.delegate.copy()
+
+    def _unlocks(self, week):
+        if week not in self.unlocks:
+            self.unlocks[week] = _zeros(len(self.weight))
+        return self.unlocks[week]
+
+    def user_weight(self, users=None):
+        if users is None:
+            return self.weight.copy()
+        return self.weight[users]
+
+    def vote_weight(self, users=None):
+        """
+        Equivalent to `TokenLocker.userVoteWeight`. Includes weight delegated to each
+        user, and excludes the user's own weight if it is delegated.
+        """
+        delegated = self.delegate >= 0
+        weight = np.where(delegated, 0, self.weight)
+        np.add.at(weight, self.delegate[delegated], self.weight[delegated])
+        if users is None:
+            return weight
+        return weight[users]
+
+    def set_delegate(self, users, delegates):
+        """
+        Equivalent to each user calling `TokenLocker.setDelegate`, in order. A
+        delegate of -1 removes the delegation.
+        """
+        users = np.asarray(users)
+        delegates = np.broadcast_to(np.asarray(delegates), users.shape)
+        next_delegate = self.next_delegate.copy()
+        for user, delegate in zip(users, delegates):
+            if user == delegate:
+                raise ValueError("Cannot delegate to self")
+            if next_delegate[user] == delegate:
+                raise ValueError("Delegate unchanged")
+            next_delegate[user] = delegate
+        self.next_delegate = next_delegate
+
+    def lock(self, users, amounts, weeks):
+        """
+        Create new locks, equivalent to `TokenLocker.lock(user, amount, weeks)`.
+        Returns the weight added for each user.
+        """
+        users = np.asarray(users)
+        amounts = _as_array(amounts, len(users))
+        weeks = np.broadcast_to(np.asarray(weeks), users.shape)
+        if np.any(weeks <= 0):
+            raise ValueError("Min 1 week")
+        if np.any(weeks > self.max_lock_weeks):
+            raise ValueError("Exceeds MAX_LOCK_WEEKS")
+        if np.any(amounts <= 0):
+            raise ValueError("Amount must be nonzero")
+
+        added = amounts * weeks
+        np.add.at(self.weight, users, added)
+        np.add.at(self.active, users, amounts)
+        self.total_weight += added.sum()
+        self.total_active += amounts.sum()
+        for length in np.unique(weeks):
+            mask = weeks == length
+            np.add.at(self._unlocks(self.week + int(length)), users[mask], amounts[mask])
+        self.weekly_total_weight[self.week] = self.total_weight
+        return added
+
+    def extend_lock(self, users, amounts, weeks, new_weeks):
+        """
+        Extend existing locks, equivalent to `TokenLocker.extendLock(amount, weeks, new_weeks)`
+        called by each user. Returns the weight added for each user.
+        """
+        users = np.asarray(users)
+        amounts = _as_array(amounts, len(users))
+        weeks = np.broadcast_to(np.asarray(weeks), users.shape)
+        new_weeks = np.broadcast_to(np.asarray(new_weeks), users.shape)
+        if np.any(weeks <= 0):
+            raise ValueError("Min 1 week")
+        if np.any(new_weeks > self.max_lock_weeks):
+            raise ValueError("Exceeds MAX_LOCK_WEEKS")
+        if np.any(weeks >= new_weeks):
+            raise ValueError("newWeeks must be greater than weeks")
+        if np.any(amounts <= 0):
+            raise ValueError("Amount must be nonzero")
+
+        # validate every source lock before modifying state
+        for length in np.unique(weeks):
+            mask = weeks == length
+            moved = _zeros(len(self.weight))
+            np.add.at(moved, users[mask], amounts[mask])
+            if np.any(moved > self.unlocks.get(self.week + int(length), 0)):
+                raise ValueError("Extended amount exceeds existing lock")
+
+        added = amounts * (new_weeks - weeks)
+        np.add.at(self.weight, users, added)
+        self.total_weight += added.sum()
+        for length in np.unique(weeks):
+            mask = weeks == length
+            np.subtract.at(self._unlocks(self.week + int(length)), users[mask], amounts[mask])
+        for length in np.unique(new_weeks):
+            mask = new_weeks == length
+            np.add.at(self._unlocks(self.week + int(length)), users[mask], amounts[mask])
+        self.weekly_total_weight[self.week] = self.total_weight
+        return added
+
+    def advance(self):
+        """
+        Move to the following week. Each active lock is one week closer to
+        unlocking, so every user's weight falls by their active balance.
+        """
+        self.weekly_total_weight[self.week] = self.total_weight
+        self.weight = self.weight - self.active
+        self.total_weight -= self.total_active
+        self.week += 1
+        self.weekly_total_weight[self.week] = self.total_weight
+        self.delegate = self.next_delegate.copy()
+
+        expired = self.unlocks.pop(self.week, None)
+        if expired is not None:
+            self.active = self.active - expired
+            self.total_active -= expired.sum()
+
+
+class IncentiveVotingModel:
+    """
+    Model of emissions voting in `IncentiveVoting`. Token approval votes are not
+    modelled, every token index is treated as approved.
+    """
+
+    def __init__(self, num_users, num_tokens, initial_rewards_per_second):
+        self.num_users = num_users
+        self.num_tokens = num_tokens
+        # one value for each 4 week epoch, decaying by 1% per epoch
+        self.rewards_per_second = [initial_rewards_per_second]
+        # week -> votes for each token
+        self.token_votes = {}
+        # week -> total votes
+        self.total_votes = {}
+        # votes used by each user in `self._user_votes_week`
+        self._user_votes = _zeros(num_users)
+        self._user_votes_week = None
+
+    def rewards_per_second_at(self, week):
+        """
+        Return the value of `rewardsPerSecond[week // 4]`.
+        """
+        while len(self.rewards_per_second) <= week // 4:
+            self.rewards_per_second.append(self.rewards_per_second[-1] * 99 // 100)
+        return self.rewards_per_second[week // 4]
+
+    def user_votes(self, week):
+        if week != self._user_votes_week:
+            return _zeros(self.num_users)
+        return self._user_votes.copy()
+
+    def available_votes(self, locker, users=None):
+        used = self.user_votes(locker.week)
+        if users is not None:
+            used = used[users]
+        return locker.vote_weight(users) // 10 ** 18 - used
+
+    def vote(self, locker, users, tokens, votes):
+        """
+        Allocate votes, equivalent to each user calling `IncentiveVoting.vote([token], [votes])`.
+        """
+        week = locker.week
+        users = np.asarray(users)
+        tokens = np.broadcast_to(np.asarray(tokens), users.shape)
+        votes = _as_array(votes, len(users))
+        if np.any((tokens < 0) | (tokens >= self.num_tokens)):
+            raise ValueError("Not approved for incentives")
+
+        used = self.user_votes(week)
+        np.add.at(used, users, votes)
+        if np.any(used[users] > locker.vote_weight(users) // 10 ** 18):
+            raise ValueError("Available votes exceeded")
+
+        self.rewards_per_second_at(week)
+        self._user_votes = used
+        self._user_votes_week = week
+        if week not in self.token_votes:
+            self.token_votes[week] = _zeros(self.num_tokens)
+            self.total_votes[week] = 0
+        np.add.at(self.token_votes[week], tokens, votes)
+        self.total_votes[week] += votes.sum()
+
+    def get_rewards_per_second(self, token, week):
+        """
+        Equivalent to `IncentiveVoting.getRewardsPerSecond`.
+        """
+        if week == 0:
+            return 0
+        week -= 1
+        votes = self.token_votes.get(week)
+        if votes is None or votes[token] == 0:
+            return 0
+        return self.rewards_per_second_at(week) * votes[token] // self.total_votes[week]
+
+
+class LpStakingModel:
+    """
+    Model of emissions and boosts in `EllipsisLpStaking`. Rewards minted to each
+    user are tracked in `minted`, LP balances held by the contract in `lp_balance`.
+
+    Pool values are lists indexed by token. `reward_per_share` arguments are pairs
+    of (`accRewardPerShare`, `accWeekRewardPerShare`).
+    """
+
+    def __init__(self, num_users, num_tokens, start_time, max_mintable):
+        self.start_time = start_time
+        self.max_mintable = max_mintable
+        self.minted_tokens = 0
+
+        self.deposit_amount = _zeros(num_users, num_tokens)
+        self.adjusted_amount = _zeros(num_users, num_tokens)
+        self.reward_debt = _zeros(num_users, num_tokens)
+        self.claimable = _zeros(num_users, num_tokens)
+        self.boost_slope = _zeros(num_users, num_tokens)
+        self.boost_start = _zeros(num_users, num_tokens)
+        self.boost_end = _zeros(num_users, num_tokens)
+        self.minted = _zeros(num_users)
+
+        self.lp_balance = [0] * num_tokens
+        self.adjusted_supply = [0] * num_tokens
+        self.rewards_per_second = [0] * num_tokens
+        self.last_reward_time = [0] * num_tokens
+        self.acc_reward_per_share = [0] * num_tokens
+        self.acc_week_reward_per_share = [0] * num_tokens
+        self.pool_boost_slope = [0] * num_tokens
+        # week -> sum of boost slopes ending in that week
+        self.boost_slope_changes = [{} for i in range(num_tokens)]
+        # week -> reward per share at the start of a week in which boosts end
+        self.boost_end_reward_per_share = [{} for i in range(num_tokens)]
+        # week -> (accRewardPerShare at the end of the week, rewards emitted in the week)
+        self.weekly_pool_data = [{} for i in range(num_tokens)]
+        # week -> seconds without adjusted supply, only tracked until the week has passed
+        self.idle_time = [{} for i in range(num_tokens)]
+
+    def _get_week(self, now):
+        return (now - self.start_time) // WEEK
+
+    def add_pool(self, token, now):
+        if self.last_reward_time[token] != 0:
+            raise ValueError("Pool already added")
+        self.last_reward_time[token] = now
+        self.idle_time[token][self._get_week(now)] = (now - self.start_time) % WEEK
+
+    def _get_reward_data(self, voter, token, now):
+        # returns the updated (adjusted_supply, boost_slope, rewards_per_second, reward_per_share),
+        # the reward per share at the start of each week since the last update and the
+        # rewards emitted in each of the weeks that passed
+        supply = self.adjusted_supply[token]
+        boost_slope = self.pool_boost_slope[token]
+        acc = self.acc_reward_per_share[token]
+        acc_week = self.acc_week_reward_per_share[token]
+        current_week = self._get_week(now)
+        last_reward_time = self.last_reward_time[token]
+        reward_week = self._get_week(last_reward_time)
+        rewards_per_second = self.rewards_per_second[token]
+        idle_time = self.idle_time[token].get(reward_week, 0)
+        if supply == 0:
+            weekly = [(acc, acc_week)] * (current_week - reward_week)
+            emissions = [0] * len(weekly)
+            if weekly:
+                active_time = (last_reward_time - self.start_time) % WEEK - idle_time
+                emissions[0] = rewards_per_second * active_time
+            rewards_per_second = voter.get_rewards_per_second(token, current_week)
+            return (supply, boost_slope, rewards_per_second, (acc, acc_week)), weekly, emissions
+
+        weekly = []
+        emissions = []
+        while reward_week < current_week:
+            next_reward_time = (reward_week + 1) * WEEK + self.start_time
+            acc, acc_week = _accrue_rewards(
+                acc, acc_week, supply, rewards_per_second, reward_week, next_reward_time - last_reward_time
+            )
+            emissions.append(rewards_per_second * (WEEK - (0 if emissions else idle_time)))
+            reward_week += 1
+            supply -= boost_slope
+            boost_slope -= self.boost_slope_changes[token].get(reward_week, 0)
+            rewards_per_second = voter.get_rewards_per_second(token, reward_week)
+            weekly.append((acc, acc_week))
+            last_reward_time = next_reward_time
+
+        acc, acc_week = _accrue_rewards(
+            acc, acc_week, supply, rewards_per_second, current_week, now - last_reward_time
+        )
+        return (supply, boost_slope, rewards_per_second, (acc, acc_week)), weekly, emissions
+
+    def update_pool(self, voter, token, now):
+        last_reward_time = self.last_reward_time[token]
+        if last_reward_time == 0:
+            raise ValueError("Invalid pool")
+        if now <= last_reward_time:
+            return self.acc_reward_per_share[token], self.acc_week_reward_per_share[token]
+        pool, weekly, emissions = self._get_reward_data(voter, token, now)
+        week = self._get_week(last_reward_time)
+        for reward_per_share, emitted in zip(weekly, emissions):
+            self.weekly_pool_data[token][week] = (reward_per_share[0], emitted)
+            week += 1
+            if self.boost_slope_changes[token].get(week, 0) > 0:
+                self.boost_end_reward_per_share[token][week] = reward_per_share
+        if self.adjusted_supply[token] == 0:
+            week_start = week * WEEK + self.start_time
+            idle = now - max(last_reward_time, week_start)
+            self.idle_time[token][week] = self.idle_time[token].get(week, 0) + idle
+        supply, boost_slope, rewards_per_second, reward_per_share = pool
+        self.adjusted_supply[token] = supply
+        self.pool_boost_slope[token] = boost_slope
+        self.rewards_per_second[token] = rewards_per_second
+        self.acc_reward_per_share[token], self.acc_week_reward_per_share[token] = reward_per_share
+        self.last_reward_time[token] = now
+        return reward_per_share
+
+    def adjusted_balance(self, users, token, week):
+        """
+        Equivalent to `adjustedBalance(token, user)` for each user, in `week`.
+        """
+        end = self.boost_end[users, token]
+        elapsed = np.minimum(end, week) - self.boost_start[users, token]
+        return self.adjusted_amount[users, token] - self.boost_slope[users, token] * elapsed
+
+    def _accrued_reward(self, users, token, reward_per_share, end_reward_per_share):
+        # `end_reward_per_share` holds a pair of arrays, the reward per share at the
+        # start of each user's `boost_end` or the current value if it has not passed
+        slope = self.boost_slope[users, token]
+        end = self.boost_end[users, token]
+        base = self.adjusted_amount[users, token] - slope * (end - self.boost_start[users, token])
+        end_acc, end_acc_week = end_reward_per_share
+        return (base * reward_per_share[0] + slope * (end * end_acc - end_acc_week)) // 10 ** 12
+
+    def _end_reward_per_share(self, users, token, reward_per_share, week, weekly=(), last_week=None):
+        end_acc = np.full(len(users), reward_per_share[0], dtype=object)
+        end_acc_week = np.full(len(users), reward_per_share[1], dtype=object)
+        end = self.boost_end[users, token]
+        ended = (self.boost_slope[users, token] > 0) & (end <= week)
+        for i in np.flatnonzero(ended):
+            if weekly and end[i] > last_week:
+                end_acc[i], end_acc_week[i] = weekly[end[i] - last_week - 1]
+            else:
+                end_acc[i], end_acc_week[i] = self.boost_end_reward_per_share[token][end[i]]
+        return end_acc, end_acc_week
+
+    def _pending(self, users, token, reward_per_share, now):
+        end_reward_per_share = self._end_reward_per_share(
+            users, token, reward_per_share, self._get_week(now)
+        )
+        return (
+            self._accrued_reward(users, token, reward_per_share, end_reward_per_share)
+            - self.reward_debt[users, token]
+        )
+
+    def _remove_adjusted_balance(self, users, token, week):
+        slope = self.boost_slope[users, token]
+        end = self.boost_end[users, token]
+        self.adjusted_supply[token] -= self.adjusted_balance(users, token, week).sum()
+        decaying = (slope > 0) & (end > week)
+        self.pool_boost_slope[token] -= slope[decaying].sum()
+        changes = self.boost_slope_changes[token]
+        for end_week, amount in zip(end[decaying], slope[decaying]):
+            changes[end_week] -= amount
+
+    def _update_liquidity_limits(
+        self, locker, users, token, reward_per_share, lp_supply, now, total_weight=None
+    ):
+        # `lp_supply` is the contract's LP balance at the time of each user's update, and
+        # `total_weight` the total lock weight if it differs from `locker.total_weight`
+        week = self._get_week(now)
+        deposits = self.deposit_amount[users, token]
+        adjusted = deposits * BASE_BOOST_PCT // 100
+        slope = _zeros(len(users))
+        boost_weeks = _zeros(len(users))
+        weights = locker.weight[users]
+        if total_weight is None:
+            total_weight = locker.total_weight
+        boosted = weights > 0
+        if np.any(boosted):
+            if np.ndim(lp_supply):
+                lp_supply = lp_supply[boosted]
+            if np.ndim(total_weight):
+                total_weight = total_weight[boosted]
+            boost = lp_supply * weights[boosted] // total_weight * WEIGHTED_BOOST_PCT // 100
+            boost = np.minimum(boost, deposits[boosted] - adjusted[boosted])
+            # weight falls by the active balance each week, the boost decays to zero
+            # over the weeks this would take and is rounded to a multiple of them
+            decay = locker.active[users][boosted]
+            weeks = np.where(decay > 0, weights[boosted] // np.maximum(decay, 1), 1)
+            boost_weeks[boosted] = weeks
+            slope[boosted] = boost // weeks
+            adjusted[boosted] += slope[boosted] * weeks
+
+        self._remove_adjusted_balance(users, token, week)
+        self.adjusted_supply[token] += adjusted.sum()
+        self.pool_boost_slope[token] += slope.sum()
+        changes = self.boost_slope_changes[token]
+        for end, amount in zip(week + boost_weeks[slope > 0], slope[slope > 0]):
+            changes[end] = changes.get(end, 0) + amount
+
+        self.adjusted_amount[users, token] = adjusted
+        self.boost_slope[users, token] = slope
+        self.boost_start[users, token] = week
+        self.boost_end[users, token] = week + boost_weeks
+        current = tuple(np.full(len(users), i, dtype=object) for i in reward_per_share)
+        self.reward_debt[users, token] = self._accrued_reward(users, token, reward_per_share, current)
+
+    def _mint_rewards(self, users, amounts):
+        # each user's mint is capped by the tokens remaining when their call executes
+        remaining = self.max_mintable - self.minted_tokens - _exclusive_cumsum(amounts)
+        amounts = np.maximum(np.minimum(amounts, remaining), 0)
+        self.minted_tokens += amounts.sum()
+        np.add.at(self.minted, users, amounts)
+        return amounts
+
+    def deposit(self, locker, voter, users, token, amounts, claim_rewards, now):
+        """
+        Equivalent to each user calling `deposit(token, amount, claim_rewards)`.
+        Returns the amount of rewards minted to each user.
+        """
+        users = np.asarray(users)
+        _validate_unique(users)
+        amounts = _as_array(amounts, len(users))
+        if np.any(amounts <= 0):
+            raise ValueError("Cannot deposit zero")
+        reward_per_share = self.update_pool(voter, token, now)
+        # deposits only process pending rewards for users with an existing adjusted balance
+        minted = _zeros(len(users))
+        staked = self.adjusted_amount[users, token] > 0
+        if np.any(staked):
+            minted[staked] = self._claim_pending(
+                users[staked], token, reward_per_share, claim_rewards, now
+            )
+
+        lp_supply = self.lp_balance[token] + np.cumsum(amounts)
+        self.lp_balance[token] = lp_supply[-1]
+        self.deposit_amount[users, token] += amounts
+        self._update_liquidity_limits(locker, users, token, reward_per_share, lp_supply, now)
+        return minted
+
+    def withdraw(self, locker, voter, users, token, amounts, claim_rewards, now):
+        """
+        Equivalent to each user calling `withdraw(token, amount, claim_rewards)`.
+        Returns the amount of rewards minted to each user.
+        """
+        users = np.asarray(users)
+        _validate_unique(users)
+        amounts = _as_array(amounts, len(users))
+        if np.any(amounts <= 0):
+            raise ValueError("Cannot withdraw zero")
+        if np.any(self.deposit_amount[users, token] < amounts):
+            raise ValueError("withdraw: not good")
+        reward_per_share = self.update_pool(voter, token, now)
+        minted = self._claim_pending(users, token, reward_per_share, claim_rewards, now)
+
+        # LP tokens are transferred out after the boost is updated
+        lp_supply = self.lp_balance[token] - _exclusive_cumsum(amounts)
+        self.lp_balance[token] -= amounts.sum()
+        self.deposit_amount[users, token] -= amounts
+        self._update_liquidity_limits(locker, users, token, reward_per_share, lp_supply, now)
+        return minted
+
+    def _claim_pending(self, users, token, reward_per_share, claim_rewards, now):
+        pending = self._pending(users, token, reward_per_share, now)
+        if claim_rewards:
+            pending = pending + self.claimable[users, token]
+            self.claimable[users, token] = 0
+            return self._mint_rewards(users, pending)
+        self.claimable[users, token] += pending
+        return _zeros(len(users))
+
+    def claim(self, locker, voter, users, tokens, now):
+        """
+        Equivalent to each user calling `claim(user, tokens)`.
+        Returns the amount of rewards minted to each user.
+        """
+        users = np.asarray(users)
+        _validate_unique(users)
+        pending = _zeros(len(users))
+        for token in tokens:
+            reward_per_share = self.update_pool(voter, token, now)
+            pending += self.claimable[users, token] + self._pending(users, token, reward_per_share, now)
+            self.claimable[users, token] = 0
+            lp_supply = self.lp_balance[token]
+            self._update_liquidity_limits(locker, users, token, reward_per_share, lp_supply, now)
+        return self._mint_rewards(users, pending)
+
+    def update_user_boosts(self, locker, voter, users, tokens, now):
+        """
+        Equivalent to calling `updateUserBoosts(user, tokens)` for each user.
+        """
+        users = np.asarray(users)
+        _validate_unique(users)
+        for token in tokens:
+            reward_per_share = self.update_pool(voter, token, now)
+            self.claimable[users, token] += self._pending(users, token, reward_per_share, now)
+            lp_supply = self.lp_balance[token]
+            self._update_liquidity_limits(locker, users, token, reward_per_share, lp_supply, now)
+
+    def refresh_boosts(self, locker, voter, users, total_weight, now):
+        """
+        Equivalent to `TokenLocker` calling `refreshBoosts(user)` after each user's
+        lock changes, where `total_weight` is the total lock weight at that point.
+        """
+        users = np.asarray(users)
+        num_pools = (self.deposit_amount[users] > 0).sum(axis=1)
+        _validate_unique(users[num_pools > 0])
+        # the contract refreshes pools in deposit order, which is not modelled
+        if np.any(num_pools > MAX_BOOST_REFRESH_POOLS):
+            raise ValueError("Deposits exceed MAX_BOOST_REFRESH_POOLS")
+        total_weight = np.asarray(total_weight)
+        for token in range(len(self.lp_balance)):
+            staked = self.deposit_amount[users, token] > 0
+            if not np.any(staked):
+                continue
+            token_users = users[staked]
+            reward_per_share = self.update_pool(voter, token, now)
+            self.claimable[token_users, token] += self._pending(token_users, token, reward_per_share, now)
+            self._update_liquidity_limits(
+                locker,
+                token_users,
+                token,
+                reward_per_share,
+                self.lp_balance[token],
+                now,
+                total_weight[staked],
+            )
+
+    def claimable_reward(self, voter, users, token, now):
+        """
+        Equivalent to `claimableReward(user, [token])` for each user.
+        """
+        users = np.asarray(users)
+        pool, weekly, _ = self._get_reward_data(voter, token, now)
+        reward_per_share = pool[3]
+        week = self._get_week(now)
+        end_reward_per_share = self._end_reward_per_share(
+            users, token, reward_per_share, week, weekly, week - len(weekly)
+        )
+        return (
+            self.claimable[users, token]
+            + self._accrued_reward(users, token, reward_per_share, end_reward_per_share)
+            - self.reward_debt[users, token]
+        )
+
+
+    def pool_history(self, voter, token, start_week, end_week, now):
+        """
+        Equivalent to `getPoolHistory(token, start_week, end_week)`.
+        """
+        current_week = self._get_week(now)
+        if end_week > current_week:
+            raise ValueError("Week has not passed")
+        _, weekly, emissions = self._get_reward_data(voter, token, now)
+        first_pending = current_week - len(emissions)
+        history = []
+        for week in range(start_week, end_week):
+            if week < first_pending:
+                history.append(self.weekly_pool_data[token].get(week, (0, 0)))
+            else:
+                i = week - first_pending
+                history.append((weekly[i][0], emissions[i]))
+        return history
+
+
+class FeeDistributorModel:
+    """
+    Model of `FeeDistributor`. Fee tokens may be any hashable key.
+
+    Rather than iterating over weeks when a user claims, each user's share of a
+    week's fees is computed for all users at once when the week is finalized.
+    """
+
+    def __init__(self, num_users, start_time):
+        self.num_users = num_users
+        self.start_time = start_time
+        # fee token -> week -> total amount received that week
+        self.weekly_fee_amounts = {}
+        # fee token -> sum of each user's share of all finalized weeks except the last
+        self.earned = {}
+        # fee token -> each user's share of the most recently finalized week
+        self.streaming = {}
+        # fee token -> amount claimed by each user
+        self.claimed = {}
+        # users with a nonzero share of the most recently finalized week
+        self._weighted = np.array([], dtype=int)
+        # fee token -> users whose most recent claim happened during week 0. The stream
+        # stored by that claim begins at `startTime`, so unless the user claims again
+        # during week 1, `_getClaimable` skips over week 0 and its fees are forfeited.
+        self._week_zero_claims = {}
+
+    def deposit_fee(self, token, amount, week):
+        if amount > 0:
+            if token not in self.weekly_fee_amounts:
+                self.weekly_fee_amounts[token] = {}
+                self.earned[token] = _zeros(self.num_users)
+                self.streaming[token] = _zeros(self.num_users)
+                self.claimed[token] = _zeros(self.num_users)
+            weekly = self.weekly_fee_amounts[token]
+            weekly[week] = weekly.get(week, 0) + amount
+
+    def finalize_week(self, locker):
+        """
+        Calculate each user's share of the fees for the locker's current week.
+        Must be called prior to `locker.advance()`.
+        """
+        week = locker.week
+        total_weight = locker.total_weight
+        # only users with lock weight receive a share, which keeps each update sparse
+        previous = self._weighted
+        self._weighted = np.flatnonzero(locker.weight)
+        weights = locker.weight[self._weighted]
+        for token, weekly in self.weekly_fee_amounts.items():
+            streaming = self.streaming[token]
+            if week == 1 and token in self._week_zero_claims:
+                streaming[self._week_zero_claims.pop(token)] = 0
+            self.earned[token][previous] += streaming[previous]
+            streaming[previous] = 0
+            amount = weekly.get(week, 0)
+            if amount and total_weight:
+                streaming[self._weighted] = amount * weights // total_weight
+
+    def claimable(self, token, now, users=None):
+        """
+        Equivalent to `claimable(user, [token])` for each user.
+        """
+        if users is None:
+            users = slice(None)
+        if token not in self.weekly_fee_amounts:
+            return _zeros(self.num_users)[users]
+        week = (now - self.start_time) // WEEK
+        if week == 0:
+            return _zeros(self.num_users)[users]
+        elapsed = now - self.start_time - week * WEEK
+        streamed = self.streaming[token][users] * elapsed // WEEK
+        return self.earned[token][users] + streamed - self.claimed[token][users]
+
+    def claim(self, token, now, users):
+        users = np.asarray(users)
+        _validate_unique(users)
+        week = (now - self.start_time) // WEEK
+        if week < 2:
+            forfeits = self._week_zero_claims.setdefault(token, np.zeros(self.num_users, dtype=bool))
+            forfeits[users] = week == 0
+        amounts = self.claimable(token, now, users)
+        if token in self.claimed:
+            self.claimed[token][users] += amounts
+        return amounts
+
+
+class EmissionsModel:
+    """
+    Combined model of the protocol, advancing the sub-models together in time.
+
+    `start_time` is the protocol start time shared by every contract and `now` the
+    current timestamp. Calls should be made in the same order, and with the same
+    timestamps, as the transactions they represent.
+    """
+
+    def __init__(
+        self,
+        num_users,
+        num_tokens,
+        start_time,
+        now,
+        initial_rewards_per_second,
+        max_mintable,
+        max_lock_weeks=52,
+    ):
+        if now < start_time:
+            raise ValueError("Cannot model prior to start_time")
+        self.start_time = start_time
+        self.now = now
+        self.locker = TokenLockerModel(num_users, self.get_week(), max_lock_weeks)
+        self.voter = IncentiveVotingModel(num_users, num_tokens, initial_rewards_per_second)
+        self.lp_staking = LpStakingModel(num_users, num_tokens, start_time, max_mintable)
+        self.fee_distributor = FeeDistributorModel(num_users, start_time)
+
+    def get_week(self):
+        return (self.now - self.start_time) // WEEK
+
+    def set_time(self, timestamp):
+        if timestamp < self.now:
+            raise ValueError("Cannot move backwards in time")
+        target = (timestamp - self.start_time) // WEEK
+        while self.locker.week < target:
+            self.fee_distributor.finalize_week(self.locker)
+            self.locker.advance()
+        self.now = timestamp
+
+    def sleep(self, seconds):
+        self.set_time(self.now + seconds)
+
+    def add_pools(self, tokens):
+        for token in tokens:
+            self.lp_staking.add_pool(token, self.now)
+
+    def lock(self, users, amounts, weeks):
+        total_weight = self.locker.total_weight
+        added = self.locker.lock(users, amounts, weeks)
+        self._refresh_boosts(users, total_weight + np.cumsum(added))
+
+    def extend_lock(self, users, amounts, weeks, new_weeks):
+        total_weight = self.locker.total_weight
+        added = self.locker.extend_lock(users, amounts, weeks, new_weeks)
+        self._refresh_boosts(users, total_weight + np.cumsum(added))
+
+    def _refresh_boosts(self, users, total_weight):
+        # each lock refreshes the user's boosts before the next user's lock is applied
+        self.lp_staking.refresh_boosts(self.locker, self.voter, users, total_weight, self.now)
+
+    def set_delegate(self, users, delegates):
+        self.locker.set_delegate(users, delegates)
+
+    def vote(self, users, tokens, votes):
+        self.voter.vote(self.locker, users, tokens, votes)
+
+    def deposit(self, users, token, amounts, claim_rewards=False):
+        return self.lp_staking.deposit(
+            self.locker, self.voter, users, token, amounts, claim_rewards, self.now
+        )
+
+    def withdraw(self, users, token, amounts, claim_rewards=False):
+        return self.lp_staking.withdraw(
+            self.locker, self.voter, users, token, amounts, claim_rewards, self.now
+        )
+
+    def claim_rewards(self, users, tokens):
+        return self.lp_staking.claim(self.locker, self.voter, users, tokens, self.now)
+
+    def update_user_boosts(self, users, tokens):
+        self.lp_staking.update_user_boosts(self.locker, self.voter, users, tokens, self.now)
+
+    def claimable_reward(self, users, token):
+        return self.lp_staking.claimable_reward(self.voter, users, token, self.now)
+
+    def pool_history(self, token, start_week, end_week):
+        return self.lp_staking.pool_history(self.voter, token, start_week, end_week, self.now)
+
+    def deposit_fee(self, token, amount):
+        self.fee_distributor.deposit_fee(token, amount, self.get_week())
+
+    def claim_fees(self, users, token):
+        return self.fee_distributor.claim(token, self.now, users)
+
+    def claimable_fees(self, users, token):
+        return self.fee_distributor.claimable(token, self.now, users)
+
+
+def simulate(
+    num_users=100_000,
+    num_weeks=200,
+    num_tokens=10,
+    num_fee_tokens=2,
+    seed=0,
+    start_time=1649289600,
+    initial_rewards_per_second=2893518518518518518 * 88,
+    max_mintable=1_500_000_000 * 10 ** 18 * 88 // 2,
+):
+    """
+    Simulate a randomly generated population of users.
+
+    Each week a share of users lock or extend, every user with lock weight votes
+    for their preferred pool, a share of stakers claim emissions or update their
+    boosts and a share of lockers claim fees.
+
+    Returns the final `EmissionsModel`.
+    """
+    rng = np.random.default_rng(seed)
+    model = EmissionsModel(
+        num_users, num_tokens, start_time, start_time, initial_rewards_per_second, max_mintable
+    )
+    model.add_pools(range(num_tokens))
+    users = np.arange(num_users)
+    preferred = rng.integers(0, num_tokens, num_users)
+
+    def random_amounts(size, low, high):
+        return _as_array([int(i) * 10 ** 18 for i in rng.integers(low, high, size)])
+
+    model.lock(users, random_amounts(num_users, 1, 1_000_000), rng.integers(1, 53, num_users))
+    for token in range(num_tokens):
+        stakers = users[preferred == token]
+        if len(stakers):
+            model.deposit(stakers, token, random_amounts(len(stakers), 1, 100_000))
+
+    for week in range(num_weeks):
+        model.set_time(start_time + week * WEEK + 3600)
+
+        lockers = users[rng.random(num_users) < 0.02]
+        if len(lockers):
+            model.lock(lockers, random_amounts(len(lockers), 1, 100_000), rng.integers(1, 53, len(lockers)))
+
+        holders = np.flatnonzero(model.locker.weight)
+        available = model.voter.available_votes(model.locker, holders)
+        voters = holders[available > 0]
+        if len(voters):
+            model.vote(voters, preferred[voters], available[available > 0])
+
+        for token in range(num_fee_tokens):
+            model.deposit_fee(token, int(rng.integers(1, 1_000_000)) * 10 ** 18)
+
+        model.sleep(86400)
+        claimers = users[rng.random(num_users) < 0.05]
+        for token in range(num_tokens):
+            token_claimers = claimers[preferred[claimers] == token]
+            if len(token_claimers):
+                model.claim_rewards(token_claimers, [token])
+        for token in range(num_fee_tokens):
+            model.claim_fees(claimers, token)
+
+    return model
+
+
+def main(num_users=100_000, num_weeks=200):
+    start = time.time()
+    model = simulate(int(num_users), int(num_weeks))
+    elapsed = time.time() - start
+    print(f"Simulated {num_users} users over {num_weeks} weeks in {elapsed:.1f}s")
+    print(f"Total lock weight: {model.locker.total_weight}")
+    print(f"Emissions minted: {model.lp_staking.minted_tokens}")
+    for token, claimed in model.fee_distributor.claimed.items():
+        print(f"Fees claimed (token {token}): {claimed.sum()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import json
+import sqlite3
+from dataclasses import dataclass, field
+
+from brownie import Contract, Multicall, accounts, network
+from eth_utils import to_checksum_address
+
+from scripts.indexer import DEPLOYMENTS, WEEK
+from scripts.merkle import build_fee_distribution
+from scripts.snapshot import aggregate
+
+
+def _key(user, token):
+    return to_checksum_address(str(user)), to_checksum_address(str(token))
+
+
+@dataclass
+class Settlement:
+    """
+    Cumulative fee entitlements for all weeks prior to `week`, as posted to
+    `FeeDistributor.setSettlementRoot`. `amounts` maps (user, fee token) to the
+    user's total entitlement and `proofs` maps the same keys to merkle proofs.
+    """
+    week: int
+    amounts: dict
+    root: bytes = None
+    proofs: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.root is None and self.amounts:
+            self.root, claims = build_fee_distribution(self.amounts)
+            self.proofs = {key: proof for key, (_, proof) in claims.items()}
+
+    def amount_of(self, user, token):
+        return self.amounts.get(_key(user, token), 0)
+
+    def claim_args(self, user, token):
+        """
+        Return the arguments for `FeeDistributor.claimSettled`.
+        """
+        key = _key(user, token)
+        return (*key, self.amounts[key], ["0x" + i.hex() for i in self.proofs[key]])
+
+    def save(self, path):
+        data = {
+            "week": self.week,
+            "root": "0x" + self.root.hex() if self.root else None,
+            "claims": [
+                {
+                    "user": user,
+                    "token": token,
+                    "amount": str(amount),
+                    "proof": ["0x" + i.hex() for i in self.proofs[user, token]],
+                }
+                for (user, token), amount in sorted(self.amounts.items())
+            ],
+        }
+        with open(path, "w") as fp:
+            json.dump(data, fp, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fp:
+            data = json.load(fp)
+        amounts = {(i["user"], i["token"]): int(i["amount"]) for i in data["claims"]}
+        settlement = cls(data["week"], amounts)
+        if data["root"] and settlement.root != bytes.fromhex(data["root"][2:]):
+            raise ValueError(f"{path}: amounts do not match root {data['root']}")
+        return settlement
+
+
+def weekly_entitlements(
+    multicall, fee_distro, locker, users, tokens, start_week, end_week, forfeited=()
+):
+    """
+    Return a dict of {(user, token): amount} of the fees for weeks `start_week` up
+    to but not including `end_week`, using the same rounding as `FeeDistributor.claim`.
+
+    `forfeited` is a set of (user, token) keys that were claimed during the first
+    week. Such a claim records an empty stream for the first week, so `claim` never
+    pays the fees of that week and they are excluded here in the same way.
+    """
+    weeks = range(start_week, end_week)
+    calls = [(locker, "weeklyTotalWeight", (i,)) for i in weeks]
+    calls += [(fee_distro, "weeklyFeeAmounts", (token, i)) for token in tokens for i in weeks]
+    calls += [(locker, "weeklyWeightOf", (user, i)) for user in users for i in weeks]
+    results = iter(aggregate(multicall, calls))
+
+    total_weights = {i: next(results) for i in weeks}
+    fee_amounts = {(token, i): next(results) for token in tokens for i in weeks}
+    amounts = {}
+    for user in users:
+        weights = [(i, next(results)) for i in weeks]
+        for token in tokens:
+            skip_first = _key(user, token) in forfeited
+            amount = sum(
+                fee_amounts[token, i] * weight // total_weights[i]
+                for i, weight in weights
+                if weight and not (i == 0 and skip_first)
+            )
+            if amount:
+                amounts[_key(user, token)] = amount
+    return amounts
+
+
+def build_settlement(multicall, fee_distro, locker, users, week, previous=None, forfeited=()):
+    """
+    Build a `Settlement` for all weeks prior to `week`.
+
+    When `previous` is given, only weeks from `previous.week` onward are read from
+    chain and added to its amounts. `forfeited` holds the (user, token) pairs claimed
+    during the first week, see `weekly_entitlements`.
+
+    Past lock weights are deleted when a user compacts their locks, as soon as the
+    second week after them has ended (see `TokenLocker.compactionHorizon`). Each
+    settlement must therefore be built within two weeks of `previous.week`. Raises
+    if any user has already deleted a week that would be read.
+    """
+    length = fee_distro.feeTokensLength()
+    tokens = aggregate(multicall, [(fee_distro, "feeTokens", (i,)) for i in range(length)])
+    amounts = dict(previous.amounts) if previous else {}
+    start_week = previous.week if previous else 0
+    users = set(to_checksum_address(str(i)) for i in users) | set(i[0] for i in amounts)
+    forfeited = set(_key(*i) for i in forfeited)
+
+    users = sorted(users)
+    compacted = aggregate(multicall, [(locker, "compactedUntil", (i,)) for i in users])
+    lost = [user for user, week in zip(users, compacted) if week > start_week]
+    if lost:
+        raise ValueError(f"Lock weights from week {start_week} have been deleted for {lost}")
+    for key, amount in weekly_entitlements(
+        multicall, fee_distro, locker, users, tokens, start_week, week, forfeited
+    ).items():
+        amounts[key] = amounts.get(key, 0) + amount
+    return Settlement(week, amounts)
+
+
+def verify_settlement(
+    multicall, fee_distro, locker, settlement, previous=None, users=(), forfeited=()
+):
+    """
+    Recompute `settlement` from chain state and check it against the root posted
+    to `fee_distro`.
+
+    Returns a list of (user, token, expected, actual) for each amount that differs,
+    where `expected` is the recomputed value. Raises if the recomputed root does
+    not match the posted root or week.
+    """
+    users = list(users) + [i[0] for i in settlement.amounts]
+    expected = build_settlement(
+        multicall, fee_distro, locker, users, settlement.week, previous, forfeited
+    )
+    mismatches = [
+        (*key, expected.amounts.get(key, 0), settlement.amounts.get(key, 0))
+        for key in sorted(set(expected.amounts) | set(settlement.amounts))
+        if expected.amounts.get(key, 0) != settlement.amounts.get(key, 0)
+    ]
+    if fee_distro.settlementWeek() != settlement.week:
+        raise ValueError(f"Posted week {fee_distro.settlementWeek()} != {settlement.week}")
+    posted = bytes(fee_distro.settlementRoot())
+    if posted != expected.root:
+        raise ValueError(f"Posted root 0x{posted.hex()} does not match recomputed root")
+    return mismatches
+
+
+def publish(fee_distro, settlement, account):
+    return fee_distro.setSettlementRoot(settlement.root, settlement.week, {"from": account})
+
+
+def _load_contracts(multicall):
+    contracts = {
+        name: Contract.from_abi(name, address, container.abi)
+        for name, (container, address) in DEPLOYMENTS.items()
+    }
+    if multicall is None:
+        if not network.show_active().startswith("development"):
+            raise ValueError("A deployed Multicall address is required outside of development")
+        multicall = Multicall.deploy({"from": accounts[0]})
+    else:
+        multicall = Multicall.at(multicall)
+    return contracts["FeeDistributor"], contracts["TokenLocker"], multicall
+
+
+def _indexed_users(conn):
+    # everyone who has created a lock or registered their EPS v1 locks
+    query = 'SELECT "user" FROM "NewLock" UNION SELECT "user" FROM "LegacyLock"'
+    return [i[0] for i in conn.execute(query)]
+
+
+def _first_week_claims(conn):
+    # (user, token) pairs claimed before the end of the first week
+    start_time = int(conn.execute("SELECT value FROM meta WHERE key = 'start_time'").fetchone()[0])
+    query = (
+        'SELECT e."account", e."token" FROM "FeesClaimed" e '
+        "JOIN blocks b ON b.number = e.block_number WHERE b.timestamp < ?"
+    )
+    return set(conn.execute(query, (start_time + WEEK,)))
+
+
+def main(out_path, previous_path=None, db_path="indexer.db", multicall=None):
+    """
+    Compute the settlement for every fully released week and write it to `out_path`.
+    The root is posted separately by the owner of `FeeDistributor`.
+    """
+    fee_distro, locker, multicall = _load_contracts(multicall)
+    previous = Settlement.load(previous_path) if previous_path else None
+
+    # users and first week claims are taken from the event indexer, see `scripts/indexer.py`
+    conn = sqlite3.connect(db_path)
+    users = _indexed_users(conn)
+    forfeited = _first_week_claims(conn)
+
+    week = fee_distro.getWeek() - 1
+    settlement = build_settlement(multicall, fee_distro, locker, users, week, previous, forfeited)
+    settlement.save(out_path)
+    print(f"Settlement for weeks prior to {week}: root 0x{settlement.root.hex()}")
+    print(f"Wrote {len(settlement.amounts)} claims to {out_path}")
+
+
+def verify(path, previous_path=None, db_path="indexer.db", multicall=None):
+    """
+    Recompute a settlement from chain state and compare it with the posted root.
+    Run against a local node that is synced with (or forked from) the network.
+    """
+    fee_distro, locker, multicall = _load_contracts(multicall)
+    previous = Settlement.load(previous_path) if previous_path else None
+    settlement = Settlement.load(path)
+    forfeited = _first_week_claims(sqlite3.connect(db_path))
+    mismatches = verify_settlement(
+        multicall, fee_distro, locker, settlement, previous, forfeited=forfeited
+    )
+    for user, token, expected, actual in mismatches:
+        print(f"{user} {token}: expected {expected}, settlement has {actual}")
+    print(f"Posted root matches chain state for weeks prior to {settlement.week}")
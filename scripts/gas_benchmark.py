@@ -0,0 +1,398 @@
+import csv
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from brownie import CumulativeMerkleDistributor, RewardsToken, accounts, chain
+from eth_utils import to_checksum_address
+
+from scripts.fee_settlement import Settlement
+from scripts.local_deploy import advance_weeks, deploy_local
+from scripts.merkle import accumulate, build_distribution
+from scripts.packed_votes import vote_packed
+from scripts.vote_relayer import sign_vote
+
+
+BASELINE_PATH = Path(__file__).parents[1].joinpath("gas_baseline.json")
+
+# an operation fails the benchmark when it uses more than this percentage
+# of additional gas relative to the stored baseline
+TOLERANCE_PCT = 2
+
+# parameter sweeps
+LOCK_WEEKS = [1, 2, 4, 8, 13, 26, 39, 52]
+IDLE_WEEKS = [0, 1, 2, 4, 8, 13, 26, 52]
+TOKEN_COUNTS = [1, 2, 5, 10, 20, 50]
+SIGNED_VOTE_COUNTS = [1, 10, 50]
+BATCH_SIZES = [1, 10, 50]
+
+# weeks of lock data deleted by each call to `initiateExitStreamAndCompact`
+COMPACT_MAX_WEEKS = 52
+
+LOCK_AMOUNT = 10_000 * 10 ** 18
+LP_AMOUNT = 1_000 * 10 ** 18
+MERKLE_LEAVES = 1024
+
+
+def _bench_token(system, user, other):
+    eps2 = system.eps2
+    yield "EllipsisToken2.transfer", eps2.transfer(other, 10 ** 18, {"from": user})
+    yield "EllipsisToken2.approve", eps2.approve(other, 10 ** 18, {"from": user})
+    yield "EllipsisToken2.transferFrom", eps2.transferFrom(user, other, 10 ** 18, {"from": other})
+
+    system.eps._mint_for_testing(user, 10 ** 18, {"from": user})
+    system.eps.approve(eps2, 10 ** 18, {"from": user})
+    yield "EllipsisToken2.migrate", eps2.migrate(user, 10 ** 18, {"from": user})
+
+
+def _bench_locker(system, user, other):
+    locker = system.locker
+    for weeks in LOCK_WEEKS:
+        chain.revert()
+        yield f"TokenLocker.lock[weeks={weeks}]", locker.lock(user, LOCK_AMOUNT, weeks, {"from": user})
+
+    for weeks in LOCK_WEEKS[1:]:
+        chain.revert()
+        locker.lock(user, LOCK_AMOUNT, 1, {"from": user})
+        tx = locker.extendLock(LOCK_AMOUNT, 1, weeks, {"from": user})
+        yield f"TokenLocker.extendLock[weeks={weeks}]", tx
+
+    # delegation moves every future week of weight, and later locks also
+    # update the delegate's weekly totals
+    chain.revert()
+    locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+    yield "TokenLocker.setDelegate[weeks=52]", locker.setDelegate(other, {"from": user})
+    yield "TokenLocker.lock[weeks=52,delegated]", locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+
+    for idle in IDLE_WEEKS:
+        chain.revert()
+        locker.lock(user, LOCK_AMOUNT, 1, {"from": user})
+        advance_weeks(idle + 1)
+        yield f"TokenLocker.initiateExitStream[idle={idle}]", locker.initiateExitStream({"from": user})
+
+    for idle in IDLE_WEEKS:
+        chain.revert()
+        locker.lock(user, LOCK_AMOUNT, 1, {"from": user})
+        advance_weeks(idle + 1)
+        # weeks prior to the user's latest fee claim may be deleted
+        system.fee_distro.claim(user, [system.lp_tokens[0]], {"from": user})
+        tx = locker.initiateExitStreamAndCompact(COMPACT_MAX_WEEKS, {"from": user})
+        yield f"TokenLocker.initiateExitStreamAndCompact[idle={idle}]", tx
+
+    chain.revert()
+    locker.lock(user, LOCK_AMOUNT, 1, {"from": user})
+    advance_weeks(1)
+    locker.initiateExitStream({"from": user})
+    chain.sleep(86400 * 8)
+    yield "TokenLocker.withdrawExitStream", locker.withdrawExitStream({"from": user})
+
+
+def _bench_voter(system, user, other):
+    locker, voter = system.locker, system.voter
+    for count in TOKEN_COUNTS:
+        chain.revert()
+        locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        tx = voter.vote(system.lp_tokens[:count], [1] * count, {"from": user})
+        yield f"IncentiveVoting.vote[tokens={count}]", tx
+
+        chain.revert()
+        locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        tx = vote_packed(voter, system.lp_tokens[:count], [1] * count, {"from": user})
+        yield f"IncentiveVoting.votePacked[tokens={count}]", tx
+
+    for idle in IDLE_WEEKS:
+        chain.revert()
+        locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        advance_weeks(idle)
+        tx = voter.vote(system.lp_tokens[:1], [1], {"from": user})
+        yield f"IncentiveVoting.vote[idle={idle}]", tx
+
+    # weekly vote records pack two weeks per slot, so voting again in the
+    # following week only updates slots that were initialized by the first vote
+    chain.revert()
+    locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+    advance_weeks(2 - voter.getWeek() % 2)
+    voter.vote(system.lp_tokens[:5], [1] * 5, {"from": user})
+    advance_weeks(1)
+    tx = voter.vote(system.lp_tokens[:5], [1] * 5, {"from": user})
+    yield "IncentiveVoting.vote[tokens=5,consecutive]", tx
+
+    # signers never hold gas, their locks are created by `user`
+    for count in SIGNED_VOTE_COUNTS:
+        chain.revert()
+        signers = [accounts.add() for i in range(count)]
+        signed = []
+        for acct in signers:
+            locker.lock(acct, LOCK_AMOUNT // 100, 52, {"from": user})
+            signed.append(sign_vote(voter, acct.private_key, system.lp_tokens[:5], [1] * 5))
+        tx = voter.submitVotes([i.as_tuple() for i in signed], {"from": other})
+        yield f"IncentiveVoting.submitVotes[votes={count},tokens=5]", tx
+
+    # approval votes require a token that was not included in the initial approvals
+    chain.revert()
+    pool = system.pools[0]
+    token = RewardsToken.deploy({"from": system.deployer})
+    token.setMinter(pool, {"from": system.deployer})
+    system.fund_epx(user, 500 * LOCK_AMOUNT)
+    locker.lock(user, 500 * LOCK_AMOUNT, 52, {"from": user})
+    advance_weeks(2)
+    tx = voter.createTokenApprovalVote(token, {"from": user})
+    yield "IncentiveVoting.createTokenApprovalVote", tx
+    yield "IncentiveVoting.voteForTokenApproval", voter.voteForTokenApproval(0, 1, {"from": user})
+
+
+def _batch_users(system, count):
+    """
+    Create `count` funded accounts, each with a lock and a deposit in the first LP token.
+    """
+    users = []
+    for i in range(count):
+        acct = accounts.add()
+        system.deployer.transfer(acct, 10 ** 18)
+        system.fund_epx(acct, LOCK_AMOUNT)
+        system.fund_lp(acct, LP_AMOUNT, system.lp_tokens[:1])
+        system.locker.lock(acct, LOCK_AMOUNT, 52, {"from": acct})
+        system.lp_staker.deposit(system.lp_tokens[0], LP_AMOUNT, False, {"from": acct})
+        users.append(acct)
+    return users
+
+
+def _setup_staking(system, user, tokens):
+    system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+    for token in tokens:
+        system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": user})
+    system.voter.vote(tokens, [1] * len(tokens), {"from": user})
+
+
+def _bench_staking(system, user, other):
+    lp_staker = system.lp_staker
+    token = system.lp_tokens[0]
+
+    chain.revert()
+    system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+    yield "EllipsisLpStaking.deposit", lp_staker.deposit(token, LP_AMOUNT, False, {"from": user})
+    chain.sleep(86400)
+    yield "EllipsisLpStaking.withdraw", lp_staker.withdraw(token, LP_AMOUNT, False, {"from": user})
+
+    for count in TOKEN_COUNTS:
+        chain.revert()
+        tokens = system.lp_tokens[:count]
+        _setup_staking(system, user, tokens)
+        advance_weeks(1)
+        yield f"EllipsisLpStaking.claim[tokens={count}]", lp_staker.claim(user, tokens, {"from": user})
+
+        chain.sleep(86400)
+        tx = lp_staker.updateUserBoosts(user, tokens, {"from": user})
+        yield f"EllipsisLpStaking.updateUserBoosts[tokens={count}]", tx
+
+        chain.sleep(86400)
+        tx = lp_staker.claimAndLock(tokens, 52, {"from": user})
+        yield f"EllipsisLpStaking.claimAndLock[tokens={count}]", tx
+
+        # locking refreshes boosts in up to `MAX_BOOST_REFRESH_POOLS` pools
+        tx = system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        yield f"TokenLocker.lock[pools={count}]", tx
+
+    for idle in IDLE_WEEKS:
+        chain.revert()
+        _setup_staking(system, user, [token])
+        advance_weeks(idle)
+        chain.sleep(86400)
+        yield f"EllipsisLpStaking.claim[idle={idle}]", lp_staker.claim(user, [token], {"from": user})
+
+    # batched claims share pool updates, see the `/user` entries for the cost per user
+    chain.revert()
+    users = _batch_users(system, max(BATCH_SIZES))
+    advance_weeks(1)
+    for count in BATCH_SIZES:
+        tx = lp_staker.claimMany(users[:count], [token], {"from": user})
+        yield f"EllipsisLpStaking.claimMany[users={count}]", tx
+        chain.undo()
+
+
+def _bench_fee_distro(system, user, other):
+    fee_distro = system.fee_distro
+    deployer = system.deployer
+    # LP tokens are freely mintable, which makes them convenient fee tokens
+    fee_tokens = system.lp_tokens
+
+    def deposit_fees(tokens):
+        for token in tokens:
+            token.mint(deployer, 10 ** 24, {"from": deployer})
+            token.approve(fee_distro, 2 ** 256 - 1, {"from": deployer})
+            fee_distro.depositFee(token, 10 ** 24, {"from": deployer})
+
+    chain.revert()
+    token = fee_tokens[0]
+    token.mint(deployer, 10 ** 24, {"from": deployer})
+    token.approve(fee_distro, 2 ** 256 - 1, {"from": deployer})
+    yield "FeeDistributor.depositFee", fee_distro.depositFee(token, 10 ** 24, {"from": deployer})
+
+    for count in TOKEN_COUNTS:
+        chain.revert()
+        system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        deposit_fees(fee_tokens[:count])
+        advance_weeks(2)
+        tx = fee_distro.claim(user, fee_tokens[:count], {"from": user})
+        yield f"FeeDistributor.claim[tokens={count}]", tx
+
+    for idle in IDLE_WEEKS:
+        chain.revert()
+        system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        deposit_fees(fee_tokens[:1])
+        advance_weeks(idle + 1)
+        chain.sleep(86400)
+        yield f"FeeDistributor.claim[idle={idle}]", fee_distro.claim(user, [token], {"from": user})
+
+    # settled claims use one proof regardless of idle weeks
+    for idle in IDLE_WEEKS:
+        chain.revert()
+        system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+        deposit_fees(fee_tokens[:1])
+        advance_weeks(idle + 2)
+        amounts = {
+            (to_checksum_address(os.urandom(20)), token.address): 10 ** 18
+            for i in range(MERKLE_LEAVES - 1)
+        }
+        amounts[user.address, token.address] = fee_distro.claimable(user, [token])[0]
+        settlement = Settlement(fee_distro.getWeek() - 1, amounts)
+        fee_distro.setSettlementRoot(settlement.root, settlement.week, {"from": deployer})
+        tx = fee_distro.claimSettled(*settlement.claim_args(user, token), {"from": user})
+        yield f"FeeDistributor.claimSettled[idle={idle}]", tx
+
+    # batched claims share weekly fee and total weight reads
+    chain.revert()
+    users = _batch_users(system, max(BATCH_SIZES))
+    deposit_fees(fee_tokens[:1])
+    advance_weeks(2)
+    for count in BATCH_SIZES:
+        tx = fee_distro.claimMany(users[:count], [token], {"from": user})
+        yield f"FeeDistributor.claimMany[users={count}]", tx
+        chain.undo()
+
+
+def _bench_merkle(system, user, other):
+    chain.revert()
+    amounts = {
+        to_checksum_address(os.urandom(20)): 10 ** 18 for i in range(MERKLE_LEAVES - 1)
+    }
+    amounts[user.address] = 10 ** 18
+    root, claims = build_distribution(amounts)
+    system.merkle.setParams(root, 10 ** 18 * MERKLE_LEAVES, {"from": system.deployer})
+
+    amount, proof = claims[user.address]
+    tx = system.merkle.claim(amount, user, proof, {"from": user})
+    yield f"MerkleDistributor.claim[leaves={MERKLE_LEAVES}]", tx
+
+    # a claim covering several cumulative rounds costs the same as a single round
+    chain.revert()
+    distributor = CumulativeMerkleDistributor.deploy(
+        system.eps2, system.deployer, {"from": system.deployer}
+    )
+    system.fund_epx(system.deployer, 10 ** 18 * MERKLE_LEAVES * 4)
+    system.eps2.transfer(distributor, 10 ** 18 * MERKLE_LEAVES * 4, {"from": system.deployer})
+    totals = {}
+    for i in range(4):
+        totals = accumulate(totals, amounts)
+        root, claims = build_distribution(totals)
+        distributor.setRoot(root, {"from": system.deployer})
+    amount, proof = claims[user.address]
+    tx = distributor.claim(amount, user, proof, {"from": user})
+    yield f"CumulativeMerkleDistributor.claim[leaves={MERKLE_LEAVES},rounds=4]", tx
+
+
+BENCHMARKS = [
+    _bench_token,
+    _bench_locker,
+    _bench_voter,
+    _bench_staking,
+    _bench_fee_distro,
+    _bench_merkle,
+]
+
+
+def iter_benchmarks():
+    """
+    Deploy the protocol locally and yield (operation name, transaction) for each
+    user-facing entry point across the configured parameter sweeps.
+    """
+    system = deploy_local(num_lp_tokens=max(TOKEN_COUNTS))
+    user, other = accounts[1], accounts[2]
+    system.fund_epx(user, 10 * LOCK_AMOUNT)
+    system.fund_lp(user, LP_AMOUNT)
+    chain.snapshot()
+
+    for bench in BENCHMARKS:
+        chain.revert()
+        yield from bench(system, user, other)
+
+
+def run_benchmarks():
+    """
+    Measure the gas used by each operation yielded from `iter_benchmarks`.
+
+    Returns a dict of {operation name: gas used}. Batched operations, named with
+    `users=<count>`, also include the gas used per user as `<operation name>/user`.
+    """
+    results = {name: tx.gas_used for name, tx in iter_benchmarks()}
+    for name, gas in list(results.items()):
+        match = re.search(r"users=(\d+)", name)
+        if match:
+            results[f"{name}/user"] = gas // int(match.group(1))
+    return results
+
+
+def compare(results, baseline, tolerance_pct=TOLERANCE_PCT):
+    """
+    Compare benchmark results against a baseline.
+
+    Returns a list of (operation name, baseline gas, new gas) for each
+    operation that regressed by more than `tolerance_pct`.
+    """
+    regressions = []
+    for name, gas in sorted(results.items()):
+        if name not in baseline:
+            continue
+        if gas * 100 > baseline[name] * (100 + tolerance_pct):
+            regressions.append((name, baseline[name], gas))
+    return regressions
+
+
+def write_baseline(results, path=BASELINE_PATH):
+    with path.open("w") as fp:
+        json.dump(dict(sorted(results.items())), fp, indent=2, sort_keys=True)
+        fp.write("\n")
+    with path.with_suffix(".csv").open("w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["operation", "gas"])
+        writer.writerows(sorted(results.items()))
+
+
+def main(update_baseline="false"):
+    results = run_benchmarks()
+
+    if update_baseline.lower() in ("true", "1") or not BASELINE_PATH.exists():
+        write_baseline(results)
+        print(f"Wrote {len(results)} benchmarks to {BASELINE_PATH}")
+        return
+
+    with BASELINE_PATH.open() as fp:
+        baseline = json.load(fp)
+
+    print(f"{'operation':<52}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, gas in sorted(results.items()):
+        if name in baseline:
+            change = f"{(gas - baseline[name]) / baseline[name]:+.2%}"
+            print(f"{name:<52}{baseline[name]:>12}{gas:>12}{change:>10}")
+        else:
+            print(f"{name:<52}{'-':>12}{gas:>12}{'new':>10}")
+    for name in sorted(set(baseline) - set(results)):
+        print(f"{name:<52}{baseline[name]:>12}{'-':>12}{'removed':>10}")
+
+    regressions = compare(results, baseline)
+    if regressions:
+        for name, old, new in regressions:
+            print(f"REGRESSION: {name} {old} -> {new}")
+        sys.exit(f"{len(regressions)} operations exceeded the {TOLERANCE_PCT}% gas tolerance")
@@ -0,0 +1,269 @@
+import os
+
+from brownie import EllipsisLpStaking, IncentiveVotingTester, accounts, chain, web3
+from eth_utils import to_checksum_address
+
+from scripts.local_deploy import (
+    INITIAL_REWARDS_PER_SECOND,
+    MAX_MINTABLE,
+    QUORUM_PCT,
+    TOKEN_APPROVAL_WEIGHT,
+    advance_weeks,
+    deploy_local,
+)
+
+
+# Operational limits to search against. Transactions must fit in a single block,
+# views must fit under the gas cap applied by RPC nodes to `eth_call` (the geth
+# default is 50 million). The local chain must be launched with a block gas limit
+# at least as high as the largest of these values, otherwise the local limit is
+# used instead and a warning is printed.
+BLOCK_GAS_LIMIT = 30_000_000
+ETH_CALL_GAS_CAP = 50_000_000
+
+# upper bound for each search, in weeks or approved tokens
+MAX_WEEKS = 20_000
+MAX_TOKENS = 20_000
+
+# number of tokens approved per transaction when building the approved token set
+APPROVE_BATCH_SIZE = 100
+
+LOCK_AMOUNT = 10_000 * 10 ** 18
+LP_AMOUNT = 1_000 * 10 ** 18
+
+
+class SetupFailed(Exception):
+    """
+    Raised when the state for a probe cannot be built on the local chain. Unlike a
+    measurement that exceeds its limit, this says nothing about the threshold.
+    """
+
+
+def _estimate(fn, *args):
+    """
+    Estimate the gas used by a contract call or transaction, returning `None`
+    when the estimate fails because the node's gas limit is exceeded.
+    """
+    try:
+        return fn.estimate_gas(*args)
+    except Exception:
+        return None
+
+
+def search_threshold(grow, measure, limit, start=0, step=16, upper=MAX_WEEKS):
+    """
+    Find the largest `n` for which `measure()` remains under `limit`.
+
+    `grow(a, b)` must transition the chain from the state for `a` to the state
+    for `b`, where `b > a`. States are only ever grown - the search takes a
+    snapshot at the last known-good value and reverts to it after each probe that
+    exceeds the limit, so the number of `grow` calls is logarithmic in the result.
+
+    Returns (n, gas used at n, gas used at n + 1 or None if the limit was never crossed).
+    Raises `SetupFailed` if `grow` cannot build a state.
+    """
+    lo = start
+    lo_gas = measure()
+    if lo_gas is None or lo_gas > limit:
+        return lo, lo_gas, lo_gas
+    chain.snapshot()
+
+    # exponential search for an upper bound
+    hi = None
+    while hi is None:
+        n = min(lo + step, upper)
+        grow(lo, n)
+        gas = measure()
+        if gas is not None and gas <= limit:
+            lo, lo_gas = n, gas
+            if lo == upper:
+                return lo, lo_gas, None
+            chain.snapshot()
+            step *= 2
+        else:
+            hi, hi_gas = n, gas
+            chain.revert()
+
+    # binary search between the last good value and the first failure
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        grow(lo, mid)
+        gas = measure()
+        if gas is not None and gas <= limit:
+            lo, lo_gas = mid, gas
+            chain.snapshot()
+        else:
+            hi, hi_gas = mid, gas
+            chain.revert()
+
+    return lo, lo_gas, hi_gas
+
+
+def _grow_weeks(a, b):
+    advance_weeks(b - a)
+
+
+def _staking_claim(system, user):
+    token = system.lp_tokens[0]
+    system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+    system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": user})
+    system.voter.vote([token], [1], {"from": user})
+    return {
+        "EllipsisLpStaking.claim": (
+            lambda: _estimate(system.lp_staker.claim, user, [token], {"from": user}),
+            BLOCK_GAS_LIMIT,
+        ),
+        "EllipsisLpStaking.claimableReward": (
+            lambda: _estimate(system.lp_staker.claimableReward, user, [token], {"from": user}),
+            ETH_CALL_GAS_CAP,
+        ),
+    }
+
+
+def _fee_claim(system, user):
+    token = system.lp_tokens[0]
+    deployer = system.deployer
+    system.locker.lock(user, LOCK_AMOUNT, 52, {"from": user})
+    token.mint(deployer, 10 ** 24, {"from": deployer})
+    token.approve(system.fee_distro, 10 ** 24, {"from": deployer})
+    system.fee_distro.depositFee(token, 10 ** 24, {"from": deployer})
+    return {
+        "FeeDistributor.claim": (
+            lambda: _estimate(system.fee_distro.claim, user, [token], {"from": user}),
+            BLOCK_GAS_LIMIT,
+        ),
+        "FeeDistributor.claimable": (
+            lambda: _estimate(system.fee_distro.claimable, user, [token], {"from": user}),
+            ETH_CALL_GAS_CAP,
+        ),
+    }
+
+
+def _exit_stream(system, user):
+    system.locker.lock(user, LOCK_AMOUNT, 1, {"from": user})
+    return {
+        "TokenLocker.initiateExitStream": (
+            lambda: _estimate(system.locker.initiateExitStream, {"from": user}),
+            BLOCK_GAS_LIMIT,
+        ),
+        "TokenLocker.userBalance": (
+            lambda: _estimate(system.locker.userBalance, user, {"from": user}),
+            ETH_CALL_GAS_CAP,
+        ),
+    }
+
+
+def _vote_catch_up(system, user):
+    # votes of zero are always permitted, so the voter's lock may expire during the search
+    token = system.lp_tokens[0]
+    return {
+        "IncentiveVoting.vote": (
+            lambda: _estimate(system.voter.vote, [token], [0], {"from": user}),
+            BLOCK_GAS_LIMIT,
+        ),
+    }
+
+
+# each scenario prepares the chain and returns {function name: (measure, limit)},
+# the search then grows the number of weeks since the scenario was prepared
+WEEK_SCENARIOS = [_staking_claim, _fee_claim, _exit_stream, _vote_catch_up]
+
+
+def _in_weeks(scenario):
+    return lambda system, user: (_grow_weeks, scenario(system, user))
+
+
+def _approved_tokens(system, user):
+    # approved tokens cannot be removed, so the search uses a new `IncentiveVotingTester`
+    # that approves tokens in batches. Token addresses are random, as these views never
+    # call the tokens.
+    deployer = system.deployer
+    voter = IncentiveVotingTester.deploy(
+        system.locker, INITIAL_REWARDS_PER_SECOND, QUORUM_PCT, TOKEN_APPROVAL_WEIGHT,
+        {"from": deployer},
+    )
+    staker = EllipsisLpStaking.deploy(
+        system.eps2, voter, system.locker, MAX_MINTABLE, {"from": deployer}
+    )
+    voter.setLpStaking(staker, [], {"from": deployer})
+    tokens = []
+
+    def grow(a, b):
+        while len(tokens) < b:
+            tokens.append(to_checksum_address(os.urandom(20)))
+        for i in range(a, b, APPROVE_BATCH_SIZE):
+            batch = tokens[i:min(i + APPROVE_BATCH_SIZE, b)]
+            try:
+                voter.approveTokens(batch, {"from": deployer})
+            except Exception as exc:
+                raise SetupFailed(f"cannot approve tokens {i} to {i + len(batch)}: {exc}")
+
+    return grow, {
+        "IncentiveVoting.getVotes": (
+            lambda: _estimate(voter.getVotes, 0, {"from": user}),
+            ETH_CALL_GAS_CAP,
+        ),
+        "IncentiveVoting.getUserVotes": (
+            lambda: _estimate(voter.getUserVotes, user, 0, {"from": user}),
+            ETH_CALL_GAS_CAP,
+        ),
+    }
+
+
+def _prepare():
+    # `search_threshold` consumes the active snapshot, so each search
+    # begins from a fresh deployment
+    chain.reset()
+    system = deploy_local()
+    user = accounts[1]
+    system.fund_epx(user, 10 * LOCK_AMOUNT)
+    system.fund_lp(user, LP_AMOUNT)
+    return system, user
+
+
+def find_limits():
+    """
+    Build adversarial states on the local chain and search for the point at which
+    each unbounded loop within the protocol exceeds the operational gas limits.
+
+    Returns a dict of {function name: (unit, threshold, gas at threshold, gas above threshold)}
+    where all but the unit are `None` if the state for the search could not be built.
+    """
+    local_limit = web3.eth.get_block("latest").gasLimit
+    if local_limit < max(BLOCK_GAS_LIMIT, ETH_CALL_GAS_CAP):
+        print(
+            f"WARNING: local block gas limit is {local_limit}, thresholds above this "
+            "value cannot be measured"
+        )
+
+    searches = [("weeks", MAX_WEEKS, _in_weeks(scenario)) for scenario in WEEK_SCENARIOS]
+    searches.append(("approved tokens", MAX_TOKENS, _approved_tokens))
+
+    results = {}
+    for unit, upper, scenario in searches:
+        system, user = _prepare()
+        names = list(scenario(system, user)[1])
+        for name in names:
+            system, user = _prepare()
+            grow, measures = scenario(system, user)
+            measure, limit = measures[name]
+            limit = min(limit, local_limit)
+            try:
+                threshold, gas, next_gas = search_threshold(grow, measure, limit, upper=upper)
+            except SetupFailed as exc:
+                print(f"{name}: setup failed, {exc}")
+                threshold, gas, next_gas = None, None, None
+            results[name] = (unit, threshold, gas, next_gas)
+
+    return results
+
+
+def main():
+    results = find_limits()
+    print(f"\n{'function':<36}{'unit':<18}{'threshold':>10}{'gas':>14}{'next':>14}")
+    for name, (unit, threshold, gas, next_gas) in results.items():
+        if threshold is None:
+            print(f"{name:<36}{unit:<18}{'setup failed':>38}")
+            continue
+        next_gas = "-" if next_gas is None else next_gas
+        print(f"{name:<36}{unit:<18}{threshold:>10}{str(gas):>14}{str(next_gas):>14}")
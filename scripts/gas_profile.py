@@ -0,0 +1,178 @@
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from brownie import chain
+
+from scripts.gas_benchmark import iter_benchmarks
+
+
+CALL_OPS = {"CALL", "CALLCODE", "DELEGATECALL", "STATICCALL"}
+
+# frame for gas that is not spent executing opcodes: the intrinsic
+# transaction cost less any refund
+INTRINSIC = "[intrinsic]"
+
+FOLDED_PATH = Path(__file__).parents[1].joinpath("gas_profile.folded")
+
+
+def _frame_ends(trace):
+    # index of the first step that returns to the same depth after each call opcode
+    ends = {}
+    open_calls = []
+    for i, step in enumerate(trace):
+        while open_calls and trace[open_calls[-1]]["depth"] >= step["depth"] and i > open_calls[-1] + 1:
+            ends[open_calls.pop()] = i
+        if step["op"] in CALL_OPS and i + 1 < len(trace) and trace[i + 1]["depth"] > step["depth"]:
+            open_calls.append(i)
+    return ends
+
+
+def _step_costs(trace):
+    """
+    Return the gas spent by each step of `trace`, excluding gas spent by the
+    steps of any call it makes. For a call opcode this is the cost of the call
+    itself, with the gas forwarded to and used by the callee removed.
+    """
+    ends = _frame_ends(trace)
+    costs = []
+    for i, step in enumerate(trace):
+        if i + 1 == len(trace):
+            costs.append(step["gasCost"])
+            continue
+        next_step = trace[i + 1]
+        if next_step["depth"] == step["depth"]:
+            costs.append(step["gas"] - next_step["gas"])
+        elif next_step["depth"] < step["depth"]:
+            costs.append(step["gasCost"])
+        elif i in ends:
+            last = trace[ends[i] - 1]
+            used_by_callee = next_step["gas"] - (last["gas"] - last["gasCost"])
+            costs.append(step["gas"] - trace[ends[i]]["gas"] - used_by_callee)
+        else:
+            costs.append(step["gasCost"])
+    return costs
+
+
+def _stacks(trace):
+    # yield the function call stack that is active at each step
+    stack = []
+    for step in trace:
+        key = (step["depth"], step.get("jumpDepth", 0))
+        while stack and stack[-1][0] > key:
+            stack.pop()
+        fn = step.get("fn") or f"{step.get('contractName') or step.get('address')}.<unknown>"
+        if stack and stack[-1][0] == key:
+            stack[-1] = (key, fn)
+        else:
+            stack.append((key, fn))
+        yield [i[1] for i in stack]
+
+
+class GasProfile:
+    """
+    Gas use aggregated across one or more transactions.
+
+    `folded` maps a semicolon-joined stack of function names to the gas spent
+    with that exact stack active, the "folded stacks" format read by flamegraph
+    tools. `calls` maps each (caller, callee) external call site to
+    [number of calls, gas used including the callee].
+    """
+
+    def __init__(self):
+        self.folded = Counter()
+        self.calls = defaultdict(lambda: [0, 0])
+        self.transactions = 0
+        self.gas_used = 0
+
+    def add(self, tx):
+        """
+        Add the call trace of `tx` to the profile.
+        """
+        trace = tx.trace
+        costs = _step_costs(trace)
+        ends = _frame_ends(trace)
+
+        stacks = list(_stacks(trace))
+        for i, (step, cost, stack) in enumerate(zip(trace, costs, stacks)):
+            self.folded[";".join(stack)] += cost
+            if step["op"] in CALL_OPS and i + 1 < len(trace) and trace[i + 1]["depth"] > step["depth"]:
+                end = trace[ends[i]]["gas"] if i in ends else trace[-1]["gas"] - trace[-1]["gasCost"]
+                site = self.calls[stack[-1], stacks[i + 1][-1]]
+                site[0] += 1
+                site[1] += step["gas"] - end
+
+        self.folded[f"{stacks[0][0]};{INTRINSIC}"] += tx.gas_used - sum(costs)
+        self.transactions += 1
+        self.gas_used += tx.gas_used
+
+    def exclusive(self):
+        """
+        Return {function: gas} for gas spent within each function's own body.
+        """
+        totals = Counter()
+        for stack, gas in self.folded.items():
+            totals[stack.split(";")[-1]] += gas
+        return totals
+
+    def inclusive(self):
+        """
+        Return {function: gas} for gas spent within each function, including
+        any functions it calls. Recursive frames are only counted once.
+        """
+        totals = Counter()
+        for stack, gas in self.folded.items():
+            for fn in set(stack.split(";")):
+                totals[fn] += gas
+        return totals
+
+    def write_folded(self, path=FOLDED_PATH):
+        with Path(path).open("w") as fp:
+            for stack, gas in sorted(self.folded.items()):
+                if gas > 0:
+                    fp.write(f"{stack} {gas}\n")
+        return path
+
+    def print_summary(self, limit=25):
+        exclusive, inclusive = self.exclusive(), self.inclusive()
+        print(f"\n{self.transactions} transactions, {self.gas_used} gas")
+
+        print(f"\n{'function':<56}{'self':>12}{'total':>12}{'% total':>9}")
+        for fn, gas in inclusive.most_common(limit):
+            print(f"{fn:<56}{exclusive[fn]:>12}{gas:>12}{gas / self.gas_used:>9.1%}")
+
+        print(f"\n{'external call site':<88}{'calls':>8}{'gas':>12}")
+        sites = sorted(self.calls.items(), key=lambda i: i[1][1], reverse=True)
+        for (caller, callee), (count, gas) in sites[:limit]:
+            print(f"{caller + ' -> ' + callee:<88}{count:>8}{gas:>12}")
+
+
+def profile_transactions(txs, profile=None):
+    """
+    Profile an iterable of transactions, adding to `profile` if given.
+    """
+    if profile is None:
+        profile = GasProfile()
+    for tx in txs:
+        profile.add(tx)
+    return profile
+
+
+def main(pattern="", output=FOLDED_PATH):
+    """
+    Profile the operations from `scripts/gas_benchmark.py` whose name contains
+    `pattern`, e.g. `brownie run gas_profile main EllipsisLpStaking.claim`.
+    """
+    # each trace must be read before the benchmark reverts the chain
+    txs = (tx for name, tx in iter_benchmarks() if pattern in name)
+    profile = profile_transactions(txs)
+    profile.print_summary()
+    print(f"\nWrote folded stacks to {profile.write_folded(output)}")
+
+
+def replay(*txids):
+    """
+    Profile existing transactions by hash, e.g. on a forked network.
+    """
+    profile = profile_transactions(chain.get_transaction(i) for i in txids)
+    profile.print_summary()
+    print(f"\nWrote folded stacks to {profile.write_folded()}")
@@ -0,0 +1,344 @@
+import json
+import sqlite3
+from collections import defaultdict
+
+from brownie import (
+    ZERO_ADDRESS,
+    Contract,
+    EllipsisLpStaking,
+    FeeDistributor,
+    IncentiveVoting,
+    TokenLocker,
+    web3,
+)
+from eth_abi import decode
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+
+from scripts.packed_votes import decode_votes
+
+
+WEEK = 86400 * 7
+
+# contract name -> events indexed from that contract
+INDEXED_EVENTS = {
+    "TokenLocker": ["NewLock", "ExtendLock", "NewExitStream", "LegacyLock", "DelegateChanged"],
+    "IncentiveVoting": ["VotedForIncentives", "VotedForIncentivesPacked", "TokenApproved"],
+    "EllipsisLpStaking": ["Deposit", "Withdraw", "ClaimedReward"],
+    "FeeDistributor": ["FeesReceived", "FeesClaimed"],
+}
+
+# mainnet deployments, as listed in the README
+DEPLOYMENTS = {
+    "TokenLocker": (TokenLocker, "0x22A93F53A0A3E6847D05Dd504283e8E296a49aAE"),
+    "IncentiveVoting": (IncentiveVoting, "0x4695e50A38E33Ea09D1F623ba8A8dB24219bb06a"),
+    "EllipsisLpStaking": (EllipsisLpStaking, "0x5B74C99AA2356B4eAa7B85dC486843eDff8Dfdbe"),
+    "FeeDistributor": (FeeDistributor, "0x3670c10C6a4994EC8926eDCf54bF53092217EE1b"),
+}
+
+
+def _to_sql(abi_type, value):
+    # uint256 does not fit in an sqlite INTEGER, so integers are stored as decimal
+    # strings. Arrays are stored as JSON lists using the same representation.
+    if abi_type.endswith("]"):
+        return json.dumps([_to_sql(abi_type[:abi_type.index("[")], i) for i in value])
+    if abi_type == "address":
+        return to_checksum_address(value)
+    if abi_type == "bool":
+        return int(value)
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+
+def _decode_log(abi, log):
+    """
+    Decode the arguments of an event log as a list ordered the same as the event inputs.
+    """
+    indexed = [i["type"] for i in abi["inputs"] if i["indexed"]]
+    topics = [decode([abi_type], bytes(topic))[0] for abi_type, topic in zip(indexed, log["topics"][1:])]
+    data = decode([i["type"] for i in abi["inputs"] if not i["indexed"]], bytes(log["data"]))
+
+    topics, data = iter(topics), iter(data)
+    return [
+        _to_sql(i["type"], next(topics) if i["indexed"] else next(data)) for i in abi["inputs"]
+    ]
+
+
+def _delegate_of(delegations, week):
+    # the delegate set by the last change that applies from `week` or earlier,
+    # None if there is no delegate
+    delegate = ZERO_ADDRESS
+    for first_week, new_delegate in delegations:
+        if first_week <= week:
+            delegate = new_delegate
+    return None if delegate == ZERO_ADDRESS else delegate
+
+
+class EventIndexer:
+    """
+    Stream protocol events into a local SQLite database.
+
+    `contracts` is a dict of {contract name: deployed contract} using the names in
+    `INDEXED_EVENTS`, and must include `TokenLocker`. Each event is stored in a table
+    of the same name, with one column per event argument. Logs are requested in
+    block ranges of `batch_size`. Each range is committed together with the indexed
+    block height, so an interrupted sync resumes from the last completed range.
+    """
+
+    def __init__(self, db_path, contracts, from_block=0, batch_size=5000, confirmations=0):
+        self.conn = sqlite3.connect(str(db_path))
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+
+        # log topic -> (contract address, event abi)
+        self._events = {}
+        for name, contract in contracts.items():
+            abis = {i["name"]: i for i in contract.abi if i["type"] == "event"}
+            for event_name in INDEXED_EVENTS[name]:
+                abi = abis[event_name]
+                self._events[event_abi_to_log_topic(abi)] = (contract.address, abi)
+        self._addresses = sorted(set(i[0] for i in self._events.values()))
+
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, timestamp INTEGER)"
+            )
+            for _, abi in self._events.values():
+                columns = "".join(f', "{i["name"]}"' for i in abi["inputs"])
+                self.conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{abi["name"]}" (block_number INTEGER, '
+                    f"log_index INTEGER, tx_hash TEXT{columns}, "
+                    "PRIMARY KEY (block_number, log_index))"
+                )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('last_block', ?)", (str(from_block - 1),)
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('start_time', ?)",
+                (str(contracts["TokenLocker"].startTime()),),
+            )
+
+    def _meta(self, key):
+        return int(self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0])
+
+    @property
+    def last_block(self):
+        """The most recent block that has been fully indexed."""
+        return self._meta("last_block")
+
+    @property
+    def start_time(self):
+        return self._meta("start_time")
+
+    def get_week(self, timestamp):
+        return (timestamp - self.start_time) // WEEK
+
+    def _store(self, logs):
+        blocks = set(log["blockNumber"] for log in logs)
+        known = set(
+            i[0] for i in self.conn.execute(
+                f"SELECT number FROM blocks WHERE number IN ({','.join('?' * len(blocks))})",
+                list(blocks),
+            )
+        )
+        for number in sorted(blocks - known):
+            timestamp = web3.eth.get_block(number).timestamp
+            self.conn.execute("INSERT INTO blocks VALUES (?, ?)", (number, timestamp))
+
+        for log in logs:
+            if not log["topics"] or bytes(log["topics"][0]) not in self._events:
+                continue
+            address, abi = self._events[bytes(log["topics"][0])]
+            if to_checksum_address(log["address"]) != address:
+                continue
+            values = _decode_log(abi, log)
+            self.conn.execute(
+                f'INSERT OR IGNORE INTO "{abi["name"]}" VALUES ({",".join("?" * (len(values) + 3))})',
+                [log["blockNumber"], log["logIndex"], "0x" + bytes(log["transactionHash"]).hex(), *values],
+            )
+
+    def sync(self, to_block=None):
+        """
+        Index all events up to `to_block`, or up to the latest block less the
+        configured confirmations. Returns the number of logs received.
+        """
+        head = web3.eth.block_number - self.confirmations
+        if to_block is None or to_block > head:
+            to_block = head
+
+        batch_size = self.batch_size
+        start = self.last_block + 1
+        count = 0
+        while start <= to_block:
+            end = min(start + batch_size - 1, to_block)
+            try:
+                logs = web3.eth.get_logs({
+                    "fromBlock": start,
+                    "toBlock": end,
+                    "address": self._addresses,
+                    "topics": [["0x" + i.hex() for i in self._events]],
+                })
+            except Exception:
+                # most providers reject ranges which return too many logs
+                if batch_size == 1:
+                    raise
+                batch_size //= 2
+                continue
+
+            with self.conn:
+                if logs:
+                    self._store(logs)
+                self.conn.execute(
+                    "UPDATE meta SET value = ? WHERE key = 'last_block'", (str(end),)
+                )
+            count += len(logs)
+            start = end + 1
+
+        return count
+
+    def _events_with_week(self, event_name, columns):
+        columns = ", ".join(f'e."{i}"' for i in columns)
+        query = (
+            f'SELECT b.timestamp, {columns} FROM "{event_name}" e '
+            "JOIN blocks b ON b.number = e.block_number ORDER BY e.block_number, e.log_index"
+        )
+        for timestamp, *values in self.conn.execute(query):
+            yield (self.get_week(timestamp), *values)
+
+    def rebuild(self):
+        """
+        Rebuild the per-week lock weight and vote tables from the indexed events.
+
+        Lock weights are derived from `NewLock` and `ExtendLock` in the same way as
+        `TokenLocker._increaseAmount`. Legacy (EPS v1) lock weights are not included,
+        as `LegacyLock` only records that a user registered their v1 locks. Vote
+        weights follow `DelegateChanged`, each change applying from the week given
+        in the event.
+        """
+        weights = defaultdict(int)
+        total_weights = defaultdict(int)
+        for week, user, amount, weeks in self._events_with_week(
+            "NewLock", ["user", "amount", "lockWeeks"]
+        ):
+            amount = int(amount)
+            for i in range(int(weeks)):
+                weights[user, week + i] += amount * (int(weeks) - i)
+                total_weights[week + i] += amount * (int(weeks) - i)
+
+        for week, user, amount, old_weeks, new_weeks in self._events_with_week(
+            "ExtendLock", ["user", "amount", "oldWeeks", "newWeeks"]
+        ):
+            amount, old_weeks, new_weeks = int(amount), int(old_weeks), int(new_weeks)
+            for i in range(new_weeks):
+                increase = amount * (new_weeks - i)
+                if i < old_weeks:
+                    increase -= amount * (old_weeks - i)
+                weights[user, week + i] += increase
+                total_weights[week + i] += increase
+
+        # user -> [(first week, delegate)], in the order the changes were made
+        delegations = defaultdict(list)
+        for _, user, delegate, week in self._events_with_week(
+            "DelegateChanged", ["user", "toDelegate", "week"]
+        ):
+            delegations[user].append((int(week), delegate))
+
+        # equivalent to `TokenLocker.weeklyVoteWeightOf`
+        vote_weights = defaultdict(int)
+        for (user, week), weight in weights.items():
+            delegate = _delegate_of(delegations[user], week)
+            vote_weights[delegate or user, week] += weight
+
+        votes = [
+            (week, user, zip(json.loads(tokens), map(int, json.loads(amounts))))
+            for week, user, tokens, amounts in self._events_with_week(
+                "VotedForIncentives", ["voter", "tokens", "votes"]
+            )
+        ]
+        # packed votes reference tokens by ID, as assigned in `TokenApproved`
+        token_ids = {
+            int(token_id): token
+            for _, token, token_id in self._events_with_week("TokenApproved", ["token", "tokenId"])
+        }
+        for week, user, packed in self._events_with_week(
+            "VotedForIncentivesPacked", ["voter", "packedVotes"]
+        ):
+            pairs = decode_votes(json.loads(packed))
+            votes.append((week, user, [(token_ids[i], amount) for i, amount in pairs]))
+
+        token_votes = defaultdict(int)
+        user_token_votes = defaultdict(int)
+        total_votes = defaultdict(int)
+        for week, user, pairs in votes:
+            for token, amount in pairs:
+                token_votes[token, week] += amount
+                user_token_votes[user, token, week] += amount
+                total_votes[week] += amount
+
+        tables = {
+            "lock_weights": ("user TEXT, week INTEGER, weight TEXT, PRIMARY KEY (user, week)", weights),
+            "total_lock_weights": ("week INTEGER PRIMARY KEY, weight TEXT", total_weights),
+            "vote_weights": (
+                "user TEXT, week INTEGER, weight TEXT, PRIMARY KEY (user, week)", vote_weights
+            ),
+            "token_votes": ("token TEXT, week INTEGER, votes TEXT, PRIMARY KEY (token, week)", token_votes),
+            "user_token_votes": (
+                "user TEXT, token TEXT, week INTEGER, votes TEXT, PRIMARY KEY (user, token, week)",
+                user_token_votes,
+            ),
+            "total_votes": ("week INTEGER PRIMARY KEY, votes TEXT", total_votes),
+        }
+        with self.conn:
+            for name, (schema, values) in tables.items():
+                self.conn.execute(f"DROP TABLE IF EXISTS {name}")
+                self.conn.execute(f"CREATE TABLE {name} ({schema})")
+                rows = [
+                    (*(key if isinstance(key, tuple) else (key,)), str(value))
+                    for key, value in values.items()
+                ]
+                if rows:
+                    placeholders = ",".join("?" * len(rows[0]))
+                    self.conn.executemany(f"INSERT INTO {name} VALUES ({placeholders})", rows)
+
+    def _lookup(self, query, args):
+        row = self.conn.execute(query, args).fetchone()
+        return int(row[0]) if row else 0
+
+    def weekly_weight_of(self, user, week):
+        return self._lookup(
+            "SELECT weight FROM lock_weights WHERE user = ? AND week = ?", (user, week)
+        )
+
+    def weekly_vote_weight_of(self, user, week):
+        return self._lookup(
+            "SELECT weight FROM vote_weights WHERE user = ? AND week = ?", (user, week)
+        )
+
+    def weekly_total_weight(self, week):
+        return self._lookup("SELECT weight FROM total_lock_weights WHERE week = ?", (week,))
+
+    def token_votes(self, token, week):
+        return self._lookup(
+            "SELECT votes FROM token_votes WHERE token = ? AND week = ?", (token, week)
+        )
+
+    def user_token_votes(self, user, token, week):
+        return self._lookup(
+            "SELECT votes FROM user_token_votes WHERE user = ? AND token = ? AND week = ?",
+            (user, token, week),
+        )
+
+    def total_votes(self, week):
+        return self._lookup("SELECT votes FROM total_votes WHERE week = ?", (week,))
+
+
+def main(db_path="indexer.db", from_block=0):
+    contracts = {
+        name: Contract.from_abi(name, address, container.abi)
+        for name, (container, address) in DEPLOYMENTS.items()
+    }
+    indexer = EventIndexer(db_path, contracts, from_block=int(from_block))
+    count = indexer.sync()
+    indexer.rebuild()
+    print(f"Indexed {count} events up to block {indexer.last_block}")
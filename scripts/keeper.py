@@ -0,0 +1,392 @@
+import asyncio
+from dataclasses import dataclass
+
+from brownie import Contract, Multicall, accounts, chain, network, web3
+
+from scripts.indexer import DEPLOYMENTS, EventIndexer
+from scripts.snapshot import aggregate
+
+
+WEEK = 86400 * 7
+FEE_CLAIM_INTERVAL = 86400
+
+# maximum number of LP tokens included in a single transaction
+TOKENS_PER_TX = 20
+# maximum number of submitted transactions awaiting confirmation
+MAX_PENDING = 8
+# seconds to wait for each transaction to confirm
+CONFIRMATION_TIMEOUT = 300
+
+# minimal ABI for reading LP token balances through `aggregate`
+_ERC20_ABI = [
+    {
+        "name": "balanceOf",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "account", "type": "address"}],
+        "outputs": [{"name": "", "type": "uint256"}],
+    }
+]
+
+
+@dataclass
+class BoostUpdate:
+    """
+    A stale boost for `user` on `token`. Reward rates are in reward tokens per second.
+    """
+    user: str
+    token: str
+    deposit_amount: int
+    adjusted_amount: int
+    expected_amount: int
+    current_rate: int
+    expected_rate: int
+
+    @property
+    def impact(self):
+        # reward rate that moves between this user and the other stakers of the pool
+        return abs(self.expected_rate - self.current_rate)
+
+
+@dataclass
+class Action:
+    """
+    A single keeper transaction. `impact` is the sum of the reward rate changes
+    it applies and `gas` is the estimated gas use, set prior to submission.
+    """
+    fn_name: str
+    args: tuple
+    impact: int = 0
+    gas: int = 0
+    txid: str = None
+    status: int = None
+
+
+def expected_adjusted_amount(deposit_amount, user_weight, next_user_weight, total_weight, lp_supply):
+    """
+    Adjusted amount for a deposit given the current lock weights, as
+    calculated by `EllipsisLpStaking._updateLiquidityLimits`. `next_user_weight`
+    is the user's lock weight in the following week.
+    """
+    adjusted = deposit_amount * 40 // 100
+    if user_weight > 0:
+        boost = lp_supply * user_weight // total_weight * 60 // 100
+        boost = min(boost, deposit_amount - adjusted)
+        # the boost is rounded down to a multiple of the weeks it takes to decay
+        decay = user_weight - next_user_weight
+        boost_weeks = user_weight // decay if decay > 0 else 1
+        adjusted += boost // boost_weeks * boost_weeks
+    return adjusted
+
+
+def current_adjusted_amount(user_info, week):
+    """
+    Effective balance in `week` for an `EllipsisLpStaking.userInfo` result,
+    as returned by `adjustedBalance`.
+    """
+    _, adjusted_amount, _, _, boost_slope, boost_start, boost_end = user_info
+    return adjusted_amount - boost_slope * (min(week, boost_end) - boost_start)
+
+
+def get_stakers(indexer):
+    """
+    Return a sorted list of (user, token) for every deposit within an `EventIndexer`
+    database. Positions that have since been withdrawn are included.
+    """
+    indexer.sync()
+    query = 'SELECT DISTINCT "user", "token" FROM "Deposit"'
+    return sorted(indexer.conn.execute(query))
+
+
+class Keeper:
+    """
+    Keeps boosts within `EllipsisLpStaking` up to date and triggers the daily
+    admin fee claim for each pool.
+
+    Stale boosts are found by comparing each position's current adjusted balance
+    with the amount the contract would calculate using current `TokenLocker`
+    weights. Boosts decay along with lock weights without keeper transactions,
+    so updates are only needed where a user's share of the total weight changed.
+    All state is read in bulk via `multicall`. Transactions are submitted from
+    `account` in order of reward impact, with nonces assigned locally so that up
+    to `max_pending` transactions are in flight at once.
+    """
+
+    def __init__(
+        self,
+        account,
+        lp_staking,
+        token_locker,
+        incentive_voting,
+        multicall,
+        tokens_per_tx=TOKENS_PER_TX,
+        max_pending=MAX_PENDING,
+        min_impact=0,
+    ):
+        self.account = account
+        self.lp_staking = lp_staking
+        self.token_locker = token_locker
+        self.incentive_voting = incentive_voting
+        self.multicall = multicall
+        self.tokens_per_tx = tokens_per_tx
+        self.max_pending = max_pending
+        self.min_impact = min_impact
+
+    def _read(self, calls):
+        results = aggregate(self.multicall, calls)
+        for (_, name, args), result in zip(calls, results):
+            if result is None:
+                raise ValueError(f"Call to {name}{args} reverted")
+        return results
+
+    def find_stale_boosts(self, stakers):
+        """
+        Return a `BoostUpdate` for each stale position in `stakers`, a list of
+        (user, token), sorted by descending impact.
+        """
+        stakers = sorted(set(stakers))
+        users = sorted(set(i[0] for i in stakers))
+        tokens = sorted(set(i[1] for i in stakers))
+        if not stakers:
+            return []
+
+        locker, staking = self.token_locker, self.lp_staking
+        week = (chain.time() - staking.startTime()) // WEEK
+        calls = [(locker, "totalWeight", ())]
+        calls += [(locker, "userWeight", (user,)) for user in users]
+        calls += [(locker, "weeklyWeightOf", (user, week + 1)) for user in users]
+        for token in tokens:
+            calls.append((Contract.from_abi("LP", token, _ERC20_ABI), "balanceOf", (staking,)))
+            calls.append((staking, "poolInfo", (token,)))
+            calls.append((self.incentive_voting, "getRewardsPerSecond", (token, week)))
+        calls += [(staking, "userInfo", (token, user)) for user, token in stakers]
+        results = iter(self._read(calls))
+
+        total_weight = next(results)
+        weights = {user: next(results) for user in users}
+        next_weights = {user: next(results) for user in users}
+        pools = {}
+        for token in tokens:
+            lp_supply, pool_info, rewards_per_second = next(results), next(results), next(results)
+            pools[token] = (lp_supply, pool_info[0], rewards_per_second)
+
+        updates = []
+        for (user, token), user_info in zip(stakers, results):
+            deposit_amount = user_info[0]
+            if deposit_amount == 0:
+                continue
+            adjusted_amount = current_adjusted_amount(user_info, week)
+            lp_supply, adjusted_supply, rewards_per_second = pools[token]
+            expected = expected_adjusted_amount(
+                deposit_amount, weights[user], next_weights[user], total_weight, lp_supply
+            )
+            if expected == adjusted_amount:
+                continue
+            new_supply = adjusted_supply - adjusted_amount + expected
+            updates.append(
+                BoostUpdate(
+                    user=user,
+                    token=token,
+                    deposit_amount=deposit_amount,
+                    adjusted_amount=adjusted_amount,
+                    expected_amount=expected,
+                    current_rate=rewards_per_second * adjusted_amount // adjusted_supply,
+                    expected_rate=rewards_per_second * expected // new_supply,
+                )
+            )
+        return sorted(updates, key=lambda i: i.impact, reverse=True)
+
+    def find_fee_claims(self, tokens):
+        """
+        Return the LP tokens in `tokens` whose pool admin fees may be claimed.
+        """
+        tokens = list(tokens)
+        calls = [(self.lp_staking, "lastFeeClaim", (token,)) for token in tokens]
+        now = chain.time()
+        return [
+            token for token, last_claim in zip(tokens, self._read(calls))
+            if last_claim + FEE_CLAIM_INTERVAL < now
+        ]
+
+    def build_actions(self, boost_updates, fee_tokens):
+        """
+        Group stale boosts into `updateUserBoosts` calls per user and fee claims into
+        `claim` calls made on behalf of the keeper account. Boost updates are ordered
+        by descending impact, fee claims are always sent last.
+        """
+        user_tokens = {}
+        for update in boost_updates:
+            if update.impact < self.min_impact:
+                continue
+            user_tokens.setdefault(update.user, []).append(update)
+
+        actions = []
+        for user, updates in user_tokens.items():
+            for i in range(0, len(updates), self.tokens_per_tx):
+                batch = updates[i:i + self.tokens_per_tx]
+                actions.append(
+                    Action(
+                        "updateUserBoosts",
+                        (user, [u.token for u in batch]),
+                        impact=sum(u.impact for u in batch),
+                    )
+                )
+        actions.sort(key=lambda i: i.impact, reverse=True)
+
+        fee_tokens = list(fee_tokens)
+        for i in range(0, len(fee_tokens), self.tokens_per_tx):
+            actions.append(Action("claim", (self.account.address, fee_tokens[i:i + self.tokens_per_tx])))
+        return actions
+
+    def estimate_gas(self, actions):
+        for action in actions:
+            fn = getattr(self.lp_staking, action.fn_name)
+            action.gas = fn.estimate_gas(*action.args, {"from": self.account})
+
+    async def _confirm(self, action, semaphore):
+        try:
+            receipt = await asyncio.to_thread(
+                web3.eth.wait_for_transaction_receipt, action.txid, CONFIRMATION_TIMEOUT
+            )
+            action.status = receipt["status"]
+        finally:
+            semaphore.release()
+
+    async def submit(self, actions):
+        """
+        Submit `actions` in order. Each transaction is broadcast with the next local
+        nonce without waiting for earlier transactions to confirm, up to `max_pending`
+        at a time. Submission stops at the first transaction that fails to broadcast,
+        so that no nonce gap is left behind it.
+        """
+        semaphore = asyncio.Semaphore(self.max_pending)
+        nonce = await asyncio.to_thread(web3.eth.get_transaction_count, self.account.address)
+        pending = []
+        for action in actions:
+            await semaphore.acquire()
+            fn = getattr(self.lp_staking, action.fn_name)
+            tx_params = {
+                "from": self.account,
+                "nonce": nonce,
+                "gas_limit": action.gas * 6 // 5,
+                "required_confs": 0,
+                "silent": True,
+            }
+            try:
+                tx = await asyncio.to_thread(fn, *action.args, tx_params)
+            except Exception:
+                semaphore.release()
+                break
+            action.txid = tx.txid
+            nonce += 1
+            pending.append(asyncio.create_task(self._confirm(action, semaphore)))
+        await asyncio.gather(*pending)
+        return actions
+
+    async def run(self, stakers, dry_run=False):
+        """
+        Find and apply all stale boosts and pending fee claims. Returns the list of
+        actions. When `dry_run` is true, gas is estimated but nothing is submitted.
+        """
+        tokens = sorted(set(i[1] for i in stakers))
+        boost_updates, fee_tokens = await asyncio.gather(
+            asyncio.to_thread(self.find_stale_boosts, stakers),
+            asyncio.to_thread(self.find_fee_claims, tokens),
+        )
+        actions = self.build_actions(boost_updates, fee_tokens)
+        await asyncio.to_thread(self.estimate_gas, actions)
+        if not dry_run:
+            await self.submit(actions)
+        return actions
+
+
+def profit_report(actions, gas_price, reward_price=0, horizon=WEEK):
+    """
+    Print the estimated cost of each action, and the value of the reward
+    rate it moves over `horizon` seconds. `reward_price` is the value of 10**18
+    reward tokens in wei of the native gas token, if zero the value is omitted.
+    """
+    print(f"\n{'action':<20}{'user':<44}{'tokens':>7}{'gas':>10}{'cost':>14}{'EPX/day':>14}{'net':>14}")
+    total_cost = total_value = 0
+    for action in actions:
+        cost = action.gas * gas_price
+        value = action.impact * horizon * reward_price // 10 ** 18
+        total_cost += cost
+        total_value += value
+        net = f"{(value - cost) / 1e18:.6f}" if reward_price else "-"
+        print(
+            f"{action.fn_name:<20}{action.args[0]:<44}{len(action.args[1]):>7}{action.gas:>10}"
+            f"{cost / 1e18:>14.6f}{action.impact * 86400 / 1e18:>14.2f}{net:>14}"
+        )
+    print(f"\n{len(actions)} transactions, total cost {total_cost / 1e18:.6f}")
+    if reward_price:
+        print(f"Value over {horizon // 3600} hours {total_value / 1e18:.6f}, net {(total_value - total_cost) / 1e18:.6f}")
+
+
+def _local_setup():
+    # deploy to a local chain and leave the boosts of several stakers stale
+    from scripts.local_deploy import advance_weeks, deploy_local
+
+    system = deploy_local(num_lp_tokens=3)
+    for i, acct in enumerate(accounts[1:6]):
+        system.fund_epx(acct, 10 ** 24)
+        system.fund_lp(acct, 10 ** 23)
+        system.locker.lock(acct, 10 ** 24 // (i + 1), 2 + i * 4, {"from": acct})
+        for token in system.lp_tokens[:i % 3 + 1]:
+            system.lp_staker.deposit(token, 10 ** 22 * (i + 1), False, {"from": acct})
+    for acct in accounts[1:6]:
+        votes = system.voter.availableVotes(acct)
+        system.voter.vote(system.lp_tokens, [votes // 3] * 3, {"from": acct})
+    advance_weeks(3)
+    contracts = {
+        "TokenLocker": system.locker,
+        "IncentiveVoting": system.voter,
+        "EllipsisLpStaking": system.lp_staker,
+    }
+    return contracts, Multicall.deploy({"from": system.deployer}), accounts[0]
+
+
+def _setup(account, multicall):
+    if network.show_active().startswith("development"):
+        return _local_setup()
+
+    contracts = {
+        name: Contract.from_abi(name, address, container.abi)
+        for name, (container, address) in DEPLOYMENTS.items()
+    }
+    if multicall is None:
+        raise ValueError("A deployed Multicall address is required outside of development")
+    return contracts, Multicall.at(multicall), accounts.load(account)
+
+
+def _run(account, db_path, multicall, dry_run, reward_price):
+    contracts, multicall, account = _setup(account, multicall)
+    indexer = EventIndexer(db_path, contracts)
+    keeper = Keeper(
+        account,
+        contracts["EllipsisLpStaking"],
+        contracts["TokenLocker"],
+        contracts["IncentiveVoting"],
+        multicall,
+    )
+    actions = asyncio.run(keeper.run(get_stakers(indexer), dry_run=dry_run))
+    profit_report(actions, web3.eth.gas_price, int(reward_price))
+    if not dry_run:
+        failed = [i for i in actions if i.status != 1]
+        print(f"{len(actions) - len(failed)} transactions confirmed, {len(failed)} failed or unsent")
+    return actions
+
+
+def main(account="keeper", db_path="indexer.db", multicall=None, reward_price=0):
+    """
+    Submit all pending boost updates and fee claims.
+    """
+    return _run(account, db_path, multicall, False, reward_price)
+
+
+def dry_run(account="keeper", db_path=":memory:", multicall=None, reward_price=0):
+    """
+    Report pending boost updates and fee claims without sending any transactions.
+    On a development network the protocol is first deployed with stale boosts.
+    """
+    return _run(account, db_path, multicall, True, reward_price)
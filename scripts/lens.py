@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from brownie import web3
+from eth_abi import decode
+from eth_utils import to_checksum_address
+
+
+# ABI types of the structs returned by `EllipsisLens`
+LOCK_POSITION_TYPE = "(uint256,uint256,uint256,uint256,uint256,uint256[2][])"
+POOL_POSITION_TYPE = "(address,uint256,uint256,uint256)"
+FEE_POSITION_TYPE = "(address,uint256)"
+USER_POSITION_TYPE = (
+    f"(address,{LOCK_POSITION_TYPE},uint256,{POOL_POSITION_TYPE}[],{FEE_POSITION_TYPE}[])"
+)
+
+
+@dataclass
+class LockPosition:
+    weight: int
+    total_weight: int
+    balance: int
+    streamable: int
+    claimable_exit_stream: int
+    # (weeks until expiration, balance of lock)
+    active_locks: List[Tuple[int, int]] = field(default_factory=list)
+
+
+@dataclass
+class PoolPosition:
+    token: str
+    deposit_amount: int
+    adjusted_amount: int
+    claimable_reward: int
+
+
+@dataclass
+class FeePosition:
+    token: str
+    claimable: int
+
+
+@dataclass
+class UserPosition:
+    user: str
+    lock: LockPosition
+    available_votes: int
+    pools: List[PoolPosition] = field(default_factory=list)
+    fees: List[FeePosition] = field(default_factory=list)
+
+    @property
+    def boost(self):
+        """
+        Effective boost for each LP token, as {token: boost}. The maximum is 2.5.
+        """
+        return {
+            i.token: 2.5 * i.adjusted_amount / i.deposit_amount
+            for i in self.pools if i.deposit_amount
+        }
+
+
+def _user_position(value):
+    user, lock, available_votes, pools, fees = value
+    return UserPosition(
+        user=to_checksum_address(user),
+        lock=LockPosition(*[int(i) for i in lock[:5]], [(int(a), int(b)) for a, b in lock[5]]),
+        available_votes=int(available_votes),
+        pools=[PoolPosition(to_checksum_address(i[0]), *[int(x) for x in i[1:]]) for i in pools],
+        fees=[FeePosition(to_checksum_address(i[0]), int(i[1])) for i in fees],
+    )
+
+
+def decode_user_position(data):
+    """
+    Decode the raw return data of `EllipsisLens.getUserPosition`.
+    """
+    return _user_position(decode([USER_POSITION_TYPE], bytes(data))[0])
+
+
+def decode_user_positions(data):
+    """
+    Decode the raw return data of `EllipsisLens.getUserPositions`.
+    """
+    return [_user_position(i) for i in decode([f"{USER_POSITION_TYPE}[]"], bytes(data))[0]]
+
+
+def get_user_position(lens, user, lp_tokens=(), fee_tokens=()):
+    """
+    Fetch the position of `user` from a deployed `EllipsisLens` in a single call.
+    """
+    data = lens.getUserPosition.encode_input(user, list(lp_tokens), list(fee_tokens))
+    return decode_user_position(web3.eth.call({"to": lens.address, "data": data}))
+
+
+def get_user_positions(lens, users, lp_tokens=(), fee_tokens=()):
+    """
+    Fetch the positions of many users from a deployed `EllipsisLens` in a single call.
+    """
+    data = lens.getUserPositions.encode_input(list(users), list(lp_tokens), list(fee_tokens))
+    return decode_user_positions(web3.eth.call({"to": lens.address, "data": data}))
@@ -0,0 +1,274 @@
+import json
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from brownie import accounts
+from brownie.exceptions import VirtualMachineError
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks, deploy_local
+
+
+REPORT_PATH = Path(__file__).parents[1].joinpath("load_report.json")
+
+# used to estimate how many calls of each operation fit in a single block
+BLOCK_GAS_LIMIT = 30_000_000
+
+NUM_LP_TOKENS = 5
+EPX_PER_USER = 1_000_000 * 10 ** 18
+LP_PER_USER = 100_000 * 10 ** 18
+WEEKLY_FEES = 10 ** 24
+PERCENTILES = [50, 90, 99]
+
+# Per-week probability that a user with each profile performs each action. Every
+# action a user takes in a week is submitted within the burst of transactions that
+# follows the epoch boundary, interleaved with the actions of all other users.
+PROFILES = {
+    "locker": {"lock": 0.6, "vote": 0.3, "deposit": 0.05, "claim": 0.1, "claim_fees": 0.7},
+    "voter": {"lock": 0.2, "vote": 0.9, "deposit": 0.1, "claim": 0.3, "claim_fees": 0.5},
+    "farmer": {"lock": 0.05, "vote": 0.1, "deposit": 0.5, "claim": 0.8, "claim_fees": 0.1},
+    "idle": {"lock": 0.02, "vote": 0.02, "deposit": 0.02, "claim": 0.05, "claim_fees": 0.05},
+}
+
+# share of users assigned to each profile
+MIXES = {
+    "balanced": {"locker": 0.3, "voter": 0.2, "farmer": 0.4, "idle": 0.1},
+    "lockers": {"locker": 0.7, "voter": 0.2, "farmer": 0.05, "idle": 0.05},
+    "farmers": {"locker": 0.1, "voter": 0.1, "farmer": 0.7, "idle": 0.1},
+}
+
+
+@dataclass
+class User:
+    account: object
+    profile: str
+    epx_balance: int
+    lp_balances: list
+    deposited: set = field(default_factory=set)
+
+
+@dataclass
+class LoadReport:
+    """
+    Results of a load test run.
+
+    `gas` maps each operation to the gas used by every successful call. `weeks`
+    holds one entry per simulated week with the number of transactions, total gas,
+    the number of full blocks needed to include them and an estimate of new
+    storage slots written.
+    """
+    profiles: Counter
+    gas: dict = field(default_factory=lambda: defaultdict(list))
+    reverts: Counter = field(default_factory=Counter)
+    weeks: list = field(default_factory=list)
+
+    def percentiles(self):
+        """
+        Return {operation: {"count", "min", "p50", "p90", "p99", "max", "per_block"}}
+        where `per_block` is the number of calls at the 99th percentile gas that
+        fit within `BLOCK_GAS_LIMIT`.
+        """
+        result = {}
+        for name, values in sorted(self.gas.items()):
+            values = sorted(values)
+            stats = {"count": len(values), "min": values[0], "max": values[-1]}
+            for pct in PERCENTILES:
+                stats[f"p{pct}"] = percentile(values, pct)
+            stats["per_block"] = BLOCK_GAS_LIMIT // stats["p99"]
+            result[name] = stats
+        return result
+
+    def as_dict(self):
+        return {
+            "profiles": dict(self.profiles),
+            "block_gas_limit": BLOCK_GAS_LIMIT,
+            "operations": self.percentiles(),
+            "reverts": dict(self.reverts),
+            "weeks": self.weeks,
+        }
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a sorted, non-empty list.
+    """
+    index = max(-(-len(values) * pct // 100) - 1, 0)
+    return values[index]
+
+
+def _new_slots(tx):
+    # SSTORE from zero to a non-zero value costs 20,000 gas plus any cold access
+    # surcharge, every other SSTORE costs less
+    return sum(1 for i in tx.trace if i["op"] == "SSTORE" and i["gasCost"] >= 20000)
+
+
+def create_users(system, num_users, mix, rng):
+    """
+    Create and fund `num_users` new local accounts, assigning each a profile
+    according to the shares in `MIXES[mix]`.
+    """
+    profiles, weights = zip(*MIXES[mix].items())
+    users = []
+    for i in range(num_users):
+        acct = accounts.add()
+        system.deployer.transfer(acct, 10 ** 16)
+        system.fund_epx(acct, EPX_PER_USER)
+        system.fund_lp(acct, LP_PER_USER)
+        profile = rng.choices(profiles, weights)[0]
+        users.append(User(acct, profile, EPX_PER_USER, [LP_PER_USER] * len(system.lp_tokens)))
+    return users
+
+
+class LoadGenerator:
+    """
+    Drive many synthetic users against a local deployment, one epoch week at a time.
+
+    Each week the chain is advanced past the epoch boundary, fees are deposited and
+    then every action chosen for every user is submitted in random order. Gas is
+    recorded for each successful call. A random `trace_pct` percent of transactions
+    are traced to estimate how many new storage slots each week adds.
+    """
+
+    def __init__(self, system, users, rng, trace_pct=5):
+        self.system = system
+        self.users = users
+        self.rng = rng
+        self.trace_pct = trace_pct
+        self.fee_tokens = system.lp_tokens[:2]
+        self.report = LoadReport(Counter(i.profile for i in users))
+
+        deployer = system.deployer
+        for token in self.fee_tokens:
+            token.approve(system.fee_distro, 2 ** 256 - 1, {"from": deployer})
+
+    def _lock(self, user):
+        amount = user.epx_balance * self.rng.randint(1, 50) // 100
+        if not amount:
+            return None
+        weeks = self.rng.randint(1, MAX_LOCK_WEEKS)
+        acct = user.account
+        tx = self.system.locker.lock(acct, amount, weeks, {"from": acct})
+        user.epx_balance -= amount
+        return tx
+
+    def _vote(self, user):
+        votes = self.system.voter.availableVotes(user.account)
+        if not votes:
+            return None
+        count = min(self.rng.randint(1, len(self.system.lp_tokens)), votes)
+        tokens = self.rng.sample(self.system.lp_tokens, count)
+        amounts = [votes // count] * count
+        return self.system.voter.vote(tokens, amounts, {"from": user.account})
+
+    def _deposit(self, user):
+        idx = self.rng.randrange(len(self.system.lp_tokens))
+        amount = user.lp_balances[idx] * self.rng.randint(1, 50) // 100
+        if not amount:
+            return None
+        token = self.system.lp_tokens[idx]
+        tx = self.system.lp_staker.deposit(token, amount, False, {"from": user.account})
+        user.lp_balances[idx] -= amount
+        user.deposited.add(idx)
+        return tx
+
+    def _claim(self, user):
+        if not user.deposited:
+            return None
+        tokens = [self.system.lp_tokens[i] for i in sorted(user.deposited)]
+        return self.system.lp_staker.claim(user.account, tokens, {"from": user.account})
+
+    def _claim_fees(self, user):
+        acct = user.account
+        return self.system.fee_distro.claim(acct, self.fee_tokens, {"from": acct})
+
+    def _deposit_fees(self):
+        deployer = self.system.deployer
+        for token in self.fee_tokens:
+            token.mint(deployer, WEEKLY_FEES, {"from": deployer})
+            tx = self.system.fee_distro.depositFee(token, WEEKLY_FEES, {"from": deployer})
+            self.report.gas["depositFee"].append(tx.gas_used)
+
+    def run_week(self):
+        advance_weeks(1)
+        self._deposit_fees()
+
+        actions = []
+        for user in self.users:
+            for name, probability in PROFILES[user.profile].items():
+                if self.rng.random() < probability:
+                    actions.append((name, user))
+        self.rng.shuffle(actions)
+
+        txs = gas_used = new_slots = traced = 0
+        for name, user in actions:
+            try:
+                tx = getattr(self, f"_{name}")(user)
+            except VirtualMachineError:
+                self.report.reverts[name] += 1
+                continue
+            if tx is None:
+                continue
+            txs += 1
+            gas_used += tx.gas_used
+            self.report.gas[name].append(tx.gas_used)
+            if self.rng.random() * 100 < self.trace_pct:
+                traced += 1
+                new_slots += _new_slots(tx)
+
+        self.report.weeks.append({
+            "week": self.system.get_week(),
+            "transactions": txs,
+            "gas_used": gas_used,
+            "blocks": -(-gas_used // BLOCK_GAS_LIMIT),
+            "new_slots": new_slots * txs // traced if traced else None,
+        })
+
+    def run(self, weeks):
+        for i in range(weeks):
+            self.run_week()
+        return self.report
+
+
+def print_report(report):
+    profiles = ", ".join(f"{v} {k}" for k, v in sorted(report.profiles.items()))
+    print(f"\n{sum(report.profiles.values())} users: {profiles}")
+    print(
+        f"\n{'operation':<14}{'count':>8}{'min':>10}{'p50':>10}{'p90':>10}"
+        f"{'p99':>10}{'max':>10}{'per block':>11}"
+    )
+    for name, s in report.percentiles().items():
+        print(
+            f"{name:<14}{s['count']:>8}{s['min']:>10}{s['p50']:>10}{s['p90']:>10}"
+            f"{s['p99']:>10}{s['max']:>10}{s['per_block']:>11}"
+        )
+    for name, count in sorted(report.reverts.items()):
+        print(f"{name} reverted {count} times")
+
+    print(f"\n{'week':>6}{'txs':>8}{'gas used':>16}{'blocks':>8}{'new slots':>11}")
+    for week in report.weeks:
+        new_slots = "-" if week["new_slots"] is None else week["new_slots"]
+        print(
+            f"{week['week']:>6}{week['transactions']:>8}{week['gas_used']:>16}"
+            f"{week['blocks']:>8}{new_slots:>11}"
+        )
+
+
+def main(num_users="1000", weeks="8", mix="balanced", seed="0", trace_pct="5"):
+    """
+    Run a load test against a local deployment, e.g.
+    `brownie run load_test main 2000 12 lockers`.
+    """
+    rng = random.Random(int(seed))
+    system = deploy_local(num_lp_tokens=NUM_LP_TOKENS)
+    users = create_users(system, int(num_users), mix, rng)
+
+    generator = LoadGenerator(system, users, rng, int(trace_pct))
+    report = generator.run(int(weeks))
+
+    print_report(report)
+    with REPORT_PATH.open("w") as fp:
+        json.dump(report.as_dict(), fp, indent=2)
+        fp.write("\n")
+    print(f"\nWrote report to {REPORT_PATH}")
+    return report
@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+
+from brownie import ZERO_ADDRESS, accounts, chain
+from brownie import (
+    EllipsisToken2,
+    FeeDistributor,
+    IncentiveVoting,
+    EllipsisLpStaking,
+    TokenLocker,
+    MerkleDistributor,
+    Pool,
+    RewardsToken,
+)
+from brownie_tokens import ERC20
+
+
+WEEK = 86400 * 7
+
+# the same parameters used in `scripts/deploy.py` and `tests/conftest.py`
+MIGRATION_RATIO = 88
+MAX_SUPPLY = 1_500_000_000 * 10 ** 18 * MIGRATION_RATIO
+MAX_MINTABLE = MAX_SUPPLY // 2
+INITIAL_REWARDS_PER_SECOND = 2893518518518518518 * MIGRATION_RATIO
+MAX_LOCK_WEEKS = 52
+QUORUM_PCT = 30
+TOKEN_APPROVAL_WEIGHT = 250_000_000 * 10 ** 18
+
+
+@dataclass
+class LocalSystem:
+    """
+    A complete deployment of the protocol on a local development chain.
+
+    Unlike `scripts/deploy.py`, nothing here depends on mainnet state. The
+    protocol starts at the beginning of the current epoch week, EPX transfers
+    are enabled immediately and every LP token in `lp_tokens` is approved for
+    emissions without an approval vote. Each LP token is minted by the `Pool`
+    at the same index in `pools`, and every pool sends admin fees to
+    `fee_distro`, as the factory `fee_receiver` does in `scripts/deploy.py`.
+    """
+    deployer: object
+    start_time: int
+    eps: object
+    eps2: object
+    locker: object
+    voter: object
+    fee_distro: object
+    lp_staker: object
+    merkle: object
+    lp_tokens: list = field(default_factory=list)
+    pools: list = field(default_factory=list)
+
+    def get_week(self):
+        return (chain.time() - self.start_time) // WEEK
+
+    def fund_epx(self, acct, amount):
+        """
+        Mint at least `amount` EPX to `acct` via the EPS migration and approve `TokenLocker`.
+        """
+        eps_amount = -(-amount // MIGRATION_RATIO)
+        self.eps._mint_for_testing(acct, eps_amount, {"from": acct})
+        self.eps.approve(self.eps2, eps_amount, {"from": acct})
+        self.eps2.migrate(acct, eps_amount, {"from": acct})
+        self.eps2.approve(self.locker, 2 ** 256 - 1, {"from": acct})
+
+    def fund_lp(self, acct, amount, tokens=None):
+        """
+        Mint `amount` of each LP token in `tokens` to `acct` and approve `EllipsisLpStaking`.
+        """
+        for token in tokens or self.lp_tokens:
+            token.mint(acct, amount, {"from": acct})
+            token.approve(self.lp_staker, 2 ** 256 - 1, {"from": acct})
+
+
+def advance_weeks(weeks):
+    """
+    Advance the chain by `weeks` full weeks, landing one hour past the epoch boundary.
+    """
+    if weeks:
+        target = (chain.time() // WEEK + weeks) * WEEK + 3600
+        chain.mine(timedelta=target - chain.time())
+
+
+def deploy_local(deployer=None, num_lp_tokens=10):
+    if deployer is None:
+        deployer = accounts[0]
+    tx_params = {"from": deployer}
+    start_time = chain.time() // WEEK * WEEK
+
+    eps = ERC20(deployer=deployer)
+    eps2 = EllipsisToken2.deploy(start_time, MAX_SUPPLY, eps, MIGRATION_RATIO, tx_params)
+    locker = TokenLocker.deploy(
+        eps2, ZERO_ADDRESS, start_time, MAX_LOCK_WEEKS, MIGRATION_RATIO, tx_params
+    )
+    voter = IncentiveVoting.deploy(
+        locker, INITIAL_REWARDS_PER_SECOND, QUORUM_PCT, TOKEN_APPROVAL_WEIGHT, tx_params
+    )
+    fee_distro = FeeDistributor.deploy(locker, tx_params)
+    lp_staker = EllipsisLpStaking.deploy(eps2, voter, locker, MAX_MINTABLE, tx_params)
+    merkle = MerkleDistributor.deploy(eps2, tx_params)
+
+    lp_tokens = []
+    pools = []
+    for i in range(num_lp_tokens):
+        pool = Pool.deploy(tx_params)
+        pool.setFeeReceiver(fee_distro, tx_params)
+        token = RewardsToken.deploy(tx_params)
+        token.setMinter(pool, tx_params)
+        lp_tokens.append(token)
+        pools.append(pool)
+
+    voter.setLpStaking(lp_staker, lp_tokens, tx_params)
+    locker.setFeeDistributor(fee_distro, tx_params)
+    locker.setLpStaking(lp_staker, tx_params)
+    eps2.addMinter(merkle, tx_params)
+    eps2.addMinter(lp_staker, tx_params)
+
+    return LocalSystem(
+        deployer=deployer,
+        start_time=start_time,
+        eps=eps,
+        eps2=eps2,
+        locker=locker,
+        voter=voter,
+        fee_distro=fee_distro,
+        lp_staker=lp_staker,
+        merkle=merkle,
+        lp_tokens=lp_tokens,
+        pools=pools,
+    )
+
+
+def main():
+    system = deploy_local()
+    print(f"TokenLocker: {system.locker}")
+    print(f"IncentiveVoting: {system.voter}")
+    print(f"EllipsisLpStaking: {system.lp_staker}")
+    print(f"FeeDistributor: {system.fee_distro}")
+    return system
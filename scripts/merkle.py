@@ -0,0 +1,102 @@
+from eth_utils import keccak, to_canonical_address
+
+
+def hash_leaf(account, amount):
+    """
+    Leaf hash used by `MerkleDistributor`: keccak256(abi.encodePacked(account, amount))
+    """
+    return keccak(to_canonical_address(account) + amount.to_bytes(32, "big"))
+
+
+def hash_fee_leaf(account, token, amount):
+    """
+    Leaf hash used by `FeeDistributor.claimSettled`:
+    keccak256(abi.encodePacked(account, token, amount))
+    """
+    return keccak(
+        to_canonical_address(account) + to_canonical_address(token) + amount.to_bytes(32, "big")
+    )
+
+
+def _hash_pair(a, b):
+    # pairs are sorted prior to hashing, matching `MerkleDistributor.verify`
+    if a <= b:
+        return keccak(a + b)
+    return keccak(b + a)
+
+
+class MerkleTree:
+    """
+    Merkle tree using sorted-pair hashing. Leaves are given as already-hashed
+    32 byte values. A layer with an odd number of nodes carries the last node
+    up to the next layer unchanged.
+    """
+
+    def __init__(self, leaves):
+        if not leaves:
+            raise ValueError("Cannot build a tree without leaves")
+        self.layers = [sorted(leaves)]
+        while len(self.layers[-1]) > 1:
+            layer = self.layers[-1]
+            next_layer = [_hash_pair(layer[i], layer[i + 1]) for i in range(0, len(layer) - 1, 2)]
+            if len(layer) % 2:
+                next_layer.append(layer[-1])
+            self.layers.append(next_layer)
+
+    @property
+    def root(self):
+        return self.layers[-1][0]
+
+    def get_proof(self, leaf):
+        index = self.layers[0].index(leaf)
+        proof = []
+        for layer in self.layers[:-1]:
+            sibling = index ^ 1
+            if sibling < len(layer):
+                proof.append(layer[sibling])
+            index //= 2
+        return proof
+
+
+def verify_proof(root, leaf, proof):
+    computed = leaf
+    for node in proof:
+        computed = _hash_pair(computed, node)
+    return computed == root
+
+
+def build_distribution(amounts):
+    """
+    Build a `MerkleDistributor` tree from a dict of {account: amount}.
+
+    Returns the tree root and a dict of {account: (amount, proof)}.
+    """
+    leaves = {account: hash_leaf(account, amount) for account, amount in amounts.items()}
+    tree = MerkleTree(list(leaves.values()))
+    claims = {
+        account: (amounts[account], tree.get_proof(leaf)) for account, leaf in leaves.items()
+    }
+    return tree.root, claims
+
+
+def build_fee_distribution(amounts):
+    """
+    Build a `FeeDistributor` settlement tree from a dict of {(account, token): amount}.
+
+    Returns the tree root and a dict of {(account, token): (amount, proof)}.
+    """
+    leaves = {key: hash_fee_leaf(*key, amount) for key, amount in amounts.items()}
+    tree = MerkleTree(list(leaves.values()))
+    claims = {key: (amounts[key], tree.get_proof(leaf)) for key, leaf in leaves.items()}
+    return tree.root, claims
+
+
+def accumulate(totals, amounts):
+    """
+    Add a round of {account: amount} to the lifetime {account: total} of previous
+    rounds, as committed to by `CumulativeMerkleDistributor`. Returns a new dict.
+    """
+    totals = dict(totals)
+    for account, amount in amounts.items():
+        totals[account] = totals.get(account, 0) + amount
+    return totals
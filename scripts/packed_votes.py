@@ -0,0 +1,68 @@
+# must match the layout used by `IncentiveVoting.votePacked`
+PAIRS_PER_WORD = 4
+PAIR_BITS = 64
+VOTE_BITS = 48
+MAX_VOTES = 2 ** VOTE_BITS - 1
+MAX_TOKEN_ID = 2 ** (PAIR_BITS - VOTE_BITS) - 1
+
+
+def encode_votes(votes):
+    """
+    Encode an iterable of (token ID, votes) pairs for `IncentiveVoting.votePacked`.
+
+    Pairs with zero votes are dropped. Returns a list of uint256 words.
+    """
+    pairs = []
+    for token_id, amount in votes:
+        if not 0 <= token_id <= MAX_TOKEN_ID:
+            raise ValueError(f"Token ID out of range: {token_id}")
+        if not 0 <= amount <= MAX_VOTES:
+            raise ValueError(f"Vote amount out of range: {amount}")
+        if amount:
+            pairs.append(token_id << VOTE_BITS | amount)
+
+    words = []
+    for i in range(0, len(pairs), PAIRS_PER_WORD):
+        word = 0
+        for j, pair in enumerate(pairs[i:i + PAIRS_PER_WORD]):
+            word |= pair << (PAIR_BITS * j)
+        words.append(word)
+    return words
+
+
+def decode_votes(words):
+    """
+    Decode packed words, as given to `votePacked` or emitted in
+    `VotedForIncentivesPacked`, into a list of (token ID, votes) pairs.
+    """
+    votes = []
+    for word in words:
+        word = int(word)
+        while word:
+            amount = word & MAX_VOTES
+            token_id = (word >> VOTE_BITS) & MAX_TOKEN_ID
+            word >>= PAIR_BITS
+            if amount:
+                votes.append((token_id, amount))
+    return votes
+
+
+def get_token_ids(voter):
+    """
+    Return {token address: token ID} for every token in `voter.approvedTokens`.
+    """
+    _, vote_data = voter.getVotes(0)
+    token_ids = {}
+    for token_id, (token, _) in enumerate(vote_data):
+        token_ids.setdefault(token, token_id)
+    return token_ids
+
+
+def vote_packed(voter, tokens, votes, tx_params, token_ids=None):
+    """
+    Call `votePacked` with the same arguments as `IncentiveVoting.vote`.
+    """
+    if token_ids is None:
+        token_ids = get_token_ids(voter)
+    encoded = encode_votes((token_ids[str(token)], amount) for token, amount in zip(tokens, votes))
+    return voter.votePacked(encoded, tx_params)
@@ -0,0 +1,192 @@
+import argparse
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+
+PROJECT_PATH = Path(__file__).parents[1]
+
+# project folders linked into every worker. `build` is copied instead so that each
+# worker has its own artifact cache and test results file.
+LINKED_FOLDERS = ["contracts", "interfaces", "scripts", "tests"]
+
+
+@dataclass
+class Result:
+    path: str
+    tests: int = 0
+    failures: int = 0
+    errors: int = 0
+    skipped: int = 0
+    duration: float = 0
+    returncode: int = None
+    log_path: Path = None
+
+    @property
+    def passed(self):
+        return self.returncode == 0
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _test_paths(root):
+    # every directory within `tests` that contains test modules
+    return sorted(
+        i.relative_to(root).as_posix()
+        for i in root.joinpath("tests").iterdir()
+        if i.is_dir() and any(i.glob("test_*.py"))
+    )
+
+
+def _path_weight(root, path):
+    # rough runtime estimate used to schedule the largest directories first
+    return sum(i.stat().st_size for i in root.joinpath(path).glob("test_*.py"))
+
+
+def create_worker(root, worker_path, port):
+    """
+    Create a worker project at `worker_path` that shares the sources of the project
+    at `root`, with a copy of the compiled artifacts and a local chain on `port`.
+    """
+    worker_path.mkdir(parents=True)
+    for name in LINKED_FOLDERS:
+        if root.joinpath(name).exists():
+            worker_path.joinpath(name).symlink_to(root.joinpath(name), target_is_directory=True)
+    if root.joinpath("build").exists():
+        shutil.copytree(root.joinpath("build"), worker_path.joinpath("build"))
+
+    config_path = root.joinpath("brownie-config.yaml")
+    config = yaml.safe_load(config_path.read_text()) if config_path.exists() else {}
+    config = config or {}
+    development = config.setdefault("networks", {}).setdefault("development", {})
+    development.setdefault("cmd_settings", {})["port"] = port
+    with worker_path.joinpath("brownie-config.yaml").open("w") as fp:
+        yaml.safe_dump(config, fp)
+    return worker_path
+
+
+def _read_junit(result, junit_path):
+    if not junit_path.exists():
+        return
+    root = ET.parse(junit_path).getroot()
+    suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+    for suite in suites:
+        result.tests += int(suite.get("tests", 0))
+        result.failures += int(suite.get("failures", 0))
+        result.errors += int(suite.get("errors", 0))
+        result.skipped += int(suite.get("skipped", 0))
+
+
+def run_path(worker_path, path, pytest_args=()):
+    """
+    Run the tests in `path` within a worker project and return a `Result`.
+    """
+    name = path.replace("/", "-")
+    junit_path = worker_path.joinpath(f"{name}.xml")
+    log_path = worker_path.joinpath(f"{name}.log")
+    cmd = ["brownie", "test", path, f"--junitxml={junit_path}", *pytest_args]
+
+    start = time.time()
+    with log_path.open("w") as fp:
+        proc = subprocess.run(cmd, cwd=worker_path, stdout=fp, stderr=subprocess.STDOUT)
+    result = Result(path, duration=time.time() - start, returncode=proc.returncode, log_path=log_path)
+    _read_junit(result, junit_path)
+    return result
+
+
+def run_parallel(paths=None, num_workers=None, pytest_args=(), root=PROJECT_PATH, work_path=None):
+    """
+    Run each test directory in `paths` as a separate `brownie test` invocation,
+    spread across `num_workers` worker projects. Each worker runs one directory
+    at a time against its own local chain. Returns a list of `Result`.
+    """
+    root = Path(root).resolve()
+    if paths is None:
+        paths = _test_paths(root)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = max(1, min(num_workers, len(paths)))
+
+    # compile once so that workers start from an up-to-date artifact cache
+    subprocess.run(["brownie", "compile"], cwd=root, check=True, stdout=subprocess.DEVNULL)
+
+    work_path = Path(work_path or tempfile.mkdtemp(prefix="parallel-test-"))
+    jobs = queue.Queue()
+    for path in sorted(paths, key=lambda i: _path_weight(root, i), reverse=True):
+        jobs.put(path)
+
+    results = []
+    lock = threading.Lock()
+
+    def worker(index):
+        worker_path = create_worker(root, work_path.joinpath(f"worker-{index}"), _free_port())
+        while True:
+            try:
+                path = jobs.get_nowait()
+            except queue.Empty:
+                return
+            result = run_path(worker_path, path, pytest_args)
+            with lock:
+                results.append(result)
+                status = "ok" if result.passed else "FAILED"
+                print(f"[worker-{index}] {path}: {status} ({result.duration:.1f}s)", flush=True)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sorted(results, key=lambda i: i.path)
+
+
+def print_summary(results, elapsed):
+    print(f"\n{'path':<28}{'tests':>7}{'failed':>8}{'errors':>8}{'skipped':>9}{'time':>9}")
+    for result in results:
+        print(
+            f"{result.path:<28}{result.tests:>7}{result.failures:>8}{result.errors:>8}"
+            f"{result.skipped:>9}{result.duration:>8.1f}s"
+        )
+    serial = sum(i.duration for i in results)
+    print(
+        f"\n{sum(i.tests for i in results)} tests in {elapsed:.1f}s "
+        f"({serial:.1f}s of test time, {serial / max(elapsed, 1e-9):.1f}x speedup)"
+    )
+    for result in results:
+        if not result.passed:
+            print(f"\n--- {result.path} failed, log at {result.log_path} ---")
+            print("\n".join(result.log_path.read_text().splitlines()[-40:]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run test directories in parallel, each worker with its own local chain."
+    )
+    parser.add_argument("paths", nargs="*", help="test directories, defaults to all of tests/")
+    parser.add_argument("-n", "--num-workers", type=int, default=None)
+    parser.add_argument("--work-path", default=None, help="where worker projects are created")
+    args, pytest_args = parser.parse_known_args(argv)
+
+    start = time.time()
+    results = run_parallel(args.paths or None, args.num_workers, pytest_args, work_path=args.work_path)
+    print_summary(results, time.time() - start)
+    return 0 if all(i.passed for i in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+import mmap
+import sqlite3
+import struct
+from pathlib import Path
+
+from brownie import ZERO_ADDRESS, Contract, Multicall, accounts, network
+from eth_utils import to_canonical_address, to_checksum_address
+
+from scripts.indexer import DEPLOYMENTS
+
+
+# Snapshot files consist of a header followed by fixed-size records sorted by key,
+# so that a memory-mapped base snapshot can be searched without being parsed.
+# A base file holds every nonzero value for a week. A diff file holds every value
+# that changed relative to its parent snapshot, with zero meaning the value was removed.
+MAGIC = b"EPXSNAP\x01"
+HEADER = struct.Struct(">8sIIBI")  # magic, week, parent week, kind, record count
+RECORD = struct.Struct(">B20s32s")  # field, address, value
+KEY_SIZE = 21
+KIND_BASE = 0
+KIND_DIFF = 1
+
+# record fields, and the address each record is keyed by
+TOTAL_WEIGHT = 0  # zero address, `TokenLocker.weeklyTotalWeight`
+USER_WEIGHT = 1  # user, `TokenLocker.weeklyWeightOf`
+TOKEN_VOTES = 2  # LP token, `IncentiveVoting.tokenVotes`
+TOTAL_VOTES = 3  # zero address, `IncentiveVoting.totalVotes`
+POOL_INFO = (4, 5, 6, 7, 8, 9)  # LP token, `EllipsisLpStaking.poolInfo` members in order
+
+MULTICALL_BATCH_SIZE = 500
+
+
+def _address(value):
+    return to_canonical_address(value)
+
+
+def aggregate(multicall, calls, batch_size=MULTICALL_BATCH_SIZE):
+    """
+    Perform many contract calls through `Multicall.tryAggregate`.
+
+    `calls` is a list of (contract, method name, args). Returns a list of decoded
+    return values, with `None` for each call that reverted.
+    """
+    results = []
+    for i in range(0, len(calls), batch_size):
+        batch = [
+            (contract.address, getattr(contract, name), args)
+            for contract, name, args in calls[i:i + batch_size]
+        ]
+        response = multicall.tryAggregate(
+            [(target, fn.encode_input(*args)) for target, fn, args in batch]
+        )
+        for (_, fn, _), (success, data) in zip(batch, response):
+            results.append(fn.decode_output(data) if success else None)
+    return results
+
+
+def read_state(multicall, locker, voter, lp_staking, users, week):
+    """
+    Read the snapshot values for `week` in bulk via `multicall`.
+
+    Returns a dict of {(field, address): value}, omitting zero values.
+    """
+    length = voter.approvedTokensLength()
+    tokens = aggregate(multicall, [(voter, "approvedTokens", (i,)) for i in range(length)])
+
+    keys = [(TOTAL_WEIGHT, ZERO_ADDRESS), (TOTAL_VOTES, ZERO_ADDRESS)]
+    calls = [(locker, "weeklyTotalWeight", (week,)), (voter, "totalVotes", (week,))]
+    for user in users:
+        keys.append((USER_WEIGHT, user))
+        calls.append((locker, "weeklyWeightOf", (user, week)))
+    for token in tokens:
+        keys.append((TOKEN_VOTES, token))
+        calls.append((voter, "tokenVotes", (token, week)))
+        keys.append((POOL_INFO, token))
+        calls.append((lp_staking, "poolInfo", (token,)))
+
+    values = {}
+    for (field, address), result in zip(keys, aggregate(multicall, calls)):
+        if result is None:
+            raise ValueError(f"Call for field {field} reverted: {address}")
+        if isinstance(field, tuple):
+            for member, value in zip(field, result):
+                values[member, address] = int(value)
+        else:
+            values[field, address] = int(result)
+    return {k: v for k, v in values.items() if v}
+
+
+def _write(path, week, parent, kind, values):
+    records = sorted(values.items())
+    with open(path, "wb") as fp:
+        fp.write(HEADER.pack(MAGIC, week, parent, kind, len(records)))
+        for (field, address), value in records:
+            fp.write(RECORD.pack(field, address, value.to_bytes(32, "big")))
+
+
+def _read_header(fp):
+    magic, week, parent, kind, count = HEADER.unpack(fp.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a snapshot file")
+    return week, parent, kind, count
+
+
+class Snapshot:
+    """
+    A single week's snapshot, backed by a memory-mapped base file with the
+    values of any following diffs held in memory.
+    """
+
+    def __init__(self, week, base_path, overlay):
+        self.week = week
+        self._fp = open(base_path, "rb")
+        self._count = _read_header(self._fp)[3]
+        if self._count:
+            self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mm = None
+        self._overlay = overlay
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _record(self, index):
+        offset = HEADER.size + index * RECORD.size
+        return self._mm[offset:offset + RECORD.size]
+
+    def _search(self, key):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[:KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            record = self._record(lo)
+            if record[:KEY_SIZE] == key:
+                return int.from_bytes(record[KEY_SIZE:], "big")
+        return 0
+
+    def get(self, field, address=ZERO_ADDRESS):
+        address = _address(address)
+        if (field, address) in self._overlay:
+            return self._overlay[field, address]
+        return self._search(bytes([field]) + address)
+
+    def items(self):
+        """
+        Iterate over (field, checksummed address, value) for every nonzero value.
+        """
+        values = {}
+        for i in range(self._count):
+            field, address, value = RECORD.unpack(self._record(i))
+            values[field, address] = int.from_bytes(value, "big")
+        values.update(self._overlay)
+        for (field, address), value in sorted(values.items()):
+            if value:
+                yield field, to_checksum_address(address), value
+
+    def total_weight(self):
+        return self.get(TOTAL_WEIGHT)
+
+    def weight_of(self, user):
+        return self.get(USER_WEIGHT, user)
+
+    def token_votes(self, token):
+        return self.get(TOKEN_VOTES, token)
+
+    def total_votes(self):
+        return self.get(TOTAL_VOTES)
+
+    def pool_info(self, token):
+        return tuple(self.get(field, token) for field in POOL_INFO)
+
+
+class SnapshotStore:
+    """
+    Directory of weekly snapshots. The first snapshot written is a base, later
+    snapshots are written as a diff against the most recent earlier snapshot.
+    A new base is written every `base_interval` weeks, which bounds the number
+    of diffs applied when loading a week.
+    """
+
+    def __init__(self, directory, base_interval=52):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.base_interval = base_interval
+
+    def _path(self, week, kind):
+        suffix = "base" if kind == KIND_BASE else "diff"
+        return self.directory.joinpath(f"{week:05d}.{suffix}")
+
+    def weeks(self):
+        return sorted(
+            int(i.stem) for i in self.directory.iterdir() if i.suffix in (".base", ".diff")
+        )
+
+    def _chain(self, week):
+        # returns the base week and the diffs to apply to it, oldest first
+        diffs = []
+        while not self._path(week, KIND_BASE).exists():
+            path = self._path(week, KIND_DIFF)
+            if not path.exists():
+                raise FileNotFoundError(f"No snapshot for week {week}")
+            diffs.append(path)
+            with path.open("rb") as fp:
+                week = _read_header(fp)[1]
+        return week, diffs[::-1]
+
+    def load(self, week):
+        """
+        Load the snapshot for `week`. The returned object should be closed after use.
+        """
+        base_week, diff_paths = self._chain(week)
+        overlay = {}
+        for path in diff_paths:
+            with path.open("rb") as fp:
+                count = _read_header(fp)[3]
+                for _ in range(count):
+                    field, address, value = RECORD.unpack(fp.read(RECORD.size))
+                    overlay[field, address] = int.from_bytes(value, "big")
+        return Snapshot(week, self._path(base_week, KIND_BASE), overlay)
+
+    def write(self, week, values):
+        """
+        Write the snapshot for `week` from a dict of {(field, address): value}.
+        Returns the path of the written file.
+        """
+        weeks = self.weeks()
+        if week in weeks:
+            raise ValueError(f"Snapshot for week {week} already exists")
+        values = {
+            (field, _address(address)): value for (field, address), value in values.items() if value
+        }
+
+        earlier = [i for i in weeks if i < week]
+        if not earlier or week - self._chain(max(earlier))[0] >= self.base_interval:
+            path = self._path(week, KIND_BASE)
+            _write(path, week, week, KIND_BASE, values)
+            return path
+
+        parent = max(earlier)
+        with self.load(parent) as previous:
+            previous_values = {
+                (field, _address(address)): value for field, address, value in previous.items()
+            }
+        diff = {key: 0 for key in previous_values if key not in values}
+        diff.update({k: v for k, v in values.items() if previous_values.get(k) != v})
+
+        path = self._path(week, KIND_DIFF)
+        _write(path, week, parent, KIND_DIFF, diff)
+        return path
+
+
+def take_snapshot(store, multicall, locker, voter, lp_staking, users, week):
+    values = read_state(multicall, locker, voter, lp_staking, users, week)
+    return store.write(week, values)
+
+
+def main(directory="snapshots", db_path="indexer.db", multicall=None):
+    contracts = {
+        name: Contract.from_abi(name, address, container.abi)
+        for name, (container, address) in DEPLOYMENTS.items()
+    }
+    if multicall is None:
+        if not network.show_active().startswith("development"):
+            raise ValueError("A deployed Multicall address is required outside of development")
+        multicall = Multicall.deploy({"from": accounts[0]})
+    else:
+        multicall = Multicall.at(multicall)
+
+    # users are taken from the event indexer, see `scripts/indexer.py`
+    conn = sqlite3.connect(db_path)
+    users = [i[0] for i in conn.execute('SELECT DISTINCT "user" FROM "NewLock"')]
+
+    locker = contracts["TokenLocker"]
+    week = locker.getWeek() - 1
+    path = take_snapshot(
+        SnapshotStore(directory),
+        multicall,
+        locker,
+        contracts["IncentiveVoting"],
+        contracts["EllipsisLpStaking"],
+        users,
+        week,
+    )
+    print(f"Wrote snapshot for week {week} to {path}")
@@ -0,0 +1,199 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from brownie import IncentiveVoting, accounts, chain
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_utils import to_checksum_address
+
+from scripts.packed_votes import decode_votes, encode_votes, get_token_ids
+
+
+# Rough cost of each signed vote within `submitVotes`, used to fill batches before
+# they are checked with `eth_estimateGas`. These deliberately overestimate.
+BATCH_BASE_GAS = 60_000
+VOTE_GAS = 90_000
+TOKEN_VOTE_GAS = 30_000
+
+# batches are kept under this limit, leaving room for other transactions in the block
+BATCH_GAS_LIMIT = 10_000_000
+
+VOTE_TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"},
+    ],
+    "Vote": [
+        {"name": "voter", "type": "address"},
+        {"name": "week", "type": "uint256"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "packedVotes", "type": "uint256[]"},
+    ],
+}
+
+
+@dataclass
+class SignedVote:
+    voter: str
+    week: int
+    nonce: int
+    packed_votes: list
+    signature: str
+
+    def as_tuple(self):
+        # argument format for `IncentiveVoting.submitVotes`
+        return (self.voter, self.nonce, self.packed_votes, self.signature)
+
+    @property
+    def gas(self):
+        return VOTE_GAS + TOKEN_VOTE_GAS * len(decode_votes(self.packed_votes))
+
+
+def vote_message(voter, user, week, nonce, packed_votes, chain_id=None):
+    """
+    Build the EIP-712 typed data for a signed vote.
+    """
+    return {
+        "types": VOTE_TYPES,
+        "primaryType": "Vote",
+        "domain": {
+            "name": "Ellipsis IncentiveVoting",
+            "version": "1",
+            "chainId": chain.id if chain_id is None else chain_id,
+            "verifyingContract": str(voter),
+        },
+        "message": {
+            "voter": to_checksum_address(str(user)),
+            "week": week,
+            "nonce": nonce,
+            "packedVotes": list(packed_votes),
+        },
+    }
+
+
+def sign_vote(voter, private_key, tokens, votes, week=None, nonce=None, token_ids=None):
+    """
+    Sign a vote for `tokens` and `votes` using the same arguments as `IncentiveVoting.vote`.
+
+    `week` and `nonce` default to the current week and the signer's next nonce.
+    """
+    user = Account.from_key(private_key).address
+    if week is None:
+        week = voter.getWeek()
+    if nonce is None:
+        nonce = voter.nonces(user)
+    if token_ids is None:
+        token_ids = get_token_ids(voter)
+    packed = encode_votes((token_ids[str(token)], amount) for token, amount in zip(tokens, votes))
+
+    message = encode_typed_data(full_message=vote_message(voter, user, week, nonce, packed))
+    signature = Account.sign_message(message, private_key).signature
+    return SignedVote(user, week, nonce, packed, "0x" + bytes(signature).hex())
+
+
+def recover_signer(voter, vote, chain_id=None):
+    message = vote_message(voter, vote.voter, vote.week, vote.nonce, vote.packed_votes, chain_id)
+    return Account.recover_message(encode_typed_data(full_message=message), signature=vote.signature)
+
+
+class VoteRelayer:
+    """
+    Collect signed votes and settle them through `IncentiveVoting.submitVotes`.
+
+    Votes are checked locally when added, so that a batch is only spent on votes
+    that will be accepted. Batches are filled using a conservative per-vote gas
+    model and then confirmed with `eth_estimateGas`. A batch that estimates above
+    `gas_limit` is split in half.
+    """
+
+    def __init__(self, voter, account, gas_limit=BATCH_GAS_LIMIT):
+        self.voter = voter
+        self.account = account
+        self.gas_limit = gas_limit
+        self.pending = []
+        self._chain_id = chain.id
+
+    def add(self, vote):
+        """
+        Queue a signed vote, returning False if it can not be applied this week.
+        """
+        if vote.week != self.voter.getWeek():
+            return False
+        expected_nonce = self.voter.nonces(vote.voter)
+        expected_nonce += sum(1 for i in self.pending if i.voter == vote.voter)
+        if vote.nonce != expected_nonce:
+            return False
+        if recover_signer(self.voter, vote, self._chain_id) != vote.voter:
+            return False
+        self.pending.append(vote)
+        return True
+
+    def batches(self):
+        """
+        Split pending votes into batches that fit within `gas_limit`, keeping
+        each voter's votes in nonce order.
+        """
+        batches = []
+        batch, gas = [], BATCH_BASE_GAS
+        for vote in self.pending:
+            if batch and gas + vote.gas > self.gas_limit:
+                batches.append(batch)
+                batch, gas = [], BATCH_BASE_GAS
+            batch.append(vote)
+            gas += vote.gas
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _fit(self, batch):
+        # split a batch until every part estimates under the gas limit
+        try:
+            gas = self.voter.submitVotes.estimate_gas(
+                [i.as_tuple() for i in batch], {"from": self.account}
+            )
+        except ValueError:
+            gas = None
+        if gas is not None and gas <= self.gas_limit:
+            return [batch]
+        if len(batch) == 1:
+            raise ValueError(f"Vote from {batch[0].voter} can not be submitted")
+        mid = len(batch) // 2
+        return self._fit(batch[:mid]) + self._fit(batch[mid:])
+
+    def submit(self):
+        """
+        Submit all pending votes. Returns a list of transaction receipts.
+        """
+        txs = []
+        for batch in self.batches():
+            for part in self._fit(batch):
+                tx = self.voter.submitVotes([i.as_tuple() for i in part], {"from": self.account})
+                txs.append(tx)
+                submitted = {(i.voter, i.nonce) for i in part}
+                self.pending = [i for i in self.pending if (i.voter, i.nonce) not in submitted]
+        return txs
+
+
+def load_votes(path):
+    """
+    Load signed votes from a file containing one JSON object per line, with
+    the fields of `SignedVote`.
+    """
+    with Path(path).open() as fp:
+        return [SignedVote(**json.loads(line)) for line in fp if line.strip()]
+
+
+def main(votes_path, voter_address, account="relayer"):
+    voter = IncentiveVoting.at(voter_address)
+    relayer = VoteRelayer(voter, accounts.load(account))
+
+    votes = load_votes(votes_path)
+    queued = sum(relayer.add(i) for i in votes)
+    print(f"Queued {queued} of {len(votes)} signed votes")
+
+    for tx in relayer.submit():
+        rejected = len(tx.events["SignedVoteRejected"]) if "SignedVoteRejected" in tx.events else 0
+        print(f"{tx.txid}: {tx.return_value} accepted, {rejected} rejected, {tx.gas_used} gas")
@@ -0,0 +1,107 @@
+import pytest
+from brownie import EllipsisLens, accounts, chain
+
+from scripts.lens import get_user_position, get_user_positions
+from scripts.local_deploy import advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+# each of `users` holds EPX and `LP_AMOUNT` of every LP token
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users):
+    deployer = system.deployer
+    fee_token = system.lp_tokens[2]
+    fee_token.mint(deployer, 10 ** 24, {"from": deployer})
+    fee_token.approve(system.fee_distro, 2 ** 256 - 1, {"from": deployer})
+
+    for i, acct in enumerate(users):
+        system.locker.lock(acct, LOCK_AMOUNT // (i + 1), 1, {"from": acct})
+        system.locker.lock(acct, LOCK_AMOUNT, 10 + i, {"from": acct})
+        system.lp_staker.deposit(system.lp_tokens[i % 2], LP_AMOUNT // 2, False, {"from": acct})
+        system.voter.vote([system.lp_tokens[0]], [system.voter.availableVotes(acct) // 2], {"from": acct})
+
+    system.fee_distro.depositFee(fee_token, 10 ** 24, {"from": deployer})
+    advance_weeks(2)
+    chain.sleep(86400)
+    # start an exit stream for the first user, the 1 week lock has expired
+    system.locker.initiateExitStream({"from": users[0]})
+    chain.sleep(3600)
+    chain.mine()
+
+
+@pytest.fixture(scope="module")
+def lens(system):
+    return EllipsisLens.deploy(
+        system.locker, system.voter, system.lp_staker, system.fee_distro, {"from": system.deployer}
+    )
+
+
+def _assert_position(position, system, acct):
+    locker, lp_staker = system.locker, system.lp_staker
+    assert position.user == acct
+    assert position.lock.weight == locker.userWeight(acct)
+    assert position.lock.total_weight == locker.totalWeight()
+    assert position.lock.balance == locker.userBalance(acct)
+    assert position.lock.streamable == locker.streamableBalance(acct)
+    assert position.lock.claimable_exit_stream == locker.claimableExitStreamBalance(acct)
+    assert position.lock.active_locks == [tuple(i) for i in locker.getActiveUserLocks(acct)]
+    assert position.available_votes == system.voter.availableVotes(acct)
+
+    assert [i.token for i in position.pools] == list(system.lp_tokens)
+    rewards = lp_staker.claimableReward(acct, system.lp_tokens)
+    for pool, token, reward in zip(position.pools, system.lp_tokens, rewards):
+        deposit = lp_staker.userInfo(token, acct)[0]
+        adjusted = lp_staker.adjustedBalance(token, acct)
+        assert (pool.deposit_amount, pool.adjusted_amount, pool.claimable_reward) == (deposit, adjusted, reward)
+
+    assert [i.token for i in position.fees] == [system.lp_tokens[2]]
+    assert position.fees[0].claimable == system.fee_distro.claimable(acct, [system.lp_tokens[2]])[0]
+
+
+def test_user_position(lens, system, users):
+    for acct in users:
+        _assert_position(get_user_position(lens, acct), system, acct)
+
+
+def test_user_positions(lens, system, users):
+    positions = get_user_positions(lens, users)
+    assert len(positions) == len(users)
+    for position, acct in zip(positions, users):
+        _assert_position(position, system, acct)
+
+
+def test_explicit_tokens(lens, system, users):
+    token = system.lp_tokens[1]
+    position = get_user_position(lens, users[1], [token], [token])
+    assert [i.token for i in position.pools] == [token]
+    assert position.pools[0].deposit_amount == LP_AMOUNT // 2
+    assert [(i.token, i.claimable) for i in position.fees] == [(token, 0)]
+
+
+def test_matches_brownie_decoding(lens, users):
+    raw = lens.getUserPositions(users, [], [])
+    decoded = get_user_positions(lens, users)
+    for value, position in zip(raw, decoded):
+        assert value[0] == position.user
+        assert value[2] == position.available_votes
+        assert [i[3] for i in value[3]] == [i.claimable_reward for i in position.pools]
+
+
+def test_unknown_user(lens, system):
+    position = get_user_position(lens, accounts[8])
+    assert position.lock.weight == 0
+    assert position.lock.active_locks == []
+    assert all(i.deposit_amount == 0 for i in position.pools)
+
+
+def test_unregistered_lp_token(lens, system, users):
+    token = system.lp_tokens[0]
+    position = get_user_position(lens, users[0], [token, accounts[8]], [])
+    assert [i.token for i in position.pools] == [token, accounts[8]]
+    claimable = system.lp_staker.claimableReward(users[0], [token])[0]
+    assert position.pools[0].claimable_reward == claimable > 0
+    assert (position.pools[1].deposit_amount, position.pools[1].claimable_reward) == (0, 0)
@@ -0,0 +1,144 @@
+import pytest
+from brownie import accounts
+from brownie_tokens import ERC20
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+FEE_AMOUNT = 10 ** 21
+
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users):
+    for acct in users[:2]:
+        system.locker.lock(acct, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": acct})
+
+
+@pytest.fixture(scope="module")
+def pool(system):
+    return system.pools[0]
+
+
+@pytest.fixture(scope="module")
+def coins(system, pool):
+    coins = [ERC20(deployer=system.deployer) for i in range(2)]
+    for coin in coins:
+        pool.addCoin(coin, {"from": system.deployer})
+        coin.approve(system.fee_distro, 2 ** 256 - 1, {"from": system.deployer})
+    return coins
+
+
+def _push_fees(pool, coins, amounts):
+    for coin, amount in zip(coins, amounts):
+        coin._mint_for_testing(pool, amount, {"from": accounts[0]})
+    pool.withdraw_admin_fees({"from": accounts[0]})
+
+
+def test_pushed_fees_not_counted(system, pool, coins):
+    fee_distro = system.fee_distro
+    _push_fees(pool, coins, [FEE_AMOUNT, FEE_AMOUNT * 2])
+
+    for coin in coins:
+        assert coin.balanceOf(pool) == 0
+        assert fee_distro.weeklyFeeAmounts(coin, system.get_week()) == 0
+        assert fee_distro.trackedBalance(coin) == 0
+    assert fee_distro.feeTokensLength() == 0
+
+
+def test_checkpoint(system, pool, coins, users):
+    fee_distro = system.fee_distro
+    week = system.get_week()
+    _push_fees(pool, coins, [FEE_AMOUNT, FEE_AMOUNT * 2])
+
+    tx = fee_distro.checkpointFees(coins, {"from": users[0]})
+
+    assert tx.return_value == [FEE_AMOUNT, FEE_AMOUNT * 2]
+    for coin, amount in zip(coins, [FEE_AMOUNT, FEE_AMOUNT * 2]):
+        assert fee_distro.weeklyFeeAmounts(coin, week) == amount
+        assert fee_distro.trackedBalance(coin) == amount
+        assert fee_distro.feeTokens(coins.index(coin)) == coin
+    assert [i.values() for i in tx.events["FeesReceived"]] == [
+        [users[0], coins[0], week, FEE_AMOUNT],
+        [users[0], coins[1], week, FEE_AMOUNT * 2],
+    ]
+
+
+def test_checkpoint_twice(system, pool, coins):
+    fee_distro = system.fee_distro
+    _push_fees(pool, coins, [FEE_AMOUNT, FEE_AMOUNT])
+    fee_distro.checkpointFees(coins, {"from": accounts[0]})
+
+    tx = fee_distro.checkpointFees(coins, {"from": accounts[0]})
+
+    assert tx.return_value == [0, 0]
+    assert "FeesReceived" not in tx.events
+    assert fee_distro.weeklyFeeAmounts(coins[0], system.get_week()) == FEE_AMOUNT
+
+
+def test_deposit_fee_not_double_counted(system, coins):
+    fee_distro = system.fee_distro
+    coin = coins[0]
+    coin._mint_for_testing(system.deployer, FEE_AMOUNT, {"from": system.deployer})
+    fee_distro.depositFee(coin, FEE_AMOUNT, {"from": system.deployer})
+
+    assert fee_distro.trackedBalance(coin) == FEE_AMOUNT
+    assert fee_distro.checkpointFees([coin], {"from": accounts[0]}).return_value == [0]
+    assert fee_distro.weeklyFeeAmounts(coin, system.get_week()) == FEE_AMOUNT
+
+
+def test_credited_to_checkpoint_week(system, pool, coins):
+    fee_distro = system.fee_distro
+    week = system.get_week()
+    _push_fees(pool, coins, [FEE_AMOUNT, FEE_AMOUNT])
+    advance_weeks(1)
+
+    fee_distro.checkpointFees(coins, {"from": accounts[0]})
+
+    assert fee_distro.weeklyFeeAmounts(coins[0], week) == 0
+    assert fee_distro.weeklyFeeAmounts(coins[0], week + 1) == FEE_AMOUNT
+
+
+def test_lp_staking_claim_pushes_fees(system, pool, coins, users):
+    # `EllipsisLpStaking` triggers the daily admin fee claim for each pool
+    fee_distro = system.fee_distro
+    for coin in coins:
+        coin._mint_for_testing(pool, FEE_AMOUNT, {"from": system.deployer})
+
+    tx = system.lp_staker.claim(users[0], system.lp_tokens[:1], {"from": users[0]})
+    assert tx.events["FeeClaimSuccess"]["pool"] == pool
+    assert [coin.balanceOf(fee_distro) for coin in coins] == [FEE_AMOUNT, FEE_AMOUNT]
+
+    fee_distro.checkpointFees(coins, {"from": users[0]})
+    for coin in coins:
+        assert fee_distro.weeklyFeeAmounts(coin, system.get_week()) == FEE_AMOUNT
+
+
+def test_claim_reduces_tracked_balance(system, pool, coins, users):
+    fee_distro = system.fee_distro
+    coin = coins[0]
+    _push_fees(pool, [coin], [FEE_AMOUNT])
+    fee_distro.checkpointFees([coin], {"from": accounts[0]})
+    advance_weeks(2)
+
+    fee_distro.claim(users[0], [coin], {"from": users[0]})
+    assert coin.balanceOf(users[0]) > 0
+    assert fee_distro.trackedBalance(coin) == coin.balanceOf(fee_distro)
+
+    # only fees received after the claim are credited
+    _push_fees(pool, [coin], [FEE_AMOUNT])
+    assert fee_distro.checkpointFees([coin], {"from": accounts[0]}).return_value == [FEE_AMOUNT]
+
+
+def test_checkpointed_fees_claimable(system, pool, coins, users):
+    fee_distro = system.fee_distro
+    coin = coins[0]
+    _push_fees(pool, [coin], [FEE_AMOUNT])
+    fee_distro.checkpointFees([coin], {"from": accounts[0]})
+    advance_weeks(2)
+
+    # both users hold identical locks
+    for acct in users:
+        assert fee_distro.claim(acct, [coin], {"from": acct}).return_value == [FEE_AMOUNT // 2]
+    assert fee_distro.trackedBalance(coin) == 0
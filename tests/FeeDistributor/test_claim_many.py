@@ -0,0 +1,140 @@
+import brownie
+import pytest
+from brownie import accounts, chain
+from brownie_tokens import ERC20
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks, deploy_local
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+FEE_AMOUNT = 10 ** 21
+LOCK_WEEKS = [3, 10, MAX_LOCK_WEEKS]
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def fee_tokens(system):
+    tokens = [ERC20(deployer=system.deployer) for i in range(2)]
+    for token in tokens:
+        token._mint_for_testing(system.deployer, FEE_AMOUNT * 20, {"from": system.deployer})
+        token.approve(system.fee_distro, 2 ** 256 - 1, {"from": system.deployer})
+    return tokens
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users, fee_tokens):
+    for acct, weeks in zip(users, LOCK_WEEKS):
+        system.locker.lock(acct, LOCK_AMOUNT, weeks, {"from": acct})
+    # fees in weeks 0 to 3, leaving the chain one hour into week 3
+    for i in range(4):
+        if i:
+            advance_weeks(1)
+        for x, token in enumerate(fee_tokens):
+            amount = FEE_AMOUNT * (i + 1) * (x + 1)
+            system.fee_distro.depositFee(token, amount, {"from": system.deployer})
+
+
+def test_matches_claimable(system, users, fee_tokens):
+    fee_distro = system.fee_distro
+    # weeks prior to 4 are fully released and there are no fees in week 4
+    advance_weeks(2)
+    claimable = [fee_distro.claimable(acct, fee_tokens) for acct in users]
+
+    tx = fee_distro.claimMany(users, fee_tokens, {"from": users[0]})
+
+    assert tx.return_value == claimable
+    for acct, amounts in zip(users, claimable):
+        assert [token.balanceOf(acct) for token in fee_tokens] == amounts
+        assert fee_distro.claimable(acct, fee_tokens) == [0, 0]
+    for token in fee_tokens:
+        assert fee_distro.trackedBalance(token) == token.balanceOf(fee_distro)
+    assert len(tx.events["FeesClaimed"]) == len(users) * len(fee_tokens)
+
+
+def test_partially_claimed(system, users, fee_tokens):
+    fee_distro = system.fee_distro
+    alice, bob = users[1:]
+    # alice claims part way through the stream for week 2, bob claims one token only
+    fee_distro.claim(alice, fee_tokens, {"from": alice})
+    fee_distro.claim(bob, fee_tokens[:1], {"from": bob})
+    advance_weeks(2)
+    claimable = [fee_distro.claimable(acct, fee_tokens) for acct in users]
+
+    tx = fee_distro.claimMany(users, fee_tokens, {"from": users[0]})
+
+    assert tx.return_value == claimable
+    for acct in users:
+        assert [token.balanceOf(acct) for token in fee_tokens] == [
+            fee_distro.totalClaimed(acct, token) for token in fee_tokens
+        ]
+
+
+def test_matches_claim_active_stream(system, users, fee_tokens):
+    fee_distro = system.fee_distro
+    alice = users[2]
+    fee_distro.claim(alice, fee_tokens, {"from": alice})
+    advance_weeks(1)
+    # the stream for week 3 has been active for one hour
+    expected = fee_distro.claim(alice, fee_tokens, {"from": alice}).return_value
+    stream = fee_distro.activeUserStream(alice, fee_tokens[0])
+    chain.undo()
+
+    tx = fee_distro.claimMany([alice], fee_tokens, {"from": alice})
+    # the stream is released per second, consecutive blocks may differ slightly
+    for amount, value in zip(tx.return_value[0], expected):
+        assert value <= amount <= value * 1001 // 1000
+    assert fee_distro.activeUserStream(alice, fee_tokens[0])[:2] == stream[:2]
+
+
+def test_duplicate_user(system, users, fee_tokens):
+    advance_weeks(2)
+    alice = users[0]
+    claimable = system.fee_distro.claimable(alice, fee_tokens)
+
+    tx = system.fee_distro.claimMany([alice, alice], fee_tokens, {"from": alice})
+
+    assert tx.return_value == [claimable, [0, 0]]
+
+
+def test_claim_receiver(system, users, fee_tokens):
+    fee_distro = system.fee_distro
+    advance_weeks(2)
+    alice, bob, charlie = users
+    receiver = accounts[5]
+    fee_distro.setClaimReceiver(receiver, {"from": alice})
+
+    tx = fee_distro.claimMany([alice, bob], fee_tokens, {"from": charlie})
+
+    assert [token.balanceOf(receiver) for token in fee_tokens] == tx.return_value[0]
+    assert [token.balanceOf(alice) for token in fee_tokens] == [0, 0]
+
+
+def test_blocked_third_party(system, users, fee_tokens):
+    advance_weeks(2)
+    alice, bob, charlie = users
+    system.fee_distro.setBlockThirdPartyActions(True, {"from": charlie})
+
+    with brownie.reverts("Cannot claim on behalf of this account"):
+        system.fee_distro.claimMany([alice, charlie], fee_tokens, {"from": bob})
+
+    system.fee_distro.claimMany([charlie], fee_tokens, {"from": charlie})
+
+
+def test_first_week(users, fee_tokens):
+    # a fresh deployment, so the first full week has not completed
+    system = deploy_local(num_lp_tokens=1)
+    fee_distro = system.fee_distro
+    alice, bob, charlie = users
+    fee_distro.setBlockThirdPartyActions(True, {"from": charlie})
+    with brownie.reverts("Cannot claim on behalf of this account"):
+        fee_distro.claimMany(users, fee_tokens, {"from": alice})
+
+    # the same as a single claim for each user
+    tx = fee_distro.claimMany([alice, bob], fee_tokens, {"from": alice})
+
+    assert tx.return_value == [[0, 0], [0, 0]]
+    assert [i["amount"] for i in tx.events["FeesClaimed"]] == [0] * 4
+    for acct in (alice, bob):
+        for token in fee_tokens:
+            assert fee_distro.activeUserStream(acct, token) == (system.start_time, 0, 0)
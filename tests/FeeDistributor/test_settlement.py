@@ -0,0 +1,273 @@
+import brownie
+import pytest
+from brownie import Multicall
+from brownie_tokens import ERC20
+
+from scripts.fee_settlement import Settlement, build_settlement, publish, verify_settlement
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks, deploy_local
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+FEE_AMOUNT = 10 ** 21
+LOCK_WEEKS = [3, 10, MAX_LOCK_WEEKS]
+
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def fee_token(system):
+    token = ERC20(deployer=system.deployer)
+    token._mint_for_testing(system.deployer, FEE_AMOUNT * 20, {"from": system.deployer})
+    token.approve(system.fee_distro, 2 ** 256 - 1, {"from": system.deployer})
+    return token
+
+
+@pytest.fixture(scope="module")
+def multicall(system):
+    return Multicall.deploy({"from": system.deployer})
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users, fee_token):
+    for acct, weeks in zip(users, LOCK_WEEKS):
+        system.locker.lock(acct, LOCK_AMOUNT, weeks, {"from": acct})
+    # fees in weeks 0 to 3, leaving the chain one hour into week 3
+    for i in range(4):
+        if i:
+            advance_weeks(1)
+        system.fee_distro.depositFee(fee_token, FEE_AMOUNT * (i + 1), {"from": system.deployer})
+
+
+def _settle(system, multicall, users, week, previous=None):
+    settlement = build_settlement(
+        multicall, system.fee_distro, system.locker, users, week, previous
+    )
+    publish(system.fee_distro, settlement, system.deployer)
+    return settlement
+
+
+def test_matches_claimable(system, multicall, users, fee_token):
+    fee_distro = system.fee_distro
+    advance_weeks(2)
+    # weeks prior to 4 are fully released and there are no fees in week 4
+    settlement = _settle(system, multicall, users, 4)
+
+    for acct in users:
+        claimable = fee_distro.claimable(acct, [fee_token])[0]
+        tx = fee_distro.claimSettled(*settlement.claim_args(acct, fee_token), {"from": acct})
+        assert tx.return_value == claimable > 0
+        assert fee_token.balanceOf(acct) == claimable
+        assert fee_distro.claimable(acct, [fee_token]) == [0]
+        assert fee_distro.claim(acct, [fee_token], {"from": acct}).return_value == [0]
+    assert fee_distro.trackedBalance(fee_token) == fee_token.balanceOf(fee_distro)
+
+
+def test_partially_claimed(system, multicall, users, fee_token):
+    fee_distro = system.fee_distro
+    alice = users[2]
+    # weeks 0 and 1 are released, week 2 is part way through its stream
+    claimed = fee_distro.claim(alice, [fee_token], {"from": alice}).return_value[0]
+    assert claimed > 0
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+
+    amount = settlement.amount_of(alice, fee_token)
+    tx = fee_distro.claimSettled(*settlement.claim_args(alice, fee_token), {"from": alice})
+    assert tx.return_value == amount - claimed
+    assert fee_token.balanceOf(alice) == fee_distro.totalClaimed(alice, fee_token) == amount
+
+
+def test_claim_twice(system, multicall, users, fee_token):
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+    alice = users[0]
+    args = settlement.claim_args(alice, fee_token)
+    system.fee_distro.claimSettled(*args, {"from": alice})
+
+    assert system.fee_distro.claimSettled(*args, {"from": alice}).return_value == 0
+
+
+def test_second_round(system, multicall, users, fee_token, tmp_path):
+    fee_distro = system.fee_distro
+    advance_weeks(2)
+    first = _settle(system, multicall, users, 4)
+    first.save(tmp_path / "first.json")
+    alice, bob = users[1:]
+    fee_distro.claimSettled(*first.claim_args(alice, fee_token), {"from": alice})
+
+    fee_distro.depositFee(fee_token, FEE_AMOUNT, {"from": system.deployer})
+    advance_weeks(2)
+    second = _settle(system, multicall, users, 6, Settlement.load(tmp_path / "first.json"))
+
+    # alice only receives fees from the new week, bob collects both rounds at once
+    for acct in [alice, bob]:
+        claimable = fee_distro.claimable(acct, [fee_token])[0]
+        tx = fee_distro.claimSettled(*second.claim_args(acct, fee_token), {"from": acct})
+        assert tx.return_value == claimable
+        assert fee_token.balanceOf(acct) == second.amount_of(acct, fee_token)
+    assert second.amount_of(bob, fee_token) > first.amount_of(bob, fee_token)
+
+
+def test_claim_continues_after_settlement(system, multicall, users, fee_token):
+    fee_distro = system.fee_distro
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+    alice = users[2]
+    fee_distro.claimSettled(*settlement.claim_args(alice, fee_token), {"from": alice})
+    assert fee_distro.claimedUntil(alice) == 3
+
+    fee_distro.depositFee(fee_token, FEE_AMOUNT, {"from": system.deployer})
+    week = fee_distro.getWeek()
+    advance_weeks(2)
+    weight, total = system.locker.weeklyWeight(alice, week)
+    expected = FEE_AMOUNT * weight // total
+
+    assert fee_distro.claim(alice, [fee_token], {"from": alice}).return_value == [expected]
+    total = settlement.amount_of(alice, fee_token) + expected
+    assert fee_distro.totalClaimed(alice, fee_token) == total
+
+
+def test_compaction_between_rounds(system, multicall, users, fee_token, tmp_path):
+    fee_distro, locker = system.fee_distro, system.locker
+    alice = users[0]
+    system.fund_epx(alice, LOCK_AMOUNT)
+    locker.lock(alice, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": alice})
+    advance_weeks(1)
+    fee_distro.depositFee(fee_token, FEE_AMOUNT, {"from": system.deployer})
+    advance_weeks(1)
+    first = _settle(system, multicall, users, 4)
+    first.save(tmp_path / "first.json")
+
+    # alice claims past the settled week and compacts her expired first lock
+    fee_distro.depositFee(fee_token, FEE_AMOUNT, {"from": system.deployer})
+    advance_weeks(1)
+    fee_distro.claim(alice, [fee_token], {"from": alice})
+    locker.initiateExitStreamAndCompact(MAX_LOCK_WEEKS, {"from": alice})
+    assert locker.compactedUntil(alice) == 4
+
+    # the second round, built within two weeks of the first, still reads week 4
+    second = _settle(system, multicall, users, 5, Settlement.load(tmp_path / "first.json"))
+    amount = second.amount_of(alice, fee_token)
+    streamed = fee_distro.activeUserStream(alice, fee_token)["claimed"]
+    assert amount == fee_distro.totalClaimed(alice, fee_token) - streamed
+    assert amount > first.amount_of(alice, fee_token)
+
+
+def test_compacted_before_settlement(system, multicall, users, fee_token, tmp_path):
+    fee_distro, locker = system.fee_distro, system.locker
+    alice = users[0]
+    advance_weeks(2)
+    first = _settle(system, multicall, users, 4)
+
+    # three weeks later alice has deleted her weight for week 4
+    advance_weeks(3)
+    fee_distro.claim(alice, [fee_token], {"from": alice})
+    locker.initiateExitStreamAndCompact(MAX_LOCK_WEEKS, {"from": alice})
+    assert locker.compactedUntil(alice) == 6
+
+    with pytest.raises(ValueError):
+        build_settlement(multicall, fee_distro, locker, users, 7, first)
+
+
+def test_root_below_claimed(system, multicall, users, fee_token):
+    fee_distro = system.fee_distro
+    alice = users[2]
+    advance_weeks(1)
+    fee_distro.depositFee(fee_token, FEE_AMOUNT, {"from": system.deployer})
+    advance_weeks(1)
+    settlement = _settle(system, multicall, users, 4)
+    # alice claims part of the stream for week 4, then the same amounts are posted for week 5
+    fee_distro.claim(alice, [fee_token], {"from": alice})
+    advance_weeks(1)
+    fee_distro.setSettlementRoot(settlement.root, 5, {"from": system.deployer})
+
+    with brownie.reverts("Root below claimed amount"):
+        fee_distro.claimSettled(*settlement.claim_args(alice, fee_token), {"from": alice})
+
+
+def test_first_week_claim(users, multicall):
+    # a fresh deployment, claiming during the first week forfeits the fees of that week
+    system = deploy_local(num_lp_tokens=1)
+    fee_distro = system.fee_distro
+    alice, bob = users[:2]
+    token = ERC20(deployer=system.deployer)
+    token._mint_for_testing(system.deployer, FEE_AMOUNT, {"from": system.deployer})
+    token.approve(fee_distro, FEE_AMOUNT, {"from": system.deployer})
+    for acct in (alice, bob):
+        system.fund_epx(acct, LOCK_AMOUNT)
+        system.locker.lock(acct, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": acct})
+    fee_distro.depositFee(token, FEE_AMOUNT, {"from": system.deployer})
+    fee_distro.claim(alice, [token], {"from": alice})
+    advance_weeks(2)
+
+    settlement = build_settlement(
+        multicall, fee_distro, system.locker, [alice, bob], 1, forfeited=[(alice, token)]
+    )
+    assert settlement.amount_of(alice, token) == 0
+    for acct in (alice, bob):
+        assert settlement.amount_of(acct, token) == fee_distro.claimable(acct, [token])[0]
+    assert settlement.amount_of(bob, token) == FEE_AMOUNT // 2
+
+
+def test_claimed_past_root(system, multicall, users, fee_token):
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+    advance_weeks(1)
+    alice = users[2]
+    system.fee_distro.claim(alice, [fee_token], {"from": alice})
+
+    with brownie.reverts("Already claimed past root"):
+        system.fee_distro.claimSettled(*settlement.claim_args(alice, fee_token), {"from": alice})
+
+
+def test_invalid_proof(system, multicall, users, fee_token):
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+    user, token, amount, proof = settlement.claim_args(users[0], fee_token)
+
+    with brownie.reverts("Invalid proof"):
+        system.fee_distro.claimSettled(user, token, amount + 1, proof, {"from": users[0]})
+
+
+def test_blocked_third_party(system, multicall, users, fee_token):
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+    alice, bob = users[:2]
+    system.fee_distro.setBlockThirdPartyActions(True, {"from": alice})
+
+    with brownie.reverts("Cannot claim on behalf of this account"):
+        system.fee_distro.claimSettled(*settlement.claim_args(alice, fee_token), {"from": bob})
+
+
+def test_root_not_set(system, users, fee_token):
+    with brownie.reverts("Root not set"):
+        system.fee_distro.claimSettled(users[0], fee_token, 0, [], {"from": users[0]})
+
+
+def test_set_root_only_owner(system, users):
+    advance_weeks(2)
+    with brownie.reverts("Ownable: caller is not the owner"):
+        system.fee_distro.setSettlementRoot(b"\x01" * 32, 4, {"from": users[0]})
+
+
+@pytest.mark.parametrize("weeks", [0, 1])
+def test_set_root_unreleased_week(system, weeks):
+    advance_weeks(weeks)
+    week = system.fee_distro.getWeek()
+    with brownie.reverts("Week not yet released"):
+        system.fee_distro.setSettlementRoot(b"\x01" * 32, week, {"from": system.deployer})
+
+
+def test_verify(system, multicall, users, fee_token):
+    advance_weeks(2)
+    settlement = _settle(system, multicall, users, 4)
+    assert verify_settlement(multicall, system.fee_distro, system.locker, settlement) == []
+
+    # an inflated entitlement is detected
+    alice = users[0]
+    amounts = dict(settlement.amounts)
+    amounts[alice.address, fee_token.address] += 1
+    publish(system.fee_distro, Settlement(4, amounts), system.deployer)
+    with brownie.reverts():
+        system.fee_distro.claimSettled(*settlement.claim_args(alice, fee_token), {"from": alice})
+    with pytest.raises(ValueError):
+        verify_settlement(multicall, system.fee_distro, system.locker, Settlement(4, amounts))
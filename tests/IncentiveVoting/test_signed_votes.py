@@ -0,0 +1,193 @@
+import pytest
+from brownie import accounts
+
+from scripts.packed_votes import encode_votes
+from scripts.vote_relayer import VOTE_GAS, SignedVote, VoteRelayer, recover_signer, sign_vote
+
+NUM_TOKENS = 5
+NUM_SIGNERS = 6
+LOCK_AMOUNT = 10_000_000 * 10 ** 18
+
+pytestmark = pytest.mark.scenario("local")
+
+
+@pytest.fixture(scope="module")
+def relayer_account():
+    return accounts[0]
+
+
+@pytest.fixture(scope="module")
+def signers():
+    # signed votes need local private keys, signers are never funded with gas
+    return [accounts.add() for i in range(NUM_SIGNERS)]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, signers):
+    system.fund_epx(system.deployer, LOCK_AMOUNT * NUM_SIGNERS)
+    for acct in signers:
+        system.locker.lock(acct, LOCK_AMOUNT, 52, {"from": system.deployer})
+
+
+@pytest.fixture(scope="module")
+def tokens(system):
+    return system.lp_tokens[:NUM_TOKENS]
+
+
+@pytest.fixture(scope="module")
+def votes(system, signers):
+    available = system.voter.availableVotes(signers[0])
+    return [available // (2 * NUM_TOKENS) + i for i in range(NUM_TOKENS)]
+
+
+def test_recover_signer(system, signers, tokens, votes):
+    vote = sign_vote(system.voter, signers[0].private_key, tokens, votes)
+    assert recover_signer(system.voter, vote) == signers[0]
+
+
+def test_submit_votes(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    signed = [sign_vote(voter, acct.private_key, tokens, votes) for acct in signers]
+    tx = voter.submitVotes([i.as_tuple() for i in signed], {"from": relayer_account})
+
+    assert tx.return_value == NUM_SIGNERS
+    assert "SignedVoteRejected" not in tx.events
+    assert len(tx.events["VotedForIncentivesPacked"]) == NUM_SIGNERS
+
+    week = voter.getWeek()
+    assert voter.totalVotes(week) == sum(votes) * NUM_SIGNERS
+    for token, amount in zip(tokens, votes):
+        assert voter.tokenVotes(token, week) == amount * NUM_SIGNERS
+    for acct in signers:
+        assert voter.nonces(acct) == 1
+        assert voter.userVotes(acct, week) == sum(votes)
+        assert voter.availableVotes(acct) == system.locker.userWeight(acct) // 10 ** 18 - sum(votes)
+
+
+def test_matches_individual_votes(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    week = voter.getWeek()
+    signed = [sign_vote(voter, acct.private_key, tokens, votes) for acct in signers[:3]]
+    voter.submitVotes([i.as_tuple() for i in signed], {"from": relayer_account})
+
+    for acct in signers[3:]:
+        relayer_account.transfer(acct, 10 ** 17)
+        voter.vote(tokens, votes, {"from": acct})
+
+    for token in tokens:
+        assert voter.tokenVotes(token, week) == sum(
+            voter.userTokenVotes(acct, token, week) for acct in signers
+        )
+    assert voter.userVotes(signers[0], week) == voter.userVotes(signers[-1], week)
+    assert voter.totalVotes(week) == sum(votes) * NUM_SIGNERS
+
+
+def test_sequential_nonces(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    key = signers[0].private_key
+    half = [i // 2 for i in votes]
+    first = sign_vote(voter, key, tokens, half, nonce=0)
+    second = sign_vote(voter, key, tokens, half, nonce=1)
+    tx = voter.submitVotes([first.as_tuple(), second.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 2
+    assert voter.nonces(signers[0]) == 2
+    assert voter.userVotes(signers[0], voter.getWeek()) == sum(half) * 2
+
+
+def test_replayed_nonce(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    vote = sign_vote(voter, signers[0].private_key, tokens, votes)
+    voter.submitVotes([vote.as_tuple()], {"from": relayer_account})
+    tx = voter.submitVotes([vote.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 0
+    assert tx.events["SignedVoteRejected"]["voter"] == signers[0]
+    assert voter.userVotes(signers[0], voter.getWeek()) == sum(votes)
+
+
+def test_wrong_signer(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    vote = sign_vote(voter, signers[1].private_key, tokens, votes)
+    forged = SignedVote(signers[0].address, vote.week, 0, vote.packed_votes, vote.signature)
+    tx = voter.submitVotes([forged.as_tuple(), vote.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 1
+    assert tx.events["SignedVoteRejected"]["voter"] == signers[0]
+    assert voter.nonces(signers[0]) == 0
+    assert voter.nonces(signers[1]) == 1
+
+
+def test_wrong_week(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    vote = sign_vote(voter, signers[0].private_key, tokens, votes, week=voter.getWeek() + 1)
+    tx = voter.submitVotes([vote.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 0
+    assert voter.nonces(signers[0]) == 0
+
+
+def test_modified_votes(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    vote = sign_vote(voter, signers[0].private_key, tokens, votes)
+    vote.packed_votes = encode_votes([(0, sum(votes))])
+    tx = voter.submitVotes([vote.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 0
+    assert voter.totalVotes(voter.getWeek()) == 0
+
+
+def test_exceeds_available_votes(system, signers, relayer_account):
+    voter = system.voter
+    available = voter.availableVotes(signers[0])
+    over = sign_vote(voter, signers[0].private_key, system.lp_tokens[:1], [available + 1])
+    valid = sign_vote(voter, signers[1].private_key, system.lp_tokens[:1], [available])
+    tx = voter.submitVotes([over.as_tuple(), valid.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 1
+    assert voter.nonces(signers[0]) == 0
+    assert voter.tokenVotes(system.lp_tokens[0], voter.getWeek()) == available
+
+
+def test_invalid_token_id(system, signers, votes, relayer_account):
+    voter = system.voter
+    vote = sign_vote(
+        voter, signers[0].private_key, ["token"], [1], token_ids={"token": len(system.lp_tokens)}
+    )
+    tx = voter.submitVotes([vote.as_tuple()], {"from": relayer_account})
+
+    assert tx.return_value == 0
+
+
+def test_relayer_filters_votes(system, signers, tokens, votes, relayer_account):
+    voter = system.voter
+    relayer = VoteRelayer(voter, relayer_account)
+
+    assert relayer.add(sign_vote(voter, signers[0].private_key, tokens, votes))
+    assert relayer.add(sign_vote(voter, signers[0].private_key, tokens, votes, nonce=1))
+    # skipped nonce, future week and a signature from the wrong key
+    assert not relayer.add(sign_vote(voter, signers[1].private_key, tokens, votes, nonce=1))
+    assert not relayer.add(
+        sign_vote(voter, signers[1].private_key, tokens, votes, week=voter.getWeek() + 1)
+    )
+    vote = sign_vote(voter, signers[2].private_key, tokens, votes)
+    vote.voter = signers[3].address
+    assert not relayer.add(vote)
+
+    assert len(relayer.pending) == 2
+
+
+def test_relayer_batches(system, signers, votes, relayer_account):
+    voter = system.voter
+    # allow roughly two votes per batch
+    gas_limit = VOTE_GAS * 3 + 100_000
+    relayer = VoteRelayer(voter, relayer_account, gas_limit)
+    for acct in signers:
+        assert relayer.add(sign_vote(voter, acct.private_key, system.lp_tokens[:1], [1]))
+
+    txs = relayer.submit()
+    assert len(txs) > 1
+    assert sum(tx.return_value for tx in txs) == NUM_SIGNERS
+    assert all(tx.gas_used <= gas_limit for tx in txs)
+    assert not relayer.pending
+    assert voter.tokenVotes(system.lp_tokens[0], voter.getWeek()) == NUM_SIGNERS
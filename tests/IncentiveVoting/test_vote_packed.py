@@ -0,0 +1,112 @@
+import brownie
+import pytest
+
+from scripts.packed_votes import (
+    MAX_TOKEN_ID,
+    MAX_VOTES,
+    decode_votes,
+    encode_votes,
+    get_token_ids,
+    vote_packed,
+)
+
+# LP tokens in the "local" scenario, all approved in order of their token IDs
+NUM_TOKENS = 20
+LOCK_AMOUNT = 10_000_000 * 10 ** 18
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users):
+    for acct in users[:2]:
+        system.locker.lock(acct, LOCK_AMOUNT, 52, {"from": acct})
+
+
+@pytest.fixture(scope="module")
+def votes(system, users):
+    # identical votes for each user, spread over every approved token
+    available = system.voter.availableVotes(users[0])
+    return [available // (2 * NUM_TOKENS) + i for i in range(NUM_TOKENS)]
+
+
+def test_encode_decode():
+    pairs = [(0, 1), (7, MAX_VOTES), (MAX_TOKEN_ID, 12345), (3, 0), (2, 99), (1, 5)]
+    words = encode_votes(pairs)
+    assert len(words) == 2
+    assert decode_votes(words) == [i for i in pairs if i[1]]
+
+
+@pytest.mark.parametrize("pair", [(-1, 1), (MAX_TOKEN_ID + 1, 1), (0, MAX_VOTES + 1), (0, -1)])
+def test_encode_out_of_range(pair):
+    with pytest.raises(ValueError):
+        encode_votes([pair])
+
+
+def test_token_ids(system):
+    token_ids = get_token_ids(system.voter)
+    assert token_ids == {token.address: i for i, token in enumerate(system.lp_tokens)}
+
+
+def test_token_approved_events(system):
+    tx = brownie.history.filter(fn_name="setLpStaking")[-1]
+    events = tx.events["TokenApproved"]
+    assert [(i["token"], i["tokenId"]) for i in events] == [
+        (token.address, i) for i, token in enumerate(system.lp_tokens)
+    ]
+
+
+def test_matches_vote(system, users, votes):
+    voter, tokens = system.voter, system.lp_tokens
+    alice, bob = users[:2]
+    week = voter.getWeek()
+
+    voter.vote(tokens, votes, {"from": alice})
+    tx = vote_packed(voter, tokens, votes, {"from": bob})
+
+    assert voter.userVotes(alice, week) == voter.userVotes(bob, week) == sum(votes)
+    assert voter.totalVotes(week) == 2 * sum(votes)
+    for token, amount in zip(tokens, votes):
+        assert voter.userTokenVotes(bob, token, week) == amount
+        assert voter.tokenVotes(token, week) == 2 * amount
+
+    event = tx.events["VotedForIncentivesPacked"]
+    assert event["voter"] == bob
+    assert event["userVotesUsed"] == sum(votes)
+    assert decode_votes(event["packedVotes"]) == list(enumerate(votes))
+
+
+def test_exceeds_available_votes(system, users):
+    alice = users[0]
+    available = system.voter.availableVotes(alice)
+    with brownie.reverts("Available votes exceeded"):
+        system.voter.votePacked(encode_votes([(0, available), (1, 1)]), {"from": alice})
+
+
+def test_invalid_token_id(system, users):
+    with brownie.reverts("Invalid token ID"):
+        system.voter.votePacked(encode_votes([(NUM_TOKENS, 1)]), {"from": users[0]})
+
+
+def test_unapproved_token(system, users):
+    voter = system.voter
+    voter.setTokenApproval(system.lp_tokens[3], False, {"from": system.deployer})
+    with brownie.reverts("Not approved for incentives"):
+        voter.votePacked(encode_votes([(3, 1)]), {"from": users[0]})
+
+    voter.setTokenApproval(system.lp_tokens[3], True, {"from": system.deployer})
+    voter.votePacked(encode_votes([(3, 1)]), {"from": users[0]})
+
+
+@pytest.mark.parametrize("count", [1, 10, 20])
+def test_gas_savings(system, users, votes, count):
+    voter, tokens = system.voter, system.lp_tokens[:count]
+    alice, bob = users[:2]
+
+    tx_vote = voter.vote(tokens, votes[:count], {"from": alice})
+    tx_packed = vote_packed(voter, tokens, votes[:count], {"from": bob})
+
+    assert len(tx_packed.input) < len(tx_vote.input)
+    if count > 1:
+        assert tx_packed.gas_used < tx_vote.gas_used
@@ -0,0 +1,56 @@
+import pytest
+
+from scripts.local_deploy import advance_weeks
+
+LOCK_AMOUNT = 10_000_000 * 10 ** 18
+
+# minimum saving from updating an existing storage slot rather than initializing
+# a new one, across all hardforks since Istanbul
+NEW_SLOT_SAVING = 15000
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users):
+    for acct in users[:2]:
+        system.locker.lock(acct, LOCK_AMOUNT, 52, {"from": acct})
+    # begin on an even week, so the next two weeks share each weekly record slot
+    advance_weeks(2 - system.voter.getWeek() % 2)
+
+
+def _vote(system, users, token_count):
+    alice, bob = users[:2]
+    voter, tokens = system.voter, system.lp_tokens
+    # bob votes first each week to initialize `totalVotes` and `rewardsPerSecond`
+    voter.vote(tokens[-1:], [1], {"from": bob})
+    return voter.vote(tokens[:token_count], [1] * token_count, {"from": alice})
+
+
+@pytest.mark.parametrize("token_count", [1, 2])
+def test_consecutive_week_shares_slots(system, users, token_count):
+    first = _vote(system, users, token_count)
+    advance_weeks(1)
+    second = _vote(system, users, token_count)
+
+    # `userVotes`, plus `tokenVotes` and `userTokenVotes` for each token
+    shared_slots = 1 + 2 * token_count
+    assert first.gas_used - second.gas_used >= shared_slots * NEW_SLOT_SAVING
+
+
+def test_consecutive_week_values(system, users):
+    alice, bob = users[:2]
+    voter, token = system.voter, system.lp_tokens[0]
+    week = voter.getWeek()
+    voter.vote([token], [7], {"from": alice})
+    advance_weeks(1)
+    voter.vote([token], [11], {"from": alice})
+
+    assert voter.userVotes(alice, week) == 7
+    assert voter.userVotes(alice, week + 1) == 11
+    assert voter.tokenVotes(token, week) == 7
+    assert voter.tokenVotes(token, week + 1) == 11
+    assert voter.userTokenVotes(alice, token, week + 1) == 11
+    assert voter.totalVotes(week + 1) == 11
+    assert voter.availableVotes(alice) == voter.availableVotes(bob) - 11
@@ -0,0 +1,159 @@
+import random
+
+import pytest
+from brownie import ZERO_ADDRESS, accounts, chain
+
+from scripts.indexer import EventIndexer
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+from scripts.packed_votes import vote_packed
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+
+# each of `users` holds EPX and `LP_AMOUNT` of every LP token
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def stakers(users):
+    return users + accounts[4:5]
+
+
+@pytest.fixture(scope="module")
+def tokens(system):
+    return system.lp_tokens[:3]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, tokens):
+    for acct in accounts[4:5]:
+        system.fund_epx(acct, 10 * LOCK_AMOUNT)
+        system.fund_lp(acct, LP_AMOUNT, tokens)
+
+
+@pytest.fixture
+def indexer(system, tmp_path):
+    contracts = {
+        "TokenLocker": system.locker,
+        "IncentiveVoting": system.voter,
+        "EllipsisLpStaking": system.lp_staker,
+        "FeeDistributor": system.fee_distro,
+    }
+    return EventIndexer(tmp_path.joinpath("events.db"), contracts, batch_size=7)
+
+
+def _generate_activity(system, stakers, tokens, weeks, seed):
+    rng = random.Random(seed)
+    locker, voter, lp_staker = system.locker, system.voter, system.lp_staker
+    fee_token = tokens[-1]
+    fee_token.approve(system.fee_distro, 2 ** 256 - 1, {"from": system.deployer})
+
+    for week in range(weeks):
+        for acct in stakers:
+            if rng.random() < 0.5:
+                locker.lock(acct, rng.randint(1, 10_000) * 10 ** 18, rng.randint(1, MAX_LOCK_WEEKS), {"from": acct})
+            active = locker.getActiveUserLocks(acct)
+            if active and active[0][0] < MAX_LOCK_WEEKS and rng.random() < 0.3:
+                lock_weeks, amount = active[0]
+                new_weeks = rng.randint(lock_weeks + 1, MAX_LOCK_WEEKS)
+                locker.extendLock(amount, lock_weeks, new_weeks, {"from": acct})
+
+            votes = voter.availableVotes(acct)
+            if votes:
+                voted = rng.sample(tokens, 2)
+                amounts = [votes // 3, votes // 2]
+                if rng.random() < 0.5:
+                    voter.vote(voted, amounts, {"from": acct})
+                else:
+                    vote_packed(voter, voted, amounts, {"from": acct})
+
+            token = rng.choice(tokens)
+            lp_staker.deposit(token, rng.randint(1, 100) * 10 ** 18, False, {"from": acct})
+
+        fee_token.mint(system.deployer, 10 ** 22, {"from": system.deployer})
+        system.fee_distro.depositFee(fee_token, 10 ** 22, {"from": system.deployer})
+        advance_weeks(1)
+
+
+def test_rebuild_matches_views(system, stakers, tokens, indexer):
+    _generate_activity(system, stakers, tokens, 8, 0)
+    indexer.sync()
+    indexer.rebuild()
+
+    locker, voter = system.locker, system.voter
+    for week in range(system.get_week() + MAX_LOCK_WEEKS):
+        assert indexer.weekly_total_weight(week) == locker.weeklyTotalWeight(week)
+        for acct in stakers:
+            assert indexer.weekly_weight_of(acct.address, week) == locker.weeklyWeightOf(acct, week)
+
+    for week in range(system.get_week()):
+        assert indexer.total_votes(week) == voter.totalVotes(week)
+        for token in tokens:
+            assert indexer.token_votes(token.address, week) == voter.tokenVotes(token, week)
+            for acct in stakers:
+                expected = voter.userTokenVotes(acct, token, week)
+                assert indexer.user_token_votes(acct.address, token.address, week) == expected
+
+
+def test_rebuild_vote_weights(system, stakers, tokens, indexer):
+    locker = system.locker
+    alice, bob, charlie = stakers[:3]
+    _generate_activity(system, stakers, tokens, 2, 4)
+    locker.setDelegate(alice, {"from": bob})
+    locker.setDelegate(alice, {"from": charlie})
+    _generate_activity(system, stakers, tokens, 2, 5)
+    # several changes within one week, only the last applies
+    locker.setDelegate(ZERO_ADDRESS, {"from": charlie})
+    locker.setDelegate(charlie, {"from": bob})
+    locker.setDelegate(alice, {"from": bob})
+    _generate_activity(system, stakers, tokens, 2, 6)
+    indexer.sync()
+    indexer.rebuild()
+
+    # `weeklyVoteWeightOf` is only accurate for the current and future weeks
+    for week in range(system.get_week(), system.get_week() + MAX_LOCK_WEEKS):
+        for acct in stakers:
+            expected = locker.weeklyVoteWeightOf(acct, week)
+            assert indexer.weekly_vote_weight_of(acct.address, week) == expected
+
+
+def test_stores_all_events(system, stakers, tokens, indexer):
+    _generate_activity(system, stakers, tokens, 2, 1)
+    indexer.sync()
+
+    for contract, names in [
+        (system.locker, ["NewLock", "ExtendLock"]),
+        (system.voter, ["VotedForIncentives"]),
+        (system.lp_staker, ["Deposit"]),
+        (system.fee_distro, ["FeesReceived"]),
+    ]:
+        for name in names:
+            expected = len(contract.events.get_sequence(0, event_type=name))
+            stored = indexer.conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            assert stored == expected
+
+
+def test_resume(system, stakers, tokens, indexer, tmp_path):
+    _generate_activity(system, stakers, tokens, 2, 2)
+    midpoint = chain.height
+    indexer.sync(midpoint)
+    assert indexer.last_block == midpoint
+
+    _generate_activity(system, stakers, tokens, 2, 3)
+    contracts = {"TokenLocker": system.locker, "IncentiveVoting": system.voter}
+    resumed = EventIndexer(tmp_path.joinpath("events.db"), contracts)
+    assert resumed.last_block == midpoint
+    resumed.sync()
+    assert resumed.last_block == chain.height
+
+    # syncing again from the start must not duplicate rows
+    resumed.conn.execute("UPDATE meta SET value = '-1' WHERE key = 'last_block'")
+    resumed.sync()
+    count = resumed.conn.execute('SELECT COUNT(*) FROM "NewLock"').fetchone()[0]
+    assert count == len(system.locker.events.get_sequence(0, event_type="NewLock"))
+
+    resumed.rebuild()
+    for acct in stakers:
+        week = system.get_week()
+        assert resumed.weekly_weight_of(acct.address, week) == system.locker.weeklyWeightOf(acct, week)
@@ -0,0 +1,287 @@
+import pytest
+from brownie import Multicall, accounts, chain, web3
+from brownie.test import state_machine, strategy
+from brownie_tokens import ERC20
+from eth_abi import decode, encode
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, WEEK
+
+NUM_USERS = 5
+NUM_LP_TOKENS = 3
+LOCK_AMOUNT = 10_000_000 * 10 ** 18
+LP_AMOUNT = 1_000_000 * 10 ** 18
+FEE_AMOUNT = 10 ** 24
+
+
+pytestmark = pytest.mark.scenario("local")
+
+
+@pytest.fixture(scope="module")
+def stakers(users):
+    return users + accounts[4:NUM_USERS + 1]
+
+
+@pytest.fixture(scope="module")
+def tokens(system):
+    return system.lp_tokens[:NUM_LP_TOKENS]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, stakers, tokens):
+    for acct in stakers:
+        system.fund_epx(acct, LOCK_AMOUNT)
+        system.fund_lp(acct, LP_AMOUNT, tokens)
+
+
+@pytest.fixture(scope="module")
+def fee_token(system):
+    token = ERC20(deployer=system.deployer)
+    token.approve(system.fee_distro, 2 ** 256 - 1, {"from": system.deployer})
+    return token
+
+
+@pytest.fixture(scope="module")
+def multicall(system):
+    return Multicall.deploy({"from": system.deployer})
+
+
+class BatchReader:
+    """
+    Read many uint256 values in a single `eth_call` through `Multicall.tryAggregate`.
+
+    Encoding and decoding is done directly with `eth_abi` and calldata is cached,
+    which keeps the cost of checking every invariant after each step low.
+    """
+
+    def __init__(self, multicall):
+        self.multicall = multicall
+        self._selector = multicall.tryAggregate.signature
+        self._calldata = {}
+
+    def read(self, calls):
+        """
+        Perform (contract, method name, args) calls, returning each result as a
+        tuple of 32 byte words converted to integers.
+        """
+        data = []
+        for contract, name, args in calls:
+            key = (contract.address, name, args)
+            if key not in self._calldata:
+                calldata = getattr(contract, name).encode_input(*args)
+                self._calldata[key] = (contract.address, bytes.fromhex(calldata[2:]))
+            data.append(self._calldata[key])
+
+        calldata = self._selector + encode(["(address,bytes)[]"], [data]).hex()
+        raw = web3.eth.call({"to": self.multicall.address, "data": calldata})
+        results = []
+        for (success, value), (_, name, args) in zip(decode(["(bool,bytes)[]"], bytes(raw))[0], calls):
+            assert success, f"{name}{args} reverted"
+            results.append(tuple(int.from_bytes(value[i:i + 32], "big") for i in range(0, len(value), 32)))
+        return results
+
+
+class StateMachine:
+    """
+    Random interleavings of user actions across the full protocol, with the
+    protocol invariants checked against on-chain state after every step.
+
+    Time jumps only accumulate within `pending_time`, and are applied as a single
+    mined block before the next transaction. Invariants are only re-read after a
+    transaction, so consecutive time jumps cost nothing.
+    """
+
+    st_user = strategy("uint256", max_value=NUM_USERS - 1)
+    st_token = strategy("uint256", max_value=NUM_LP_TOKENS - 1)
+    st_index = strategy("uint256", max_value=MAX_LOCK_WEEKS)
+    st_pct = strategy("uint256", min_value=1, max_value=100)
+    st_weeks = strategy("uint256", min_value=1, max_value=MAX_LOCK_WEEKS)
+    st_time = strategy("uint256", min_value=1, max_value=WEEK * 3)
+
+    def __init__(cls, system, users, tokens, fee_token, multicall):
+        cls.system = system
+        cls.users = users
+        cls.tokens = tokens
+        cls.fee_token = fee_token
+        cls.reader = BatchReader(multicall)
+
+    def setup(self):
+        self.pending_time = 0
+        self.state = None
+
+    def _advance(self):
+        # apply accumulated time jumps, so that views read prior to a
+        # transaction see the same week as the transaction itself
+        if self.pending_time:
+            chain.mine(timedelta=self.pending_time)
+            self.pending_time = 0
+        self.state = None
+
+    def _read_state(self):
+        if self.state is not None:
+            return self.state
+
+        system = self.system
+        locker, lp_staker, fee_distro = system.locker, system.lp_staker, system.fee_distro
+        week = locker.getWeek()
+        weeks = list(range(max(week - 1, 0), week + MAX_LOCK_WEEKS + 1))
+
+        calls = [(lp_staker, "mintedTokens", ()), (self.fee_token, "balanceOf", (fee_distro,))]
+        calls.append((fee_distro, "trackedBalance", (self.fee_token,)))
+        calls += [(locker, "weeklyTotalWeight", (i,)) for i in weeks]
+        calls += [(locker, "weeklyWeightOf", (acct, i)) for acct in self.users for i in weeks]
+        calls += [(fee_distro, "weeklyFeeAmounts", (self.fee_token, i)) for i in range(week + 1)]
+        for token in self.tokens:
+            calls.append((lp_staker, "poolInfo", (token,)))
+            calls += [(lp_staker, "userInfo", (token, acct)) for acct in self.users]
+        results = iter(i[0] if len(i) == 1 else i for i in self.reader.read(calls))
+
+        state = {"week": week, "minted": next(results), "fee_balance": next(results)}
+        state["tracked_fees"] = next(results)
+        state["total_weights"] = {i: next(results) for i in weeks}
+        state["weights"] = {(acct, i): next(results) for acct in self.users for i in weeks}
+        state["fee_amounts"] = [next(results) for i in range(week + 1)]
+        state["pools"] = {}
+        for token in self.tokens:
+            pool_info = next(results)
+            user_info = [next(results) for acct in self.users]
+            state["pools"][token] = (pool_info, user_info)
+
+        self.state = state
+        return state
+
+    # time
+
+    def rule_sleep(self, st_time):
+        self.pending_time += st_time
+
+    # TokenLocker
+
+    def rule_lock(self, st_user, st_pct, st_weeks):
+        self._advance()
+        acct = self.users[st_user]
+        amount = self.system.eps2.balanceOf(acct) * st_pct // 100
+        if amount:
+            self.system.locker.lock(acct, amount, st_weeks, {"from": acct})
+
+    def rule_extend_lock(self, st_user, st_index, st_pct, st_weeks):
+        self._advance()
+        acct = self.users[st_user]
+        locks = [i for i in self.system.locker.getActiveUserLocks(acct) if i[0] < MAX_LOCK_WEEKS]
+        if locks:
+            weeks, balance = locks[st_index % len(locks)]
+            new_weeks = weeks + 1 + st_weeks % (MAX_LOCK_WEEKS - weeks)
+            amount = balance * st_pct // 100
+            if amount:
+                self.system.locker.extendLock(amount, weeks, new_weeks, {"from": acct})
+
+    def rule_exit_stream(self, st_user):
+        self._advance()
+        acct = self.users[st_user]
+        if self.system.locker.streamableBalance(acct):
+            self.system.locker.initiateExitStream({"from": acct})
+        else:
+            self.system.locker.withdrawExitStream({"from": acct})
+
+    # IncentiveVoting
+
+    def rule_vote(self, st_user, st_token, st_pct):
+        self._advance()
+        acct = self.users[st_user]
+        votes = self.system.voter.availableVotes(acct) * st_pct // 100
+        if votes:
+            self.system.voter.vote([self.tokens[st_token]], [votes], {"from": acct})
+
+    # EllipsisLpStaking
+
+    def rule_deposit(self, st_user, st_token, st_pct):
+        self._advance()
+        acct, token = self.users[st_user], self.tokens[st_token]
+        amount = token.balanceOf(acct) * st_pct // 100
+        if amount:
+            self.system.lp_staker.deposit(token, amount, bool(st_pct % 2), {"from": acct})
+
+    def rule_withdraw(self, st_user, st_token, st_pct):
+        self._advance()
+        acct, token = self.users[st_user], self.tokens[st_token]
+        amount = self.system.lp_staker.userInfo(token, acct)[0] * st_pct // 100
+        if amount:
+            self.system.lp_staker.withdraw(token, amount, bool(st_pct % 2), {"from": acct})
+
+    def rule_claim_rewards(self, st_user):
+        self._advance()
+        acct = self.users[st_user]
+        self.system.lp_staker.claim(acct, self.tokens, {"from": acct})
+
+    def rule_update_boosts(self, st_user):
+        self._advance()
+        acct = self.users[st_user]
+        self.system.lp_staker.updateUserBoosts(acct, self.tokens, {"from": acct})
+
+    # FeeDistributor
+
+    def rule_deposit_fee(self, st_pct):
+        self._advance()
+        deployer = self.system.deployer
+        amount = FEE_AMOUNT * st_pct // 100
+        self.fee_token._mint_for_testing(deployer, amount, {"from": deployer})
+        self.system.fee_distro.depositFee(self.fee_token, amount, {"from": deployer})
+
+    def rule_push_fees(self, st_pct):
+        # fees transferred in directly, as pools do with admin fees
+        self._advance()
+        deployer = self.system.deployer
+        amount = FEE_AMOUNT * st_pct // 100
+        self.fee_token._mint_for_testing(self.system.fee_distro, amount, {"from": deployer})
+
+    def rule_checkpoint_fees(self, st_user):
+        self._advance()
+        acct = self.users[st_user]
+        self.system.fee_distro.checkpointFees([self.fee_token], {"from": acct})
+
+    def rule_claim_fees(self, st_user):
+        self._advance()
+        acct = self.users[st_user]
+        self.system.fee_distro.claim(acct, [self.fee_token], {"from": acct})
+
+    # invariants
+
+    def invariant_lock_weights(self):
+        state = self._read_state()
+        for week, total in state["total_weights"].items():
+            assert sum(state["weights"][acct, week] for acct in self.users) == total
+
+    def invariant_minted_tokens(self):
+        state = self._read_state()
+        assert state["minted"] <= self.system.lp_staker.maxMintableTokens()
+
+    def invariant_fee_claims(self):
+        # fees are only claimable for weeks that have ended, so the total claimed
+        # can never exceed the amounts received prior to the current week
+        state = self._read_state()
+        assert state["tracked_fees"] <= state["fee_balance"]
+        claimed = sum(state["fee_amounts"]) - state["tracked_fees"]
+        assert 0 <= claimed <= sum(state["fee_amounts"][:state["week"]])
+
+    def invariant_adjusted_supply(self):
+        state = self._read_state()
+        for pool_info, user_info in state["pools"].values():
+            # boosts decay without writes to `userInfo`, so balances are
+            # calculated for the week in which the pool was last updated
+            adjusted_supply, last_reward_time, boost_slope = pool_info[0], pool_info[2], pool_info[5]
+            week = (last_reward_time - self.system.start_time) // WEEK
+            balances = [i[1] - i[4] * (min(week, i[6]) - i[5]) for i in user_info]
+            assert adjusted_supply == sum(balances)
+            assert boost_slope == sum(i[4] for i in user_info if week < i[6])
+            assert all(i[1] <= i[0] for i in user_info)
+
+
+def test_invariants(system, stakers, tokens, fee_token, multicall):
+    state_machine(
+        StateMachine,
+        system,
+        stakers,
+        tokens,
+        fee_token,
+        multicall,
+        settings={"max_examples": 50, "stateful_step_count": 40},
+    )
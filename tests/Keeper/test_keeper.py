@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from brownie import Multicall, accounts
+
+from scripts.indexer import EventIndexer
+from scripts.keeper import Keeper, expected_adjusted_amount, get_stakers
+from scripts.local_deploy import advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+
+# each of `users` holds EPX and `LP_AMOUNT` of every LP token
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def depositors(users):
+    # the last depositor has no lock
+    return users + accounts[4:7]
+
+
+@pytest.fixture(scope="module")
+def tokens(system):
+    return system.lp_tokens[:3]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, depositors, tokens):
+    for acct in accounts[4:7]:
+        system.fund_epx(acct, 10 * LOCK_AMOUNT)
+        system.fund_lp(acct, LP_AMOUNT, tokens)
+    for i, acct in enumerate(depositors):
+        if i < 5:
+            system.locker.lock(acct, LOCK_AMOUNT // (i + 1), 2 + i * 3, {"from": acct})
+        for token in tokens[:i % 3 + 1]:
+            system.lp_staker.deposit(token, LP_AMOUNT // (i + 2), False, {"from": acct})
+    for acct in depositors[:5]:
+        votes = system.voter.availableVotes(acct)
+        system.voter.vote(tokens, [votes // 3] * 3, {"from": acct})
+
+    # lock weights decay and the shortest lock expires, leaving boosts stale
+    advance_weeks(3)
+
+
+@pytest.fixture(scope="module")
+def stakers(system):
+    contracts = {"TokenLocker": system.locker, "EllipsisLpStaking": system.lp_staker}
+    return get_stakers(EventIndexer(":memory:", contracts))
+
+
+@pytest.fixture(scope="module")
+def keeper(system):
+    multicall = Multicall.deploy({"from": system.deployer})
+    return Keeper(accounts[0], system.lp_staker, system.locker, system.voter, multicall, max_pending=3)
+
+
+def _expected(system, user, token):
+    deposit_amount = system.lp_staker.userInfo(token, user)[0]
+    return expected_adjusted_amount(
+        deposit_amount,
+        system.locker.userWeight(user),
+        system.locker.weeklyWeightOf(user, system.locker.getWeek() + 1),
+        system.locker.totalWeight(),
+        token.balanceOf(system.lp_staker),
+    )
+
+
+def test_get_stakers(depositors, tokens, stakers):
+    expected = sorted(
+        (acct.address, token.address)
+        for i, acct in enumerate(depositors)
+        for token in tokens[:i % 3 + 1]
+    )
+    assert stakers == expected
+
+
+def test_find_stale_boosts(system, stakers, keeper, tokens):
+    updates = keeper.find_stale_boosts(stakers)
+    assert updates
+    assert [i.impact for i in updates] == sorted((i.impact for i in updates), reverse=True)
+
+    stale = {(i.user, i.token): i for i in updates}
+    for user, token in stakers:
+        token = next(i for i in tokens if i == token)
+        adjusted = system.lp_staker.adjustedBalance(token, user)
+        expected = _expected(system, user, token)
+        assert ((user, token.address) in stale) == (adjusted != expected)
+        if adjusted != expected:
+            assert stale[user, token.address].expected_amount == expected
+
+    update = updates[0]
+    system.lp_staker.updateUserBoosts(update.user, [update.token], {"from": accounts[0]})
+    assert system.lp_staker.userInfo(update.token, update.user)[1] == update.expected_amount
+
+
+def test_run(system, stakers, keeper, tokens):
+    nonce = accounts[0].nonce
+    actions = asyncio.run(keeper.run(stakers))
+
+    assert actions
+    assert all(i.status == 1 for i in actions)
+    assert accounts[0].nonce == nonce + len(actions)
+    assert keeper.find_stale_boosts(stakers) == []
+    assert keeper.find_fee_claims(tokens) == []
+    for token in tokens:
+        assert system.lp_staker.lastFeeClaim(token) > 0
+
+
+def test_action_order(system, stakers, keeper, tokens):
+    boost_updates, fee_tokens = keeper.find_stale_boosts(stakers), keeper.find_fee_claims(tokens)
+    actions = keeper.build_actions(boost_updates, fee_tokens)
+    boosts = [i for i in actions if i.fn_name == "updateUserBoosts"]
+    assert [i.impact for i in boosts] == sorted((i.impact for i in boosts), reverse=True)
+    assert len(set(i.args[0] for i in boosts)) == len(boosts)
+    assert [i.fn_name for i in actions[len(boosts):]] == ["claim"]
+
+
+def test_tokens_per_tx(system, stakers, keeper):
+    tokens_per_tx = keeper.tokens_per_tx
+    keeper.tokens_per_tx = 1
+    try:
+        actions = asyncio.run(keeper.run(stakers))
+    finally:
+        keeper.tokens_per_tx = tokens_per_tx
+    assert all(len(i.args[1]) == 1 for i in actions)
+    assert all(i.status == 1 for i in actions)
+    assert keeper.find_stale_boosts(stakers) == []
+
+
+def test_dry_run(system, stakers, keeper):
+    nonce = accounts[0].nonce
+    actions = asyncio.run(keeper.run(stakers, dry_run=True))
+
+    assert actions
+    assert all(i.gas > 0 and i.txid is None for i in actions)
+    assert accounts[0].nonce == nonce
+    assert len(keeper.find_stale_boosts(stakers)) == len(
+        [j for i in actions if i.fn_name == "updateUserBoosts" for j in i.args[1]]
+    )
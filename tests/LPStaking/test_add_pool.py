@@ -2,27 +2,8 @@ import brownie
 import pytest
 from brownie import ZERO_ADDRESS, accounts, chain
 
-def mint_epx_to_acct(eps, eps2, locker, amount, acct):
-    eps._mint_for_testing(acct, amount)
-    eps.approve(eps2, amount, {"from": acct})
-    eps2.migrate(acct, amount, {"from": acct})
-    eps2.approve(locker, amount, {"from": acct})
-    assert eps2.balanceOf(acct) == amount * 88
-
-
-# set up user with LP tokens and vote weight
-@pytest.fixture(scope="module", autouse=True)
-def setup(eps2, eps, locker, voter, lp_tokens, pools, lp_staker, alice, bob, transfer_time):
-    lp_tokens[0].setMinter(pools[0], {'from': alice})
-    lp_tokens[1].setMinter(pools[1])
-
-    for acct in [alice, bob]:
-        mint_epx_to_acct(eps, eps2, locker, 15000000 * 10 ** 18, acct)
-        
-    delta = transfer_time - chain.time()
-    chain.mine(timedelta=delta)
-    locker.lock(alice, 15000000 * 10 ** 18, 30, {"from": alice})
-    locker.lock(bob, 15000000 * 10 ** 18, 30, {"from": bob})
+# alice and bob hold locked EPX for vote weight
+pytestmark = pytest.mark.scenario("locked")
 
 
 def test_unauthorized_add_pool(lp_staker, alice, lp_tokens):
@@ -0,0 +1,175 @@
+import pytest
+from brownie import accounts
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, WEEK, advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+LOCK_WEEKS = [4, 10, MAX_LOCK_WEEKS]
+
+# each of `users` holds EPX and `LP_AMOUNT` of every LP token
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def stakers(users):
+    # the last staker has no lock
+    return users + accounts[4:5]
+
+
+@pytest.fixture(scope="module")
+def poker():
+    # has no deposit, `updateUserBoosts` from this account only updates the pool
+    return accounts[6]
+
+
+@pytest.fixture(scope="module")
+def token(system):
+    return system.lp_tokens[0]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, stakers, token):
+    for acct, weeks in zip(stakers, LOCK_WEEKS):
+        system.locker.lock(acct, LOCK_AMOUNT, weeks, {"from": acct})
+    system.fund_lp(stakers[-1], LP_AMOUNT, [token])
+    for acct in stakers:
+        system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": acct})
+    _vote(system, stakers)
+    advance_weeks(1)
+
+
+def _vote(system, stakers):
+    for acct in stakers:
+        votes = system.voter.availableVotes(acct)
+        if votes:
+            system.voter.vote(system.lp_tokens[:1], [votes], {"from": acct})
+
+
+def _legacy_adjusted(system, user, token):
+    # the frozen boost calculated on each interaction, prior to boosts decaying
+    deposit = system.lp_staker.userInfo(token, user)[0]
+    weight, total = system.locker.userWeight(user), system.locker.totalWeight()
+    adjusted = deposit * 40 // 100
+    if weight:
+        adjusted += token.balanceOf(system.lp_staker) * weight // total * 60 // 100
+    return min(adjusted, deposit)
+
+
+def _assert_pool_matches_stakers(system, stakers, token):
+    lp_staker = system.lp_staker
+    week = system.locker.getWeek()
+    pool_info = lp_staker.poolInfo(token)
+    assert (pool_info[2] - system.start_time) // WEEK == week
+    assert pool_info[0] == sum(lp_staker.adjustedBalance(token, acct) for acct in stakers)
+    slopes = [lp_staker.userInfo(token, acct)[4:] for acct in stakers]
+    assert pool_info[5] == sum(slope for slope, _, end in slopes if week < end)
+
+
+def test_update_matches_frozen_boost(system, stakers, token):
+    # on each interaction the boost is set as before, rounded down to a multiple of its duration
+    lp_staker = system.lp_staker
+    for i in range(6):
+        for acct in stakers:
+            lp_staker.updateUserBoosts(acct, [token], {"from": acct})
+            _, adjusted, _, _, slope, start, end = lp_staker.userInfo(token, acct)
+            assert 0 <= _legacy_adjusted(system, acct, token) - adjusted < max(end - start, 1)
+            assert lp_staker.adjustedBalance(token, acct) == adjusted
+        _assert_pool_matches_stakers(system, stakers, token)
+        advance_weeks(1)
+
+
+def test_balance_follows_lock_weight(system, stakers, token):
+    lp_staker, locker = system.lp_staker, system.locker
+    alice = stakers[0]
+    _, adjusted, _, _, slope, start, end = lp_staker.userInfo(token, alice)
+    boost = slope * (end - start)
+    base = adjusted - boost
+    weight = locker.weeklyWeightOf(alice, start)
+    assert end == start + LOCK_WEEKS[0]
+
+    for i in range(LOCK_WEEKS[0] + 2):
+        week = locker.getWeek()
+        current = lp_staker.adjustedBalance(token, alice) - base
+        assert current == slope * max(end - week, 0)
+        # a single lock decays linearly, so the boost stays proportional to its weight
+        assert current * weight == boost * locker.userWeight(alice)
+        advance_weeks(1)
+    assert lp_staker.adjustedBalance(token, alice) == base
+
+
+def test_supply_follows_decay(system, stakers, poker, token):
+    lp_staker = system.lp_staker
+    user_info = [lp_staker.userInfo(token, acct) for acct in stakers]
+    for i in range(LOCK_WEEKS[1] + 2):
+        lp_staker.updateUserBoosts(poker, [token], {"from": poker})
+        _assert_pool_matches_stakers(system, stakers, token)
+        advance_weeks(1)
+
+    # no user positions were written
+    assert [lp_staker.userInfo(token, acct) for acct in stakers] == user_info
+
+
+def test_decay_after_all_locks_expire(system, stakers, poker, token):
+    lp_staker = system.lp_staker
+    advance_weeks(MAX_LOCK_WEEKS + 1)
+    lp_staker.updateUserBoosts(poker, [token], {"from": poker})
+    _assert_pool_matches_stakers(system, stakers, token)
+    pool_info = lp_staker.poolInfo(token)
+    assert pool_info[0] == sum(LP_AMOUNT * 40 // 100 for acct in stakers)
+    assert pool_info[5] == 0
+
+    for acct in stakers:
+        claimable = lp_staker.claimableReward(acct, [token])[0]
+        tx = lp_staker.claim(acct, [token], {"from": acct})
+        assert tx.return_value >= claimable > 0
+
+
+@pytest.mark.parametrize("idx", range(len(LOCK_WEEKS) + 1))
+def test_rewards_match_weekly_balances(system, stakers, token, idx):
+    # rewards equal a per-week sum of balance * reward per share, as if every
+    # boost had been updated at the start of each week
+    lp_staker, voter = system.lp_staker, system.voter
+    acct = stakers[idx]
+    last_time = lp_staker.claim(acct, [token], {"from": acct}).timestamp
+
+    balances = {}
+    for i in range(LOCK_WEEKS[1] + 2):
+        balances[system.get_week()] = [lp_staker.adjustedBalance(token, a) for a in stakers]
+        _vote(system, stakers)
+        advance_weeks(1)
+    balances[system.get_week()] = [lp_staker.adjustedBalance(token, a) for a in stakers]
+    tx = lp_staker.claim(acct, [token], {"from": acct})
+
+    expected = 0
+    for week, weekly_balances in sorted(balances.items()):
+        end_time = min((week + 1) * WEEK + system.start_time, tx.timestamp)
+        reward = (end_time - last_time) * voter.getRewardsPerSecond(token, week)
+        expected += weekly_balances[idx] * (reward * 10 ** 12 // sum(weekly_balances))
+        last_time = end_time
+
+    # rewards before and after the period are each rounded down
+    assert 0 <= tx.return_value - expected // 10 ** 12 <= 1
+
+
+def test_emergency_withdraw_decayed(system, stakers, poker, token):
+    lp_staker = system.lp_staker
+    bob = stakers[1]
+    advance_weeks(3)
+    # the pool has not been updated since boosts decayed
+    lp_staker.emergencyWithdraw(token, {"from": bob})
+    lp_staker.updateUserBoosts(poker, [token], {"from": poker})
+    _assert_pool_matches_stakers(system, stakers, token)
+
+    # bob's boost no longer decays from the pool supply
+    advance_weeks(LOCK_WEEKS[1])
+    lp_staker.updateUserBoosts(poker, [token], {"from": poker})
+    _assert_pool_matches_stakers(system, stakers, token)
+
+
+def test_unregistered_token(system, stakers, token):
+    # a token that was never added has no pool data to decay
+    advance_weeks(2)
+    claimable = system.lp_staker.claimableReward(stakers[0], [token, accounts[8]])
+    assert claimable[0] > 0
+    assert claimable[1] == 0
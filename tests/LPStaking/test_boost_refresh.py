@@ -0,0 +1,118 @@
+import brownie
+import pytest
+from brownie import chain
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users):
+    alice, bob, charlie = users
+    system.locker.lock(bob, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": bob})
+    for token in system.lp_tokens[:3]:
+        system.lp_staker.deposit(token, LP_AMOUNT // 2, False, {"from": alice})
+        system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": bob})
+    advance_weeks(1)
+
+
+def _adjusted(system, user, tokens):
+    return [system.lp_staker.userInfo(token, user)[1] for token in tokens]
+
+
+def test_user_pools(system, users):
+    lp_staker, tokens = system.lp_staker, system.lp_tokens
+    alice = users[0]
+    assert lp_staker.getUserPools(alice) == tokens[:3]
+
+    lp_staker.withdraw(tokens[0], LP_AMOUNT // 4, False, {"from": alice})
+    assert lp_staker.getUserPools(alice) == tokens[:3]
+
+    lp_staker.withdraw(tokens[0], LP_AMOUNT // 4, False, {"from": alice})
+    assert lp_staker.getUserPools(alice) == [tokens[2], tokens[1]]
+
+    lp_staker.deposit(tokens[0], LP_AMOUNT // 4, False, {"from": alice})
+    lp_staker.emergencyWithdraw(tokens[1], {"from": alice})
+    assert lp_staker.getUserPools(alice) == [tokens[2], tokens[0]]
+
+    lp_staker.withdraw(tokens[0], LP_AMOUNT // 4, False, {"from": alice})
+    lp_staker.withdraw(tokens[2], LP_AMOUNT // 2, False, {"from": alice})
+    assert lp_staker.getUserPools(alice) == []
+
+
+def test_lock_refreshes_boosts(system, users, expected_adjusted):
+    alice = users[0]
+    tokens = system.lp_tokens[:3]
+    before = _adjusted(system, alice, tokens)
+    claimable = system.lp_staker.claimableReward(alice, tokens)
+
+    system.locker.lock(alice, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": alice})
+
+    after = _adjusted(system, alice, tokens)
+    assert all(new > old for new, old in zip(after, before))
+    assert after == [expected_adjusted(system, alice, token) for token in tokens]
+    # rewards earned at the previous boost are retained
+    assert all(
+        new >= old for new, old in zip(system.lp_staker.claimableReward(alice, tokens), claimable)
+    )
+
+
+def test_extend_lock_refreshes_boosts(system, users, expected_adjusted):
+    alice = users[0]
+    tokens = system.lp_tokens[:3]
+    system.locker.lock(alice, LOCK_AMOUNT // 10, 1, {"from": alice})
+    before = _adjusted(system, alice, tokens)
+
+    system.locker.extendLock(LOCK_AMOUNT // 10, 1, MAX_LOCK_WEEKS, {"from": alice})
+
+    after = _adjusted(system, alice, tokens)
+    assert all(new > old for new, old in zip(after, before))
+    assert after == [expected_adjusted(system, alice, token) for token in tokens]
+
+
+def test_third_party_lock_refreshes_boosts(system, users, expected_adjusted):
+    alice, charlie = users[0], users[2]
+    tokens = system.lp_tokens[:3]
+    system.locker.lock(alice, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": charlie})
+    assert _adjusted(system, alice, tokens) == [
+        expected_adjusted(system, alice, token) for token in tokens
+    ]
+
+
+def test_no_deposits(system, users):
+    charlie = users[2]
+    tx = system.locker.lock(charlie, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": charlie})
+    assert tx.events["NewLock"]["user"] == charlie
+    assert system.lp_staker.getUserPools(charlie) == []
+
+
+def test_max_pools(system, users, expected_adjusted):
+    # pools beyond the limit are left for `updateUserBoosts`
+    lp_staker, tokens = system.lp_staker, system.lp_tokens
+    charlie = users[2]
+    limit = lp_staker.MAX_BOOST_REFRESH_POOLS()
+    assert limit < len(tokens)
+    for token in tokens:
+        lp_staker.deposit(token, LP_AMOUNT // 10, False, {"from": charlie})
+    advance_weeks(1)
+    chain.sleep(86400)
+
+    before = _adjusted(system, charlie, tokens)
+    system.locker.lock(charlie, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": charlie})
+    expected = [expected_adjusted(system, charlie, token) for token in tokens]
+    adjusted = _adjusted(system, charlie, tokens)
+    assert adjusted[:limit] == expected[:limit]
+    assert adjusted[limit:] == before[limit:]
+
+    lp_staker.updateUserBoosts(charlie, tokens[limit:], {"from": charlie})
+    assert _adjusted(system, charlie, tokens) == expected
+
+
+def test_refresh_only_locker(system, users):
+    with brownie.reverts("Sender not tokenLocker"):
+        system.lp_staker.refreshBoosts(users[0], {"from": users[0]})
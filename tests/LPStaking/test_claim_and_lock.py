@@ -0,0 +1,143 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS, chain
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def tokens(system):
+    return system.lp_tokens[:2]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users, tokens):
+    alice, bob, charlie = users
+    for acct in users:
+        for token in tokens:
+            system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": acct})
+
+    # alice has no lock, so she starts with the minimum boost
+    system.locker.lock(bob, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": bob})
+    system.locker.lock(charlie, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": charlie})
+    system.voter.vote(tokens, [10 ** 6, 10 ** 6], {"from": bob})
+    advance_weeks(1)
+    chain.sleep(86400)
+
+
+def test_claim_and_lock(system, users, tokens):
+    lp_staker, locker, eps2 = system.lp_staker, system.locker, system.eps2
+    alice = users[0]
+    claimable = sum(lp_staker.claimableReward(alice, tokens))
+    balance = eps2.balanceOf(alice)
+    locker_balance = eps2.balanceOf(locker)
+
+    tx = lp_staker.claimAndLock(tokens, 10, {"from": alice})
+    amount = tx.return_value
+
+    assert amount >= claimable > 0
+    assert eps2.balanceOf(alice) == balance
+    assert eps2.balanceOf(locker) == locker_balance + amount
+    assert locker.userWeight(alice) == amount * 10
+    assert locker.getActiveUserLocks(alice) == [(10, amount)]
+    assert tx.events["ClaimedReward"]["receiver"] == lp_staker
+    assert eps2.balanceOf(lp_staker) == 0
+    assert tx.events["NewLock"].values() == [alice, amount, 10]
+    assert sum(lp_staker.claimableReward(alice, tokens)) == 0
+
+
+def test_boost_uses_new_weight(system, users, tokens, expected_adjusted):
+    lp_staker = system.lp_staker
+    alice = users[0]
+    before = [lp_staker.userInfo(token, alice)[1] for token in tokens]
+
+    lp_staker.claimAndLock(tokens, MAX_LOCK_WEEKS, {"from": alice})
+
+    for token, adjusted in zip(tokens, before):
+        assert lp_staker.userInfo(token, alice)[1] > adjusted
+        assert lp_staker.userInfo(token, alice)[1] == expected_adjusted(system, alice, token)
+
+
+def test_matches_claim_then_lock(system, users, tokens):
+    lp_staker, locker, eps2 = system.lp_staker, system.locker, system.eps2
+    alice = users[0]
+
+    lp_staker.claimAndLock(tokens, 20, {"from": alice})
+    weight = locker.userWeight(alice)
+    adjusted = [lp_staker.userInfo(token, alice)[1] for token in tokens]
+    chain.undo()
+
+    tx = lp_staker.claim(alice, tokens, {"from": alice})
+    eps2.approve(locker, tx.return_value, {"from": alice})
+    locker.lock(alice, tx.return_value, 20, {"from": alice})
+    lp_staker.updateUserBoosts(alice, tokens, {"from": alice})
+
+    # the second path runs at a later timestamp, so slightly more has been earned
+    assert locker.userWeight(alice) == pytest.approx(weight, rel=1e-4)
+    for token, expected in zip(tokens, adjusted):
+        assert lp_staker.userInfo(token, alice)[1] == pytest.approx(expected, rel=1e-4)
+
+
+def test_duplicate_tokens(system, users, tokens):
+    lp_staker = system.lp_staker
+    alice = users[0]
+    claimable = sum(lp_staker.claimableReward(alice, tokens))
+
+    amount = lp_staker.claimAndLock(tokens + tokens, 5, {"from": alice}).return_value
+    assert amount == pytest.approx(claimable, rel=1e-4)
+    assert system.locker.getActiveUserLocks(alice) == [(5, amount)]
+
+
+def test_ignores_claim_receiver(system, users, tokens):
+    lp_staker, eps2 = system.lp_staker, system.eps2
+    alice, bob = users[:2]
+    lp_staker.setClaimReceiver(bob, {"from": alice})
+    balance = eps2.balanceOf(bob)
+
+    amount = lp_staker.claimAndLock(tokens, 5, {"from": alice}).return_value
+    assert eps2.balanceOf(bob) == balance
+    assert system.locker.getActiveUserLocks(alice) == [(5, amount)]
+
+
+def test_nothing_to_claim(system, users):
+    tx = system.lp_staker.claimAndLock([], 5, {"from": users[0]})
+
+    assert tx.return_value == 0
+    assert "NewLock" not in tx.events
+
+
+@pytest.mark.parametrize("weeks", [0, MAX_LOCK_WEEKS + 1])
+def test_invalid_weeks(system, users, weeks, tokens):
+    with brownie.reverts():
+        system.lp_staker.claimAndLock(tokens, weeks, {"from": users[0]})
+
+
+def test_lock_claimed_rewards_only_lp_staking(system, users):
+    with brownie.reverts("Sender not lpStaking"):
+        system.locker.lockClaimedRewards(users[0], 10 ** 18, 5, {"from": users[0]})
+
+
+def test_set_lp_staking_once(system):
+    with brownie.reverts():
+        system.locker.setLpStaking(ZERO_ADDRESS, {"from": system.deployer})
+
+
+def test_set_lp_staking_only_deployer(system, users):
+    with brownie.reverts("Only deployer"):
+        system.locker.setLpStaking(users[0], {"from": users[0]})
+
+
+def test_claim_in_following_week(system, users, tokens):
+    lp_staker = system.lp_staker
+    alice = users[0]
+    lp_staker.claimAndLock(tokens, MAX_LOCK_WEEKS, {"from": alice})
+    advance_weeks(1)
+    amount = lp_staker.claimAndLock(tokens, MAX_LOCK_WEEKS, {"from": alice}).return_value
+    assert amount > 0
+    assert len(system.locker.getActiveUserLocks(alice)) == 2
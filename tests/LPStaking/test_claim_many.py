@@ -0,0 +1,102 @@
+import brownie
+import pytest
+from brownie import chain
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def tokens(system):
+    return system.lp_tokens[:2]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users, tokens):
+    alice, bob, charlie = users
+    for acct in users:
+        for token in tokens:
+            system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": acct})
+
+    # alice has no lock, bob and charlie have locks of different lengths
+    system.locker.lock(bob, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": bob})
+    system.locker.lock(charlie, LOCK_AMOUNT, 10, {"from": charlie})
+    system.voter.vote(tokens, [10 ** 6, 10 ** 6], {"from": bob})
+    advance_weeks(1)
+    chain.sleep(86400)
+
+
+def test_claim_many(system, users, tokens):
+    lp_staker, eps2 = system.lp_staker, system.eps2
+    claimable = [sum(lp_staker.claimableReward(acct, tokens)) for acct in users]
+    balances = [eps2.balanceOf(acct) for acct in users]
+
+    tx = lp_staker.claimMany(users, tokens, {"from": users[0]})
+
+    for acct, amount, expected, balance in zip(users, tx.return_value, claimable, balances):
+        assert amount >= expected > 0
+        assert eps2.balanceOf(acct) == balance + amount
+        assert sum(lp_staker.claimableReward(acct, tokens)) == 0
+    assert [i["user"] for i in tx.events["ClaimedReward"]] == users
+
+
+def test_boosts_updated(system, users, tokens, expected_adjusted):
+    lp_staker = system.lp_staker
+    lp_staker.claimMany(users, tokens, {"from": users[0]})
+
+    for acct in users:
+        for token in tokens:
+            assert lp_staker.userInfo(token, acct)[1] == expected_adjusted(system, acct, token)
+
+
+def test_matches_claim(system, users, tokens):
+    lp_staker = system.lp_staker
+    bob = users[1]
+    amount = lp_staker.claim(bob, tokens, {"from": bob}).return_value
+    adjusted = [lp_staker.userInfo(token, bob)[1] for token in tokens]
+    chain.undo()
+
+    # both claims are mined in consecutive blocks, allow for one second of emissions
+    tx = lp_staker.claimMany([bob], tokens, {"from": bob})
+    assert amount <= tx.return_value[0] <= amount * 1001 // 1000
+    assert [lp_staker.userInfo(token, bob)[1] for token in tokens] == adjusted
+
+
+def test_duplicate_user(system, users, tokens):
+    alice = users[0]
+    balance = system.eps2.balanceOf(alice)
+    tx = system.lp_staker.claimMany([alice, alice], tokens, {"from": alice})
+
+    assert tx.return_value[0] > 0
+    assert tx.return_value[1] == 0
+    assert system.eps2.balanceOf(alice) == balance + tx.return_value[0]
+
+
+def test_claim_receiver(system, users, tokens):
+    alice, bob, charlie = users
+    balances = [system.eps2.balanceOf(acct) for acct in (alice, charlie)]
+    system.lp_staker.setClaimReceiver(charlie, {"from": alice})
+    tx = system.lp_staker.claimMany([alice, bob], tokens, {"from": bob})
+
+    assert system.eps2.balanceOf(alice) == balances[0]
+    assert system.eps2.balanceOf(charlie) == balances[1] + tx.return_value[0]
+
+
+def test_blocked_third_party(system, users, tokens):
+    alice, bob, charlie = users
+    system.lp_staker.setBlockThirdPartyActions(True, {"from": charlie})
+
+    with brownie.reverts("Cannot claim on behalf of this account"):
+        system.lp_staker.claimMany([alice, charlie], tokens, {"from": bob})
+
+    system.lp_staker.claimMany([charlie], tokens, {"from": charlie})
+
+
+def test_empty(system, users, tokens):
+    tx = system.lp_staker.claimMany([], tokens, {"from": users[0]})
+    assert tx.return_value == []
@@ -1,47 +1,20 @@
 import brownie
 import pytest
-from brownie import ZERO_ADDRESS, accounts, chain
+from brownie import ZERO_ADDRESS, accounts
 
-def mint_epx_to_acct(eps, eps2, locker, amount, acct):
-    eps._mint_for_testing(acct, amount)
-    eps.approve(eps2, amount, {"from": acct})
-    eps2.migrate(acct, amount, {"from": acct})
-    eps2.approve(locker, amount, {"from": acct})
-    assert eps2.balanceOf(acct) == amount * 88
+# Alice and Bob hold locked EPX for vote weight.
+pytestmark = pytest.mark.scenario("locked")
 
 
 # Vote for incentives on pools 1-5
 # doesn't move past vote week
 @pytest.fixture(scope="module")
-def setup_gauges(voter, lp_tokens, pools, locker, alice, bob):
+def setup_gauges(scenarios, voter, lp_tokens):
+    scenarios.load("approved")
     for index in range(5):
-        # bump past first week
-        chain.mine(timedelta=86400 * 14)
-        # set the pools on the lpToken
-        lp_tokens[index].setMinter(pools[index])
-        # create a vote for a gauge
-        voter.createTokenApprovalVote(lp_tokens[index], {"from": alice})
-        # vote
-        voter.voteForTokenApproval(index, 2**256-1, {"from": alice})
-        # assert the token was approved
         assert voter.isApproved(lp_tokens[index]) == True
 
 
-# Alice and Bob get EPX and lock it for vote weight.
-@pytest.fixture(scope="module", autouse=True)
-def setup(eps2, eps, locker, voter, lp_tokens, pools, lp_staker, alice, bob, transfer_time):
-    lp_tokens[0].setMinter(pools[0], {'from': alice})
-    lp_tokens[1].setMinter(pools[1])
-
-    for acct in [alice, bob]:
-        mint_epx_to_acct(eps, eps2, locker, 15000000 * 10 ** 18, acct)
-        
-    delta = transfer_time - chain.time()
-    chain.mine(timedelta=delta)
-    locker.lock(alice, 15000000 * 10 ** 18, 30, {"from": alice})
-    locker.lock(bob, 15000000 * 10 ** 18, 30, {"from": bob})
-
-
 # no revert string here
 def test_deposit_no_amount(lp_staker, alice, pools):
     with brownie.reverts():
@@ -0,0 +1,156 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS, EllipsisLpStaking, IncentiveVoting, TokenLocker, chain
+
+from scripts.local_deploy import (
+    INITIAL_REWARDS_PER_SECOND,
+    MAX_LOCK_WEEKS,
+    MAX_MINTABLE,
+    MIGRATION_RATIO,
+    QUORUM_PCT,
+    TOKEN_APPROVAL_WEIGHT,
+    advance_weeks,
+)
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+WEEK = 86400 * 7
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users):
+    alice = users[0]
+    system.locker.lock(alice, LOCK_AMOUNT, MAX_LOCK_WEEKS, {"from": alice})
+    system.voter.vote(system.lp_tokens[:2], [10 ** 6, 10 ** 6], {"from": alice})
+    advance_weeks(1)
+
+
+@pytest.fixture(scope="module")
+def token(system):
+    return system.lp_tokens[0]
+
+
+@pytest.fixture(scope="module")
+def deposit_time(system, users, token):
+    # the first deposit happens part way into the first week with emissions
+    return system.lp_staker.deposit(token, LP_AMOUNT, False, {"from": users[1]}).timestamp
+
+
+def _recorded(lp_staker, token, start_week, end_week):
+    return [
+        (lp_staker.weeklyPoolData(token, i, 0), lp_staker.weeklyPoolData(token, i, 1))
+        for i in range(start_week, end_week)
+    ]
+
+
+def test_idle_time(system, users, token, deposit_time):
+    week = system.get_week()
+    advance_weeks(1)
+    system.lp_staker.claim(users[1], [token], {"from": users[1]})
+
+    week_end = system.start_time + (week + 1) * WEEK
+    expected = system.voter.getRewardsPerSecond(token, week) * (week_end - deposit_time)
+    assert system.lp_staker.weeklyPoolData(token, week, 1) == expected > 0
+
+
+def test_full_week(system, users, token, deposit_time):
+    week = system.get_week() + 1
+    advance_weeks(2)
+    system.lp_staker.claim(users[1], [token], {"from": users[1]})
+
+    expected = system.voter.getRewardsPerSecond(token, week) * WEEK
+    assert system.lp_staker.weeklyPoolData(token, week, 1) == expected > 0
+
+
+def test_reward_per_share(system, users, token, deposit_time):
+    lp_staker = system.lp_staker
+    advance_weeks(4)
+    lp_staker.claim(users[1], [token], {"from": users[1]})
+
+    history = _recorded(lp_staker, token, 0, system.get_week())
+    acc = [i[0] for i in history]
+    assert acc == sorted(acc)
+    assert 0 < acc[-1] < lp_staker.poolInfo(token)[3]
+
+
+def test_pending_weeks(system, users, token, deposit_time):
+    lp_staker = system.lp_staker
+    advance_weeks(3)
+    week = system.get_week()
+    history = lp_staker.getPoolHistory(token, 0, week)
+
+    # the next update records the same values
+    lp_staker.claim(users[1], [token], {"from": users[1]})
+    assert history == _recorded(lp_staker, token, 0, week)
+    assert lp_staker.getPoolHistory(token, 0, week) == history
+
+
+def test_withdrawn_pool(system, users, token, deposit_time):
+    lp_staker = system.lp_staker
+    bob = users[1]
+    advance_weeks(1)
+    tx = lp_staker.withdraw(token, LP_AMOUNT, False, {"from": bob})
+    week = system.get_week()
+    withdrawn = tx.timestamp - (system.start_time + week * WEEK)
+    advance_weeks(2)
+
+    history = lp_staker.getPoolHistory(token, week, week + 2)
+    rewards_per_second = system.voter.getRewardsPerSecond(token, week)
+    assert history[0][1] == rewards_per_second * withdrawn
+    assert history[1] == (history[0][0], 0)
+
+
+def test_unused_pool(system, deposit_time):
+    advance_weeks(2)
+    week = system.get_week()
+    history = system.lp_staker.getPoolHistory(system.lp_tokens[1], 0, week)
+    assert history == [(0, 0)] * week
+
+
+def test_empty_range(system, token):
+    week = system.get_week()
+    assert system.lp_staker.getPoolHistory(token, week, week) == []
+
+
+def test_week_not_passed(system, token):
+    week = system.get_week()
+    with brownie.reverts("Week has not passed"):
+        system.lp_staker.getPoolHistory(token, 0, week + 1)
+
+
+def test_invalid_pool(system, users):
+    with brownie.reverts("Invalid pool"):
+        system.lp_staker.getPoolHistory(users[0], 0, 0)
+
+
+def test_added_before_start(system, users):
+    # as in `scripts/deploy.py`, the initial pools are added before the first week
+    deployer = system.deployer
+    start_time = (chain.time() // WEEK + 1) * WEEK
+    locker = TokenLocker.deploy(
+        system.eps2, ZERO_ADDRESS, start_time, MAX_LOCK_WEEKS, MIGRATION_RATIO, {"from": deployer}
+    )
+    voter = IncentiveVoting.deploy(
+        locker, INITIAL_REWARDS_PER_SECOND, QUORUM_PCT, TOKEN_APPROVAL_WEIGHT, {"from": deployer}
+    )
+    lp_staker = EllipsisLpStaking.deploy(
+        system.eps2, voter, locker, MAX_MINTABLE, {"from": deployer}
+    )
+    token = system.lp_tokens[2]
+    voter.setLpStaking(lp_staker, [token], {"from": deployer})
+    assert lp_staker.poolInfo(token)[2] == start_time
+
+    advance_weeks(1)
+    bob = users[1]
+    token.approve(lp_staker, LP_AMOUNT, {"from": bob})
+    lp_staker.deposit(token, LP_AMOUNT, False, {"from": bob})
+    advance_weeks(1)
+    lp_staker.withdraw(token, LP_AMOUNT, False, {"from": bob})
+
+    # nothing is emitted in the first week
+    assert lp_staker.weeklyPoolData(token, 0, 0) == 0
+    assert lp_staker.weeklyPoolData(token, 0, 1) == 0
+    assert lp_staker.claimableReward(bob, [token]) == [0]
@@ -1,26 +1,13 @@
 import brownie
 import pytest
-from brownie import accounts, chain
+from brownie import accounts
 
-def mint_epx_to_acct(eps, eps2, locker, amount, acct):
-    eps._mint_for_testing(acct, amount)
-    eps.approve(eps2, amount, {"from": acct})
-    eps2.migrate(acct, amount, {"from": acct})
-    eps2.approve(locker, amount, {"from": acct})
-    assert eps2.balanceOf(acct) == amount * 88
+# alice and bob hold locked EPX and the first five LP tokens are approved
+pytestmark = pytest.mark.scenario("approved")
 
 
 @pytest.fixture(scope="module", autouse=True)
-def setup(eps2, eps, locker, voter, lp_tokens, lp_staker, alice, bob, transfer_time, pools):
-    # hand out some eps
-    for acct in [alice, bob]:
-        mint_epx_to_acct(eps, eps2, locker, 15000000 * 10 ** 18, acct)
-        
-    delta = transfer_time - chain.time()
-    chain.mine(timedelta=delta)
-    locker.lock(alice, 15000000 * 10 ** 18, 30, {"from": alice})
-    locker.lock(bob, 15000000 * 10 ** 18, 30, {"from": bob})
-
+def setup(lp_tokens, lp_staker, alice, bob):
     amount = 10**19
     for index in range(5):
         # mint some lp tokens.
@@ -28,16 +15,6 @@ def setup(eps2, eps, locker, voter, lp_tokens, lp_staker, alice, bob, transfer_t
         lp_tokens[index].approve(lp_staker, amount, {"from": alice})
         lp_tokens[index].mint(bob, amount, {"from": bob})
         lp_tokens[index].approve(lp_staker, amount, {"from": bob})
-        # bump past first week
-        chain.mine(timedelta=86400 * 14)
-        # set the pool on the lpToken
-        lp_tokens[index].setMinter(pools[index], {"from": alice})
-        # create a vote for a gauge
-        voter.createTokenApprovalVote(lp_tokens[index], {"from": alice})
-        # vote
-        voter.voteForTokenApproval(index, 2**256-1, {"from": alice})
-        # assert the token was approved
-        assert voter.isApproved(lp_tokens[index]) == True
 
     # deposit LP
     lp_staker.deposit(lp_tokens[0], amount, 1, {"from": alice})
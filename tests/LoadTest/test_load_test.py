@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from scripts.load_test import LoadGenerator, create_users, percentile
+
+NUM_USERS = 8
+WEEKS = 3
+
+pytestmark = pytest.mark.scenario("local")
+
+
+@pytest.fixture(scope="module")
+def report(system):
+    rng = random.Random(0)
+    users = create_users(system, NUM_USERS, "balanced", rng)
+    return LoadGenerator(system, users, rng, trace_pct=100).run(WEEKS)
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7], 90) == 7
+
+
+def test_no_reverts(report):
+    assert not report.reverts
+
+
+def test_weeks(report):
+    assert len(report.weeks) == WEEKS
+    first = report.weeks[0]["week"]
+    assert [i["week"] for i in report.weeks] == list(range(first, first + WEEKS))
+
+    gas = report.percentiles()
+    assert gas["depositFee"]["count"] == WEEKS * 2
+    assert sum(i["transactions"] for i in report.weeks) == sum(
+        v["count"] for k, v in gas.items() if k != "depositFee"
+    )
+
+
+def test_percentiles_ordered(report):
+    for stats in report.percentiles().values():
+        assert stats["min"] <= stats["p50"] <= stats["p90"] <= stats["p99"] <= stats["max"]
+        assert stats["per_block"] * stats["p99"] <= 30_000_000
+
+
+def test_new_slots(report):
+    # with every transaction traced, the estimate is exact and the first
+    # week of activity always writes to new storage
+    assert report.weeks[0]["new_slots"] > 0
@@ -0,0 +1,170 @@
+import brownie
+import pytest
+from brownie import CumulativeMerkleDistributor, accounts
+
+from scripts.merkle import accumulate, build_distribution
+
+ROUNDS = [
+    {0: 100, 1: 200, 2: 300},
+    {0: 50, 2: 25, 3: 1000},
+    {1: 10, 3: 1},
+]
+FUND_AMOUNT = 10 ** 6
+
+pytestmark = pytest.mark.scenario("local")
+
+
+@pytest.fixture(scope="module")
+def recipients(users):
+    # one more than `users`, so that the last round includes an account absent from the first
+    return users + accounts[4:5]
+
+
+@pytest.fixture(scope="module")
+def updater():
+    return accounts[6]
+
+
+@pytest.fixture(scope="module")
+def distributor(system, updater):
+    return _deploy(system, updater, FUND_AMOUNT)
+
+
+def _deploy(system, updater, amount):
+    tx_params = {"from": system.deployer}
+    distributor = CumulativeMerkleDistributor.deploy(system.eps2, updater, tx_params)
+    system.fund_epx(system.deployer, amount)
+    system.eps2.transfer(distributor, amount, tx_params)
+    return distributor
+
+
+def _post_rounds(distributor, updater, recipients, count):
+    totals = {}
+    for amounts in ROUNDS[:count]:
+        totals = accumulate(totals, {recipients[k].address: v for k, v in amounts.items()})
+        root, claims = build_distribution(totals)
+        distributor.setRoot(root, {"from": updater})
+    return totals, claims
+
+
+def test_claim(system, distributor, updater, recipients):
+    totals, claims = _post_rounds(distributor, updater, recipients, 1)
+    alice = recipients[0]
+    amount, proof = claims[alice.address]
+
+    tx = distributor.claim(amount, alice, proof, {"from": alice})
+
+    assert tx.return_value == 100
+    assert system.eps2.balanceOf(alice) == 100
+    assert distributor.claimed(alice) == 100
+    assert tx.events["Claimed"].values() == [alice, alice, 100, 100]
+
+
+def test_claim_each_round(system, distributor, updater, recipients):
+    alice = recipients[0]
+    for i in range(1, len(ROUNDS) + 1):
+        totals, claims = _post_rounds(distributor, updater, recipients, i)
+        amount, proof = claims[alice.address]
+        if amount > distributor.claimed(alice):
+            distributor.claim(amount, alice, proof, {"from": alice})
+        assert system.eps2.balanceOf(alice) == totals[alice.address]
+
+
+def test_claim_many_rounds_at_once(system, distributor, updater, recipients):
+    totals, claims = _post_rounds(distributor, updater, recipients, len(ROUNDS))
+    for acct in recipients:
+        amount, proof = claims[acct.address]
+        distributor.claim(amount, acct, proof, {"from": acct})
+        assert system.eps2.balanceOf(acct) == totals[acct.address]
+    assert distributor.totalClaimed() == sum(totals.values())
+    assert system.eps2.balanceOf(distributor) == FUND_AMOUNT - sum(totals.values())
+
+
+def test_partial_then_remaining(system, distributor, updater, recipients):
+    bob = recipients[2]
+    _, claims = _post_rounds(distributor, updater, recipients, 1)
+    amount, proof = claims[bob.address]
+    distributor.claim(amount, bob, proof, {"from": bob})
+
+    totals, claims = _post_rounds(distributor, updater, recipients, len(ROUNDS))
+    amount, proof = claims[bob.address]
+    tx = distributor.claim(amount, bob, proof, {"from": bob})
+
+    assert tx.return_value == totals[bob.address] - 300
+    assert system.eps2.balanceOf(bob) == totals[bob.address]
+
+
+def test_nothing_to_claim(distributor, updater, recipients):
+    alice = recipients[0]
+    _, claims = _post_rounds(distributor, updater, recipients, 1)
+    amount, proof = claims[alice.address]
+    distributor.claim(amount, alice, proof, {"from": alice})
+
+    with brownie.reverts("Nothing to claim"):
+        distributor.claim(amount, alice, proof, {"from": alice})
+
+
+def test_old_root_proof(distributor, updater, recipients):
+    alice = recipients[0]
+    _, old_claims = _post_rounds(distributor, updater, recipients, 1)
+    _post_rounds(distributor, updater, recipients, 2)
+    amount, proof = old_claims[alice.address]
+
+    with brownie.reverts("Invalid proof"):
+        distributor.claim(amount, alice, proof, {"from": alice})
+
+
+def test_receiver(system, distributor, updater, recipients):
+    alice, bob = recipients[:2]
+    _, claims = _post_rounds(distributor, updater, recipients, 1)
+    amount, proof = claims[alice.address]
+    distributor.claim(amount, bob, proof, {"from": alice})
+
+    assert system.eps2.balanceOf(bob) == amount
+    assert distributor.claimed(alice) == amount
+    assert distributor.claimed(bob) == 0
+
+
+def test_other_account_proof(distributor, updater, recipients):
+    alice, bob = recipients[:2]
+    _, claims = _post_rounds(distributor, updater, recipients, 1)
+    amount, proof = claims[alice.address]
+
+    with brownie.reverts("Invalid proof"):
+        distributor.claim(amount, bob, proof, {"from": bob})
+
+
+def test_insufficient_balance(system, updater, recipients):
+    distributor = _deploy(system, updater, 150)
+    _, claims = _post_rounds(distributor, updater, recipients, 1)
+    alice, bob = recipients[:2]
+    amount, proof = claims[alice.address]
+    distributor.claim(amount, alice, proof, {"from": alice})
+
+    amount, proof = claims[bob.address]
+    with brownie.reverts("Insufficient balance"):
+        distributor.claim(amount, bob, proof, {"from": bob})
+
+
+def test_root_not_set(distributor, recipients):
+    with brownie.reverts("Root not set"):
+        distributor.claim(0, recipients[0], [], {"from": recipients[0]})
+
+
+def test_set_root_only_updater(distributor, recipients):
+    with brownie.reverts("Only updater"):
+        distributor.setRoot(b"\x01" * 32, {"from": recipients[0]})
+
+
+def test_set_root_round(distributor, updater):
+    tx = distributor.setRoot(b"\x01" * 32, {"from": updater})
+    assert distributor.round() == 1
+    assert tx.events["RootUpdated"].values() == ["0x" + "01" * 32, 1]
+
+
+def test_set_updater(system, distributor, recipients):
+    distributor.setUpdater(recipients[0], {"from": system.deployer})
+    distributor.setRoot(b"\x01" * 32, {"from": recipients[0]})
+
+    with brownie.reverts("Ownable: caller is not the owner"):
+        distributor.setUpdater(recipients[0], {"from": recipients[0]})
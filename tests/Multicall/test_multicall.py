@@ -0,0 +1,41 @@
+import pytest
+from brownie import chain
+
+
+@pytest.fixture(scope="module")
+def multicall(Multicall, alice):
+    return Multicall.deploy({'from': alice})
+
+
+def test_aggregate(multicall, locker, voter, alice):
+    calls = [
+        (locker, locker.startTime.encode_input()),
+        (voter, voter.getWeek.encode_input()),
+        (locker, locker.weeklyWeightOf.encode_input(alice, 3)),
+    ]
+    results = multicall.tryAggregate(calls)
+
+    assert [i[0] for i in results] == [True, True, True]
+    assert locker.startTime.decode_output(results[0][1]) == locker.startTime()
+    assert voter.getWeek.decode_output(results[1][1]) == voter.getWeek()
+    assert locker.weeklyWeightOf.decode_output(results[2][1]) == 0
+
+
+def test_failed_call_does_not_revert(multicall, voter):
+    # `tokenApprovalVotes` reverts on an out of bounds index
+    calls = [
+        (voter, voter.tokenApprovalVotes.encode_input(0)),
+        (voter, voter.startTime.encode_input()),
+    ]
+    results = multicall.tryAggregate(calls)
+
+    assert results[0][0] is False
+    assert results[1][0] is True
+
+
+def test_get_block(multicall):
+    chain.mine()
+    number, timestamp = multicall.getBlock()
+    # depending on the client, calls execute against the latest or pending block
+    assert chain.height <= number <= chain.height + 1
+    assert timestamp >= chain[-1].timestamp
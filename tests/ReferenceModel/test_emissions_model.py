@@ -0,0 +1,312 @@
+import random
+
+import pytest
+from brownie import ZERO_ADDRESS, accounts, chain
+
+from scripts.local_deploy import (
+    INITIAL_REWARDS_PER_SECOND,
+    MAX_LOCK_WEEKS,
+    MAX_MINTABLE,
+    advance_weeks,
+)
+
+pytest.importorskip("numpy")
+from scripts.emissions_model import EmissionsModel  # noqa: E402
+
+NUM_USERS = 4
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+
+# each of `users` holds EPX and `LP_AMOUNT` of every LP token
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def stakers(users):
+    return users + accounts[4:NUM_USERS + 1]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system):
+    for acct in accounts[4:NUM_USERS + 1]:
+        system.fund_epx(acct, 10 * LOCK_AMOUNT)
+        system.fund_lp(acct, LP_AMOUNT)
+
+
+@pytest.fixture
+def model(system):
+    model = EmissionsModel(
+        NUM_USERS,
+        len(system.lp_tokens),
+        system.start_time,
+        chain[-1].timestamp,
+        INITIAL_REWARDS_PER_SECOND,
+        MAX_MINTABLE,
+        MAX_LOCK_WEEKS,
+    )
+    for i, token in enumerate(system.lp_tokens):
+        model.lp_staking.add_pool(i, system.lp_staker.poolInfo(token)[2])
+    return model
+
+
+def _minted(tx):
+    if "ClaimedReward" not in tx.events:
+        return 0
+    return sum(i["amount"] for i in tx.events["ClaimedReward"])
+
+
+def _user_info(model, user, token):
+    lp_staking = model.lp_staking
+    return (
+        lp_staking.deposit_amount[user, token],
+        lp_staking.adjusted_amount[user, token],
+        lp_staking.reward_debt[user, token],
+        lp_staking.claimable[user, token],
+        lp_staking.boost_slope[user, token],
+        lp_staking.boost_start[user, token],
+        lp_staking.boost_end[user, token],
+    )
+
+
+def _pool_info(model, token):
+    lp_staking = model.lp_staking
+    return (
+        lp_staking.adjusted_supply[token],
+        lp_staking.rewards_per_second[token],
+        lp_staking.last_reward_time[token],
+        lp_staking.acc_reward_per_share[token],
+        lp_staking.acc_week_reward_per_share[token],
+        lp_staking.pool_boost_slope[token],
+    )
+
+
+def test_lock_weights(system, model, stakers):
+    rng = random.Random(0)
+    locker = system.locker
+    for week in range(60):
+        for i, acct in enumerate(stakers):
+            if rng.random() < 0.3:
+                amount = rng.randint(1, 10_000) * 10 ** 18
+                weeks = rng.randint(1, MAX_LOCK_WEEKS)
+                tx = locker.lock(acct, amount, weeks, {"from": acct})
+                model.set_time(tx.timestamp)
+                model.lock([i], amount, weeks)
+
+            active = locker.getActiveUserLocks(acct)
+            if active and active[0][0] < MAX_LOCK_WEEKS and rng.random() < 0.2:
+                weeks, amount = active[0]
+                new_weeks = rng.randint(weeks + 1, MAX_LOCK_WEEKS)
+                tx = locker.extendLock(amount // 2 or amount, weeks, new_weeks, {"from": acct})
+                model.set_time(tx.timestamp)
+                model.extend_lock([i], amount // 2 or amount, weeks, new_weeks)
+
+        for i, acct in enumerate(stakers):
+            assert locker.userWeight(acct) == model.locker.weight[i]
+        assert locker.totalWeight() == model.locker.total_weight
+
+        advance_weeks(1)
+        model.set_time(chain.time())
+
+
+def test_rewards_per_second(system, model, stakers):
+    locker, voter = system.locker, system.voter
+    for i, acct in enumerate(stakers):
+        tx = locker.lock(acct, LOCK_AMOUNT // (i + 1), MAX_LOCK_WEEKS, {"from": acct})
+        model.set_time(tx.timestamp)
+        model.lock([i], LOCK_AMOUNT // (i + 1), MAX_LOCK_WEEKS)
+
+    # spans several 4 week epochs, so `rewardsPerSecond` decays multiple times
+    for week in range(30):
+        for i, acct in enumerate(stakers):
+            token = (i + week) % 2
+            votes = voter.availableVotes(acct) // (i + 1)
+            tx = voter.vote([system.lp_tokens[token]], [votes], {"from": acct})
+            model.set_time(tx.timestamp)
+            model.vote([i], [token], [votes])
+
+        advance_weeks(1)
+        model.set_time(chain.time())
+        current_week = model.get_week()
+        for i, token in enumerate(system.lp_tokens):
+            expected = model.voter.get_rewards_per_second(i, current_week)
+            assert voter.getRewardsPerSecond(token, current_week) == expected
+
+    for i, expected in enumerate(model.voter.rewards_per_second):
+        assert voter.rewardsPerSecond(i) == expected
+
+
+def test_delegated_votes(system, model, stakers):
+    rng = random.Random(2)
+    locker, voter = system.locker, system.voter
+    for i, acct in enumerate(stakers):
+        tx = locker.lock(acct, LOCK_AMOUNT // (i + 1), 10 + i, {"from": acct})
+        model.set_time(tx.timestamp)
+        model.lock([i], LOCK_AMOUNT // (i + 1), 10 + i)
+
+    for week in range(8):
+        # changes take effect from the next week, a user may change more than once per week
+        for i, acct in enumerate(stakers * 2):
+            i %= NUM_USERS
+            if rng.random() < 0.3:
+                current = model.locker.next_delegate[i]
+                delegate = rng.choice([j for j in range(-1, NUM_USERS) if j not in (i, current)])
+                target = stakers[delegate] if delegate >= 0 else ZERO_ADDRESS
+                tx = locker.setDelegate(target, {"from": acct})
+                model.set_time(tx.timestamp)
+                model.set_delegate([i], delegate)
+
+        for i, acct in enumerate(stakers):
+            assert locker.userVoteWeight(acct) == model.locker.vote_weight([i])[0]
+            votes = voter.availableVotes(acct)
+            assert votes == model.voter.available_votes(model.locker, [i])[0]
+            if votes:
+                tx = voter.vote([system.lp_tokens[0]], [votes // 2], {"from": acct})
+                model.set_time(tx.timestamp)
+                model.vote([i], [0], [votes // 2])
+
+        advance_weeks(1)
+        model.set_time(chain.time())
+
+    assert voter.totalVotes(model.get_week() - 1) == model.voter.total_votes[model.get_week() - 1]
+
+
+def test_staking_boosts(system, model, stakers):
+    rng = random.Random(1)
+    locker, voter, lp_staker = system.locker, system.voter, system.lp_staker
+    # unequal lock weights give each user a different boost, the last user has none
+    for i, acct in enumerate(stakers[:-1]):
+        tx = locker.lock(acct, LOCK_AMOUNT // (i + 1), 10 * (i + 1), {"from": acct})
+        model.set_time(tx.timestamp)
+        model.lock([i], LOCK_AMOUNT // (i + 1), 10 * (i + 1))
+
+    for week in range(12):
+        for i, acct in enumerate(stakers[:-1]):
+            votes = voter.availableVotes(acct)
+            tx = voter.vote([system.lp_tokens[i % 2]], [votes], {"from": acct})
+            model.set_time(tx.timestamp)
+            model.vote([i], [i % 2], [votes])
+
+        for i, acct in enumerate(stakers):
+            token_idx = rng.randint(0, 1)
+            token = system.lp_tokens[token_idx]
+            deposited = lp_staker.userInfo(token, acct)[0]
+            action = rng.choice(["deposit", "withdraw", "claim", "boost"])
+            if action == "withdraw" and deposited == 0:
+                action = "deposit"
+
+            claim_rewards = rng.random() < 0.5
+            if action == "deposit":
+                amount = rng.randint(1, 1_000) * 10 ** 18
+                tx = lp_staker.deposit(token, amount, claim_rewards, {"from": acct})
+                model.set_time(tx.timestamp)
+                minted = model.deposit([i], token_idx, amount, claim_rewards)
+            elif action == "withdraw":
+                amount = rng.randint(1, deposited)
+                tx = lp_staker.withdraw(token, amount, claim_rewards, {"from": acct})
+                model.set_time(tx.timestamp)
+                minted = model.withdraw([i], token_idx, amount, claim_rewards)
+            elif action == "claim":
+                tx = lp_staker.claim(acct, [token], {"from": acct})
+                model.set_time(tx.timestamp)
+                minted = model.claim_rewards([i], [token_idx])
+            else:
+                tx = lp_staker.updateUserBoosts(acct, [token], {"from": acct})
+                model.set_time(tx.timestamp)
+                model.update_user_boosts([i], [token_idx])
+                minted = [0]
+
+            assert _minted(tx) == minted[0]
+            assert tuple(lp_staker.userInfo(token, acct)) == _user_info(model, i, token_idx)
+
+        advance_weeks(1)
+        chain.sleep(rng.randint(0, 86400 * 3))
+
+    for i, token in enumerate(system.lp_tokens):
+        assert tuple(lp_staker.poolInfo(token)) == _pool_info(model, i)
+    assert lp_staker.mintedTokens() == model.lp_staking.minted_tokens
+
+    # includes weeks recorded by pool updates and the week not yet recorded
+    model.set_time(chain.time())
+    week = model.get_week()
+    for i, token in enumerate(system.lp_tokens):
+        history = [tuple(x) for x in lp_staker.getPoolHistory(token, 0, week)]
+        assert history == model.pool_history(i, 0, week)
+
+
+def test_lock_refreshes_boosts(system, model, stakers):
+    rng = random.Random(3)
+    locker, voter, lp_staker = system.locker, system.voter, system.lp_staker
+    for i, acct in enumerate(stakers):
+        tx = locker.lock(acct, LOCK_AMOUNT // 4, 4, {"from": acct})
+        model.set_time(tx.timestamp)
+        model.lock([i], LOCK_AMOUNT // 4, 4)
+        votes = voter.availableVotes(acct)
+        tx = voter.vote([system.lp_tokens[i % 2]], [votes], {"from": acct})
+        model.set_time(tx.timestamp)
+        model.vote([i], [i % 2], [votes])
+        for token_idx in range(i % 2 + 1):
+            tx = lp_staker.deposit(system.lp_tokens[token_idx], LP_AMOUNT // 2, False, {"from": acct})
+            model.set_time(tx.timestamp)
+            model.deposit([i], token_idx, LP_AMOUNT // 2)
+
+    # each user's first lock can be extended once, otherwise a new lock is added
+    extended = set()
+    for week in range(3):
+        advance_weeks(1)
+        chain.sleep(rng.randint(0, 86400))
+        remaining = 3 - week
+        for i, acct in enumerate(stakers):
+            if i in extended or rng.random() < 0.5:
+                amount, weeks = rng.randint(1, 1_000) * 10 ** 18, rng.randint(5, 20)
+                tx = locker.lock(acct, amount, weeks, {"from": acct})
+                model.set_time(tx.timestamp)
+                model.lock([i], amount, weeks)
+            else:
+                extended.add(i)
+                tx = locker.extendLock(LOCK_AMOUNT // 4, remaining, 20, {"from": acct})
+                model.set_time(tx.timestamp)
+                model.extend_lock([i], LOCK_AMOUNT // 4, remaining, 20)
+
+            for token_idx, token in enumerate(system.lp_tokens):
+                assert tuple(lp_staker.userInfo(token, acct)) == _user_info(model, i, token_idx)
+
+    for i, token in enumerate(system.lp_tokens):
+        assert lp_staker.poolInfo(token)[0] == model.lp_staking.adjusted_supply[i]
+
+
+def test_fee_split(system, model, stakers):
+    rng = random.Random(2)
+    locker, fee_distro = system.locker, system.fee_distro
+    deployer = system.deployer
+    # LP tokens are freely mintable, which makes them convenient fee tokens
+    fee_tokens = system.lp_tokens
+    for token in fee_tokens:
+        token.approve(fee_distro, 2 ** 256 - 1, {"from": deployer})
+
+    for week in range(10):
+        for i, acct in enumerate(stakers):
+            if week == 0 or rng.random() < 0.2:
+                amount = rng.randint(1, 10_000) * 10 ** 18
+                weeks = rng.randint(1, 8)
+                tx = locker.lock(acct, amount, weeks, {"from": acct})
+                model.set_time(tx.timestamp)
+                model.lock([i], amount, weeks)
+
+        for i, token in enumerate(fee_tokens):
+            if i == 0 or week % 2:
+                amount = rng.randint(1, 10 ** 6) * 10 ** 18 + rng.randint(0, 10 ** 18)
+                token.mint(deployer, amount, {"from": deployer})
+                tx = fee_distro.depositFee(token, amount, {"from": deployer})
+                model.set_time(tx.timestamp)
+                model.deposit_fee(i, amount)
+
+        chain.sleep(rng.randint(3600, 86400 * 3))
+        for i, acct in enumerate(stakers):
+            if rng.random() < 0.5:
+                tx = fee_distro.claim(acct, fee_tokens, {"from": acct})
+                model.set_time(tx.timestamp)
+                expected = [model.claim_fees([i], token)[0] for token in range(len(fee_tokens))]
+                assert [e["amount"] for e in tx.events["FeesClaimed"]] == expected
+
+        advance_weeks(1)
@@ -0,0 +1,96 @@
+import random
+
+import pytest
+from brownie import Multicall, accounts
+
+from scripts.local_deploy import advance_weeks
+from scripts.snapshot import HEADER, RECORD, SnapshotStore, take_snapshot
+
+LOCK_AMOUNT = 1_000_000 * 10 ** 18
+LP_AMOUNT = 100_000 * 10 ** 18
+
+
+# each of `users` holds EPX and `LP_AMOUNT` of every LP token
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def voters(users):
+    return users + accounts[4:6]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system):
+    for acct in accounts[4:6]:
+        system.fund_epx(acct, 10 * LOCK_AMOUNT)
+        system.fund_lp(acct, LP_AMOUNT)
+
+
+@pytest.fixture(scope="module")
+def multicall(system):
+    return Multicall.deploy({"from": system.deployer})
+
+
+def _weekly_activity(system, voters, rng):
+    for acct in voters:
+        if rng.random() < 0.6:
+            system.locker.lock(acct, rng.randint(1, 1_000) * 10 ** 18, rng.randint(1, 4), {"from": acct})
+        votes = system.voter.availableVotes(acct)
+        if votes:
+            system.voter.vote([rng.choice(system.lp_tokens)], [votes], {"from": acct})
+        if rng.random() < 0.5:
+            token = rng.choice(system.lp_tokens)
+            system.lp_staker.deposit(token, rng.randint(1, 100) * 10 ** 18, False, {"from": acct})
+
+
+def _assert_matches_chain(snapshot, system, voters, week):
+    assert snapshot.total_weight() == system.locker.weeklyTotalWeight(week)
+    assert snapshot.total_votes() == system.voter.totalVotes(week)
+    for acct in voters:
+        assert snapshot.weight_of(acct) == system.locker.weeklyWeightOf(acct, week)
+    for token in system.lp_tokens:
+        assert snapshot.token_votes(token) == system.voter.tokenVotes(token, week)
+
+
+def test_rebuild_each_week(system, voters, multicall, tmp_path):
+    rng = random.Random(0)
+    store = SnapshotStore(tmp_path, base_interval=4)
+    pool_info = {}
+    for i in range(6):
+        _weekly_activity(system, voters, rng)
+        advance_weeks(1)
+        week = system.get_week() - 1
+        take_snapshot(store, multicall, system.locker, system.voter, system.lp_staker, voters, week)
+        pool_info[week] = {i.address: tuple(system.lp_staker.poolInfo(i)) for i in system.lp_tokens}
+
+    for week in store.weeks():
+        with store.load(week) as snapshot:
+            _assert_matches_chain(snapshot, system, voters, week)
+            for token, expected in pool_info[week].items():
+                assert snapshot.pool_info(token) == expected
+
+    # the first snapshot and every 4th week afterwards is a base, the rest are diffs
+    kinds = sorted(i.name for i in tmp_path.iterdir())
+    assert kinds[0].endswith(".base")
+    assert kinds[4].endswith(".base")
+    assert sum(i.endswith(".diff") for i in kinds) == 4
+
+
+def test_diff_only_contains_changes(system, voters, multicall, tmp_path):
+    store = SnapshotStore(tmp_path)
+    rng = random.Random(1)
+    for i in range(2):
+        _weekly_activity(system, voters, rng)
+        advance_weeks(1)
+        week = system.get_week() - 1
+        path = take_snapshot(
+            store, multicall, system.locker, system.voter, system.lp_staker, voters, week
+        )
+
+    with store.load(week - 1) as previous, store.load(week) as current:
+        before = {i[:2]: i[2] for i in previous.items()}
+        after = {i[:2]: i[2] for i in current.items()}
+    changed = set(k for k in before.keys() | after.keys() if before.get(k) != after.get(k))
+
+    assert path.suffix == ".diff"
+    assert (path.stat().st_size - HEADER.size) // RECORD.size == len(changed)
@@ -0,0 +1,223 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS, TokenLocker
+from brownie_tokens import ERC20
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+
+# (amount, weeks) locked by alice in the first week
+LOCKS = [(100 * 10 ** 18, 3), (200 * 10 ** 18, 10), (300 * 10 ** 18, 20)]
+LATE_LOCK = (400 * 10 ** 18, 30)
+LATE_LOCK_WEEK = 14
+CLAIM_WEEK = 12
+WEEKS = 24
+FEE_AMOUNT = 10 ** 21
+MAX_WEEKS = 100
+
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def fee_tokens(system):
+    return system.lp_tokens[:2]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, users, fee_tokens):
+    alice, bob, charlie = users
+    locker, fee_distro, deployer = system.locker, system.fee_distro, system.deployer
+    for token in fee_tokens:
+        token.approve(fee_distro, 2 ** 256 - 1, {"from": deployer})
+
+    for amount, weeks in LOCKS:
+        locker.lock(alice, amount, weeks, {"from": alice})
+    locker.lock(bob, 10 ** 21, MAX_LOCK_WEEKS, {"from": bob})
+    locker.lock(charlie, 50 * 10 ** 18, 2, {"from": charlie})
+
+    # fees are received every week, alice claims once and charlie never claims
+    for week in range(1, WEEKS + 1):
+        for token in fee_tokens:
+            token.mint(deployer, FEE_AMOUNT, {"from": deployer})
+            fee_distro.depositFee(token, FEE_AMOUNT, {"from": deployer})
+        advance_weeks(1)
+        if week == CLAIM_WEEK:
+            fee_distro.claim(alice, fee_tokens, {"from": alice})
+        if week == LATE_LOCK_WEEK:
+            locker.lock(alice, *LATE_LOCK, {"from": alice})
+
+
+def _views(system, user):
+    locker = system.locker
+    weeks = range(locker.getWeek() + MAX_LOCK_WEEKS + 1)
+    return {
+        "weights": [locker.weeklyWeightOf(user, i) for i in weeks],
+        "totals": [locker.weeklyTotalWeight(i) for i in weeks],
+        "balance": locker.userBalance(user),
+        "streamable": locker.streamableBalance(user),
+        "locks": locker.getActiveUserLocks(user),
+    }
+
+
+@pytest.fixture(scope="module")
+def history(system, users):
+    return {acct: _views(system, acct) for acct in users}
+
+
+@pytest.fixture(scope="module")
+def claimable(system, users, fee_tokens):
+    return {acct: system.fee_distro.claimable(acct, fee_tokens) for acct in users}
+
+
+def test_compaction_horizon(system, users):
+    alice, bob, charlie = users
+    assert system.fee_distro.claimedUntil(alice) == CLAIM_WEEK - 1
+    assert system.fee_distro.claimedUntil(charlie) == 0
+    assert system.locker.compactionHorizon(alice) == CLAIM_WEEK - 1
+    assert system.locker.compactionHorizon(charlie) == 0
+
+
+def test_horizon_follows_own_claims(system, users, fee_tokens):
+    alice, bob = users[:2]
+    locker, fee_distro = system.locker, system.fee_distro
+    # a claim made by another account does not move the horizon
+    fee_distro.claim(bob, fee_tokens, {"from": alice})
+    assert fee_distro.claimedUntil(bob) == 0
+    assert locker.compactionHorizon(bob) == 0
+
+    fee_distro.claim(bob, fee_tokens[:1], {"from": bob})
+    week = locker.getWeek()
+    assert fee_distro.claimedUntil(bob) == week - 1
+    assert locker.compactionHorizon(bob) == week - 2
+
+
+def test_new_fee_token(system, users):
+    # fees in a token the user has never claimed do not reset the horizon
+    token = ERC20(deployer=system.deployer)
+    token._mint_for_testing(system.deployer, FEE_AMOUNT, {"from": system.deployer})
+    token.approve(system.fee_distro, FEE_AMOUNT, {"from": system.deployer})
+    system.fee_distro.depositFee(token, FEE_AMOUNT, {"from": system.deployer})
+    advance_weeks(1)
+    assert system.locker.compactionHorizon(users[0]) == CLAIM_WEEK - 1
+
+
+def test_horizon_without_fee_distributor(system, users):
+    locker = TokenLocker.deploy(
+        system.eps2, ZERO_ADDRESS, system.start_time, MAX_LOCK_WEEKS, 88, {"from": system.deployer}
+    )
+    assert locker.compactionHorizon(users[0]) == 0
+
+
+def test_fee_distributor_set_once(system):
+    with brownie.reverts():
+        system.locker.setFeeDistributor(ZERO_ADDRESS, {"from": system.deployer})
+
+
+def test_fee_distributor_only_deployer(system, users):
+    with brownie.reverts("Only deployer"):
+        system.locker.setFeeDistributor(users[0], {"from": users[0]})
+
+
+def test_weights(system, users, history):
+    alice = users[0]
+    locker = system.locker
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+
+    horizon = CLAIM_WEEK - 1
+    assert locker.compactedUntil(alice) == horizon
+    assert all(history[alice]["weights"][:horizon])
+    for week, weight in enumerate(history[alice]["weights"]):
+        assert locker.weeklyWeightOf(alice, week) == (0 if week < horizon else weight)
+        assert locker.weeklyTotalWeight(week) == history[alice]["totals"][week]
+
+
+def test_exit_stream(system, users, history):
+    alice = users[0]
+    locker = system.locker
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+
+    streamed = sum(i[0] for i in LOCKS)
+    assert history[alice]["streamable"] == streamed
+    assert locker.exitStream(alice)["amount"] == streamed
+    assert locker.streamableBalance(alice) == 0
+    assert locker.userBalance(alice) == history[alice]["balance"] - streamed == LATE_LOCK[0]
+    assert locker.getActiveUserLocks(alice) == history[alice]["locks"]
+
+
+def test_unlocks_cleared(system, users):
+    alice = users[0]
+    locker = system.locker
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+
+    for week in range(locker.getWeek() + 1):
+        assert locker.weeklyUnlocksOf(alice, week) == 0
+    assert locker.weeklyUnlocksOf(alice, LATE_LOCK_WEEK + LATE_LOCK[1]) == LATE_LOCK[0]
+
+
+def test_matches_uncompacted_exit(system, users):
+    alice = users[0]
+    locker = system.locker
+    locker.initiateExitStream({"from": alice})
+    expected = (locker.exitStream(alice), locker.userBalance(alice), locker.getActiveUserLocks(alice))
+    brownie.chain.undo()
+
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+    actual = (locker.exitStream(alice), locker.userBalance(alice), locker.getActiveUserLocks(alice))
+    assert actual == expected
+
+
+def test_fee_claims(system, users, claimable, fee_tokens):
+    for acct in users:
+        if system.locker.streamableBalance(acct):
+            system.locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": acct})
+
+    for acct in users:
+        assert system.fee_distro.claimable(acct, fee_tokens) == claimable[acct]
+
+
+def test_unclaimed_fees_keep_weights(system, users, history):
+    charlie = users[2]
+    locker = system.locker
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": charlie})
+
+    assert locker.compactedUntil(charlie) == 0
+    for week, weight in enumerate(history[charlie]["weights"]):
+        assert locker.weeklyWeightOf(charlie, week) == weight
+
+
+def test_compact_twice(system, users, fee_tokens):
+    alice = users[0]
+    locker, fee_distro = system.locker, system.fee_distro
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+
+    locker.lock(alice, 10 ** 18, 1, {"from": alice})
+    advance_weeks(1)
+    fee_distro.claim(alice, fee_tokens, {"from": alice})
+    week = locker.getWeek()
+    horizon = week - 2
+    assert locker.compactionHorizon(alice) == horizon
+
+    before = _views(system, alice)
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+    assert locker.compactedUntil(alice) == horizon
+    assert locker.exitStream(alice)["amount"] == sum(i[0] for i in LOCKS) + 10 ** 18
+    for week, weight in enumerate(before["weights"]):
+        assert locker.weeklyWeightOf(alice, week) == (0 if week < horizon else weight)
+
+
+def test_max_weeks(system, users, history):
+    alice = users[0]
+    locker = system.locker
+    locker.initiateExitStreamAndCompact(4, {"from": alice})
+    assert locker.compactedUntil(alice) == 4
+    assert locker.exitStream(alice)["amount"] == sum(i[0] for i in LOCKS)
+
+    # later exits continue from `compactedUntil`
+    locker.lock(alice, 10 ** 18, 1, {"from": alice})
+    advance_weeks(1)
+    locker.initiateExitStreamAndCompact(MAX_WEEKS, {"from": alice})
+    horizon = CLAIM_WEEK - 1
+    assert locker.compactedUntil(alice) == horizon
+    for week, weight in enumerate(history[alice]["weights"][:horizon + 1]):
+        assert locker.weeklyWeightOf(alice, week) == (0 if week < horizon else weight)
@@ -0,0 +1,178 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS, accounts
+
+from scripts.local_deploy import MAX_LOCK_WEEKS, advance_weeks
+
+LOCK_AMOUNT = 1000 * 10 ** 18
+
+# each of `users` holds EPX and every LP token, nothing is locked or deposited
+pytestmark = pytest.mark.scenario("funded")
+
+
+@pytest.fixture(scope="module")
+def delegators(users):
+    # accounts that delegate to `users[0]`, more than `users` alone provides
+    return users[1:] + accounts[4:6]
+
+
+@pytest.fixture(scope="module")
+def integrator():
+    return accounts[6]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(system, delegators, integrator):
+    for acct in delegators[2:]:
+        system.fund_epx(acct, 10 * LOCK_AMOUNT)
+    system.fund_epx(integrator, 100 * LOCK_AMOUNT)
+    advance_weeks(1)
+
+
+def _assert_delegated_weights(locker, delegate, delegators):
+    week = locker.getWeek()
+    for i in range(week + 1, week + MAX_LOCK_WEEKS + 2):
+        expected = sum(locker.weeklyWeightOf(acct, i) for acct in delegators)
+        assert locker.weeklyDelegatedWeight(delegate, i) == expected
+
+
+def test_delegate_next_week(system, users):
+    locker = system.locker
+    alice, bob = users[:2]
+    locker.lock(alice, LOCK_AMOUNT, 10, {"from": alice})
+    locker.lock(bob, LOCK_AMOUNT, 20, {"from": bob})
+    weight = locker.userWeight(alice)
+
+    tx = locker.setDelegate(bob, {"from": alice})
+    week = locker.getWeek()
+    assert tx.events["DelegateChanged"].values() == [alice, ZERO_ADDRESS, bob, week + 1]
+
+    # weight is unchanged for the current week
+    assert locker.delegateOf(alice, week) == ZERO_ADDRESS
+    assert locker.delegateOf(alice, week + 1) == bob
+    assert locker.userVoteWeight(alice) == weight
+    assert locker.userVoteWeight(bob) == locker.userWeight(bob)
+
+    advance_weeks(1)
+    assert locker.userVoteWeight(alice) == 0
+    assert locker.userVoteWeight(bob) == locker.userWeight(bob) + locker.userWeight(alice)
+    _assert_delegated_weights(locker, bob, [alice])
+
+
+def test_aggregate_weight(system, users, delegators, integrator):
+    locker = system.locker
+    delegate = users[0]
+    for i, acct in enumerate(delegators):
+        locker.lock(acct, LOCK_AMOUNT * (i + 1), 5 * (i + 1), {"from": integrator})
+        locker.setDelegate(delegate, {"from": acct})
+    _assert_delegated_weights(locker, delegate, delegators)
+
+    # locks made on behalf of delegators also increase the delegated weight
+    for i, acct in enumerate(delegators):
+        locker.lock(acct, LOCK_AMOUNT, MAX_LOCK_WEEKS - i, {"from": integrator})
+    locker.extendLock(LOCK_AMOUNT, 5, 30, {"from": delegators[0]})
+    _assert_delegated_weights(locker, delegate, delegators)
+
+    for weeks in [1, 4, 20, 30]:
+        advance_weeks(weeks)
+        delegated = sum(locker.userWeight(acct) for acct in delegators)
+        assert locker.weeklyDelegatedWeight(delegate, locker.getWeek()) == delegated
+        assert locker.userVoteWeight(delegate) == locker.userWeight(delegate) + delegated
+
+
+def test_lock_same_week_as_delegation(system, users):
+    # weight added in the current week stays with the current delegate
+    locker = system.locker
+    alice, bob, charlie = users[:3]
+    locker.lock(alice, LOCK_AMOUNT, 10, {"from": alice})
+    locker.setDelegate(bob, {"from": alice})
+    advance_weeks(1)
+    locker.setDelegate(charlie, {"from": alice})
+    locker.lock(alice, LOCK_AMOUNT, 10, {"from": alice})
+
+    week = locker.getWeek()
+    assert locker.weeklyDelegatedWeight(bob, week) == locker.userWeight(alice)
+    assert locker.weeklyDelegatedWeight(charlie, week) == 0
+    _assert_delegated_weights(locker, bob, [])
+    _assert_delegated_weights(locker, charlie, [alice])
+
+
+def test_change_delegate_twice_in_week(system, users):
+    locker = system.locker
+    alice, bob, charlie = users[:3]
+    locker.lock(alice, LOCK_AMOUNT, 10, {"from": alice})
+    locker.setDelegate(bob, {"from": alice})
+    advance_weeks(1)
+    locker.setDelegate(charlie, {"from": alice})
+    locker.setDelegate(ZERO_ADDRESS, {"from": alice})
+
+    week = locker.getWeek()
+    assert locker.delegateOf(alice, week) == bob
+    assert locker.delegateOf(alice, week + 1) == ZERO_ADDRESS
+    assert locker.userVoteWeight(alice) == 0
+    _assert_delegated_weights(locker, bob, [])
+    _assert_delegated_weights(locker, charlie, [])
+
+    advance_weeks(1)
+    assert locker.userVoteWeight(alice) == locker.userWeight(alice)
+    assert locker.userVoteWeight(bob) == locker.userWeight(bob)
+
+
+def test_delegation_is_not_transitive(system, users):
+    locker = system.locker
+    alice, bob, charlie = users[:3]
+    for acct in (alice, bob, charlie):
+        locker.lock(acct, LOCK_AMOUNT, 10, {"from": acct})
+    locker.setDelegate(bob, {"from": alice})
+    locker.setDelegate(charlie, {"from": bob})
+    advance_weeks(1)
+
+    assert locker.userVoteWeight(bob) == locker.userWeight(alice)
+    assert locker.userVoteWeight(charlie) == locker.userWeight(bob) + locker.userWeight(charlie)
+
+
+def test_delegate_votes(system, users, delegators):
+    locker, voter = system.locker, system.voter
+    delegate = users[0]
+    for acct in [delegate] + delegators:
+        locker.lock(acct, LOCK_AMOUNT, 10, {"from": acct})
+    for acct in delegators:
+        locker.setDelegate(delegate, {"from": acct})
+    advance_weeks(1)
+
+    votes = voter.availableVotes(delegate)
+    weights = [locker.userWeight(acct) for acct in [delegate] + delegators]
+    assert votes == sum(weights) // 10 ** 18
+    for acct in delegators:
+        assert voter.availableVotes(acct) == 0
+        with brownie.reverts("Available votes exceeded"):
+            voter.vote(system.lp_tokens[:1], [1], {"from": acct})
+
+    voter.vote(system.lp_tokens[:1], [votes], {"from": delegate})
+    assert voter.totalVotes(voter.getWeek()) == votes
+
+
+def test_cannot_double_vote(system, users):
+    locker, voter = system.locker, system.voter
+    alice, bob = users[:2]
+    locker.lock(alice, LOCK_AMOUNT, 10, {"from": alice})
+    voter.vote(system.lp_tokens[:1], [voter.availableVotes(alice)], {"from": alice})
+    locker.setDelegate(bob, {"from": alice})
+    assert voter.availableVotes(bob) == 0
+
+    advance_weeks(1)
+    assert voter.availableVotes(bob) == locker.userWeight(alice) // 10 ** 18
+
+
+def test_delegate_to_self(system, users):
+    with brownie.reverts("Cannot delegate to self"):
+        system.locker.setDelegate(users[0], {"from": users[0]})
+
+
+def test_delegate_unchanged(system, users):
+    locker = system.locker
+    with brownie.reverts("Delegate unchanged"):
+        locker.setDelegate(ZERO_ADDRESS, {"from": users[0]})
+    locker.setDelegate(users[1], {"from": users[0]})
+    with brownie.reverts("Delegate unchanged"):
+        locker.setDelegate(users[1], {"from": users[0]})
@@ -28,6 +28,31 @@ INITIAL_POOLS = [
 def isolate(fn_isolation):
     pass
 
+
+# overrides the brownie fixture of the same name. rather than resetting to an
+# empty chain, each module begins from the cached snapshot of its scenario.
+# a module selects a scenario with `pytestmark = pytest.mark.scenario(name)`
+@pytest.fixture(scope="module")
+def module_isolation(request, scenarios):
+    scenarios.load(_module_scenario(request.node))
+    yield
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "scenario(name): begin each test in the module from a cached chain state"
+    )
+
+
+def pytest_collection_modifyitems(items):
+    # loading a scenario discards the snapshots of every scenario that is not one
+    # of its ancestors. running modules with the deepest scenarios first means
+    # each scenario only has to be built once.
+    def key(item):
+        return [(0, name) for name in _lineage(_module_scenario(item))] + [(1, "")]
+
+    items.sort(key=key)
+
 # session scope
 
 @pytest.fixture(scope="session")
@@ -75,11 +100,16 @@ def dan():
     return accounts[3]
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def eps(alice):
     return ERC20({'from': alice})
 
 
+@pytest.fixture(scope="session")
+def users():
+    return accounts[1:4]
+
+
 @pytest.fixture(scope="module")
 def initial_pools():
     return INITIAL_POOLS
@@ -99,7 +129,7 @@ def v1_staker_mock():
     return ERC20({'from': alice})
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def lp_tokens(RewardsToken, alice):
     ret = []
     for i in range(10):
@@ -107,7 +137,7 @@ def lp_tokens(RewardsToken, alice):
     return ret
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def pools(Pool, alice):
     ret = []
     for i in range(10):
@@ -125,27 +155,28 @@ def setup_gauges():
 
 # ellipsis contracts
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def eps2(EllipsisToken2, eps, alice):
     token = EllipsisToken2.deploy(TOKEN_TRANSFERS_TIME, MAX_SUPPLY, eps, MIGRATION_RATIO, {'from': alice})
     return token
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def locker(TokenLocker, eps2, alice):
     locker = TokenLocker.deploy(eps2, "0x2a435Ecb3fcC0E316492Dc1cdd62d0F189be5640", START_TIME, MAX_LOCK_WEEKS, MIGRATION_RATIO, {'from': alice})
     return locker
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def voter(IncentiveVoting, locker, alice):
     voter = IncentiveVoting.deploy(locker, INITIAL_REWARDS_PER_SECOND, QUORUM_PCT, TOKEN_APPROVAL_WEIGHT, {'from': alice})
     return voter
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def fee_distro(FeeDistributor, locker, alice):
     fee_distro = FeeDistributor.deploy(locker, {'from': alice})
+    locker.setFeeDistributor(fee_distro, {'from': alice})
     return fee_distro
 
 
@@ -156,9 +187,160 @@ def fee_distro_tester(FeeDistributorTester, alice):
 
 
 # note INITIAL_POOLS is not set up.
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def lp_staker(EllipsisLpStaking, eps2, locker, voter, alice):
     staking = EllipsisLpStaking.deploy(eps2, voter, locker, MAX_MINTABLE, {'from': alice})
     voter.setLpStaking(staking, INITIAL_POOLS, {"from": alice})
     eps2.addMinter(staking, {"from": alice})
+    locker.setLpStaking(staking, {"from": alice})
     return staking
+
+
+# scenarios
+
+def mint_epx_to_acct(eps, eps2, locker, amount, acct):
+    eps._mint_for_testing(acct, amount)
+    eps.approve(eps2, amount, {"from": acct})
+    eps2.migrate(acct, amount, {"from": acct})
+    eps2.approve(locker, amount, {"from": acct})
+    assert eps2.balanceOf(acct) == amount * MIGRATION_RATIO
+
+
+# alice and bob each hold 15m EPX locked for 30 weeks, EPX is transferable
+# and the first two LP tokens have their pools set
+def _build_locked(eps, eps2, locker, lp_tokens, pools, alice, bob, **kwargs):
+    lp_tokens[0].setMinter(pools[0], {'from': alice})
+    lp_tokens[1].setMinter(pools[1], {'from': alice})
+    for acct in [alice, bob]:
+        mint_epx_to_acct(eps, eps2, locker, 15000000 * 10 ** 18, acct)
+
+    chain.mine(timedelta=TOKEN_TRANSFERS_TIME - chain.time())
+    locker.lock(alice, 15000000 * 10 ** 18, 30, {"from": alice})
+    locker.lock(bob, 15000000 * 10 ** 18, 30, {"from": bob})
+
+
+# the first five LP tokens are approved for emissions, one every two weeks
+def _build_approved(voter, lp_tokens, pools, alice, **kwargs):
+    for index in range(5):
+        chain.mine(timedelta=86400 * 14)
+        lp_tokens[index].setMinter(pools[index], {"from": alice})
+        voter.createTokenApprovalVote(lp_tokens[index], {"from": alice})
+        voter.voteForTokenApproval(index, 2**256-1, {"from": alice})
+
+
+# a `scripts/local_deploy.py` deployment with twenty LP tokens, all approved for emissions
+def _build_local(**kwargs):
+    # imported here as contract containers are only available once the project is loaded
+    from scripts.local_deploy import deploy_local
+
+    return {"system": deploy_local(num_lp_tokens=20)}
+
+
+# each of `users` holds 10m EPX and 100k of every LP token, approved for the
+# locker and the LP staker. nothing is locked or deposited.
+def _build_funded(system, **kwargs):
+    for acct in accounts[1:4]:
+        system.fund_epx(acct, 10_000_000 * 10 ** 18)
+        system.fund_lp(acct, 100_000 * 10 ** 18)
+
+
+# name -> (parent scenario, builder)
+SCENARIOS = {
+    "deployed": (None, None),
+    "locked": ("deployed", _build_locked),
+    "approved": ("locked", _build_approved),
+    "local": ("deployed", _build_local),
+    "funded": ("local", _build_funded),
+}
+
+
+def _lineage(name):
+    path = []
+    while name is not None:
+        path.insert(0, name)
+        name = SCENARIOS[name][0]
+    return path
+
+
+def _module_scenario(node):
+    marker = node.get_closest_marker("scenario")
+    return marker.args[0] if marker else "deployed"
+
+
+class ScenarioCache:
+    """
+    Chain snapshots of commonly used test states, each built on demand on top of
+    its parent. The root scenario, "deployed", holds the session deployments.
+
+    A builder may return a dict of objects it deployed, which are added to
+    `contracts` and passed to the builders of its descendants.
+
+    Reverting to a snapshot also discards every snapshot taken after it, so only
+    the lineage of the most recently loaded scenario remains cached.
+
+    The public `chain.snapshot` and `chain.revert` hold a single snapshot, while
+    each scenario in a lineage needs its own. This uses the private
+    `chain._take_snapshot` and `chain._revert` instead, which also restore the
+    local time offset. They are not a stable API, so the README pins eth-brownie
+    to 1.22.2.
+    """
+
+    def __init__(self, contracts):
+        self.contracts = contracts
+        self._cached = [("deployed", chain._take_snapshot())]
+
+    def load(self, name):
+        path = _lineage(name)
+        depth = 1
+        while depth < min(len(path), len(self._cached)) and self._cached[depth][0] == path[depth]:
+            depth += 1
+
+        del self._cached[depth:]
+        parent, snapshot_id = self._cached[-1]
+        self._cached[-1] = (parent, chain._revert(snapshot_id))
+        for child in path[depth:]:
+            self.contracts.update(SCENARIOS[child][1](**self.contracts) or {})
+            self._cached.append((child, chain._take_snapshot()))
+
+
+@pytest.fixture(scope="session")
+def scenarios(eps, eps2, locker, voter, fee_distro, lp_staker, lp_tokens, pools, alice, bob):
+    return ScenarioCache({
+        "eps": eps,
+        "eps2": eps2,
+        "locker": locker,
+        "voter": voter,
+        "fee_distro": fee_distro,
+        "lp_staker": lp_staker,
+        "lp_tokens": lp_tokens,
+        "pools": pools,
+        "alice": alice,
+        "bob": bob,
+    })
+
+
+# the `LocalSystem` of a module that loads the "local" scenario, or one built on it
+@pytest.fixture(scope="module")
+def system(request, scenarios):
+    assert "local" in _lineage(_module_scenario(request.node)), "module does not use deploy_local"
+    return scenarios.contracts["system"]
+
+
+def _expected_adjusted(system, user, token):
+    deposit = system.lp_staker.userInfo(token, user)[0]
+    weight, total = system.locker.userWeight(user), system.locker.totalWeight()
+    supply = token.balanceOf(system.lp_staker)
+    adjusted = deposit * 40 // 100
+    if weight:
+        boost = min(supply * weight // total * 60 // 100, deposit - adjusted)
+        # rounded down to a multiple of the weeks the boost takes to decay
+        next_weight = system.locker.weeklyWeightOf(user, system.locker.getWeek() + 1)
+        weeks = weight // (weight - next_weight)
+        adjusted += boost // weeks * weeks
+    return adjusted
+
+
+# the adjusted balance `EllipsisLpStaking` should set when a user's boost is updated
+@pytest.fixture(scope="session")
+def expected_adjusted():
+    return _expected_adjusted